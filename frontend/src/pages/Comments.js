@@ -5,28 +5,40 @@ import './Comments.css';
 const Comments = () => {
   const [publicComments, setPublicComments] = useState([]);
   const [myComments, setMyComments] = useState([]);
+  const [publicNextCursor, setPublicNextCursor] = useState(null);
+  const [myNextCursor, setMyNextCursor] = useState(null);
   const [currentUser, setCurrentUser] = useState(null);
   const [newCommentMessage, setNewCommentMessage] = useState('');
   const [newCommentIsPublic, setNewCommentIsPublic] = useState(true);
 
-  const fetchComments = () => {
+  // O cursor da próxima página vem no header X-Next-Cursor
+  const fetchPublicComments = (cursor = null) => {
     console.log("Fetching public comments...");
-    apiClient.get('/comments/all_public').then(response => {
+    apiClient.get('/comments/all_public', { params: cursor ? { cursor } : {} }).then(response => {
       console.log("Public comments fetched successfully:", response.data);
-      setPublicComments(response.data);
+      setPublicComments(previous => (cursor ? [...previous, ...response.data] : response.data));
+      setPublicNextCursor(response.headers['x-next-cursor'] || null);
     }).catch(error => {
       console.error("Error fetching public comments:", error.response ? error.response.data : error.message);
     });
+  };
 
+  const fetchMyComments = (cursor = null) => {
     console.log("Fetching my comments...");
-    apiClient.get('/comments/my').then(response => {
+    apiClient.get('/comments/my', { params: cursor ? { cursor } : {} }).then(response => {
       console.log("My comments fetched successfully:", response.data);
-      setMyComments(response.data);
+      setMyComments(previous => (cursor ? [...previous, ...response.data] : response.data));
+      setMyNextCursor(response.headers['x-next-cursor'] || null);
     }).catch(error => {
       console.error("Error fetching my comments:", error.response ? error.response.data : error.message);
     });
   };
 
+  const fetchComments = () => {
+    fetchPublicComments();
+    fetchMyComments();
+  };
+
   const checkUserAuth = () => {
     console.log("Checking user authentication...");
     apiClient.get('/auth/me').then(response => {
@@ -43,6 +55,26 @@ const Comments = () => {
     checkUserAuth();
   }, []);
 
+  // Feed ao vivo: os comentários públicos novos chegam por SSE, sem polling da listagem
+  useEffect(() => {
+    const source = new EventSource(`${apiClient.defaults.baseURL}/comments/stream`);
+    source.addEventListener('comment_created', event => {
+      const comment = JSON.parse(event.data);
+      setPublicComments(previous => (previous.some(c => c.id === comment.id) ? previous : [comment, ...previous]));
+    });
+    source.addEventListener('comment_updated', event => {
+      const comment = JSON.parse(event.data);
+      setPublicComments(previous => previous.map(c => (c.id === comment.id ? comment : c)));
+    });
+    source.addEventListener('comment_deleted', event => {
+      const { id } = JSON.parse(event.data);
+      setPublicComments(previous => previous.filter(c => c.id !== id));
+    });
+    // O servidor não consegue retomar a partir do último evento: recarrega a primeira página
+    source.addEventListener('reset', () => fetchPublicComments());
+    return () => source.close();
+  }, []);
+
   const handlePostComment = async (e) => {
     e.preventDefault();
     console.log("Posting comment:", { message: newCommentMessage, is_public: newCommentIsPublic });
@@ -122,6 +154,11 @@ const Comments = () => {
             </div>
           )}
         </div>
+        {publicNextCursor && (
+          <button className="load-more-button" onClick={() => fetchPublicComments(publicNextCursor)}>
+            Carregar mais
+          </button>
+        )}
       </div>
 
       {/* Seção de Meus Comentários */}
@@ -165,6 +202,11 @@ const Comments = () => {
             </div>
           )}
         </div>
+        {myNextCursor && (
+          <button className="load-more-button" onClick={() => fetchMyComments(myNextCursor)}>
+            Carregar mais
+          </button>
+        )}
       </div>
 
       {/* Formulário de cadastro - Card separado */}
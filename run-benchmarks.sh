@@ -0,0 +1,26 @@
+#!/bin/bash
+
+# Script para executar os benchmarks de endpoints dos serviços Python
+# Argumentos extras são repassados aos dois benchmarks (ex.: --requests 200 --no-save)
+
+echo "=========================================="
+echo "⏱️  Executando os benchmarks de endpoints"
+echo "=========================================="
+
+cd "$(dirname "$0")"
+
+if [ -d ".venv" ]; then
+    PYTHON_CMD="$(pwd)/.venv/bin/python"
+else
+    PYTHON_CMD="python"
+fi
+
+echo ""
+echo "🔍 Serviço de PROJETOS..."
+echo "=========================================="
+(cd services/projects/src && $PYTHON_CMD -m benchmarks.bench_endpoints "$@") || exit 1
+
+echo ""
+echo "🔍 Serviço de COMENTÁRIOS (${BENCH_COMMENTS:-10000} comentários)..."
+echo "=========================================="
+(cd services/comments/src && $PYTHON_CMD -m benchmarks.bench_endpoints --comments "${BENCH_COMMENTS:-10000}" "$@") || exit 1
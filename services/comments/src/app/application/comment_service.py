@@ -1,41 +1,334 @@
+import itertools
 from datetime import datetime, timezone
-from typing import List
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
-from app.domain.comment import Comment, CommentCreate, CommentRepository
-from app.infrastructure.publisher import Publisher
+from app.domain.comment import (DEFAULT_PAGE_SIZE, DEFAULT_STATS_DAYS, AsyncCommentRepository, Comment, CommentCreate, CommentPage,
+                                CommentRepository, CommentSearchPage, CommentStats, CommentUpdate, IdempotencyKey,
+                                RawCommentPage)
+from app.infrastructure.broadcaster import CommentBroadcaster
+from app.infrastructure.timeline import PublicTimeline
+
+
+def _notification(comment: Comment) -> dict:
+    return {
+        "user_name": comment.user_name,
+        "message": comment.message,
+        "is_public": comment.is_public
+    }
+
+
+def _new_comment(data: CommentCreate, user_id: str, user_name: str) -> Comment:
+    return Comment(
+        user_id=user_id,
+        user_name=user_name,
+        message=data.message,
+        is_public=data.is_public,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def _new_comments(items: List[CommentCreate], user_id: str, user_name: str) -> List[Comment]:
+    created_at = datetime.now(timezone.utc)
+    return [
+        Comment(user_id=user_id, user_name=user_name, message=item.message, is_public=item.is_public, created_at=created_at)
+        for item in items
+    ]
+
+
+def _take(stream: Iterator[Comment], count: int) -> List[Comment]:
+    try:
+        return list(itertools.islice(stream, count))
+    finally:
+        # Fecha o cursor no servidor em vez de esperar o streaming acabar
+        stream.close()
+
+
+async def _take_async(stream: AsyncIterator[Comment], count: int) -> List[Comment]:
+    comments = []
+    try:
+        async for comment in stream:
+            comments.append(comment)
+            if len(comments) == count:
+                break
+    finally:
+        await stream.aclose()
+    return comments
+
+
+def _created_public(comments: List[Comment], errors: List[Optional[str]]) -> List[Comment]:
+    return [comment for comment, error in zip(comments, errors) if error is None and comment.is_public]
+
+
+def _visible_stats(stats: CommentStats, viewer_id: Optional[str]) -> CommentStats:
+    # O total do autor inclui os privados: só ele mesmo o vê, os demais recebem apenas os públicos
+    if stats.user is not None and stats.user.user_id != viewer_id:
+        return stats.model_copy(update={"user": stats.user.model_copy(update={"count": None})})
+    return stats
 
 
 class CommentService:
-    def __init__(self, repository: CommentRepository, publisher: Publisher):
+    def __init__(self, repository: CommentRepository, broadcaster: Optional[CommentBroadcaster] = None,
+                 timeline: Optional[PublicTimeline] = None):
         self.repository = repository
-        self.publisher = publisher
+        # Alimenta o SSE /comments/stream; None desliga os eventos
+        self.broadcaster = broadcaster
+        # Serve as páginas mais novas de /comments/all_public da memória; None lê sempre do repositório
+        self.timeline = timeline
+
+    def load_timeline(self):
+        """Carrega a timeline pública do banco se ela ainda não foi carregada ou ficou para trás."""
+        if self.timeline is None or not self.timeline.claim_reload():
+            return
+        try:
+            # A versão é lida antes: uma escrita no meio deixa a timeline à frente dela e só causa outra recarga
+            version = self.repository.get_public_version()
+            # stream_public não passa pelo cache de páginas, que pode estar atrasado em relação à versão
+            comments = _take(self.repository.stream_public(), self.timeline.capacity + 1)
+        except Exception:
+            self.timeline.release_reload()
+            raise
+        self.timeline.load(comments, version)
 
     def create_comment(self, data: CommentCreate, user_id: str, user_name: str) -> Comment:
-        comment = Comment(
-            user_id=user_id,
-            user_name=user_name,
-            message=data.message,
-            is_public=data.is_public,
-            created_at=datetime.now(timezone.utc),
-        )
-        inserted_comment = self.repository.insert(comment)
+        comment = _new_comment(data, user_id, user_name)
+        # A notificação vai para o outbox junto com o comentário; o OutboxDispatcher publica depois
+        created = self.repository.insert(comment, notification=_notification(comment))
+        if created.is_public and self.timeline is not None:
+            self.timeline.add([created])
+        if self.broadcaster is not None:
+            self.broadcaster.publish_created(created)
+        return created
+
+    def create_comment_idempotent(self, data: CommentCreate, user_id: str, user_name: str,
+                                  idempotency_key: str) -> Tuple[Comment, bool]:
+        """Cria o comentário uma única vez por Idempotency-Key; devolve (comentário, se é um replay)."""
+        comment = _new_comment(data, user_id, user_name)
+        key = IdempotencyKey.for_comment(idempotency_key, user_id, data)
+        created, replayed = self.repository.insert_idempotent(comment, _notification(comment), key)
+        if not replayed and created.is_public and self.timeline is not None:
+            self.timeline.add([created])
+        if not replayed and self.broadcaster is not None:
+            self.broadcaster.publish_created(created)
+        return created, replayed
+
+    def create_comments(self, items: List[CommentCreate], user_id: str, user_name: str,
+                        ordered: bool = True) -> List[Tuple[Comment, Optional[str]]]:
+        comments = _new_comments(items, user_id, user_name)
+        errors = self.repository.insert_many(comments, [_notification(comment) for comment in comments], ordered)
+        public = _created_public(comments, errors)
+        # O lote inteiro incrementa a versão pública uma única vez
+        if public and self.timeline is not None:
+            self.timeline.add(public)
+        if self.broadcaster is not None:
+            for comment, error in zip(comments, errors):
+                if error is None:
+                    self.broadcaster.publish_created(comment)
+        return list(zip(comments, errors))
+
+    def get_all_public_comments(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        if self.timeline is not None:
+            self.load_timeline()
+            page = self.timeline.page(limit, cursor)
+            if page is not None:
+                return page
+        return self.repository.list_public(limit=limit, cursor=cursor)
+
+    def get_comments_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return self.repository.list_by_user(user_id, limit=limit, cursor=cursor)
+
+    def get_all_public_comments_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        if self.timeline is not None:
+            self.load_timeline()
+            page = self.timeline.raw_page(limit, cursor)
+            if page is not None:
+                return page
+        return self.repository.list_public_raw(limit=limit, cursor=cursor)
+
+    def get_comments_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return self.repository.list_by_user_raw(user_id, limit=limit, cursor=cursor)
+
+    def stream_public_comments(self, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return self.repository.stream_public(cursor=cursor)
+
+    def stream_comments_by_user(self, user_id: str, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return self.repository.stream_by_user(user_id, cursor=cursor)
 
-        self.publisher.publish_comment({
-            "user_name": user_name,
-            "message": data.message,
-            "is_public": data.is_public
-        })
+    def search_comments(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                        cursor: Optional[str] = None) -> CommentSearchPage:
+        return self.repository.search(text, viewer_id, limit=limit, cursor=cursor)
 
-        return inserted_comment
+    def get_public_comments_version(self) -> int:
+        version = self.repository.get_public_version()
+        if self.timeline is not None:
+            # Uma versão diferente da esperada pela timeline vem de escritas de outra réplica
+            self.timeline.observe(version)
+        return version
 
-    def get_all_public_comments(self) -> List[Comment]:
-        return self.repository.list_public()
+    def get_user_comments_version(self, user_id: str) -> int:
+        return self.repository.get_user_version(user_id)
 
-    def get_comments_by_user(self, user_id: str) -> List[Comment]:
-        return self.repository.list_by_user(user_id)
+    def get_comment_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None,
+                          viewer_id: Optional[str] = None) -> CommentStats:
+        return _visible_stats(self.repository.get_stats(days, user_id), viewer_id)
 
     def get_comment_by_id(self, comment_id: str) -> Comment:
         return self.repository.get_by_id(comment_id)
 
     def delete_comment(self, comment_id: str) -> bool:
-        return self.repository.delete(comment_id)
+        deleted = self.repository.delete(comment_id)
+        if deleted is None:
+            return False
+        if self.timeline is not None:
+            self.timeline.remove(comment_id, deleted.is_public)
+        # Assinantes do feed público não devem saber da existência de comentários privados
+        if deleted.is_public and self.broadcaster is not None:
+            self.broadcaster.publish_deleted(comment_id)
+        return True
+
+    def delete_user_comment(self, comment_id: str, user_id: str) -> Comment:
+        deleted = self.repository.delete_owned(comment_id, user_id)
+        if self.timeline is not None:
+            self.timeline.remove(comment_id, deleted.is_public)
+        if deleted.is_public and self.broadcaster is not None:
+            self.broadcaster.publish_deleted(comment_id)
+        return deleted
+
+    def update_comment(self, comment_id: str, user_id: str, data: CommentUpdate) -> Comment:
+        changes = data.changes()
+        updated = self.repository.update_owned(comment_id, user_id, changes, data.version)
+        if self.timeline is not None:
+            self.timeline.update(updated)
+        if self.broadcaster is not None:
+            self.broadcaster.publish_updated(updated, changes)
+        return updated
+
+
+class AsyncCommentService:
+    def __init__(self, repository: AsyncCommentRepository, broadcaster: Optional[CommentBroadcaster] = None,
+                 timeline: Optional[PublicTimeline] = None):
+        self.repository = repository
+        # Alimenta o SSE /comments/stream; None desliga os eventos
+        self.broadcaster = broadcaster
+        # Serve as páginas mais novas de /comments/all_public da memória; None lê sempre do repositório
+        self.timeline = timeline
+
+    async def load_timeline(self):
+        if self.timeline is None or not self.timeline.claim_reload():
+            return
+        try:
+            version = await self.repository.get_public_version()
+            comments = await _take_async(self.repository.stream_public(), self.timeline.capacity + 1)
+        except Exception:
+            self.timeline.release_reload()
+            raise
+        self.timeline.load(comments, version)
+
+    async def create_comment(self, data: CommentCreate, user_id: str, user_name: str) -> Comment:
+        comment = _new_comment(data, user_id, user_name)
+        created = await self.repository.insert(comment, notification=_notification(comment))
+        if created.is_public and self.timeline is not None:
+            self.timeline.add([created])
+        if self.broadcaster is not None:
+            self.broadcaster.publish_created(created)
+        return created
+
+    async def create_comment_idempotent(self, data: CommentCreate, user_id: str, user_name: str,
+                                        idempotency_key: str) -> Tuple[Comment, bool]:
+        comment = _new_comment(data, user_id, user_name)
+        key = IdempotencyKey.for_comment(idempotency_key, user_id, data)
+        created, replayed = await self.repository.insert_idempotent(comment, _notification(comment), key)
+        if not replayed and created.is_public and self.timeline is not None:
+            self.timeline.add([created])
+        if not replayed and self.broadcaster is not None:
+            self.broadcaster.publish_created(created)
+        return created, replayed
+
+    async def create_comments(self, items: List[CommentCreate], user_id: str, user_name: str,
+                              ordered: bool = True) -> List[Tuple[Comment, Optional[str]]]:
+        comments = _new_comments(items, user_id, user_name)
+        errors = await self.repository.insert_many(comments, [_notification(comment) for comment in comments], ordered)
+        public = _created_public(comments, errors)
+        # O lote inteiro incrementa a versão pública uma única vez
+        if public and self.timeline is not None:
+            self.timeline.add(public)
+        if self.broadcaster is not None:
+            for comment, error in zip(comments, errors):
+                if error is None:
+                    self.broadcaster.publish_created(comment)
+        return list(zip(comments, errors))
+
+    async def get_all_public_comments(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        if self.timeline is not None:
+            await self.load_timeline()
+            page = self.timeline.page(limit, cursor)
+            if page is not None:
+                return page
+        return await self.repository.list_public(limit=limit, cursor=cursor)
+
+    async def get_comments_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return await self.repository.list_by_user(user_id, limit=limit, cursor=cursor)
+
+    async def get_all_public_comments_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        if self.timeline is not None:
+            await self.load_timeline()
+            page = self.timeline.raw_page(limit, cursor)
+            if page is not None:
+                return page
+        return await self.repository.list_public_raw(limit=limit, cursor=cursor)
+
+    async def get_comments_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return await self.repository.list_by_user_raw(user_id, limit=limit, cursor=cursor)
+
+    def stream_public_comments(self, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self.repository.stream_public(cursor=cursor)
+
+    def stream_comments_by_user(self, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self.repository.stream_by_user(user_id, cursor=cursor)
+
+    async def search_comments(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                              cursor: Optional[str] = None) -> CommentSearchPage:
+        return await self.repository.search(text, viewer_id, limit=limit, cursor=cursor)
+
+    async def get_public_comments_version(self) -> int:
+        version = await self.repository.get_public_version()
+        if self.timeline is not None:
+            # Uma versão diferente da esperada pela timeline vem de escritas de outra réplica
+            self.timeline.observe(version)
+        return version
+
+    async def get_user_comments_version(self, user_id: str) -> int:
+        return await self.repository.get_user_version(user_id)
+
+    async def get_comment_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None,
+                                viewer_id: Optional[str] = None) -> CommentStats:
+        return _visible_stats(await self.repository.get_stats(days, user_id), viewer_id)
+
+    async def get_comment_by_id(self, comment_id: str) -> Comment:
+        return await self.repository.get_by_id(comment_id)
+
+    async def delete_comment(self, comment_id: str) -> bool:
+        deleted = await self.repository.delete(comment_id)
+        if deleted is None:
+            return False
+        if self.timeline is not None:
+            self.timeline.remove(comment_id, deleted.is_public)
+        if deleted.is_public and self.broadcaster is not None:
+            self.broadcaster.publish_deleted(comment_id)
+        return True
+
+    async def delete_user_comment(self, comment_id: str, user_id: str) -> Comment:
+        deleted = await self.repository.delete_owned(comment_id, user_id)
+        if self.timeline is not None:
+            self.timeline.remove(comment_id, deleted.is_public)
+        if deleted.is_public and self.broadcaster is not None:
+            self.broadcaster.publish_deleted(comment_id)
+        return deleted
+
+    async def update_comment(self, comment_id: str, user_id: str, data: CommentUpdate) -> Comment:
+        changes = data.changes()
+        updated = await self.repository.update_owned(comment_id, user_id, changes, data.version)
+        if self.timeline is not None:
+            self.timeline.update(updated)
+        if self.broadcaster is not None:
+            self.broadcaster.publish_updated(updated, changes)
+        return updated
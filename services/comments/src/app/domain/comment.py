@@ -1,8 +1,10 @@
+import hashlib
 from abc import ABC, abstractmethod
-from datetime import datetime, timezone
-from typing import Optional
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Iterator, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class CommentCreate(BaseModel):
@@ -16,21 +18,238 @@ class Comment(CommentCreate):
     user_name: str
     is_public: bool = True
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    version: int = 0
+
+
+class CommentUpdate(BaseModel):
+    message: Optional[str] = None
+    is_public: Optional[bool] = None
+    # Versão que o cliente leu; a edição só é aplicada se ainda for a atual
+    version: int
+
+    @model_validator(mode="after")
+    def check_has_changes(self):
+        if self.message is None and self.is_public is None:
+            raise ValueError("message or is_public must be provided")
+        return self
+
+    def changes(self) -> dict:
+        return self.model_dump(exclude={"version"}, exclude_none=True)
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+DEFAULT_STATS_DAYS = 30
+MAX_STATS_DAYS = 366
+
+MAX_SEARCH_QUERY_LENGTH = 200
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class CommentNotFoundError(LookupError):
+    pass
+
+
+class CommentPermissionError(PermissionError):
+    pass
+
+
+class IdempotencyKeyMismatchError(ValueError):
+    """A Idempotency-Key já foi usada com outro corpo de requisição."""
+
+
+class IdempotencyKeyInProgressError(RuntimeError):
+    """Outra requisição com a mesma Idempotency-Key ainda não terminou."""
+
+
+class CommentVersionConflictError(ValueError):
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Version conflict: current version is {current_version}")
+        self.current_version = current_version
+
+
+@dataclass(frozen=True)
+class IdempotencyKey:
+    # Escopo do autor + chave enviada pelo cliente
+    id: str
+    request_hash: str
+
+    @classmethod
+    def for_comment(cls, key: str, user_id: str, data: CommentCreate) -> "IdempotencyKey":
+        request_hash = hashlib.sha256(data.model_dump_json().encode()).hexdigest()
+        return cls(id=f"{user_id}:{key}", request_hash=request_hash)
+
+
+class CommentPage(BaseModel):
+    items: List[Comment]
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class RawCommentPage:
+    """Página com os comentários já no formato da resposta JSON.
+
+    Os itens vêm de documentos gravados pelo próprio serviço e não passam pela
+    validação do pydantic (ver app.routes.fast_json).
+    """
+    items: List[dict]
+    next_cursor: Optional[str] = None
+
+
+class CommentSearchHit(Comment):
+    # Relevância calculada pelo índice de texto; maior é melhor
+    score: float
+    snippet: str
+
+
+class CommentSearchPage(BaseModel):
+    items: List[CommentSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class DeletedComment(BaseModel):
+    """O que a remoção devolve do comentário: autor, visibilidade e data, sem o conteúdo."""
+    id: str
+    user_id: str
+    is_public: bool
+    created_at: datetime
+
+
+class DailyCommentCount(BaseModel):
+    date: date
+    count: int
+    public: int
+
+
+class UserCommentCount(BaseModel):
+    user_id: str
+    # None quando quem pede não é o próprio autor
+    count: Optional[int] = None
+    public: int
+
+
+class CommentStats(BaseModel):
+    total: int
+    public: int
+    # Do dia atual (UTC) para trás
+    days: List[DailyCommentCount]
+    user: Optional[UserCommentCount] = None
 
 
 class CommentRepository(ABC):
 
     @abstractmethod
-    def insert(self, comment: Comment) -> Comment: ...
+    def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment: ...
 
     @abstractmethod
-    def list_public(self, limit: int = 100, offset: int = 0) -> list[Comment]: ...
+    def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                          key: IdempotencyKey) -> tuple[Comment, bool]: ...
 
     @abstractmethod
-    def list_by_user(self, user_id: str, limit: int = 100, offset: int = 0) -> list[Comment]: ...
+    def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                    ordered: bool = True) -> List[Optional[str]]: ...
+
+    @abstractmethod
+    def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage: ...
+
+    @abstractmethod
+    def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage: ...
+
+    @abstractmethod
+    def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage: ...
+
+    @abstractmethod
+    def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage: ...
+
+    @abstractmethod
+    def stream_public(self, cursor: Optional[str] = None) -> Iterator[Comment]: ...
+
+    @abstractmethod
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> Iterator[Comment]: ...
+
+    @abstractmethod
+    def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+               cursor: Optional[str] = None) -> CommentSearchPage: ...
+
+    @abstractmethod
+    def get_public_version(self) -> int: ...
+
+    @abstractmethod
+    def get_user_version(self, user_id: str) -> int: ...
+
+    @abstractmethod
+    def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats: ...
 
     @abstractmethod
     def get_by_id(self, comment_id: str) -> Comment: ...
 
     @abstractmethod
-    def delete(self, comment_id: str) -> bool: ...
+    def delete(self, comment_id: str) -> Optional[DeletedComment]: ...
+
+    @abstractmethod
+    def delete_owned(self, comment_id: str, user_id: str) -> Comment: ...
+
+    @abstractmethod
+    def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment: ...
+
+
+class AsyncCommentRepository(ABC):
+
+    @abstractmethod
+    async def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment: ...
+
+    @abstractmethod
+    async def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                                key: IdempotencyKey) -> tuple[Comment, bool]: ...
+
+    @abstractmethod
+    async def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                          ordered: bool = True) -> List[Optional[str]]: ...
+
+    @abstractmethod
+    async def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage: ...
+
+    @abstractmethod
+    async def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage: ...
+
+    @abstractmethod
+    async def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage: ...
+
+    @abstractmethod
+    async def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage: ...
+
+    @abstractmethod
+    def stream_public(self, cursor: Optional[str] = None) -> AsyncIterator[Comment]: ...
+
+    @abstractmethod
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[Comment]: ...
+
+    @abstractmethod
+    async def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                     cursor: Optional[str] = None) -> CommentSearchPage: ...
+
+    @abstractmethod
+    async def get_public_version(self) -> int: ...
+
+    @abstractmethod
+    async def get_user_version(self, user_id: str) -> int: ...
+
+    @abstractmethod
+    async def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats: ...
+
+    @abstractmethod
+    async def get_by_id(self, comment_id: str) -> Comment: ...
+
+    @abstractmethod
+    async def delete(self, comment_id: str) -> Optional[DeletedComment]: ...
+
+    @abstractmethod
+    async def delete_owned(self, comment_id: str, user_id: str) -> Comment: ...
+
+    @abstractmethod
+    async def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment: ...
@@ -0,0 +1,114 @@
+"""Camada fria dos comentários antigos.
+
+Comentários com mais de ARCHIVE_AFTER_DAYS dias saem da coleção comments
+para comments_archive, mantendo a coleção quente (e os seus índices) do
+tamanho do que é lido com frequência. As listagens continuam no arquivo
+quando a coleção quente acaba (ver os repositórios).
+
+O job move do mais antigo para o mais novo, então todo comentário arquivado
+é mais antigo que qualquer comentário da coleção quente; é isso que permite
+continuar a mesma paginação por keyset no arquivo. Cada lote é copiado e só
+depois removido, então o job pode ser interrompido e rodado de novo:
+
+    python -m app.infrastructure.archive [--dry-run] [--older-than-days N] [--batch-size N]
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.infrastructure.mongo import get_mongo_database, transactions_enabled
+from app.infrastructure.vault import load_secrets
+from pymongo import ASCENDING, DeleteOne, ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLLECTION = "comments_archive"
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+DEFAULT_BATCH_SIZE = 1000
+
+# Do mais antigo para o mais novo, o inverso de KEYSET_SORT
+ARCHIVE_SORT = [("created_at", ASCENDING), ("_id", ASCENDING)]
+
+
+def archive_enabled() -> bool:
+    """Se as leituras continuam no arquivo quando a coleção quente acaba."""
+    return os.getenv("COMMENTS_ARCHIVE_ENABLED", "true").lower() == "true"
+
+
+def archive_cutoff(older_than_days: int, now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+
+
+def _copy_operations(docs: list[dict]) -> list[ReplaceOne]:
+    # Substitui em vez de inserir: um lote interrompido e rodado de novo grava a versão atual do comentário
+    return [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs]
+
+
+def _delete_operations(docs: list[dict]) -> list[DeleteOne]:
+    # Só remove o comentário se ele não foi editado depois de copiado; senão o próximo lote copia de novo
+    operations = []
+    for doc in docs:
+        version = doc["version"] if "version" in doc else {"$exists": False}
+        operations.append(DeleteOne({"_id": doc["_id"], "version": version}))
+    return operations
+
+
+def _move_batch(comments, archive, cutoff: datetime, batch_size: int, session=None) -> int:
+    docs = list(comments.find({"created_at": {"$lt": cutoff}}, session=session).sort(ARCHIVE_SORT).limit(batch_size))
+    if not docs:
+        return 0
+    archive.bulk_write(_copy_operations(docs), ordered=False, session=session)
+    return comments.bulk_write(_delete_operations(docs), ordered=False, session=session).deleted_count
+
+
+def archive_batch(comments, archive, cutoff: datetime, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Move o lote mais antigo anterior a cutoff e devolve quantos comentários saíram da coleção quente.
+
+    Sem MONGO_TRANSACTIONS_ENABLED, um comentário removido pelo autor entre a
+    cópia e a remoção do lote continua no arquivo.
+    """
+    if transactions_enabled():
+        with comments.database.client.start_session() as session:
+            return session.with_transaction(lambda s: _move_batch(comments, archive, cutoff, batch_size, s))
+    return _move_batch(comments, archive, cutoff, batch_size)
+
+
+def archive_comments(database, older_than_days: int = DEFAULT_ARCHIVE_AFTER_DAYS, batch_size: int = DEFAULT_BATCH_SIZE,
+                     dry_run: bool = False) -> int:
+    comments = database["comments"]
+    cutoff = archive_cutoff(older_than_days)
+    if dry_run:
+        total = comments.count_documents({"created_at": {"$lt": cutoff}})
+        logger.info(f"[MONGO][dry-run] {total} comentários anteriores a {cutoff.isoformat()} seriam arquivados")
+        return total
+
+    archive = database[ARCHIVE_COLLECTION]
+    total = 0
+    while True:
+        moved = archive_batch(comments, archive, cutoff, batch_size)
+        if moved == 0:
+            break
+        total += moved
+        logger.info(f"[MONGO] {ARCHIVE_COLLECTION}: {total} comentários arquivados")
+    logger.info(f"[MONGO] Arquivamento concluído: {total} comentários anteriores a {cutoff.isoformat()}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move os comentários antigos para a coleção comments_archive.")
+    parser.add_argument("--dry-run", action="store_true", help="apenas conta quantos comentários seriam arquivados")
+    parser.add_argument("--older-than-days", type=int, default=int(os.getenv("ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)),
+                        help="idade mínima, em dias, dos comentários arquivados")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="comentários movidos por lote")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_secrets()
+    archive_comments(get_mongo_database(), older_than_days=args.older_than_days, batch_size=args.batch_size, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.domain.comment import Comment
+
+COMMENT_CREATED = "comment_created"
+COMMENT_UPDATED = "comment_updated"
+COMMENT_DELETED = "comment_deleted"
+# Enviado quando o Last-Event-ID saiu do histórico: o cliente deve recarregar a listagem
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class CommentEvent:
+    id: int
+    type: str
+    data: str
+
+
+class Subscription:
+    """Fila limitada de um assinante, consumida no event loop que o criou.
+
+    Os eventos chegam por call_soon_threadsafe, então o publish pode vir de
+    qualquer thread (rotas síncronas rodam no threadpool).
+    """
+
+    def __init__(self, broadcaster: "CommentBroadcaster", loop: asyncio.AbstractEventLoop, max_queue: int,
+                 replay: List[CommentEvent], reset: bool):
+        self.replay = replay
+        self.reset = reset
+        self.dropped = False
+        self._broadcaster = broadcaster
+        self._loop = loop
+        self._queue: asyncio.Queue[Optional[CommentEvent]] = asyncio.Queue(max_queue)
+        self._closed = False
+
+    def offer(self, event: Optional[CommentEvent]):
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+        except RuntimeError:
+            # Event loop já encerrado
+            self._broadcaster.unsubscribe(self)
+
+    def _deliver(self, event: Optional[CommentEvent]):
+        if self._closed:
+            return
+        if event is None:
+            self._end()
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Consumidor lento: descarta a fila e encerra o stream; o cliente
+            # reconecta com Last-Event-ID e retoma pelo histórico
+            self.dropped = True
+            self._broadcaster.unsubscribe(self, dropped=True)
+            self._end()
+
+    def _end(self):
+        self._closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def next(self) -> Optional[CommentEvent]:
+        """Próximo evento, ou None quando a assinatura foi encerrada."""
+        return await self._queue.get()
+
+    def close(self):
+        self._closed = True
+        self._broadcaster.unsubscribe(self)
+
+
+class CommentBroadcaster:
+    """Difusão em processo dos eventos do feed público para o SSE.
+
+    Mantém os últimos eventos em um buffer circular para que um cliente que
+    reconecta com Last-Event-ID receba o que perdeu. Cada processo tem o seu
+    próprio feed e a sua própria sequência de ids.
+    """
+
+    def __init__(self, max_queue: int = 100, history_size: int = 1000):
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._history: deque[CommentEvent] = deque(maxlen=history_size)
+        self._subscribers: set[Subscription] = set()
+        self._sequence = 0
+        self._closed = False
+        # Reentrante: offer pode cancelar a assinatura enquanto o publish segura o lock
+        self._lock = threading.RLock()
+
+    def publish(self, event_type: str, data: str) -> Optional[CommentEvent]:
+        with self._lock:
+            if self._closed:
+                return None
+            self._sequence += 1
+            event = CommentEvent(self._sequence, event_type, data)
+            self._history.append(event)
+            # Entregue sob o lock para que todos os assinantes vejam a mesma ordem
+            for subscription in list(self._subscribers):
+                subscription.offer(event)
+        return event
+
+    def publish_created(self, comment: Comment):
+        if comment.is_public:
+            self.publish(COMMENT_CREATED, comment.model_dump_json())
+
+    def publish_updated(self, comment: Comment, changes: dict):
+        if comment.is_public:
+            self.publish(COMMENT_UPDATED, comment.model_dump_json())
+        elif "is_public" in changes:
+            # Um comentário que ficou privado sai do feed público
+            self.publish_deleted(comment.id)
+
+    def publish_deleted(self, comment_id: str):
+        self.publish(COMMENT_DELETED, json.dumps({"id": comment_id}))
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """Registra um assinante no event loop atual.
+
+        O histórico posterior a last_event_id é capturado sob o mesmo lock do
+        registro, então nenhum evento é perdido ou duplicado entre os dois.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            replay, reset = self._replay_after(last_event_id)
+            subscription = Subscription(self, loop, self.max_queue, replay, reset)
+            if self._closed:
+                subscription.offer(None)
+            else:
+                self._subscribers.add(subscription)
+        return subscription
+
+    def _replay_after(self, last_event_id: Optional[int]) -> tuple[List[CommentEvent], bool]:
+        if last_event_id is None:
+            return [], False
+        oldest = self._history[0].id if self._history else self._sequence + 1
+        # Id maior que a sequência atual indica que o processo reiniciou
+        if last_event_id > self._sequence or last_event_id < oldest - 1:
+            return [], True
+        return [event for event in self._history if event.id > last_event_id], False
+
+    def unsubscribe(self, subscription: Subscription, dropped: bool = False):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.discard(subscription)
+                if dropped:
+                    self.dropped += 1
+
+    def close(self):
+        """Encerra todos os streams abertos (usado no shutdown)."""
+        with self._lock:
+            self._closed = True
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscription in subscribers:
+            subscription.offer(None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "last_event_id": self._sequence,
+                "history": len(self._history),
+                "dropped": self.dropped,
+            }
+
+
+_broadcaster: CommentBroadcaster | None = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_comment_broadcaster() -> CommentBroadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                _broadcaster = CommentBroadcaster(
+                    max_queue=int(os.getenv("SSE_QUEUE_SIZE", 100)),
+                    history_size=int(os.getenv("SSE_HISTORY_SIZE", 1000))
+                )
+    return _broadcaster
+
+
+def close_comment_broadcaster():
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is not None:
+            _broadcaster.close()
+        _broadcaster = None
@@ -0,0 +1,326 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Hashable, Iterator, List, Optional
+
+from app.domain.comment import (DEFAULT_PAGE_SIZE, DEFAULT_STATS_DAYS, AsyncCommentRepository, Comment, CommentPage,
+                                CommentRepository, CommentSearchPage, CommentStats, DeletedComment, IdempotencyKey,
+                                RawCommentPage)
+
+
+class TTLCache:
+    """Cache LRU limitado em tamanho, com expiração por entrada e contadores de uso."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value, generation: Optional[int] = None):
+        with self._lock:
+            # Uma invalidação ocorreu durante a leitura no banco: o valor pode estar desatualizado
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def evict_where(self, predicate: Callable[[Hashable, object], bool]) -> int:
+        with self._lock:
+            self.generation += 1
+            keys = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            self.evictions += len(keys)
+            return len(keys)
+
+    def clear(self):
+        self.evict_where(lambda key, value: True)
+
+    def observe_version(self, version: int):
+        """Descarta tudo quando a versão lida no banco difere da última vista.
+
+        Cobre as escritas feitas por outras réplicas, que não passam pela
+        invalidação local, e o intervalo entre o incremento da versão e a
+        invalidação feita por este processo: a página servida nunca é mais
+        antiga que a versão usada no ETag.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+        self.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _public_page_key(limit: int, cursor: Optional[str], kind: str = "list_public") -> tuple:
+    return (kind, limit, cursor or None)
+
+
+def _is_first_page(key: tuple, page: CommentPage) -> bool:
+    return key[2] is None
+
+
+def _item_id(item) -> Optional[str]:
+    # Páginas do caminho rápido guardam dicts em vez de Comment
+    return item["id"] if isinstance(item, dict) else item.id
+
+
+def _page_contains(comment_id: str) -> Callable[[tuple, CommentPage], bool]:
+    return lambda key, page: any(_item_id(item) == comment_id for item in page.items)
+
+
+def _evict_updated(cache: "TTLCache", comment: Comment):
+    # Se nenhuma página em cache tinha o comentário e ele agora é público, não
+    # há como saber em qual página ele passa a aparecer
+    if cache.evict_where(_page_contains(comment.id)) == 0 and comment.is_public:
+        cache.clear()
+
+
+class CachedCommentRepository(CommentRepository):
+    """Repositório read-through que serve list_public da memória.
+
+    Como a paginação é por keyset, um comentário público novo só altera as
+    primeiras páginas e um comentário removido só altera a página que o
+    contém; apenas essas entradas são invalidadas.
+    """
+
+    def __init__(self, repository: CommentRepository, cache: TTLCache):
+        self.repository = repository
+        self.cache = cache
+
+    def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        inserted = self.repository.insert(comment, notification)
+        if inserted.is_public:
+            self.cache.evict_where(_is_first_page)
+        return inserted
+
+    def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                          key: IdempotencyKey) -> tuple[Comment, bool]:
+        inserted, replayed = self.repository.insert_idempotent(comment, notification, key)
+        if inserted.is_public and not replayed:
+            self.cache.evict_where(_is_first_page)
+        return inserted, replayed
+
+    def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                    ordered: bool = True) -> List[Optional[str]]:
+        errors = self.repository.insert_many(comments, notifications, ordered)
+        if any(error is None and comment.is_public for comment, error in zip(comments, errors)):
+            self.cache.evict_where(_is_first_page)
+        return errors
+
+    def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        key = _public_page_key(limit, cursor)
+        page = self.cache.get(key)
+        if page is None:
+            generation = self.cache.generation
+            page = self.repository.list_public(limit=limit, cursor=cursor)
+            self.cache.set(key, page, generation)
+        return page
+
+    def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return self.repository.list_by_user(user_id, limit=limit, cursor=cursor)
+
+    def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        key = _public_page_key(limit, cursor, "list_public_raw")
+        page = self.cache.get(key)
+        if page is None:
+            generation = self.cache.generation
+            page = self.repository.list_public_raw(limit=limit, cursor=cursor)
+            self.cache.set(key, page, generation)
+        return page
+
+    def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return self.repository.list_by_user_raw(user_id, limit=limit, cursor=cursor)
+
+    def stream_public(self, cursor: Optional[str] = None) -> Iterator[Comment]:
+        # O streaming percorre o resultado inteiro; guardá-lo em cache anularia o limite de memória
+        return self.repository.stream_public(cursor=cursor)
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return self.repository.stream_by_user(user_id, cursor=cursor)
+
+    def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+               cursor: Optional[str] = None) -> CommentSearchPage:
+        # Termos de busca variam demais para valer a pena guardar em cache
+        return self.repository.search(text, viewer_id, limit=limit, cursor=cursor)
+
+    def get_public_version(self) -> int:
+        version = self.repository.get_public_version()
+        self.cache.observe_version(version)
+        return version
+
+    def get_user_version(self, user_id: str) -> int:
+        return self.repository.get_user_version(user_id)
+
+    def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        return self.repository.get_stats(days, user_id)
+
+    def get_by_id(self, comment_id: str) -> Comment:
+        return self.repository.get_by_id(comment_id)
+
+    def delete(self, comment_id: str) -> Optional[DeletedComment]:
+        deleted = self.repository.delete(comment_id)
+        if deleted:
+            self.cache.evict_where(_page_contains(comment_id))
+        return deleted
+
+    def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        deleted = self.repository.delete_owned(comment_id, user_id)
+        self.cache.evict_where(_page_contains(comment_id))
+        return deleted
+
+    def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        updated = self.repository.update_owned(comment_id, user_id, changes, expected_version)
+        _evict_updated(self.cache, updated)
+        return updated
+
+
+class CachedAsyncCommentRepository(AsyncCommentRepository):
+
+    def __init__(self, repository: AsyncCommentRepository, cache: TTLCache):
+        self.repository = repository
+        self.cache = cache
+
+    async def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        inserted = await self.repository.insert(comment, notification)
+        if inserted.is_public:
+            self.cache.evict_where(_is_first_page)
+        return inserted
+
+    async def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                                key: IdempotencyKey) -> tuple[Comment, bool]:
+        inserted, replayed = await self.repository.insert_idempotent(comment, notification, key)
+        if inserted.is_public and not replayed:
+            self.cache.evict_where(_is_first_page)
+        return inserted, replayed
+
+    async def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                          ordered: bool = True) -> List[Optional[str]]:
+        errors = await self.repository.insert_many(comments, notifications, ordered)
+        if any(error is None and comment.is_public for comment, error in zip(comments, errors)):
+            self.cache.evict_where(_is_first_page)
+        return errors
+
+    async def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        key = _public_page_key(limit, cursor)
+        page = self.cache.get(key)
+        if page is None:
+            generation = self.cache.generation
+            page = await self.repository.list_public(limit=limit, cursor=cursor)
+            self.cache.set(key, page, generation)
+        return page
+
+    async def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return await self.repository.list_by_user(user_id, limit=limit, cursor=cursor)
+
+    async def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        key = _public_page_key(limit, cursor, "list_public_raw")
+        page = self.cache.get(key)
+        if page is None:
+            generation = self.cache.generation
+            page = await self.repository.list_public_raw(limit=limit, cursor=cursor)
+            self.cache.set(key, page, generation)
+        return page
+
+    async def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return await self.repository.list_by_user_raw(user_id, limit=limit, cursor=cursor)
+
+    def stream_public(self, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self.repository.stream_public(cursor=cursor)
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self.repository.stream_by_user(user_id, cursor=cursor)
+
+    async def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                     cursor: Optional[str] = None) -> CommentSearchPage:
+        return await self.repository.search(text, viewer_id, limit=limit, cursor=cursor)
+
+    async def get_public_version(self) -> int:
+        version = await self.repository.get_public_version()
+        self.cache.observe_version(version)
+        return version
+
+    async def get_user_version(self, user_id: str) -> int:
+        return await self.repository.get_user_version(user_id)
+
+    async def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        return await self.repository.get_stats(days, user_id)
+
+    async def get_by_id(self, comment_id: str) -> Comment:
+        return await self.repository.get_by_id(comment_id)
+
+    async def delete(self, comment_id: str) -> Optional[DeletedComment]:
+        deleted = await self.repository.delete(comment_id)
+        if deleted:
+            self.cache.evict_where(_page_contains(comment_id))
+        return deleted
+
+    async def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        deleted = await self.repository.delete_owned(comment_id, user_id)
+        self.cache.evict_where(_page_contains(comment_id))
+        return deleted
+
+    async def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        updated = await self.repository.update_owned(comment_id, user_id, changes, expected_version)
+        _evict_updated(self.cache, updated)
+        return updated
+
+
+# Cache compartilhado pelo processo inteiro
+_comment_cache: TTLCache | None = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.getenv("COMMENTS_CACHE_ENABLED", "true").lower() == "true"
+
+
+def get_comment_cache() -> TTLCache:
+    global _comment_cache
+    if _comment_cache is None:
+        with _cache_lock:
+            if _comment_cache is None:
+                _comment_cache = TTLCache(
+                    max_entries=int(os.getenv("COMMENTS_CACHE_MAX_ENTRIES", 256)),
+                    ttl_seconds=float(os.getenv("COMMENTS_CACHE_TTL_SECONDS", 30))
+                )
+    return _comment_cache
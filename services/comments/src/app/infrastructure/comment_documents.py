@@ -0,0 +1,83 @@
+from typing import Optional
+
+from app.domain.comment import (Comment, CommentNotFoundError, CommentPermissionError, CommentVersionConflictError,
+                                DeletedComment)
+from bson import ObjectId
+from bson.errors import InvalidId
+
+NOT_ATTEMPTED_ERROR = "Not inserted: an earlier item failed in ordered mode"
+
+
+def to_document(comment: Comment) -> dict:
+    document = comment.model_dump(by_alias=True)
+    del document["id"]
+    return document
+
+
+def from_document(doc: dict) -> Comment:
+    doc["id"] = str(doc.pop("_id"))
+    return Comment(**doc)
+
+
+def deleted_from_document(comment_id: str, doc: dict) -> DeletedComment:
+    return DeletedComment(id=comment_id, user_id=doc["user_id"], is_public=doc["is_public"], created_at=doc["created_at"])
+
+
+def to_raw(doc: dict) -> dict:
+    """Converte um documento do banco direto para o dict da resposta, na ordem dos campos de Comment."""
+    return {
+        "message": doc["message"],
+        "is_public": doc["is_public"],
+        "id": str(doc["_id"]),
+        "user_id": doc["user_id"],
+        "user_name": doc["user_name"],
+        "created_at": doc["created_at"],
+        # Documentos anteriores ao versionamento não têm o campo
+        "version": doc.get("version", 0),
+    }
+
+
+def insert_many_errors(details: dict, count: int, ordered: bool) -> list[Optional[str]]:
+    """Erro por documento a partir dos detalhes de um BulkWriteError do insert_many."""
+    errors: list[Optional[str]] = [None] * count
+    write_errors = details.get("writeErrors", [])
+    for error in write_errors:
+        errors[error["index"]] = error.get("errmsg", "Write error")
+    if ordered and write_errors:
+        # O servidor para no primeiro erro: os documentos seguintes nem foram enviados
+        for index in range(min(error["index"] for error in write_errors) + 1, count):
+            errors[index] = NOT_ATTEMPTED_ERROR
+    return errors
+
+
+def owned_object_id(comment_id: str) -> ObjectId:
+    try:
+        return ObjectId(comment_id)
+    except (InvalidId, TypeError):
+        raise CommentNotFoundError(comment_id)
+
+
+def guarded_update(user_id: str, changes: dict, expected_version: int) -> list[dict]:
+    """Update em pipeline que só altera o documento se o autor e a versão conferirem.
+
+    Com ReturnDocument.BEFORE o documento devolvido é exatamente o que a
+    condição avaliou, então uma única operação basta para saber se a edição
+    foi aplicada ou por que não foi.
+    """
+    current_version = {"$ifNull": ["$version", 0]}
+    allowed = {"$and": [{"$eq": ["$user_id", user_id]}, {"$eq": [current_version, expected_version]}]}
+    updates = {field: {"$cond": [allowed, {"$literal": value}, f"${field}"]} for field, value in changes.items()}
+    updates["version"] = {"$cond": [allowed, {"$add": [current_version, 1]}, current_version]}
+    return [{"$set": updates}]
+
+
+def apply_guarded_update(before: Optional[dict], user_id: str, changes: dict, expected_version: int) -> dict:
+    """Interpreta o documento anterior devolvido por guarded_update e monta o estado atual."""
+    if before is None:
+        raise CommentNotFoundError()
+    if before["user_id"] != user_id:
+        raise CommentPermissionError()
+    current_version = before.get("version", 0)
+    if current_version != expected_version:
+        raise CommentVersionConflictError(current_version)
+    return {**before, **changes, "version": current_version + 1}
@@ -1,62 +1,252 @@
-import os
-from typing import List
+from typing import Iterator, List, Optional
 
-from app.domain.comment import Comment, CommentRepository
+from app.domain.comment import (DEFAULT_PAGE_SIZE, DEFAULT_STATS_DAYS, Comment, CommentNotFoundError, CommentPage,
+                                CommentPermissionError, CommentRepository, CommentSearchPage, CommentStats, IdempotencyKey,
+                                DeletedComment, RawCommentPage)
+from app.infrastructure.archive import ARCHIVE_COLLECTION, archive_enabled
+from app.infrastructure.comment_documents import (apply_guarded_update, deleted_from_document, from_document, guarded_update,
+                                                   insert_many_errors, owned_object_id, to_document)
+from app.infrastructure.idempotency import IDEMPOTENCY_COLLECTION, MongoIdempotencyStore, replayed_comment
+from app.infrastructure.mongo import get_mongo_collection, transactions_enabled
+from app.infrastructure.outbox import OUTBOX_COLLECTION, MongoOutbox
+from app.infrastructure.pagination import KEYSET_SORT, STREAM_BATCH_SIZE, build_page, build_raw_page, keyset_after, keyset_query
+from app.infrastructure.rollups import ROLLUPS_COLLECTION, MongoRollupStore, rollup_changes, visibility_changes
+from app.infrastructure.search import build_search_page, search_pipeline
+from app.infrastructure.versions import PUBLIC_SCOPE, VERSIONS_COLLECTION, MongoVersionStore, comment_scopes, user_scope
 from bson import ObjectId
-from pymongo import DESCENDING, MongoClient
+from pymongo.errors import BulkWriteError
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+
+def _comments(documents) -> Iterator[Comment]:
+    try:
+        for doc in documents:
+            yield from_document(doc)
+    finally:
+        # Cliente desconectado no meio do streaming: libera o cursor no servidor
+        documents.close()
+
+
+def _closing(documents) -> Iterator[dict]:
+    try:
+        yield from documents
+    finally:
+        documents.close()
 
 
 class CommentMongoRepository(CommentRepository):
-    def __init__(self):
-        mongo_uri = os.getenv("MONGO_URI")
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client["comments"]
-        self.collection = self.db["comments"]
-        self.collection.create_index("is_public")
-        self.collection.create_index("created_at")
-
-    def insert(self, comment: Comment) -> Comment:
-        comment_dict = comment.model_dump(by_alias=True)
-        result = self.collection.insert_one(comment_dict)
-        comment.id = str(result.inserted_id)
+    def __init__(self, collection: Collection | None = None, versions: MongoVersionStore | None = None,
+                 outbox: MongoOutbox | None = None, rollups: MongoRollupStore | None = None,
+                 idempotency: MongoIdempotencyStore | None = None, archive: Collection | None = None):
+        self.collection = collection if collection is not None else get_mongo_collection("comments")
+        self.versions = versions if versions is not None else MongoVersionStore(get_mongo_collection(VERSIONS_COLLECTION))
+        self.outbox = outbox if outbox is not None else MongoOutbox(get_mongo_collection(OUTBOX_COLLECTION))
+        self.rollups = rollups if rollups is not None else MongoRollupStore(get_mongo_collection(ROLLUPS_COLLECTION))
+        self.idempotency = idempotency if idempotency is not None else MongoIdempotencyStore(get_mongo_collection(IDEMPOTENCY_COLLECTION))
+        # Comentários antigos movidos por app.infrastructure.archive; None desliga a leitura do arquivo
+        self.archive = archive if archive is not None else (get_mongo_collection(ARCHIVE_COLLECTION) if archive_enabled() else None)
+
+    def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        """Grava o comentário e, se houver, o registro de notificação no outbox.
+
+        Com MONGO_TRANSACTIONS_ENABLED as escritas são atômicas; sem replica
+        set elas são sequenciais e o outbox é gravado logo após o comentário.
+        """
+        if transactions_enabled():
+            with self.collection.database.client.start_session() as session:
+                session.with_transaction(lambda s: self._insert(comment, notification, s))
+        else:
+            self._insert(comment, notification)
         return comment
 
-    def list_public(self, limit: int = 1000, offset: int = 0) -> List[Comment]:
-        cursor = self.collection.find({"is_public": True}).sort("created_at", DESCENDING).limit(limit).skip(offset)
+    def _insert(self, comment: Comment, notification: Optional[dict], session=None):
+        document = to_document(comment)
+        result = self.collection.insert_one(document, session=session)
+        comment.id = str(result.inserted_id)
+        if notification is not None:
+            self.outbox.add(notification, session=session)
+        self.versions.bump(comment_scopes(comment.user_id, comment.is_public), session=session)
+        self.rollups.apply(rollup_changes(created=[document]), session=session)
+
+    def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                          key: IdempotencyKey) -> tuple[Comment, bool]:
+        """Como insert, mas devolve o comentário já criado com a mesma chave (e True) em vez de gravar de novo.
+
+        Com transações a chave é reservada na mesma transação do comentário;
+        sem elas, é reservada antes e liberada se o insert falhar.
+        """
+        if transactions_enabled():
+            with self.collection.database.client.start_session() as session:
+                return session.with_transaction(lambda s: self._insert_idempotent(comment, notification, key, s))
+        return self._insert_idempotent(comment, notification, key)
+
+    def _insert_idempotent(self, comment: Comment, notification: Optional[dict], key: IdempotencyKey,
+                           session=None) -> tuple[Comment, bool]:
+        record = self.idempotency.claim(key, session=session)
+        if record is not None:
+            return replayed_comment(record, key), True
+        try:
+            self._insert(comment, notification, session)
+        except Exception:
+            if session is None:
+                self.idempotency.release(key)
+            raise
+        self.idempotency.complete(key, comment, session=session)
+        return comment, False
+
+    def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                    ordered: bool = True) -> List[Optional[str]]:
+        """Grava os comentários com um único insert_many e devolve o erro de cada um (None se gravado).
+
+        Não usa transação: uma falha abortaria o lote inteiro e o import
+        precisa de resultado parcial. O outbox recebe só os gravados.
+        """
+        if not comments:
+            return []
+        documents = [to_document(comment) for comment in comments]
+        try:
+            self.collection.insert_many(documents, ordered=ordered)
+            errors = [None] * len(documents)
+        except BulkWriteError as e:
+            errors = insert_many_errors(e.details, len(documents), ordered)
+
+        inserted = [index for index, error in enumerate(errors) if error is None]
+        for index in inserted:
+            # O driver preenche o _id de cada documento antes de enviar o lote
+            comments[index].id = str(documents[index]["_id"])
+        if notifications is not None:
+            self.outbox.add_many([notifications[index] for index in inserted])
+        scopes = {scope for index in inserted for scope in comment_scopes(comments[index].user_id, comments[index].is_public)}
+        if scopes:
+            self.versions.bump(sorted(scopes))
+        self.rollups.apply(rollup_changes(created=[documents[index] for index in inserted]))
+        return errors
+
+    def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return self._list_page({"is_public": True}, limit, cursor)
+
+    def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return self._list_page({"user_id": user_id}, limit, cursor)
 
-        results = []
-        for doc in cursor:
-            doc["id"] = str(doc["_id"])
-            del doc["_id"]
-            results.append(Comment(**doc))
-        return results
+    def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return build_raw_page(self._find_page({"is_public": True}, limit, cursor), limit)
 
-    def list_by_user(self, user_id: str, limit: int = 1000, offset: int = 0) -> List[Comment]:
-        cursor = self.collection.find({"user_id": user_id}).sort("created_at", DESCENDING).limit(limit).skip(offset)
+    def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return build_raw_page(self._find_page({"user_id": user_id}, limit, cursor), limit)
 
-        results = []
-        for doc in cursor:
-            doc["id"] = str(doc["_id"])
-            del doc["_id"]
-            results.append(Comment(**doc))
-        return results
+    def _list_page(self, query: dict, limit: int, cursor: Optional[str]) -> CommentPage:
+        return build_page(self._find_page(query, limit, cursor), limit)
+
+    def _find_page(self, query: dict, limit: int, cursor: Optional[str]) -> list[dict]:
+        docs = list(self.collection.find(keyset_query(query, cursor)).sort(KEYSET_SORT).limit(limit + 1))
+        if len(docs) <= limit and self.archive is not None:
+            # A coleção quente acabou: o restante da página vem do arquivo, a partir do último documento
+            archive_query = keyset_after(query, docs[-1]["created_at"], docs[-1]["_id"]) if docs else keyset_query(query, cursor)
+            docs += list(self.archive.find(archive_query).sort(KEYSET_SORT).limit(limit + 1 - len(docs)))
+        return docs
+
+    def stream_public(self, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return self._stream({"is_public": True}, cursor)
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return self._stream({"user_id": user_id}, cursor)
+
+    def _stream(self, query: dict, cursor: Optional[str]) -> Iterator[Comment]:
+        # keyset_query roda já aqui, então um cursor inválido falha antes da resposta começar
+        documents = self.collection.find(keyset_query(query, cursor)).sort(KEYSET_SORT).batch_size(STREAM_BATCH_SIZE)
+        return _comments(self._continue_in_archive(documents, query, cursor))
+
+    def _continue_in_archive(self, documents, query: dict, cursor: Optional[str]) -> Iterator[dict]:
+        archive_query = keyset_query(query, cursor)
+        try:
+            for doc in documents:
+                # Calculado antes do yield: from_document consome o _id do documento
+                archive_query = keyset_after(query, doc["created_at"], doc["_id"])
+                yield doc
+        finally:
+            documents.close()
+        if self.archive is not None:
+            yield from _closing(self.archive.find(archive_query).sort(KEYSET_SORT).batch_size(STREAM_BATCH_SIZE))
+
+    def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+               cursor: Optional[str] = None) -> CommentSearchPage:
+        docs = list(self.collection.aggregate(search_pipeline(text, viewer_id, limit, cursor)))
+        return build_search_page(docs, text, limit)
+
+    def get_public_version(self) -> int:
+        return self.versions.get(PUBLIC_SCOPE)
+
+    def get_user_version(self, user_id: str) -> int:
+        return self.versions.get(user_scope(user_id))
+
+    def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        return self.rollups.get_stats(days, user_id)
 
     def get_by_id(self, comment_id: str) -> Comment:
         try:
-            doc = self.collection.find_one({"_id": ObjectId(comment_id)})
+            doc = self._find_one({"_id": ObjectId(comment_id)})
             if doc:
-                doc["id"] = str(doc["_id"])
-                del doc["_id"]
-                return Comment(**doc)
+                return from_document(doc)
             return None
         except Exception as e:
             print(f"Error getting comment {comment_id}: {e}")
             return None
 
-    def delete(self, comment_id: str) -> bool:
+    def delete(self, comment_id: str) -> Optional[DeletedComment]:
         try:
-            result = self.collection.delete_one({"_id": ObjectId(comment_id)})
-            return result.deleted_count > 0
+            # find_one_and_delete devolve autor, visibilidade e data para saber quais versões e contadores atualizar
+            doc = self._find_one_and_delete(
+                {"_id": ObjectId(comment_id)}, projection={"user_id": True, "is_public": True, "created_at": True}
+            )
+            if doc is None:
+                return None
+            self.versions.bump(comment_scopes(doc["user_id"], doc["is_public"]))
+            self.rollups.apply(rollup_changes(removed=[doc]))
+            return deleted_from_document(comment_id, doc)
         except Exception as e:
             print(f"Error deleting comment {comment_id}: {e}")
-            return False
+            return None
+
+    def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        """Remove o comentário do autor em uma operação; a leitura extra só ocorre quando nada foi removido."""
+        object_id = owned_object_id(comment_id)
+        doc = self._find_one_and_delete({"_id": object_id, "user_id": user_id})
+        if doc is None:
+            if self._find_one({"_id": object_id}, {"_id": True}) is None:
+                raise CommentNotFoundError(comment_id)
+            raise CommentPermissionError(comment_id)
+        self.versions.bump(comment_scopes(doc["user_id"], doc["is_public"]))
+        self.rollups.apply(rollup_changes(removed=[doc]))
+        return from_document(doc)
+
+    def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        before = self._find_one_and_update(
+            {"_id": owned_object_id(comment_id)},
+            guarded_update(user_id, changes, expected_version),
+            return_document=ReturnDocument.BEFORE
+        )
+        after = apply_guarded_update(before, user_id, changes, expected_version)
+        self.versions.bump(sorted(set(comment_scopes(user_id, before["is_public"]) + comment_scopes(user_id, after["is_public"]))))
+        self.rollups.apply(visibility_changes(before, after))
+        return from_document(after)
+
+    # Leituras e escritas por _id procuram na coleção quente e, se o comentário já foi arquivado, no arquivo
+
+    def _find_one(self, query: dict, *args) -> Optional[dict]:
+        doc = self.collection.find_one(query, *args)
+        if doc is None and self.archive is not None:
+            doc = self.archive.find_one(query, *args)
+        return doc
+
+    def _find_one_and_delete(self, query: dict, **kwargs) -> Optional[dict]:
+        doc = self.collection.find_one_and_delete(query, **kwargs)
+        if doc is None and self.archive is not None:
+            doc = self.archive.find_one_and_delete(query, **kwargs)
+        return doc
+
+    def _find_one_and_update(self, query: dict, update, **kwargs) -> Optional[dict]:
+        doc = self.collection.find_one_and_update(query, update, **kwargs)
+        if doc is None and self.archive is not None:
+            doc = self.archive.find_one_and_update(query, update, **kwargs)
+        return doc
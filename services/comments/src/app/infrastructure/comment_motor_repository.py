@@ -0,0 +1,233 @@
+from typing import AsyncIterator, List, Optional
+
+from app.domain.comment import (DEFAULT_PAGE_SIZE, DEFAULT_STATS_DAYS, AsyncCommentRepository, Comment, CommentNotFoundError,
+                                CommentPage, CommentPermissionError, CommentSearchPage, CommentStats, IdempotencyKey,
+                                DeletedComment, RawCommentPage)
+from app.infrastructure.archive import ARCHIVE_COLLECTION, archive_enabled
+from app.infrastructure.comment_documents import (apply_guarded_update, deleted_from_document, from_document, guarded_update,
+                                                   insert_many_errors, owned_object_id, to_document)
+from app.infrastructure.idempotency import IDEMPOTENCY_COLLECTION, MotorIdempotencyStore, replayed_comment
+from app.infrastructure.mongo import get_async_mongo_collection, transactions_enabled
+from app.infrastructure.outbox import OUTBOX_COLLECTION, MotorOutbox
+from app.infrastructure.pagination import KEYSET_SORT, STREAM_BATCH_SIZE, build_page, build_raw_page, keyset_after, keyset_query
+from app.infrastructure.rollups import ROLLUPS_COLLECTION, MotorRollupStore, rollup_changes, visibility_changes
+from app.infrastructure.search import build_search_page, search_pipeline
+from app.infrastructure.versions import PUBLIC_SCOPE, VERSIONS_COLLECTION, MotorVersionStore, comment_scopes, user_scope
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+
+async def _comments(documents) -> AsyncIterator[Comment]:
+    try:
+        async for doc in documents:
+            yield from_document(doc)
+    finally:
+        # documents é o gerador de _continue_in_archive, que fecha os cursores do motor
+        await documents.aclose()
+
+
+async def _closing(documents) -> AsyncIterator[dict]:
+    try:
+        async for doc in documents:
+            yield doc
+    finally:
+        await documents.close()
+
+
+class CommentMotorRepository(AsyncCommentRepository):
+    def __init__(self, collection: AsyncIOMotorCollection | None = None, versions: MotorVersionStore | None = None,
+                 outbox: MotorOutbox | None = None, rollups: MotorRollupStore | None = None,
+                 idempotency: MotorIdempotencyStore | None = None, archive: AsyncIOMotorCollection | None = None):
+        self.collection = collection if collection is not None else get_async_mongo_collection("comments")
+        self.versions = versions if versions is not None else MotorVersionStore(get_async_mongo_collection(VERSIONS_COLLECTION))
+        self.outbox = outbox if outbox is not None else MotorOutbox(get_async_mongo_collection(OUTBOX_COLLECTION))
+        self.rollups = rollups if rollups is not None else MotorRollupStore(get_async_mongo_collection(ROLLUPS_COLLECTION))
+        self.idempotency = (idempotency if idempotency is not None
+                            else MotorIdempotencyStore(get_async_mongo_collection(IDEMPOTENCY_COLLECTION)))
+        self.archive = archive if archive is not None else (get_async_mongo_collection(ARCHIVE_COLLECTION) if archive_enabled() else None)
+
+    async def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        if transactions_enabled():
+            async with await self.collection.database.client.start_session() as session:
+                await session.with_transaction(lambda s: self._insert(comment, notification, s))
+        else:
+            await self._insert(comment, notification)
+        return comment
+
+    async def _insert(self, comment: Comment, notification: Optional[dict], session=None):
+        document = to_document(comment)
+        result = await self.collection.insert_one(document, session=session)
+        comment.id = str(result.inserted_id)
+        if notification is not None:
+            await self.outbox.add(notification, session=session)
+        await self.versions.bump(comment_scopes(comment.user_id, comment.is_public), session=session)
+        await self.rollups.apply(rollup_changes(created=[document]), session=session)
+
+    async def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                                key: IdempotencyKey) -> tuple[Comment, bool]:
+        if transactions_enabled():
+            async with await self.collection.database.client.start_session() as session:
+                return await session.with_transaction(lambda s: self._insert_idempotent(comment, notification, key, s))
+        return await self._insert_idempotent(comment, notification, key)
+
+    async def _insert_idempotent(self, comment: Comment, notification: Optional[dict], key: IdempotencyKey,
+                                 session=None) -> tuple[Comment, bool]:
+        record = await self.idempotency.claim(key, session=session)
+        if record is not None:
+            return replayed_comment(record, key), True
+        try:
+            await self._insert(comment, notification, session)
+        except Exception:
+            if session is None:
+                await self.idempotency.release(key)
+            raise
+        await self.idempotency.complete(key, comment, session=session)
+        return comment, False
+
+    async def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                          ordered: bool = True) -> List[Optional[str]]:
+        if not comments:
+            return []
+        documents = [to_document(comment) for comment in comments]
+        try:
+            await self.collection.insert_many(documents, ordered=ordered)
+            errors = [None] * len(documents)
+        except BulkWriteError as e:
+            errors = insert_many_errors(e.details, len(documents), ordered)
+
+        inserted = [index for index, error in enumerate(errors) if error is None]
+        for index in inserted:
+            comments[index].id = str(documents[index]["_id"])
+        if notifications is not None:
+            await self.outbox.add_many([notifications[index] for index in inserted])
+        scopes = {scope for index in inserted for scope in comment_scopes(comments[index].user_id, comments[index].is_public)}
+        if scopes:
+            await self.versions.bump(sorted(scopes))
+        await self.rollups.apply(rollup_changes(created=[documents[index] for index in inserted]))
+        return errors
+
+    async def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return await self._list_page({"is_public": True}, limit, cursor)
+
+    async def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return await self._list_page({"user_id": user_id}, limit, cursor)
+
+    async def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return build_raw_page(await self._find_page({"is_public": True}, limit, cursor), limit)
+
+    async def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return build_raw_page(await self._find_page({"user_id": user_id}, limit, cursor), limit)
+
+    async def _list_page(self, query: dict, limit: int, cursor: Optional[str]) -> CommentPage:
+        return build_page(await self._find_page(query, limit, cursor), limit)
+
+    async def _find_page(self, query: dict, limit: int, cursor: Optional[str]) -> list[dict]:
+        docs = await self.collection.find(keyset_query(query, cursor)).sort(KEYSET_SORT).limit(limit + 1).to_list(length=limit + 1)
+        if len(docs) <= limit and self.archive is not None:
+            archive_query = keyset_after(query, docs[-1]["created_at"], docs[-1]["_id"]) if docs else keyset_query(query, cursor)
+            remaining = limit + 1 - len(docs)
+            docs += await self.archive.find(archive_query).sort(KEYSET_SORT).limit(remaining).to_list(length=remaining)
+        return docs
+
+    def stream_public(self, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self._stream({"is_public": True}, cursor)
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self._stream({"user_id": user_id}, cursor)
+
+    def _stream(self, query: dict, cursor: Optional[str]) -> AsyncIterator[Comment]:
+        documents = self.collection.find(keyset_query(query, cursor)).sort(KEYSET_SORT).batch_size(STREAM_BATCH_SIZE)
+        return _comments(self._continue_in_archive(documents, query, cursor))
+
+    async def _continue_in_archive(self, documents, query: dict, cursor: Optional[str]) -> AsyncIterator[dict]:
+        archive_query = keyset_query(query, cursor)
+        try:
+            async for doc in documents:
+                archive_query = keyset_after(query, doc["created_at"], doc["_id"])
+                yield doc
+        finally:
+            await documents.close()
+        if self.archive is not None:
+            async for doc in _closing(self.archive.find(archive_query).sort(KEYSET_SORT).batch_size(STREAM_BATCH_SIZE)):
+                yield doc
+
+    async def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                     cursor: Optional[str] = None) -> CommentSearchPage:
+        docs = await self.collection.aggregate(search_pipeline(text, viewer_id, limit, cursor)).to_list(length=limit + 1)
+        return build_search_page(docs, text, limit)
+
+    async def get_public_version(self) -> int:
+        return await self.versions.get(PUBLIC_SCOPE)
+
+    async def get_user_version(self, user_id: str) -> int:
+        return await self.versions.get(user_scope(user_id))
+
+    async def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        return await self.rollups.get_stats(days, user_id)
+
+    async def get_by_id(self, comment_id: str) -> Comment:
+        try:
+            doc = await self._find_one({"_id": ObjectId(comment_id)})
+            if doc:
+                return from_document(doc)
+            return None
+        except Exception as e:
+            print(f"Error getting comment {comment_id}: {e}")
+            return None
+
+    async def delete(self, comment_id: str) -> Optional[DeletedComment]:
+        try:
+            # find_one_and_delete devolve autor, visibilidade e data para saber quais versões e contadores atualizar
+            doc = await self._find_one_and_delete(
+                {"_id": ObjectId(comment_id)}, projection={"user_id": True, "is_public": True, "created_at": True}
+            )
+            if doc is None:
+                return None
+            await self.versions.bump(comment_scopes(doc["user_id"], doc["is_public"]))
+            await self.rollups.apply(rollup_changes(removed=[doc]))
+            return deleted_from_document(comment_id, doc)
+        except Exception as e:
+            print(f"Error deleting comment {comment_id}: {e}")
+            return None
+
+    async def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        object_id = owned_object_id(comment_id)
+        doc = await self._find_one_and_delete({"_id": object_id, "user_id": user_id})
+        if doc is None:
+            if await self._find_one({"_id": object_id}, {"_id": True}) is None:
+                raise CommentNotFoundError(comment_id)
+            raise CommentPermissionError(comment_id)
+        await self.versions.bump(comment_scopes(doc["user_id"], doc["is_public"]))
+        await self.rollups.apply(rollup_changes(removed=[doc]))
+        return from_document(doc)
+
+    async def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        before = await self._find_one_and_update(
+            {"_id": owned_object_id(comment_id)},
+            guarded_update(user_id, changes, expected_version),
+            return_document=ReturnDocument.BEFORE
+        )
+        after = apply_guarded_update(before, user_id, changes, expected_version)
+        await self.versions.bump(sorted(set(comment_scopes(user_id, before["is_public"]) + comment_scopes(user_id, after["is_public"]))))
+        await self.rollups.apply(visibility_changes(before, after))
+        return from_document(after)
+
+    async def _find_one(self, query: dict, *args) -> Optional[dict]:
+        doc = await self.collection.find_one(query, *args)
+        if doc is None and self.archive is not None:
+            doc = await self.archive.find_one(query, *args)
+        return doc
+
+    async def _find_one_and_delete(self, query: dict, **kwargs) -> Optional[dict]:
+        doc = await self.collection.find_one_and_delete(query, **kwargs)
+        if doc is None and self.archive is not None:
+            doc = await self.archive.find_one_and_delete(query, **kwargs)
+        return doc
+
+    async def _find_one_and_update(self, query: dict, update, **kwargs) -> Optional[dict]:
+        doc = await self.collection.find_one_and_update(query, update, **kwargs)
+        if doc is None and self.archive is not None:
+            doc = await self.archive.find_one_and_update(query, update, **kwargs)
+        return doc
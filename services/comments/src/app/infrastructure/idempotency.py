@@ -0,0 +1,145 @@
+"""Chaves Idempotency-Key do POST /comments.
+
+Cada chave (por autor) guarda o hash da requisição e o comentário criado.
+Um retry com a mesma chave recebe esse comentário de volta, sem um segundo
+insert, notificação ou evento. As chaves expiram pelo índice TTL em
+expires_at depois de IDEMPOTENCY_KEY_TTL_SECONDS.
+
+Sem transações a chave é reservada antes do insert. Se o processo morre
+entre a reserva e o complete, a reserva fica sem comentário; passado
+IDEMPOTENCY_CLAIM_LEASE_SECONDS desde claimed_at, o próximo retry a assume
+em vez de receber 409 até a chave expirar.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.domain.comment import (Comment, IdempotencyKey, IdempotencyKeyInProgressError,
+                                IdempotencyKeyMismatchError)
+from pymongo import ReturnDocument
+
+IDEMPOTENCY_COLLECTION = "comment_idempotency_keys"
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_LEASE_SECONDS = 30
+
+
+def idempotency_ttl_seconds() -> float:
+    return float(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+
+def idempotency_lease_seconds() -> float:
+    return float(os.getenv("IDEMPOTENCY_CLAIM_LEASE_SECONDS", DEFAULT_LEASE_SECONDS))
+
+
+def _claim_fields(key: IdempotencyKey, now: datetime, ttl_seconds: float) -> dict:
+    return {
+        "request_hash": key.request_hash,
+        "comment": None,
+        "created_at": now,
+        "claimed_at": now,
+        "expires_at": now + timedelta(seconds=ttl_seconds),
+    }
+
+
+def _claim_update(key: IdempotencyKey, now: datetime, ttl_seconds: float) -> dict:
+    return {"$setOnInsert": _claim_fields(key, now, ttl_seconds)}
+
+
+def _abandoned_claim_query(key: IdempotencyKey, now: datetime, lease_seconds: float) -> dict:
+    # $not também casa reservas gravadas antes de claimed_at existir
+    return {"_id": key.id, "comment": None, "claimed_at": {"$not": {"$gte": now - timedelta(seconds=lease_seconds)}}}
+
+
+def _abandoned(record: dict, now: datetime, lease_seconds: float) -> bool:
+    if record.get("comment") is not None:
+        return False
+    claimed_at = record.get("claimed_at")
+    if claimed_at is None:
+        return True
+    if claimed_at.tzinfo is None:
+        # O pymongo devolve datas ingênuas em UTC
+        claimed_at = claimed_at.replace(tzinfo=timezone.utc)
+    return claimed_at < now - timedelta(seconds=lease_seconds)
+
+
+def _complete_update(comment: Comment) -> dict:
+    # Guarda a resposta inteira: o replay devolve o comentário como foi criado, mesmo que editado depois
+    return {"$set": {"comment": comment.model_dump()}}
+
+
+def replayed_comment(record: dict, key: IdempotencyKey) -> Comment:
+    """Comentário original de uma chave já usada, ou o erro a devolver ao cliente."""
+    if record["request_hash"] != key.request_hash:
+        raise IdempotencyKeyMismatchError(key.id)
+    if record.get("comment") is None:
+        # Reserva dentro do prazo: outra requisição ainda está gravando
+        raise IdempotencyKeyInProgressError(key.id)
+    return Comment(**record["comment"])
+
+
+class MongoIdempotencyStore:
+
+    def __init__(self, collection, ttl_seconds: Optional[float] = None, lease_seconds: Optional[float] = None):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else idempotency_ttl_seconds()
+        self.lease_seconds = lease_seconds if lease_seconds is not None else idempotency_lease_seconds()
+
+    def claim(self, key: IdempotencyKey, session=None) -> Optional[dict]:
+        """Reserva a chave; devolve None se ela é nova (ou abandonada) ou o registro existente.
+
+        Um upsert em vez de insert_one: um DuplicateKeyError abortaria a
+        transação em que a chave é reservada junto com o comentário.
+        """
+        now = datetime.now(timezone.utc)
+        record = self.collection.find_one_and_update(
+            {"_id": key.id}, _claim_update(key, now, self.ttl_seconds), upsert=True,
+            return_document=ReturnDocument.BEFORE, session=session
+        )
+        if record is None or not _abandoned(record, now, self.lease_seconds):
+            return record
+        # Condicional: entre dois retries simultâneos, só um assume a reserva
+        taken = self.collection.find_one_and_update(
+            _abandoned_claim_query(key, now, self.lease_seconds), {"$set": _claim_fields(key, now, self.ttl_seconds)},
+            session=session
+        )
+        if taken is not None:
+            return None
+        # Outro retry assumiu a reserva antes: o registro atual decide entre replay e 409
+        return self.collection.find_one({"_id": key.id}, session=session) or record
+
+    def complete(self, key: IdempotencyKey, comment: Comment, session=None):
+        self.collection.update_one({"_id": key.id}, _complete_update(comment), session=session)
+
+    def release(self, key: IdempotencyKey):
+        self.collection.delete_one({"_id": key.id, "comment": None})
+
+
+class MotorIdempotencyStore:
+
+    def __init__(self, collection, ttl_seconds: Optional[float] = None, lease_seconds: Optional[float] = None):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else idempotency_ttl_seconds()
+        self.lease_seconds = lease_seconds if lease_seconds is not None else idempotency_lease_seconds()
+
+    async def claim(self, key: IdempotencyKey, session=None) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        record = await self.collection.find_one_and_update(
+            {"_id": key.id}, _claim_update(key, now, self.ttl_seconds), upsert=True,
+            return_document=ReturnDocument.BEFORE, session=session
+        )
+        if record is None or not _abandoned(record, now, self.lease_seconds):
+            return record
+        taken = await self.collection.find_one_and_update(
+            _abandoned_claim_query(key, now, self.lease_seconds), {"$set": _claim_fields(key, now, self.ttl_seconds)},
+            session=session
+        )
+        if taken is not None:
+            return None
+        return await self.collection.find_one({"_id": key.id}, session=session) or record
+
+    async def complete(self, key: IdempotencyKey, comment: Comment, session=None):
+        await self.collection.update_one({"_id": key.id}, _complete_update(comment), session=session)
+
+    async def release(self, key: IdempotencyKey):
+        await self.collection.delete_one({"_id": key.id, "comment": None})
@@ -0,0 +1,216 @@
+"""Registro declarativo dos índices do MongoDB do serviço de comentários.
+
+Os índices que faltam são criados no startup (ver main.py), sem remover nada,
+para não tirar índices de réplicas antigas durante um deploy. Remoções e
+trocas de definição ficam para a linha de comando:
+
+    python -m app.infrastructure.indexes [--dry-run] [--keep-obsolete]
+"""
+import argparse
+import logging
+from dataclasses import dataclass, field
+
+from app.infrastructure.mongo import get_mongo_database
+from app.infrastructure.vault import load_secrets
+from pymongo import ASCENDING, DESCENDING, TEXT
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    keys: list[tuple[str, int]]
+    serves: list[str]
+    options: dict = field(default_factory=dict)
+
+
+@dataclass
+class IndexPlan:
+    collection: str
+    to_create: list[IndexSpec] = field(default_factory=list)
+    to_drop: list[str] = field(default_factory=list)
+    unchanged: list[IndexSpec] = field(default_factory=list)
+    # Índices do registro com definição diferente, mantidos como estão quando a reconciliação só cria
+    outdated: list[str] = field(default_factory=list)
+
+
+INDEXES: dict[str, list[IndexSpec]] = {
+    "comments": [
+        IndexSpec(
+            name="is_public_created_at_id",
+            keys=[("is_public", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            serves=["CommentRepository.list_public"],
+        ),
+        IndexSpec(
+            name="user_id_created_at_id",
+            keys=[("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            serves=["CommentRepository.list_by_user"],
+        ),
+        IndexSpec(
+            name="message_user_name_text",
+            keys=[("message", TEXT), ("user_name", TEXT)],
+            serves=["CommentRepository.search"],
+            # Um termo na mensagem pesa mais que no nome do autor; o stemming segue o idioma dos comentários
+            options={"weights": {"message": 10, "user_name": 2}, "default_language": "portuguese"},
+        ),
+        IndexSpec(
+            name="created_at_id",
+            keys=[("created_at", ASCENDING), ("_id", ASCENDING)],
+            serves=["archive_batch"],
+        ),
+    ],
+    # Só as listagens continuam no arquivo; a busca textual cobre apenas a coleção quente
+    "comments_archive": [
+        IndexSpec(
+            name="is_public_created_at_id",
+            keys=[("is_public", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            serves=["CommentRepository.list_public"],
+        ),
+        IndexSpec(
+            name="user_id_created_at_id",
+            keys=[("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            serves=["CommentRepository.list_by_user"],
+        ),
+    ],
+    "comment_outbox": [
+        IndexSpec(
+            name="status_next_attempt_at",
+            keys=[("status", ASCENDING), ("next_attempt_at", ASCENDING)],
+            serves=["MongoOutbox.claim"],
+        ),
+    ],
+    "comment_idempotency_keys": [
+        IndexSpec(
+            name="expires_at_ttl",
+            keys=[("expires_at", ASCENDING)],
+            serves=["MongoIdempotencyStore.claim"],
+            options={"expireAfterSeconds": 0},
+        ),
+    ],
+    "rate_limits": [
+        IndexSpec(
+            name="expires_at_ttl",
+            keys=[("expires_at", ASCENDING)],
+            serves=["MongoRateLimitBackend.consume"],
+            options={"expireAfterSeconds": 0},
+        ),
+    ],
+}
+
+
+def _normalize_direction(direction):
+    # O servidor pode devolver 1.0/-1.0 dependendo de como o índice foi criado
+    return int(direction) if isinstance(direction, float) else direction
+
+
+# Forma com que o servidor descreve qualquer índice de texto; os campos ficam em "weights"
+TEXT_INDEX_KEY = [("_fts", TEXT), ("_ftsx", 1)]
+
+
+def _text_fields(spec: IndexSpec) -> set[str]:
+    return {key for key, direction in spec.keys if direction == TEXT}
+
+
+def _index_key(spec: IndexSpec) -> list:
+    if not _text_fields(spec):
+        return spec.keys
+    return [(key, direction) for key, direction in spec.keys if direction != TEXT] + TEXT_INDEX_KEY
+
+
+def _matches(spec: IndexSpec, info: dict) -> bool:
+    if [(key, _normalize_direction(direction)) for key, direction in info["key"]] != _index_key(spec):
+        return False
+    text_fields = _text_fields(spec)
+    if text_fields and set(info.get("weights", {})) != text_fields:
+        return False
+    return all(info.get(option) == value for option, value in spec.options.items())
+
+
+def plan_indexes(collection_name: str, existing: dict, specs: list[IndexSpec], drop_obsolete: bool = True,
+                 create_only: bool = False) -> IndexPlan:
+    """Compara os índices existentes com o registro.
+
+    Com create_only nada é removido: os índices fora do registro ficam e os
+    que mudaram de definição vão para `outdated`, à espera da linha de comando.
+    """
+    plan = IndexPlan(collection=collection_name)
+    desired = {spec.name: spec for spec in specs}
+
+    for name, info in existing.items():
+        if name == "_id_":
+            continue
+        spec = desired.get(name)
+        if spec is None:
+            if drop_obsolete and not create_only:
+                plan.to_drop.append(name)
+        elif not _matches(spec, info):
+            (plan.outdated if create_only else plan.to_drop).append(name)
+
+    for spec in specs:
+        if spec.name in plan.outdated:
+            continue
+        if spec.name in existing and spec.name not in plan.to_drop:
+            plan.unchanged.append(spec)
+        else:
+            plan.to_create.append(spec)
+    return plan
+
+
+def reconcile_indexes(database, drop_obsolete: bool = True, dry_run: bool = False,
+                      create_only: bool = False) -> list[IndexPlan]:
+    plans = []
+    for collection_name, specs in INDEXES.items():
+        collection = database[collection_name]
+        plan = plan_indexes(collection_name, collection.index_information(), specs, drop_obsolete, create_only)
+        if not dry_run:
+            # Remove antes de criar: um índice antigo com as mesmas chaves e outro nome impediria a criação
+            for name in plan.to_drop:
+                collection.drop_index(name)
+            for spec in plan.to_create:
+                collection.create_index(spec.keys, name=spec.name, **spec.options)
+        log_plan(plan, dry_run)
+        plans.append(plan)
+    return plans
+
+
+async def reconcile_indexes_async(database, drop_obsolete: bool = True, dry_run: bool = False,
+                                  create_only: bool = False) -> list[IndexPlan]:
+    plans = []
+    for collection_name, specs in INDEXES.items():
+        collection = database[collection_name]
+        plan = plan_indexes(collection_name, await collection.index_information(), specs, drop_obsolete, create_only)
+        if not dry_run:
+            for name in plan.to_drop:
+                await collection.drop_index(name)
+            for spec in plan.to_create:
+                await collection.create_index(spec.keys, name=spec.name, **spec.options)
+        log_plan(plan, dry_run)
+        plans.append(plan)
+    return plans
+
+
+def log_plan(plan: IndexPlan, dry_run: bool = False):
+    prefix = "[MONGO][dry-run]" if dry_run else "[MONGO]"
+    for spec in plan.unchanged:
+        logger.info(f"{prefix} {plan.collection}.{spec.name} ok -> {', '.join(spec.serves)}")
+    for spec in plan.to_create:
+        logger.info(f"{prefix} {plan.collection}.{spec.name} criado -> {', '.join(spec.serves)}")
+    for name in plan.to_drop:
+        logger.info(f"{prefix} {plan.collection}.{name} removido (obsoleto)")
+    for name in plan.outdated:
+        logger.warning(f"{prefix} {plan.collection}.{name} difere do registro; mantido até a reconciliação pela linha de comando")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcilia os índices do MongoDB com o registro declarativo.")
+    parser.add_argument("--dry-run", action="store_true", help="apenas mostra o que seria alterado")
+    parser.add_argument("--keep-obsolete", action="store_true", help="não remove índices fora do registro")
+    args = parser.parse_args()
+
+    load_secrets()
+    reconcile_indexes(get_mongo_database(), drop_obsolete=not args.keep_obsolete, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
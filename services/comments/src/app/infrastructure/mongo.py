@@ -0,0 +1,82 @@
+import os
+import threading
+
+from app.infrastructure.metrics import mongo_event_listeners
+from app.infrastructure.slow_queries import slow_query_listeners
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+# Clientes compartilhados pelo processo inteiro: cada um mantém o seu pool de conexões
+_mongo_client: MongoClient | None = None
+_async_mongo_client: AsyncIOMotorClient | None = None
+_client_lock = threading.Lock()
+
+
+def _client_options() -> dict:
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", 0)),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60000)),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000)),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+        "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 10000)),
+        # Duração de cada comando em mongodb_command_duration_seconds e registro dos comandos lentos
+        "event_listeners": mongo_event_listeners() + slow_query_listeners(),
+    }
+
+
+def transactions_enabled() -> bool:
+    # Transações exigem replica set; o mongo do docker-compose roda standalone
+    return os.getenv("MONGO_TRANSACTIONS_ENABLED", "false").lower() == "true"
+
+
+def get_mongo_client() -> MongoClient:
+    global _mongo_client
+    if _mongo_client is None:
+        with _client_lock:
+            if _mongo_client is None:
+                _mongo_client = MongoClient(os.getenv("MONGO_URI"), **_client_options())
+    return _mongo_client
+
+
+def close_client():
+    global _mongo_client
+    with _client_lock:
+        if _mongo_client is not None:
+            _mongo_client.close()
+        _mongo_client = None
+
+
+def get_mongo_database() -> Database:
+    db_name = os.getenv("MONGO_DB_NAME", "comments")
+    return get_mongo_client()[db_name]
+
+
+def get_mongo_collection(collection_name: str) -> Collection:
+    return get_mongo_database()[collection_name]
+
+
+def get_async_mongo_client() -> AsyncIOMotorClient:
+    global _async_mongo_client
+    if _async_mongo_client is None:
+        _async_mongo_client = AsyncIOMotorClient(os.getenv("MONGO_URI"), **_client_options())
+    return _async_mongo_client
+
+
+def close_async_client():
+    global _async_mongo_client
+    if _async_mongo_client is not None:
+        _async_mongo_client.close()
+    _async_mongo_client = None
+
+
+def get_async_mongo_database() -> AsyncIOMotorDatabase:
+    db_name = os.getenv("MONGO_DB_NAME", "comments")
+    return get_async_mongo_client()[db_name]
+
+
+def get_async_mongo_collection(collection_name: str) -> AsyncIOMotorCollection:
+    return get_async_mongo_database()[collection_name]
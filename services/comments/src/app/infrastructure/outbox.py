@@ -0,0 +1,133 @@
+"""Outbox das notificações de comentários.
+
+O registro é gravado junto com o comentário e publicado depois pelo
+OutboxDispatcher, então a latência do POST depende só do MongoDB e uma
+falha do RabbitMQ não perde a notificação (entrega at-least-once). O
+registro guarda também o contexto de tracing da requisição, para que a
+publicação apareça no mesmo trace.
+"""
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from app.infrastructure.tracing import inject_context
+from pymongo import ASCENDING
+
+OUTBOX_COLLECTION = "comment_outbox"
+
+PENDING = "pending"
+DEAD = "dead"
+
+# Ordem em que os registros vencidos são reivindicados pelo dispatcher
+CLAIM_SORT = [("next_attempt_at", ASCENDING)]
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def new_outbox_record(payload: dict, now: datetime | None = None) -> dict:
+    now = now or utcnow()
+    return {
+        "payload": payload,
+        "status": PENDING,
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+        "last_error": None,
+        "trace_context": inject_context(),
+    }
+
+
+def _due_query(now: datetime) -> dict:
+    return {"status": PENDING, "next_attempt_at": {"$lte": now}}
+
+
+def _claim_update(token: ObjectId, now: datetime, lease_seconds: float) -> dict:
+    # Enquanto a concessão não vence, nenhum outro dispatcher pega o registro;
+    # se este processo morrer no meio, o registro volta a ficar disponível
+    return {"$set": {"claim": token, "next_attempt_at": now + timedelta(seconds=lease_seconds)}}
+
+
+def _reschedule_update(attempts: int, error: str, next_attempt_at: datetime) -> dict:
+    return {"$set": {"attempts": attempts, "last_error": error, "next_attempt_at": next_attempt_at}, "$unset": {"claim": ""}}
+
+
+def _dead_letter_update(attempts: int, error: str, now: datetime) -> dict:
+    return {"$set": {"status": DEAD, "attempts": attempts, "last_error": error, "dead_at": now}, "$unset": {"claim": ""}}
+
+
+class MongoOutbox:
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def add(self, payload: dict, session=None):
+        self.collection.insert_one(new_outbox_record(payload), session=session)
+
+    def add_many(self, payloads: list[dict], session=None):
+        if payloads:
+            now = utcnow()
+            self.collection.insert_many([new_outbox_record(payload, now) for payload in payloads], session=session)
+
+    def claim(self, limit: int, lease_seconds: float) -> list[dict]:
+        now = utcnow()
+        due = _due_query(now)
+        ids = [doc["_id"] for doc in self.collection.find(due, {"_id": True}).sort(CLAIM_SORT).limit(limit)]
+        if not ids:
+            return []
+        token = ObjectId()
+        self.collection.update_many({**due, "_id": {"$in": ids}}, _claim_update(token, now, lease_seconds))
+        return list(self.collection.find({"_id": {"$in": ids}, "claim": token}).sort(CLAIM_SORT))
+
+    def complete(self, ids: list):
+        if ids:
+            self.collection.delete_many({"_id": {"$in": ids}})
+
+    def release(self, ids: list):
+        if ids:
+            self.collection.update_many({"_id": {"$in": ids}}, {"$set": {"next_attempt_at": utcnow()}, "$unset": {"claim": ""}})
+
+    def reschedule(self, record_id, attempts: int, error: str, next_attempt_at: datetime):
+        self.collection.update_one({"_id": record_id}, _reschedule_update(attempts, error, next_attempt_at))
+
+    def dead_letter(self, record_id, attempts: int, error: str):
+        self.collection.update_one({"_id": record_id}, _dead_letter_update(attempts, error, utcnow()))
+
+
+class MotorOutbox:
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def add(self, payload: dict, session=None):
+        await self.collection.insert_one(new_outbox_record(payload), session=session)
+
+    async def add_many(self, payloads: list[dict], session=None):
+        if payloads:
+            now = utcnow()
+            await self.collection.insert_many([new_outbox_record(payload, now) for payload in payloads], session=session)
+
+    async def claim(self, limit: int, lease_seconds: float) -> list[dict]:
+        now = utcnow()
+        due = _due_query(now)
+        docs = await self.collection.find(due, {"_id": True}).sort(CLAIM_SORT).limit(limit).to_list(length=limit)
+        ids = [doc["_id"] for doc in docs]
+        if not ids:
+            return []
+        token = ObjectId()
+        await self.collection.update_many({**due, "_id": {"$in": ids}}, _claim_update(token, now, lease_seconds))
+        return await self.collection.find({"_id": {"$in": ids}, "claim": token}).sort(CLAIM_SORT).to_list(length=limit)
+
+    async def complete(self, ids: list):
+        if ids:
+            await self.collection.delete_many({"_id": {"$in": ids}})
+
+    async def release(self, ids: list):
+        if ids:
+            await self.collection.update_many({"_id": {"$in": ids}}, {"$set": {"next_attempt_at": utcnow()}, "$unset": {"claim": ""}})
+
+    async def reschedule(self, record_id, attempts: int, error: str, next_attempt_at: datetime):
+        await self.collection.update_one({"_id": record_id}, _reschedule_update(attempts, error, next_attempt_at))
+
+    async def dead_letter(self, record_id, attempts: int, error: str):
+        await self.collection.update_one({"_id": record_id}, _dead_letter_update(attempts, error, utcnow()))
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+from app.infrastructure.mongo import get_async_mongo_collection, get_mongo_collection
+from app.infrastructure.outbox import OUTBOX_COLLECTION, MongoOutbox, MotorOutbox, utcnow
+from app.infrastructure.publisher import AsyncPublisher, Publisher, get_async_publisher, get_publisher
+from app.infrastructure.tracing import use_context
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts: int, base_seconds: float, max_seconds: float) -> float:
+    """Backoff exponencial com jitter, para as réplicas não tentarem todas juntas."""
+    delay = min(max_seconds, base_seconds * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def dispatcher_enabled() -> bool:
+    return os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"
+
+
+class _DispatcherSettings:
+
+    def __init__(self):
+        self.batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+        self.poll_interval = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", 1))
+        self.lease_seconds = float(os.getenv("OUTBOX_LEASE_SECONDS", 30))
+        self.max_attempts = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+        self.retry_base_seconds = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", 1))
+        self.retry_max_seconds = float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", 300))
+
+    def failure(self, record: dict, error: Exception) -> tuple[int, str, bool]:
+        attempts = record.get("attempts", 0) + 1
+        return attempts, f"{type(error).__name__}: {error}", attempts >= self.max_attempts
+
+    def next_attempt_at(self, attempts: int):
+        return utcnow() + timedelta(seconds=retry_delay(attempts, self.retry_base_seconds, self.retry_max_seconds))
+
+
+class OutboxDispatcher(_DispatcherSettings):
+    """Drena o outbox em lotes para o exchange comment_notifications, em uma thread própria.
+
+    Na primeira falha de publicação o restante do lote é devolvido sem contar
+    tentativa: se o RabbitMQ está fora, só um registro por ciclo paga o backoff.
+    Registros que esgotam OUTBOX_MAX_ATTEMPTS ficam com status "dead" na
+    coleção para inspeção.
+    """
+
+    def __init__(self, outbox: MongoOutbox, publisher_provider: Callable[[], Publisher]):
+        super().__init__()
+        self.outbox = outbox
+        self.publisher_provider = publisher_provider
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def dispatch_once(self) -> int:
+        records = self.outbox.claim(self.batch_size, self.lease_seconds)
+        if not records:
+            return 0
+
+        try:
+            publisher = self.publisher_provider()
+        except Exception as e:
+            # Sem publisher (RabbitMQ indisponível no startup, por exemplo)
+            self._fail(records[0], e)
+            self.outbox.release([record["_id"] for record in records[1:]])
+            return 0
+
+        published = []
+        try:
+            for index, record in enumerate(records):
+                try:
+                    with use_context(record.get("trace_context")):
+                        publisher.publish_comment(record["payload"])
+                except Exception as e:
+                    self._fail(record, e)
+                    self.outbox.release([pending["_id"] for pending in records[index + 1:]])
+                    break
+                published.append(record["_id"])
+        finally:
+            self.outbox.complete(published)
+        return len(published)
+
+    def _fail(self, record: dict, error: Exception):
+        attempts, message, exhausted = self.failure(record, error)
+        if exhausted:
+            logger.error(f"[OUTBOX] Notificação {record['_id']} enviada para dead-letter após {attempts} tentativas: {message}")
+            self.outbox.dead_letter(record["_id"], attempts, message)
+        else:
+            logger.warning(f"[OUTBOX] Falha ao publicar {record['_id']} (tentativa {attempts}): {message}")
+            self.outbox.reschedule(record["_id"], attempts, message, self.next_attempt_at(attempts))
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                dispatched = self.dispatch_once()
+            except Exception as e:
+                logger.error(f"[OUTBOX] Erro ao drenar o outbox: {e}")
+                dispatched = 0
+            # Lote cheio indica fila acumulada: segue drenando sem esperar
+            if dispatched < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class AsyncOutboxDispatcher(_DispatcherSettings):
+
+    def __init__(self, outbox: MotorOutbox, publisher_provider: Callable[[], Awaitable[AsyncPublisher]]):
+        super().__init__()
+        self.outbox = outbox
+        self.publisher_provider = publisher_provider
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def dispatch_once(self) -> int:
+        records = await self.outbox.claim(self.batch_size, self.lease_seconds)
+        if not records:
+            return 0
+
+        try:
+            publisher = await self.publisher_provider()
+        except Exception as e:
+            await self._fail(records[0], e)
+            await self.outbox.release([record["_id"] for record in records[1:]])
+            return 0
+
+        published = []
+        try:
+            for index, record in enumerate(records):
+                try:
+                    with use_context(record.get("trace_context")):
+                        await publisher.publish_comment(record["payload"])
+                except Exception as e:
+                    await self._fail(record, e)
+                    await self.outbox.release([pending["_id"] for pending in records[index + 1:]])
+                    break
+                published.append(record["_id"])
+        finally:
+            await self.outbox.complete(published)
+        return len(published)
+
+    async def _fail(self, record: dict, error: Exception):
+        attempts, message, exhausted = self.failure(record, error)
+        if exhausted:
+            logger.error(f"[OUTBOX] Notificação {record['_id']} enviada para dead-letter após {attempts} tentativas: {message}")
+            await self.outbox.dead_letter(record["_id"], attempts, message)
+        else:
+            logger.warning(f"[OUTBOX] Falha ao publicar {record['_id']} (tentativa {attempts}): {message}")
+            await self.outbox.reschedule(record["_id"], attempts, message, self.next_attempt_at(attempts))
+
+    async def run(self):
+        while not self._stop.is_set():
+            try:
+                dispatched = await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"[OUTBOX] Erro ao drenar o outbox: {e}")
+                dispatched = 0
+            if dispatched < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+def create_dispatcher() -> OutboxDispatcher:
+    return OutboxDispatcher(MongoOutbox(get_mongo_collection(OUTBOX_COLLECTION)), get_publisher)
+
+
+def create_async_dispatcher() -> AsyncOutboxDispatcher:
+    return AsyncOutboxDispatcher(MotorOutbox(get_async_mongo_collection(OUTBOX_COLLECTION)), get_async_publisher)
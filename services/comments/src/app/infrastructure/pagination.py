@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from app.domain.comment import CommentPage, InvalidCursorError, RawCommentPage
+from app.infrastructure.comment_documents import from_document, to_raw
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING
+
+# A ordenação inclui o _id para desempatar comentários com o mesmo created_at
+KEYSET_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# Documentos por getMore nas listagens em streaming
+STREAM_BATCH_SIZE = 100
+
+
+def encode_cursor(doc: dict) -> str:
+    payload = json.dumps([doc["created_at"].isoformat(), str(doc["_id"])])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, object_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), ObjectId(object_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def keyset_query(base_query: dict, cursor: Optional[str]) -> dict:
+    """Restringe a consulta aos documentos após o cursor, na ordem de KEYSET_SORT.
+
+    Usa uma faixa sobre a chave de ordenação em vez de skip, então o custo da
+    página N é o mesmo da primeira página.
+    """
+    if not cursor:
+        return base_query
+
+    created_at, object_id = decode_cursor(cursor)
+    return keyset_after(base_query, created_at, object_id)
+
+
+def keyset_after(base_query: dict, created_at: datetime, object_id: ObjectId) -> dict:
+    """Restringe a consulta aos documentos após a chave (created_at, _id)."""
+    return {
+        **base_query,
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": object_id}},
+        ],
+    }
+
+
+def _split_page(docs: list[dict], limit: int) -> tuple[list[dict], Optional[str]]:
+    """Separa até limit + 1 documentos em página e cursor seguinte.
+
+    O documento excedente só indica que existe uma próxima página.
+    """
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1])
+    return docs, None
+
+
+def build_page(docs: list[dict], limit: int) -> CommentPage:
+    docs, next_cursor = _split_page(docs, limit)
+    return CommentPage(items=[from_document(doc) for doc in docs], next_cursor=next_cursor)
+
+
+def build_raw_page(docs: list[dict], limit: int) -> RawCommentPage:
+    docs, next_cursor = _split_page(docs, limit)
+    return RawCommentPage(items=[to_raw(doc) for doc in docs], next_cursor=next_cursor)
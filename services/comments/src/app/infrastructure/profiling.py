@@ -0,0 +1,293 @@
+"""Profiling sob demanda do serviço em execução.
+
+Os arquivos vão para PROFILING_DIR (padrão profiles/), em formatos que as
+ferramentas de flamegraph leem direto:
+
+- request-*.prof: cProfile de uma requisição, no formato do pstats
+  (snakeviz, tuna, flameprof);
+- sample-*.collapsed: amostras de pilha de todas as threads, uma pilha por
+  linha no formato "a;b;c <contagem>" (flamegraph.pl, speedscope, inferno);
+- memory-*.collapsed e memory-diff-*.collapsed: bytes alocados por pilha,
+  segundo o tracemalloc, no mesmo formato; memory-*.tracemalloc é o snapshot
+  completo, para tracemalloc.Snapshot.load.
+
+Desligado por padrão (PROFILING_ENABLED=true liga). Só os
+PROFILING_MAX_FILES arquivos mais novos (padrão 100) são mantidos.
+"""
+import cProfile
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from types import FrameType
+from typing import Callable, Optional
+
+# Limites das amostragens pedidas pela API, para uma chamada não prender o processo
+MAX_SAMPLE_SECONDS = 300
+MIN_SAMPLE_INTERVAL = 0.001
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+
+def max_profile_files() -> int:
+    return int(os.getenv("PROFILING_MAX_FILES", 100))
+
+
+def request_sample_rate() -> float:
+    """Fração das requisições perfiladas sem o header X-Profile; 0 (padrão) só perfila as pedidas."""
+    return float(os.getenv("PROFILING_REQUEST_SAMPLE_RATE", 0))
+
+
+def profile_dir() -> Path:
+    path = Path(os.getenv("PROFILING_DIR", "profiles"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def profile_path(kind: str, label: str = "", suffix: str = "") -> Path:
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    name = "-".join(part for part in (kind, timestamp, re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_")) if part)
+    return profile_dir() / f"{name}{suffix}"
+
+
+def prune_profiles(keep: Optional[int] = None) -> int:
+    """Apaga os arquivos mais antigos além dos `keep` mais novos; devolve quantos foram apagados."""
+    keep = max_profile_files() if keep is None else keep
+    files = sorted((path for path in profile_dir().iterdir() if path.is_file()),
+                   key=lambda path: path.stat().st_mtime_ns, reverse=True)
+    removed = 0
+    for path in files[keep:]:
+        # Outra thread pode ter apagado o mesmo arquivo
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def should_sample_request() -> bool:
+    rate = request_sample_rate()
+    return rate > 0 and random.random() < rate
+
+
+class RequestProfile:
+    """cProfile de uma requisição.
+
+    Um cProfile.Profile só mede a thread em que foi ligado: o perfil do event
+    loop fica em `loop` e cada trecho executado no threadpool (as rotas
+    síncronas, via profile_in_thread) ganha o seu, somados no fim. O perfil
+    do event loop inclui o que outras requisições fizeram nele no mesmo
+    intervalo.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.loop = cProfile.Profile()
+        self._threads: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def thread_profile(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        with self._lock:
+            self._threads.append(profile)
+        return profile
+
+    def dump(self) -> Path:
+        stats = pstats.Stats()
+        with self._lock:
+            profiles = [self.loop, *self._threads]
+        for profile in profiles:
+            profile.create_stats()
+            # pstats não aceita um perfil vazio, como o do event loop de uma rota síncrona rápida
+            if profile.stats:
+                stats.add(profile)
+        stats.dump_stats(self.path)
+        prune_profiles()
+        return self.path
+
+
+# Perfil da requisição atual; o contexto é copiado para o threadpool junto com a chamada da rota
+current_request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_request_profile", default=None)
+
+# Um perfil de requisição por vez: dois cProfile ligados no event loop se sobrescrevem
+request_profile_lock = threading.Lock()
+
+
+def profile_in_thread(func: Callable) -> Callable:
+    """Envolve uma função síncrona para que, no threadpool, ela entre no perfil da requisição atual."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        request_profile = current_request_profile.get()
+        if request_profile is None:
+            return func(*args, **kwargs)
+        profile = request_profile.thread_profile()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    return wrapper
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def collapse_frames(frame: Optional[FrameType]) -> list[str]:
+    """Pilha da raiz até o frame, um nome por nível."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def write_collapsed(path: Path, counts: dict[str, int]) -> Path:
+    with path.open("w", encoding="utf-8") as file:
+        for stack, count in sorted(counts.items(), key=lambda item: -item[1]):
+            file.write(f"{stack} {count}\n")
+    return path
+
+
+class SamplingProfiler:
+    """Amostra periodicamente a pilha de todas as threads, por tempo de parede.
+
+    Threads paradas (esperando I/O, lock ou trabalho no threadpool) também
+    entram nas amostras, o que mostra onde o tempo da requisição é gasto
+    esperando e não só executando.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, seconds: float, interval: float) -> tuple[Path, int]:
+        """Amostra por `seconds` segundos a cada `interval` e grava o resultado; bloqueia a thread que chama."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Sampling profiler already running")
+        try:
+            counts, samples = self._sample(min(seconds, MAX_SAMPLE_SECONDS), max(interval, MIN_SAMPLE_INTERVAL))
+            path = write_collapsed(profile_path("sample", suffix=".collapsed"), counts)
+            prune_profiles()
+            return path, samples
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float) -> tuple[dict[str, int], int]:
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        counts: dict[str, int] = {}
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = ";".join([names.get(ident, str(ident))] + collapse_frames(frame))
+                counts[stack] = counts.get(stack, 0) + 1
+            samples += 1
+            time.sleep(interval)
+        return counts, samples
+
+
+class MemoryProfiler:
+    """Snapshots do tracemalloc, cada um comparado com o anterior."""
+
+    def __init__(self):
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int):
+        # Mais frames dão pilhas mais completas no flamegraph, ao custo de mais memória por alocação
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._previous = None
+
+    def stop(self):
+        with self._lock:
+            tracemalloc.stop()
+            self._previous = None
+
+    def snapshot(self, top: int = 10) -> dict:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc is not running")
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            path = profile_path("memory", suffix=".tracemalloc")
+            snapshot.dump(str(path))
+            stats = snapshot.statistics("traceback")
+            result = {
+                "snapshot": path.name,
+                "collapsed": write_collapsed(path.with_suffix(".collapsed"),
+                                             _collapsed_sizes((stat.traceback, stat.size) for stat in stats)).name,
+                "traced_bytes": sum(stat.size for stat in stats),
+            }
+            if self._previous is not None:
+                differences = snapshot.compare_to(self._previous, "traceback")
+                diff_path = profile_dir() / path.name.replace("memory-", "memory-diff-", 1)
+                result["diff"] = write_collapsed(diff_path.with_suffix(".collapsed"), _collapsed_sizes(
+                    (stat.traceback, stat.size_diff) for stat in differences if stat.size_diff > 0)).name
+                result["top_growth"] = [
+                    {"location": str(stat.traceback[0]), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                    for stat in sorted(differences, key=lambda stat: -stat.size_diff)[:top]
+                ]
+            self._previous = snapshot
+        prune_profiles()
+        return result
+
+
+def _collapsed_sizes(stats) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for traceback, size in stats:
+        # tracemalloc guarda o frame mais recente primeiro
+        stack = ";".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback))
+        counts[stack] = counts.get(stack, 0) + size
+    return counts
+
+
+_sampling_profiler: SamplingProfiler | None = None
+_memory_profiler: MemoryProfiler | None = None
+_profilers_lock = threading.Lock()
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    global _sampling_profiler
+    if _sampling_profiler is None:
+        with _profilers_lock:
+            if _sampling_profiler is None:
+                _sampling_profiler = SamplingProfiler()
+    return _sampling_profiler
+
+
+def get_memory_profiler() -> MemoryProfiler:
+    global _memory_profiler
+    if _memory_profiler is None:
+        with _profilers_lock:
+            if _memory_profiler is None:
+                _memory_profiler = MemoryProfiler()
+    return _memory_profiler
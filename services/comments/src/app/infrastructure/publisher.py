@@ -1,9 +1,17 @@
+import asyncio
 import json
 import logging
 import os
+import queue
+import threading
 from abc import ABC, abstractmethod
 
+import aio_pika
 import pika
+from aio_pika.pool import Pool
+from app.infrastructure.metrics import observe_publish
+from app.infrastructure.tracing import publish_span
+from pika.exceptions import AMQPChannelError, AMQPConnectionError, NackError, UnroutableError
 
 logger = logging.getLogger(__name__)
 
@@ -17,31 +25,264 @@ class Publisher(ABC):
     def close(self): ...
 
 
+class AsyncPublisher(ABC):
+
+    @abstractmethod
+    async def publish_comment(self, comment: dict): ...
+
+    @abstractmethod
+    async def close(self): ...
+
+
+class _PooledChannel:
+    def __init__(self, connection, channel):
+        self.connection = connection
+        self.channel = channel
+
+    @property
+    def is_open(self) -> bool:
+        return self.connection.is_open and self.channel.is_open
+
+
 class RabbitMQPublisher(Publisher):
+    """Publisher de longa duração, compartilhado entre as requisições.
+
+    O pika não é thread-safe, então cada canal do pool tem a sua própria
+    conexão e é usado por uma única thread por vez.
+    """
+
     def __init__(self):
         host = os.getenv("RABBITMQ_HOST")
         port = int(os.getenv("RABBITMQ_PORT", 5672))
         user = os.getenv("RABBITMQ_USER")
         password = os.getenv("RABBITMQ_PASSWORD")
 
-        credentials = pika.PlainCredentials(user, password)
-        parameters = pika.ConnectionParameters(host=host, port=port, credentials=credentials)
+        self.pool_size = int(os.getenv("RABBITMQ_POOL_SIZE", 4))
+        self.acquire_timeout = float(os.getenv("RABBITMQ_ACQUIRE_TIMEOUT", 5))
+        self.confirm_delivery = os.getenv("RABBITMQ_CONFIRM_DELIVERY", "false").lower() == "true"
 
-        self.connection = pika.BlockingConnection(parameters)
-        self.channel = self.connection.channel()
+        credentials = pika.PlainCredentials(user, password)
+        self.parameters = pika.ConnectionParameters(
+            host=host,
+            port=port,
+            credentials=credentials,
+            heartbeat=int(os.getenv("RABBITMQ_HEARTBEAT", 60)),
+            blocked_connection_timeout=float(os.getenv("RABBITMQ_BLOCKED_CONNECTION_TIMEOUT", 30))
+        )
         self.exchange = "comment_notifications"
 
-        self.channel.exchange_declare(exchange=self.exchange, exchange_type='fanout', durable=True)
+        self._idle: queue.LifoQueue[_PooledChannel] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # A primeira conexão é aberta já na criação e declara o exchange uma única vez
+        self._idle.put(self._open_channel(declare_exchange=True))
+        self._created = 1
+
+    def _open_channel(self, declare_exchange: bool = False) -> _PooledChannel:
+        connection = pika.BlockingConnection(self.parameters)
+        channel = connection.channel()
+        if declare_exchange:
+            channel.exchange_declare(exchange=self.exchange, exchange_type='fanout', durable=True)
+        if self.confirm_delivery:
+            channel.confirm_delivery()
+        return _PooledChannel(connection, channel)
+
+    def _acquire(self) -> _PooledChannel:
+        if self._closed:
+            raise RuntimeError("Publisher is closed")
+
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            pooled = self._grow_or_wait()
+
+        try:
+            # Processa heartbeats e eventos pendentes acumulados enquanto o canal estava ocioso
+            pooled.connection.process_data_events(time_limit=0)
+        except AMQPConnectionError:
+            pass
+
+        if not pooled.is_open:
+            logger.warning("[RABBITMQ] Conexão ociosa perdida, reconectando...")
+            self._discard(pooled)
+            return self._replace()
+        return pooled
+
+    def _grow_or_wait(self) -> _PooledChannel:
+        with self._lock:
+            can_grow = self._created < self.pool_size
+            if can_grow:
+                self._created += 1
+        if can_grow:
+            try:
+                return self._open_channel()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty as e:
+            raise TimeoutError("No RabbitMQ channel available in the pool") from e
+
+    def _replace(self) -> _PooledChannel:
+        with self._lock:
+            self._created += 1
+        try:
+            return self._open_channel()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _release(self, pooled: _PooledChannel):
+        if self._closed or not pooled.is_open:
+            self._discard(pooled)
+            return
+        self._idle.put(pooled)
+
+    def _discard(self, pooled: _PooledChannel):
+        with self._lock:
+            self._created -= 1
+        try:
+            if pooled.connection.is_open:
+                pooled.connection.close()
+        except Exception as e:
+            logger.debug(f"[RABBITMQ] Erro ao fechar conexão descartada: {e}")
 
     def publish_comment(self, comment: dict):
-        message = json.dumps(comment).encode()
-        self.channel.basic_publish(
-            exchange=self.exchange,
-            routing_key="",
-            body=message,
-            properties=pika.BasicProperties(content_type="application/json")
+        # O traceparent vai nos headers da mensagem para o consumidor continuar o trace
+        with observe_publish(), publish_span(self.exchange) as headers:
+            self._publish(json.dumps(comment).encode(), headers)
+
+    def _publish(self, message: bytes, headers: dict):
+        # Uma nova tentativa com conexão nova caso a atual tenha caído
+        for attempt in range(2):
+            pooled = self._acquire()
+            try:
+                pooled.channel.basic_publish(
+                    exchange=self.exchange,
+                    routing_key="",
+                    body=message,
+                    properties=pika.BasicProperties(content_type="application/json", headers=headers or None)
+                )
+            except (NackError, UnroutableError):
+                self._release(pooled)
+                logger.error("[RABBITMQ] Notificação rejeitada pelo broker")
+                raise
+            except (AMQPConnectionError, AMQPChannelError) as e:
+                self._discard(pooled)
+                if attempt:
+                    raise
+                logger.warning(f"[RABBITMQ] Falha ao publicar, reconectando: {e}")
+                continue
+            self._release(pooled)
+            logger.info("[RABBITMQ] Notificação publicada")
+            return
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+
+
+# Publisher compartilhado pelo processo inteiro, criado sob demanda
+_publisher: RabbitMQPublisher | None = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> RabbitMQPublisher:
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = RabbitMQPublisher()
+    return _publisher
+
+
+def close_publisher():
+    global _publisher
+    with _publisher_lock:
+        if _publisher is not None:
+            _publisher.close()
+        _publisher = None
+
+
+class AioPikaPublisher(AsyncPublisher):
+    """Versão assíncrona do publisher, usada quando COMMENTS_IO_MODE=async.
+
+    A conexão robusta do aio-pika já trata heartbeats e reconexão; os canais
+    ficam em um pool e são reaproveitados entre as publicações.
+    """
+
+    def __init__(self):
+        self.host = os.getenv("RABBITMQ_HOST")
+        self.port = int(os.getenv("RABBITMQ_PORT", 5672))
+        self.user = os.getenv("RABBITMQ_USER")
+        self.password = os.getenv("RABBITMQ_PASSWORD")
+        self.heartbeat = int(os.getenv("RABBITMQ_HEARTBEAT", 60))
+        self.pool_size = int(os.getenv("RABBITMQ_POOL_SIZE", 4))
+        self.confirm_delivery = os.getenv("RABBITMQ_CONFIRM_DELIVERY", "false").lower() == "true"
+        self.exchange = "comment_notifications"
+
+        self.connection: aio_pika.abc.AbstractRobustConnection | None = None
+        self.channel_pool: Pool | None = None
+
+    async def connect(self):
+        self.connection = await aio_pika.connect_robust(
+            host=self.host,
+            port=self.port,
+            login=self.user,
+            password=self.password,
+            heartbeat=self.heartbeat
         )
+        self.channel_pool = Pool(self._open_channel, max_size=self.pool_size)
+
+        async with self.channel_pool.acquire() as channel:
+            await channel.declare_exchange(self.exchange, aio_pika.ExchangeType.FANOUT, durable=True)
+
+    async def _open_channel(self) -> aio_pika.abc.AbstractChannel:
+        return await self.connection.channel(publisher_confirms=self.confirm_delivery)
+
+    async def publish_comment(self, comment: dict):
+        with observe_publish(), publish_span(self.exchange) as headers:
+            message = aio_pika.Message(body=json.dumps(comment).encode(), content_type="application/json", headers=headers)
+            async with self.channel_pool.acquire() as channel:
+                exchange = await channel.get_exchange(self.exchange, ensure=False)
+                await exchange.publish(message, routing_key="")
         logger.info("[RABBITMQ] Notificação publicada")
 
-    def close(self):
-        self.connection.close()
+    async def close(self):
+        if self.channel_pool is not None:
+            await self.channel_pool.close()
+            self.channel_pool = None
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+
+_async_publisher: AioPikaPublisher | None = None
+_async_publisher_lock = asyncio.Lock()
+
+
+async def get_async_publisher() -> AioPikaPublisher:
+    global _async_publisher
+    if _async_publisher is None:
+        async with _async_publisher_lock:
+            if _async_publisher is None:
+                publisher = AioPikaPublisher()
+                await publisher.connect()
+                _async_publisher = publisher
+    return _async_publisher
+
+
+async def close_async_publisher():
+    global _async_publisher
+    if _async_publisher is not None:
+        await _async_publisher.close()
+    _async_publisher = None
@@ -0,0 +1,155 @@
+"""Limite de escrita por usuário com token bucket.
+
+Cada rota de escrita tem uma regra "capacidade/segundos": o balde começa
+cheio com `capacidade` fichas e é reabastecido continuamente até encher de
+novo em `segundos`. Cada requisição gasta uma ficha; o POST /comments/bulk
+gasta também uma ficha de "comments:create" por comentário. Sem fichas a
+rota responde 429 com Retry-After (ver app.routes.rate_limit).
+
+O backend "memory" limita cada réplica separadamente; o "mongo" guarda os
+baldes em uma coleção e aplica o mesmo limite em todas as réplicas.
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.infrastructure.mongo import get_mongo_collection
+from pymongo import ReturnDocument
+
+RATE_LIMITS_COLLECTION = "rate_limits"
+
+# Regras padrão por rota, sobrescritas por RATE_LIMIT_<NOME> (ex.: RATE_LIMIT_COMMENTS_CREATE=20/60)
+DEFAULT_RULES = {
+    "comments:create": "10/60",
+    "comments:bulk": "2/60",
+    "comments:update": "30/60",
+    "comments:delete": "30/60",
+}
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    capacity: int
+    per_seconds: float
+
+    @property
+    def refill_rate(self) -> float:
+        """Fichas repostas por segundo."""
+        return self.capacity / self.per_seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimitRule":
+        try:
+            capacity, per_seconds = value.split("/")
+            rule = cls(int(capacity), float(per_seconds))
+        except ValueError as e:
+            raise ValueError(f"Invalid rate limit rule {value!r}, expected <capacity>/<seconds>") from e
+        if rule.capacity < 1 or rule.per_seconds <= 0:
+            raise ValueError(f"Invalid rate limit rule {value!r}")
+        return rule
+
+
+def rate_limit_rule(name: str) -> RateLimitRule:
+    env_name = "RATE_LIMIT_" + name.upper().replace(":", "_")
+    return RateLimitRule.parse(os.getenv(env_name, DEFAULT_RULES[name]))
+
+
+class RateLimitBackend(ABC):
+
+    @abstractmethod
+    def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> float:
+        """Gasta `cost` fichas do balde `key`.
+
+        Devolve 0 se a requisição foi aceita ou, se não há fichas, quantos
+        segundos faltam para haver.
+        """
+
+
+def _retry_after(tokens: float, rule: RateLimitRule, cost: int) -> float:
+    return 0.0 if tokens >= cost else (cost - tokens) / rule.refill_rate
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Baldes na memória do processo, com no máximo max_keys usuários.
+
+    Um balde descartado por LRU volta cheio; como ele só é descartado depois
+    de ficar sem uso, na prática já estaria cheio de novo.
+    """
+
+    def __init__(self, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> float:
+        with self._lock:
+            now = self._clock()
+            tokens, updated_at = self._buckets.pop(key, (rule.capacity, now))
+            tokens = min(rule.capacity, tokens + (now - updated_at) * rule.refill_rate)
+            retry_after = _retry_after(tokens, rule, cost)
+            if retry_after == 0:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+def consume_pipeline(rule: RateLimitRule, cost: int = 1) -> list[dict]:
+    """Update em pipeline que reabastece e gasta as fichas em uma única operação atômica.
+
+    Usa o relógio do servidor ($$NOW), então réplicas com relógios diferentes
+    compartilham o mesmo balde sem divergir.
+    """
+    elapsed_seconds = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+    refilled = {"$add": [{"$ifNull": ["$tokens", rule.capacity]}, {"$multiply": [elapsed_seconds, rule.refill_rate]}]}
+    return [
+        {"$set": {
+            "tokens": {"$min": [rule.capacity, refilled]},
+            "updated_at": "$$NOW",
+            # Um balde parado por per_seconds já está cheio; o índice TTL o remove
+            "expires_at": {"$add": ["$$NOW", int(rule.per_seconds * 1000)]},
+        }},
+        {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+        {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]}}},
+    ]
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def consume(self, key: str, rule: RateLimitRule, cost: int = 1) -> float:
+        doc = self.collection.find_one_and_update(
+            {"_id": key}, consume_pipeline(rule, cost), upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return 0.0 if doc["allowed"] else _retry_after(doc["tokens"], rule, cost)
+
+
+_backend: RateLimitBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def rate_limit_enabled() -> bool:
+    return os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+
+def get_rate_limit_backend() -> Optional[RateLimitBackend]:
+    """Backend compartilhado pelo processo, ou None com RATE_LIMIT_ENABLED=false."""
+    global _backend
+    if not rate_limit_enabled():
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if os.getenv("RATE_LIMIT_BACKEND", "memory").lower() == "mongo":
+                    _backend = MongoRateLimitBackend(get_mongo_collection(RATE_LIMITS_COLLECTION))
+                else:
+                    _backend = InMemoryRateLimitBackend(max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", 10000)))
+    return _backend
@@ -0,0 +1,195 @@
+"""Contadores agregados dos comentários (total, por autor e por dia).
+
+Os documentos da coleção comment_rollups são mantidos com $inc a cada
+escrita, então ler as estatísticas não percorre os comentários. Se os
+contadores divergirem (escritas antigas, falhas entre as operações), eles
+podem ser recalculados a partir da coleção comments:
+
+    python -m app.infrastructure.rollups [--dry-run]
+"""
+import argparse
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from app.domain.comment import CommentStats, DailyCommentCount, UserCommentCount
+from app.infrastructure.archive import ARCHIVE_COLLECTION
+from app.infrastructure.mongo import get_mongo_database
+from app.infrastructure.vault import load_secrets
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_COLLECTION = "comment_rollups"
+
+ALL_KEY = "all"
+
+
+def user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def day_key(day: date) -> str:
+    return f"day:{day.isoformat()}"
+
+
+def _utc_day(created_at: datetime) -> date:
+    # O pymongo devolve datetimes sem fuso, já em UTC
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _rollup_keys(doc: dict) -> list[str]:
+    return [ALL_KEY, user_key(doc["user_id"]), day_key(_utc_day(doc["created_at"]))]
+
+
+def rollup_changes(created: Iterable[dict] = (), removed: Iterable[dict] = ()) -> dict[str, Counter]:
+    """Incrementos por documento de rollup para os comentários criados e removidos."""
+    changes: dict[str, Counter] = defaultdict(Counter)
+    for docs, sign in ((created, 1), (removed, -1)):
+        for doc in docs:
+            for key in _rollup_keys(doc):
+                changes[key]["count"] += sign
+                changes[key]["public"] += sign if doc["is_public"] else 0
+    return changes
+
+
+def visibility_changes(before: dict, after: dict) -> dict[str, Counter]:
+    """Incrementos de uma edição: só a contagem de públicos pode mudar."""
+    if before["is_public"] == after["is_public"]:
+        return {}
+    delta = 1 if after["is_public"] else -1
+    return {key: Counter(public=delta) for key in _rollup_keys(after)}
+
+
+def _inc_operations(changes: dict[str, Counter]) -> list[UpdateOne]:
+    operations = []
+    for key, fields in changes.items():
+        increments = {name: value for name, value in fields.items() if value}
+        if increments:
+            operations.append(UpdateOne({"_id": key}, {"$inc": increments}, upsert=True))
+    return operations
+
+
+def stats_keys(days: int, user_id: Optional[str], today: date) -> tuple[list[str], list[date]]:
+    window = [today - timedelta(days=offset) for offset in range(days)]
+    keys = [ALL_KEY] + [day_key(day) for day in window]
+    if user_id:
+        keys.append(user_key(user_id))
+    return keys, window
+
+
+def build_stats(docs: Iterable[dict], window: list[date], user_id: Optional[str]) -> CommentStats:
+    by_key = {doc["_id"]: doc for doc in docs}
+    totals = by_key.get(ALL_KEY, {})
+    daily = []
+    for day in window:
+        doc = by_key.get(day_key(day), {})
+        daily.append(DailyCommentCount(date=day, count=doc.get("count", 0), public=doc.get("public", 0)))
+    user = None
+    if user_id:
+        doc = by_key.get(user_key(user_id), {})
+        user = UserCommentCount(user_id=user_id, count=doc.get("count", 0), public=doc.get("public", 0))
+    return CommentStats(total=totals.get("count", 0), public=totals.get("public", 0), days=daily, user=user)
+
+
+def today_utc() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class MongoRollupStore:
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def apply(self, changes: dict[str, Counter], session=None):
+        operations = _inc_operations(changes)
+        if operations:
+            self.collection.bulk_write(operations, ordered=False, session=session)
+
+    def get_stats(self, days: int, user_id: Optional[str] = None) -> CommentStats:
+        keys, window = stats_keys(days, user_id, today_utc())
+        return build_stats(self.collection.find({"_id": {"$in": keys}}), window, user_id)
+
+
+class MotorRollupStore:
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def apply(self, changes: dict[str, Counter], session=None):
+        operations = _inc_operations(changes)
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False, session=session)
+
+    async def get_stats(self, days: int, user_id: Optional[str] = None) -> CommentStats:
+        keys, window = stats_keys(days, user_id, today_utc())
+        docs = await self.collection.find({"_id": {"$in": keys}}).to_list(length=len(keys))
+        return build_stats(docs, window, user_id)
+
+
+# Chave de cada família de contadores (total, por autor, por dia), calculada no servidor
+REBUILD_KEYS = [
+    {"$literal": ALL_KEY},
+    {"$concat": ["user:", "$user_id"]},
+    {"$concat": ["day:", {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}]},
+]
+
+
+def rebuild_pipeline(key_expression: dict, rebuilt_at: Optional[datetime] = None) -> list[dict]:
+    pipeline = [
+        # Comentários arquivados continuam contando
+        {"$unionWith": {"coll": ARCHIVE_COLLECTION}},
+        {"$group": {
+            "_id": key_expression,
+            "count": {"$sum": 1},
+            "public": {"$sum": {"$cond": ["$is_public", 1, 0]}},
+        }},
+    ]
+    if rebuilt_at is not None:
+        pipeline += [
+            {"$set": {"rebuilt_at": rebuilt_at}},
+            {"$merge": {"into": ROLLUPS_COLLECTION, "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ]
+    return pipeline
+
+
+def rebuild_rollups(database, dry_run: bool = False) -> int:
+    """Recalcula os contadores (comments + comments_archive) com uma agregação por família e devolve quantos existem.
+
+    Os documentos são substituídos via $merge e os que não foram regravados
+    (autores ou dias sem comentários) são removidos no final, então as
+    leituras nunca veem a coleção vazia. Um contador criado por uma escrita
+    concorrente durante a reconstrução também é removido; rode de novo se
+    houver tráfego de escrita.
+    """
+    comments = database["comments"]
+    if dry_run:
+        total = sum(len(list(comments.aggregate(rebuild_pipeline(key)))) for key in REBUILD_KEYS)
+        logger.info(f"[MONGO][dry-run] {ROLLUPS_COLLECTION}: {total} contadores seriam gravados")
+        return total
+
+    rebuilt_at = datetime.now(timezone.utc)
+    for key in REBUILD_KEYS:
+        comments.aggregate(rebuild_pipeline(key, rebuilt_at))
+    rollups = database[ROLLUPS_COLLECTION]
+    removed = rollups.delete_many({"rebuilt_at": {"$ne": rebuilt_at}}).deleted_count
+    total = rollups.count_documents({})
+    logger.info(f"[MONGO] {ROLLUPS_COLLECTION}: {total} contadores recalculados, {removed} obsoletos removidos")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula os contadores de comment_rollups a partir da coleção comments.")
+    parser.add_argument("--dry-run", action="store_true", help="apenas calcula quantos contadores seriam gravados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_secrets()
+    rebuild_rollups(get_mongo_database(), dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Busca textual nos comentários pelo índice de texto de message e user_name.
+
+O $text resolve a busca pelo índice (ver app.infrastructure.indexes), então
+o custo depende de quantos comentários contêm os termos e não do tamanho da
+coleção. Os resultados vêm ordenados por relevância e paginados por keyset
+sobre (score, _id), como as listagens.
+"""
+import base64
+import json
+import re
+from typing import Optional
+
+from app.domain.comment import CommentSearchHit, CommentSearchPage, InvalidCursorError
+from bson import ObjectId
+from bson.errors import InvalidId
+
+SEARCH_SORT = {"score": -1, "_id": -1}
+
+SNIPPET_LENGTH = 160
+# Caracteres mantidos antes do primeiro termo encontrado
+SNIPPET_CONTEXT = 40
+
+
+def encode_search_cursor(doc: dict) -> str:
+    payload = json.dumps([doc["score"], str(doc["_id"])])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, object_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(score), ObjectId(object_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def visibility_filter(viewer_id: Optional[str]) -> dict:
+    """Comentários públicos e, para um usuário autenticado, também os privados dele."""
+    if viewer_id is None:
+        return {"is_public": True}
+    return {"$or": [{"is_public": True}, {"user_id": viewer_id}]}
+
+
+def search_pipeline(text: str, viewer_id: Optional[str], limit: int, cursor: Optional[str] = None) -> list[dict]:
+    # O $match com $text precisa ser o primeiro estágio para usar o índice
+    pipeline = [
+        {"$match": {"$text": {"$search": text}, **visibility_filter(viewer_id)}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if cursor:
+        score, object_id = decode_search_cursor(cursor)
+        pipeline.append({"$match": {"$or": [{"score": {"$lt": score}}, {"score": score, "_id": {"$lt": object_id}}]}})
+    pipeline += [{"$sort": SEARCH_SORT}, {"$limit": limit + 1}]
+    return pipeline
+
+
+def search_terms(text: str) -> list[str]:
+    """Palavras da busca, sem as negadas com '-' (que não aparecem nos resultados)."""
+    terms = []
+    for token in re.findall(r'-?"[^"]*"|\S+', text):
+        if not token.startswith("-"):
+            terms.extend(re.findall(r"\w+", token))
+    return terms
+
+
+def make_snippet(message: str, terms: list[str], length: int = SNIPPET_LENGTH) -> str:
+    """Trecho da mensagem em torno da primeira ocorrência de um dos termos.
+
+    O índice aplica stemming, então um resultado pode não conter o termo
+    literalmente; nesse caso o trecho é o início da mensagem.
+    """
+    if len(message) <= length:
+        return message
+    lowered = message.lower()
+    positions = [position for position in (lowered.find(term.lower()) for term in terms) if position >= 0]
+    start = max(0, min(positions) - SNIPPET_CONTEXT) if positions else 0
+    if start > 0:
+        # Recua até o início da palavra
+        start = message.rfind(" ", 0, start) + 1
+    end = min(len(message), start + length)
+    if end < len(message):
+        space = message.rfind(" ", start, end)
+        end = space if space > start else end
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(message) else ""
+    return prefix + message[start:end].strip() + suffix
+
+
+def to_search_hit(doc: dict, terms: list[str]) -> CommentSearchHit:
+    doc["id"] = str(doc.pop("_id"))
+    return CommentSearchHit(**doc, snippet=make_snippet(doc["message"], terms))
+
+
+def build_search_page(docs: list[dict], text: str, limit: int) -> CommentSearchPage:
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_search_cursor(docs[-1])
+    terms = search_terms(text)
+    return CommentSearchPage(items=[to_search_hit(doc, terms) for doc in docs], next_cursor=next_cursor)
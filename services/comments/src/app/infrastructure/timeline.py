@@ -0,0 +1,243 @@
+"""Réplica em memória dos comentários públicos mais novos.
+
+A primeira página de /comments/all_public é de longe a leitura mais comum e
+só precisa dos comentários mais recentes. A timeline guarda os N comentários
+públicos mais novos, ordenados pela mesma chave (created_at, _id) da
+paginação por keyset, e responde qualquer página que caiba nela sem ir ao
+banco; páginas mais antigas continuam no repositório.
+
+Ela é carregada do banco na subida e atualizada pelas escritas do próprio
+processo (ver CommentService). Escritas de outras réplicas aparecem na versão
+do escopo público, que as rotas já leem para o ETag: cada escrita pública
+incrementa essa versão em exatamente 1, então a timeline sabe a versão que
+deveria ver e, se a lida for outra, é recarregada antes da próxima página.
+"""
+import os
+import threading
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.domain.comment import Comment, CommentPage, RawCommentPage
+from app.infrastructure.pagination import decode_cursor, encode_cursor
+
+DEFAULT_TIMELINE_SIZE = 500
+
+
+def _as_stored(comment: Comment) -> Comment:
+    # O MongoDB devolve created_at sem fuso e com precisão de milissegundos; um comentário recém-criado
+    # precisa ficar igual ao que a mesma página lida do banco traria, inclusive no cursor
+    created_at = comment.created_at
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    created_at = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+    if created_at == comment.created_at:
+        return comment
+    return comment.model_copy(update={"created_at": created_at})
+
+
+def _key(comment: Comment) -> tuple[datetime, str]:
+    # ids são ObjectIds em hexadecimal de tamanho fixo: a ordem das strings é a dos ObjectIds
+    return comment.created_at, comment.id
+
+
+class PublicTimeline:
+    """Os `capacity` comentários públicos mais novos, do mais antigo para o mais novo.
+
+    `version` é a versão do escopo público que o conteúdo reflete. Enquanto a
+    timeline não foi carregada ou ficou para trás (`stale`), page() devolve
+    None e a leitura vai para o repositório.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_TIMELINE_SIZE):
+        self.capacity = capacity
+        self._keys: List[tuple[datetime, str]] = []
+        self._comments: List[Comment] = []
+        self._raw: List[dict] = []
+        self._lock = threading.Lock()
+        self.version: Optional[int] = None
+        # Se a timeline tem todos os comentários públicos, e não só os mais novos
+        self.complete = False
+        self.stale = False
+        self._reloading = False
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def claim_reload(self) -> bool:
+        """Reserva a recarga se ela é necessária e ninguém está recarregando; quem recebe True chama load()."""
+        with self._lock:
+            if self._reloading or (self.version is not None and not self.stale):
+                return False
+            self._reloading = True
+            return True
+
+    def release_reload(self):
+        with self._lock:
+            self._reloading = False
+
+    def load(self, comments: List[Comment], version: int):
+        """Substitui o conteúdo pelos comentários públicos mais novos, do mais novo para o mais antigo.
+
+        Recebe até capacity + 1 comentários: o excedente só indica que há
+        comentários mais antigos fora da timeline.
+        """
+        newest = [_as_stored(comment) for comment in comments[:self.capacity]]
+        newest.reverse()
+        with self._lock:
+            self._keys = [_key(comment) for comment in newest]
+            self._comments = newest
+            self._raw = [comment.model_dump() for comment in newest]
+            self.version = version
+            self.complete = len(comments) <= self.capacity
+            self.stale = False
+            self._reloading = False
+            self.reloads += 1
+
+    def observe(self, version: int):
+        """Registra a versão pública lida do banco; outra versão significa escritas que a timeline não viu."""
+        with self._lock:
+            if self.version is not None and version != self.version:
+                self.stale = True
+
+    def add(self, comments: List[Comment]):
+        """Aplica comentários públicos gravados por este processo numa única escrita (uma versão)."""
+        with self._lock:
+            if self.version is None:
+                return
+            self.version += 1
+            for comment in comments:
+                self._insert(_as_stored(comment))
+
+    def update(self, comment: Comment):
+        """Aplica uma edição feita por este processo."""
+        with self._lock:
+            if self.version is None:
+                return
+            index = self._index(comment.id)
+            if comment.is_public:
+                # Público depois da edição: o escopo público mudou, esteja o comentário na timeline ou não
+                self.version += 1
+                if index is not None:
+                    # created_at não muda na edição: a posição continua a mesma
+                    self._comments[index] = _as_stored(comment)
+                    self._raw[index] = self._comments[index].model_dump()
+                else:
+                    self._insert(_as_stored(comment))
+            else:
+                self._forget(index)
+
+    def remove(self, comment_id: str, is_public: bool):
+        """Aplica uma remoção feita por este processo; comentários privados não estão na timeline."""
+        with self._lock:
+            if self.version is None or is_public is False:
+                return
+            self._forget(self._index(comment_id))
+
+    def _forget(self, index: Optional[int]):
+        if index is not None:
+            # Estava na timeline, logo era público
+            self.version += 1
+            self._remove_at(index)
+        elif not self.complete:
+            # Pode ter sido um comentário público mais antigo que a timeline: a versão esperada é desconhecida
+            self.stale = True
+
+    def _index(self, comment_id: str) -> Optional[int]:
+        for index, comment in enumerate(self._comments):
+            if comment.id == comment_id:
+                return index
+        return None
+
+    def _insert(self, comment: Comment):
+        key = _key(comment)
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            self._comments[index] = comment
+            self._raw[index] = comment.model_dump()
+            return
+        # Mais antigo que toda a timeline: pode haver comentários entre ele e ela que não estão aqui
+        if index == 0 and not self.complete:
+            return
+        self._keys.insert(index, key)
+        self._comments.insert(index, comment)
+        self._raw.insert(index, comment.model_dump())
+        while len(self._keys) > self.capacity:
+            self._remove_at(0)
+            self.complete = False
+
+    def _remove_at(self, index: int):
+        del self._keys[index]
+        del self._comments[index]
+        del self._raw[index]
+
+    def _bounds(self, limit: int, cursor: Optional[str]) -> Optional[tuple[int, int, Optional[str]]]:
+        # Devolve o intervalo [start, end) da página e o próximo cursor, ou None se ela não cabe na timeline
+        if self.version is None or self.stale:
+            return None
+        end = len(self._keys)
+        if cursor:
+            created_at, object_id = decode_cursor(cursor)
+            if created_at.tzinfo is not None:
+                return None
+            end = bisect_left(self._keys, (created_at, str(object_id)))
+        if end > limit:
+            start = end - limit
+            last = self._comments[start]
+            return start, end, encode_cursor({"created_at": last.created_at, "_id": last.id})
+        if self.complete:
+            return 0, end, None
+        return None
+
+    def page(self, limit: int, cursor: Optional[str] = None) -> Optional[CommentPage]:
+        with self._lock:
+            bounds = self._bounds(limit, cursor)
+            if bounds is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            start, end, next_cursor = bounds
+            return CommentPage(items=self._comments[start:end][::-1], next_cursor=next_cursor)
+
+    def raw_page(self, limit: int, cursor: Optional[str] = None) -> Optional[RawCommentPage]:
+        with self._lock:
+            bounds = self._bounds(limit, cursor)
+            if bounds is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            start, end, next_cursor = bounds
+            return RawCommentPage(items=self._raw[start:end][::-1], next_cursor=next_cursor)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._keys),
+                "capacity": self.capacity,
+                "version": self.version,
+                "complete": self.complete,
+                "stale": self.stale,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Timeline compartilhada pelo processo inteiro
+_public_timeline: PublicTimeline | None = None
+_timeline_lock = threading.Lock()
+
+
+def timeline_enabled() -> bool:
+    return os.getenv("COMMENTS_TIMELINE_ENABLED", "true").lower() == "true"
+
+
+def get_public_timeline() -> PublicTimeline:
+    global _public_timeline
+    if _public_timeline is None:
+        with _timeline_lock:
+            if _public_timeline is None:
+                _public_timeline = PublicTimeline(capacity=int(os.getenv("COMMENTS_TIMELINE_SIZE", DEFAULT_TIMELINE_SIZE)))
+    return _public_timeline
@@ -0,0 +1,197 @@
+from typing import AsyncIterator, Iterator, List, Optional
+
+from app.domain.comment import (DEFAULT_PAGE_SIZE, DEFAULT_STATS_DAYS, AsyncCommentRepository, Comment, CommentPage,
+                                CommentRepository, CommentSearchPage, CommentStats, DeletedComment, IdempotencyKey,
+                                RawCommentPage)
+from app.infrastructure.tracing import tracer
+
+DB_ATTRIBUTES = {"db.system": "mongodb"}
+
+
+def _span(method: str):
+    return tracer.start_as_current_span(f"CommentRepository.{method}", attributes=DB_ATTRIBUTES)
+
+
+def _traced_stream(method: str, stream: Iterator[Comment]) -> Iterator[Comment]:
+    # O span cobre a iteração inteira, não só a criação do cursor; ele não vira o span atual porque
+    # o streaming alterna com o envio da resposta
+    span = tracer.start_span(f"CommentRepository.{method}", attributes=DB_ATTRIBUTES)
+    count = 0
+    try:
+        for comment in stream:
+            count += 1
+            yield comment
+    finally:
+        stream.close()
+        span.set_attribute("comments.count", count)
+        span.end()
+
+
+async def _traced_async_stream(method: str, stream: AsyncIterator[Comment]) -> AsyncIterator[Comment]:
+    span = tracer.start_span(f"CommentRepository.{method}", attributes=DB_ATTRIBUTES)
+    count = 0
+    try:
+        async for comment in stream:
+            count += 1
+            yield comment
+    finally:
+        await stream.aclose()
+        span.set_attribute("comments.count", count)
+        span.end()
+
+
+class TracedCommentRepository(CommentRepository):
+    """Abre um span por chamada ao repositório, que fica dentro do span da requisição.
+
+    Fica por baixo do CachedCommentRepository: cada span é uma ida ao MongoDB.
+    """
+
+    def __init__(self, repository: CommentRepository):
+        self.repository = repository
+
+    def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        with _span("insert"):
+            return self.repository.insert(comment, notification)
+
+    def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                          key: IdempotencyKey) -> tuple[Comment, bool]:
+        with _span("insert_idempotent"):
+            return self.repository.insert_idempotent(comment, notification, key)
+
+    def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                    ordered: bool = True) -> List[Optional[str]]:
+        with _span("insert_many") as span:
+            span.set_attribute("comments.count", len(comments))
+            return self.repository.insert_many(comments, notifications, ordered)
+
+    def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        with _span("list_public"):
+            return self.repository.list_public(limit=limit, cursor=cursor)
+
+    def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        with _span("list_by_user"):
+            return self.repository.list_by_user(user_id, limit=limit, cursor=cursor)
+
+    def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        with _span("list_public_raw"):
+            return self.repository.list_public_raw(limit=limit, cursor=cursor)
+
+    def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        with _span("list_by_user_raw"):
+            return self.repository.list_by_user_raw(user_id, limit=limit, cursor=cursor)
+
+    def stream_public(self, cursor: Optional[str] = None) -> Iterator[Comment]:
+        # A chamada ao repositório fica fora do gerador: um cursor inválido continua falhando antes da resposta
+        return _traced_stream("stream_public", self.repository.stream_public(cursor=cursor))
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return _traced_stream("stream_by_user", self.repository.stream_by_user(user_id, cursor=cursor))
+
+    def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+               cursor: Optional[str] = None) -> CommentSearchPage:
+        with _span("search"):
+            return self.repository.search(text, viewer_id, limit=limit, cursor=cursor)
+
+    def get_public_version(self) -> int:
+        with _span("get_public_version"):
+            return self.repository.get_public_version()
+
+    def get_user_version(self, user_id: str) -> int:
+        with _span("get_user_version"):
+            return self.repository.get_user_version(user_id)
+
+    def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        with _span("get_stats"):
+            return self.repository.get_stats(days, user_id)
+
+    def get_by_id(self, comment_id: str) -> Comment:
+        with _span("get_by_id"):
+            return self.repository.get_by_id(comment_id)
+
+    def delete(self, comment_id: str) -> Optional[DeletedComment]:
+        with _span("delete"):
+            return self.repository.delete(comment_id)
+
+    def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        with _span("delete_owned"):
+            return self.repository.delete_owned(comment_id, user_id)
+
+    def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        with _span("update_owned"):
+            return self.repository.update_owned(comment_id, user_id, changes, expected_version)
+
+
+class TracedAsyncCommentRepository(AsyncCommentRepository):
+
+    def __init__(self, repository: AsyncCommentRepository):
+        self.repository = repository
+
+    async def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        with _span("insert"):
+            return await self.repository.insert(comment, notification)
+
+    async def insert_idempotent(self, comment: Comment, notification: Optional[dict],
+                                key: IdempotencyKey) -> tuple[Comment, bool]:
+        with _span("insert_idempotent"):
+            return await self.repository.insert_idempotent(comment, notification, key)
+
+    async def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                          ordered: bool = True) -> List[Optional[str]]:
+        with _span("insert_many") as span:
+            span.set_attribute("comments.count", len(comments))
+            return await self.repository.insert_many(comments, notifications, ordered)
+
+    async def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        with _span("list_public"):
+            return await self.repository.list_public(limit=limit, cursor=cursor)
+
+    async def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        with _span("list_by_user"):
+            return await self.repository.list_by_user(user_id, limit=limit, cursor=cursor)
+
+    async def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        with _span("list_public_raw"):
+            return await self.repository.list_public_raw(limit=limit, cursor=cursor)
+
+    async def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        with _span("list_by_user_raw"):
+            return await self.repository.list_by_user_raw(user_id, limit=limit, cursor=cursor)
+
+    def stream_public(self, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return _traced_async_stream("stream_public", self.repository.stream_public(cursor=cursor))
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return _traced_async_stream("stream_by_user", self.repository.stream_by_user(user_id, cursor=cursor))
+
+    async def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                     cursor: Optional[str] = None) -> CommentSearchPage:
+        with _span("search"):
+            return await self.repository.search(text, viewer_id, limit=limit, cursor=cursor)
+
+    async def get_public_version(self) -> int:
+        with _span("get_public_version"):
+            return await self.repository.get_public_version()
+
+    async def get_user_version(self, user_id: str) -> int:
+        with _span("get_user_version"):
+            return await self.repository.get_user_version(user_id)
+
+    async def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        with _span("get_stats"):
+            return await self.repository.get_stats(days, user_id)
+
+    async def get_by_id(self, comment_id: str) -> Comment:
+        with _span("get_by_id"):
+            return await self.repository.get_by_id(comment_id)
+
+    async def delete(self, comment_id: str) -> Optional[DeletedComment]:
+        with _span("delete"):
+            return await self.repository.delete(comment_id)
+
+    async def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        with _span("delete_owned"):
+            return await self.repository.delete_owned(comment_id, user_id)
+
+    async def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        with _span("update_owned"):
+            return await self.repository.update_owned(comment_id, user_id, changes, expected_version)
@@ -0,0 +1,141 @@
+"""Tracing distribuído com OpenTelemetry.
+
+TRACING_EXPORTER escolhe para onde vão os spans:
+
+- none (padrão): nada é exportado e os spans da API são no-ops;
+- file: um span por linha, em JSON, no arquivo TRACING_FILE, sem nenhum
+  serviço externo;
+- console: o mesmo JSON na saída padrão;
+- <módulo>:<fábrica>: qualquer SpanExporter do OpenTelemetry, por exemplo
+  opentelemetry.exporter.otlp.proto.http.trace_exporter:OTLPSpanExporter
+  (o pacote do exporter é instalado à parte).
+
+O contexto segue no header traceparent (W3C Trace Context): lido das
+requisições HTTP (app.routes.tracing), gravado no registro do outbox junto
+com o comentário e enviado nos headers das mensagens AMQP, para que o
+consumidor das notificações continue o mesmo trace.
+"""
+import importlib
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind
+
+SERVICE_NAME = "comment-service"
+DEFAULT_TRACE_FILE = "traces/comment-service.jsonl"
+
+tracer = trace.get_tracer("app")
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Grava cada span como uma linha JSON, no formato de ReadableSpan.to_json()."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        with self._lock:
+            if self._file.closed:
+                return SpanExportResult.FAILURE
+            for span in spans:
+                self._file.write(span.to_json(indent=None) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+        return True
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+def tracing_exporter() -> str:
+    return os.getenv("TRACING_EXPORTER", "none").strip()
+
+
+def tracing_enabled() -> bool:
+    return tracing_exporter().lower() != "none"
+
+
+def create_exporter(name: str) -> SpanExporter:
+    if name.lower() == "file":
+        return JsonLinesSpanExporter(os.getenv("TRACING_FILE", DEFAULT_TRACE_FILE))
+    if name.lower() == "console":
+        return ConsoleSpanExporter(formatter=lambda span: span.to_json(indent=None) + os.linesep)
+    module_name, separator, factory = name.partition(":")
+    if not separator:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {name}")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+# O provider global do OpenTelemetry só pode ser definido uma vez por processo
+_tracer_provider: TracerProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def configure_tracing() -> Optional[TracerProvider]:
+    global _tracer_provider
+    if not tracing_enabled():
+        return None
+    with _provider_lock:
+        if _tracer_provider is None:
+            ratio = float(os.getenv("TRACING_SAMPLE_RATIO", 1.0))
+            provider = TracerProvider(
+                resource=Resource.create({"service.name": SERVICE_NAME}),
+                # Um trace que chega amostrado (ou não) no traceparent mantém a decisão de quem o começou
+                sampler=ParentBased(TraceIdRatioBased(ratio)),
+            )
+            provider.add_span_processor(BatchSpanProcessor(create_exporter(tracing_exporter())))
+            trace.set_tracer_provider(provider)
+            _tracer_provider = provider
+    return _tracer_provider
+
+
+def flush_tracing():
+    """Envia os spans pendentes; chamado no shutdown da aplicação."""
+    if _tracer_provider is not None:
+        _tracer_provider.force_flush()
+
+
+def inject_context() -> dict:
+    """Headers com o contexto do span atual (traceparent), vazio fora de um trace."""
+    carrier: dict = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def use_context(carrier: Optional[dict]) -> Iterator[None]:
+    """Torna atual o contexto guardado em `carrier`, como o de uma requisição gravado no outbox."""
+    if not carrier:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
+
+
+@contextmanager
+def publish_span(exchange: str) -> Iterator[dict]:
+    """Span PRODUCER de uma publicação no RabbitMQ; devolve os headers AMQP com o contexto dele."""
+    attributes = {"messaging.system": "rabbitmq", "messaging.destination.name": exchange, "messaging.operation": "publish"}
+    with tracer.start_as_current_span(f"{exchange} publish", kind=SpanKind.PRODUCER, attributes=attributes):
+        yield inject_context()
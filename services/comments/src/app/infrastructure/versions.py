@@ -0,0 +1,53 @@
+from pymongo import UpdateOne
+
+VERSIONS_COLLECTION = "collection_versions"
+
+PUBLIC_SCOPE = "comments:public"
+
+
+def user_scope(user_id: str) -> str:
+    return f"comments:user:{user_id}"
+
+
+def comment_scopes(user_id: str, is_public: bool) -> list[str]:
+    """Escopos cuja listagem muda quando um comentário deste autor é gravado."""
+    scopes = [user_scope(user_id)]
+    if is_public:
+        scopes.append(PUBLIC_SCOPE)
+    return scopes
+
+
+def _bump_operations(scopes) -> list[UpdateOne]:
+    return [UpdateOne({"_id": scope}, {"$inc": {"version": 1}}, upsert=True) for scope in scopes]
+
+
+class MongoVersionStore:
+    """Contador de versão por escopo, incrementado a cada escrita.
+
+    Ler a versão é um find_one por _id, bem mais barato que a listagem;
+    os ETags são derivados dela. Fica no Mongo para que todas as réplicas
+    do serviço enxerguem a mesma versão.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get(self, scope: str) -> int:
+        doc = self.collection.find_one({"_id": scope}, {"version": True})
+        return doc["version"] if doc else 0
+
+    def bump(self, scopes: list[str], session=None):
+        self.collection.bulk_write(_bump_operations(scopes), ordered=False, session=session)
+
+
+class MotorVersionStore:
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, scope: str) -> int:
+        doc = await self.collection.find_one({"_id": scope}, {"version": True})
+        return doc["version"] if doc else 0
+
+    async def bump(self, scopes: list[str], session=None):
+        await self.collection.bulk_write(_bump_operations(scopes), ordered=False, session=session)
@@ -1,8 +1,24 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
+from app.infrastructure.broadcaster import close_comment_broadcaster
+from app.infrastructure.indexes import reconcile_indexes, reconcile_indexes_async
+from app.infrastructure.metrics import metrics_enabled
+from app.infrastructure.mongo import close_async_client, close_client, get_async_mongo_database, get_mongo_database
+from app.infrastructure.outbox_dispatcher import create_async_dispatcher, create_dispatcher, dispatcher_enabled
+from app.infrastructure.profiling import profiling_enabled
+from app.infrastructure.publisher import close_async_publisher, close_publisher
+from app.infrastructure.slow_queries import close_slow_query_log, slow_query_log_enabled
+from app.infrastructure.timeline import timeline_enabled
+from app.infrastructure.tracing import configure_tracing, flush_tracing, tracing_enabled
 from app.infrastructure.vault import load_secrets
-from app.routes import routes
+from app.routes import async_routes, metrics, profiling, routes, slow_queries, tracing
 from fastapi import FastAPI
 
+logger = logging.getLogger(__name__)
+
 try:
     load_secrets()
 except Exception as e:
@@ -13,14 +29,88 @@ except Exception as e:
     # further errors if secrets are truly essential.
     pass
 
+configure_tracing()
+
+# "sync" usa pymongo/pika no threadpool; "async" usa motor/aio-pika no event loop
+IO_MODE = os.getenv("COMMENTS_IO_MODE", "sync").lower()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("MONGO_RECONCILE_INDEXES", "true").lower() == "true":
+        # Por padrão só cria: réplicas da versão anterior ainda podem usar os índices que sairiam
+        drop_obsolete = os.getenv("MONGO_DROP_OBSOLETE_INDEXES", "false").lower() == "true"
+        try:
+            if IO_MODE == "async":
+                await reconcile_indexes_async(get_async_mongo_database(), drop_obsolete=drop_obsolete,
+                                              create_only=not drop_obsolete)
+            else:
+                reconcile_indexes(get_mongo_database(), drop_obsolete=drop_obsolete, create_only=not drop_obsolete)
+            logger.info("[MONGO] Índices verificados com sucesso.")
+        except Exception as e:
+            logger.error(f"[MONGO] Erro ao reconciliar índices: {e}")
+
+    if timeline_enabled():
+        # Sem a carga aqui, a primeira leitura de /comments/all_public carregaria a timeline
+        try:
+            if IO_MODE == "async":
+                await (await async_routes.get_async_service()).load_timeline()
+            else:
+                routes.get_service().load_timeline()
+            logger.info("[MONGO] Timeline pública carregada.")
+        except Exception as e:
+            logger.error(f"[MONGO] Erro ao carregar a timeline pública: {e}")
+
+    dispatcher = None
+    if dispatcher_enabled():
+        dispatcher = create_async_dispatcher() if IO_MODE == "async" else create_dispatcher()
+        dispatcher.start()
+
+    yield
+
+    # Encerra os streams SSE abertos antes de fechar as conexões
+    close_comment_broadcaster()
+    if IO_MODE == "async":
+        if dispatcher is not None:
+            await dispatcher.stop()
+        await close_async_publisher()
+        close_async_client()
+    else:
+        if dispatcher is not None:
+            dispatcher.stop()
+        close_publisher()
+        close_client()
+    close_slow_query_log()
+    flush_tracing()
+
+
 app = FastAPI(
     title="Comment Service",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url=None
+    redoc_url=None,
+    lifespan=lifespan
 )
 
-app.include_router(routes.router)
+if IO_MODE == "async":
+    app.include_router(async_routes.router)
+else:
+    app.include_router(routes.router)
+
+if metrics_enabled():
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(metrics.router)
+
+if profiling_enabled():
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiling.router)
+
+if slow_query_log_enabled():
+    app.include_router(slow_queries.router)
+
+if tracing_enabled():
+    # Adicionado por último, fica por fora: o span da requisição cobre também a medição das métricas
+    app.add_middleware(tracing.TracingMiddleware)
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,11 +1,14 @@
 import os
+from typing import Optional
 
+from app.infrastructure.tracing import tracer
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt
 from jose.exceptions import ExpiredSignatureError, JWTError
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
@@ -16,7 +19,8 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         raise HTTPException(status_code=500, detail="JWT_SECRET not set")
 
     try:
-        payload = jwt.decode(token, secret, algorithms=["HS256"])
+        with tracer.start_as_current_span("get_current_user"):
+            payload = jwt.decode(token, secret, algorithms=["HS256"])
         return {
             "id": payload.get("id"),
             "name": payload.get("name")
@@ -25,3 +29,24 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired") from e
     except JWTError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from e
+
+
+def is_admin(user: dict) -> bool:
+    authorized_user_id = os.getenv("AUTHORIZED_USER_ID")
+    return bool(authorized_user_id) and user.get("id") == authorized_user_id
+
+
+def get_admin_user(user: dict = Depends(get_current_user)) -> dict:
+    """Usuário do token, se for o AUTHORIZED_USER_ID; rotas administrativas respondem 403 aos demais."""
+    if not os.getenv("AUTHORIZED_USER_ID"):
+        raise HTTPException(status_code=500, detail="AUTHORIZED_USER_ID not set")
+    if not is_admin(user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    return user
+
+
+def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[dict]:
+    """Usuário do token, ou None sem header Authorization; um token inválido ainda é 401."""
+    if credentials is None:
+        return None
+    return get_current_user(credentials)
@@ -0,0 +1,88 @@
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.domain.comment import Comment, CommentCreate
+from app.infrastructure.comment_documents import NOT_ATTEMPTED_ERROR
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+MAX_BULK_ITEMS = 1000
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkCreateResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+@dataclass
+class BulkRequest:
+    total: int
+    valid: list[tuple[int, CommentCreate]] = field(default_factory=list)
+    errors: dict[int, str] = field(default_factory=dict)
+
+    def insertable(self, ordered: bool) -> list[tuple[int, CommentCreate]]:
+        # No modo ordenado nada depois do primeiro item inválido é gravado
+        if ordered and self.errors:
+            first_error = min(self.errors)
+            return [(index, item) for index, item in self.valid if index < first_error]
+        return self.valid
+
+
+def _parse_items(body: bytes, media_type: str) -> list:
+    if media_type in NDJSON_MEDIA_TYPES:
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                # Uma linha quebrada vira erro daquele item, não da requisição inteira
+                items.append(e)
+        return items
+
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON body")
+    return items
+
+
+async def read_bulk_request(request: Request) -> BulkRequest:
+    """Lê e valida o corpo do POST /comments/bulk em uma única passada."""
+    media_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    items = _parse_items(await request.body(), media_type)
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} comments per request")
+
+    bulk = BulkRequest(total=len(items))
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            bulk.errors[index] = f"Invalid JSON: {item}"
+            continue
+        try:
+            bulk.valid.append((index, CommentCreate.model_validate(item)))
+        except ValidationError as e:
+            bulk.errors[index] = "; ".join(f"{'.'.join(map(str, error['loc'])) or 'item'}: {error['msg']}" for error in e.errors())
+    return bulk
+
+
+def build_bulk_result(bulk: BulkRequest, outcomes: list[tuple[int, Comment, Optional[str]]]) -> BulkCreateResult:
+    results = {index: BulkItemResult(index=index, error=error) for index, error in bulk.errors.items()}
+    for index, comment, error in outcomes:
+        results[index] = BulkItemResult(index=index, error=error) if error else BulkItemResult(index=index, id=comment.id)
+
+    items = [results.get(index, BulkItemResult(index=index, error=NOT_ATTEMPTED_ERROR)) for index in range(bulk.total)]
+    created = sum(1 for item in items if item.error is None)
+    return BulkCreateResult(created=created, failed=len(items) - created, results=items)
@@ -0,0 +1,27 @@
+import os
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+
+
+def fast_json_enabled() -> bool:
+    return os.getenv("FAST_JSON_ENABLED", "false").lower() == "true"
+
+
+def dumps(content: Any) -> bytes:
+    # OPT_UTC_Z escreve datetimes UTC com "Z", como o serializador do pydantic
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def fast_json_response(content: Any, sub_response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """Codifica dicts já no formato da resposta direto para bytes.
+
+    Devolver um Response faz o FastAPI pular a validação e a serialização do
+    response_model; os headers definidos no Response injetado na rota (ETag,
+    cursor) são copiados, pois o FastAPI só os aplica a valores comuns.
+    """
+    headers = None
+    if sub_response is not None:
+        headers = {name: value for name, value in sub_response.headers.items() if name != "content-length"}
+    return Response(dumps(content), status_code=status_code, media_type="application/json", headers=headers)
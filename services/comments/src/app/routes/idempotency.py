@@ -0,0 +1,4 @@
+# Enviado quando a resposta do POST /comments é o replay de uma Idempotency-Key já usada
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
@@ -0,0 +1,65 @@
+import time
+
+from app.infrastructure.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+router = APIRouter()
+
+# Rótulo das requisições que não casam com nenhuma rota, para não criar uma série por URL
+UNMATCHED_ROUTE = "unmatched"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+def route_template(scope: Scope) -> str:
+    """Template da rota da requisição (/comments/{comment_id}), o mesmo que o roteador vai escolher."""
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            # Caminho certo com outro método: o roteador responde 405 por esta rota
+            partial = route.path
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Mede as requisições HTTP por rota.
+
+    Middleware ASGI puro em vez de BaseHTTPMiddleware: não passa o corpo da
+    resposta por uma fila e mede os streams até o último chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(time.perf_counter() - started)
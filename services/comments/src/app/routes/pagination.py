@@ -0,0 +1,20 @@
+from typing import List, Union
+
+from app.domain.comment import Comment, CommentPage, CommentSearchPage, RawCommentPage
+from app.routes.fast_json import fast_json_response
+from app.routes.msgpack_negotiation import msgpack_response
+from fastapi import Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def paginated(response: Response, page: Union[CommentPage, CommentSearchPage, RawCommentPage],
+              as_msgpack: bool = False) -> Union[List[Comment], Response]:
+    # O corpo continua sendo a lista de comentários; o cursor da próxima página vai no header
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if as_msgpack:
+        return msgpack_response(page.items, response)
+    if isinstance(page, RawCommentPage):
+        return fast_json_response(page.items, response)
+    return page.items
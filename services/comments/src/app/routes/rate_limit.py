@@ -0,0 +1,50 @@
+import math
+from typing import Optional
+
+from app.infrastructure.rate_limit import RateLimitBackend, get_rate_limit_backend, rate_limit_rule
+from app.routes.auth import get_current_user
+from app.routes.bulk import BulkRequest, read_bulk_request
+from fastapi import Depends, HTTPException, status
+
+
+def _consume(backend: Optional[RateLimitBackend], name: str, user: dict, cost: int = 1):
+    if backend is None or not user or cost <= 0:
+        return
+    retry_after = backend.consume(f"{name}:{user['id']}", rate_limit_rule(name), cost)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+class RateLimit:
+    """Dependência que aplica a regra da rota ao usuário do JWT.
+
+    Usa o mesmo get_current_user da rota; o FastAPI resolve a dependência
+    uma vez por requisição, então o token não é decodificado duas vezes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, user: dict = Depends(get_current_user),
+                 backend: Optional[RateLimitBackend] = Depends(get_rate_limit_backend)):
+        _consume(backend, self.name, user)
+
+
+class BulkItemsRateLimit:
+    """Gasta uma ficha da regra `name` por item válido do POST /comments/bulk.
+
+    Sem isso um único bulk de MAX_BULK_ITEMS comentários passaria pelo limite
+    de criação. O corpo vem do mesmo read_bulk_request da rota, lido uma vez.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self, user: dict = Depends(get_current_user),
+                 bulk: BulkRequest = Depends(read_bulk_request),
+                 backend: Optional[RateLimitBackend] = Depends(get_rate_limit_backend)):
+        _consume(backend, self.name, user, cost=len(bulk.valid))
@@ -1,57 +1,221 @@
-from typing import List
+from typing import Annotated, List, Optional
 
 from app.application.comment_service import CommentService
-from app.domain.comment import Comment, CommentCreate
+from app.domain.comment import (DEFAULT_PAGE_SIZE, DEFAULT_STATS_DAYS, MAX_PAGE_SIZE, MAX_SEARCH_QUERY_LENGTH, MAX_STATS_DAYS,
+                                Comment, CommentCreate, CommentNotFoundError, CommentPermissionError, CommentSearchHit, CommentStats,
+                                CommentUpdate, CommentVersionConflictError, IdempotencyKeyInProgressError, IdempotencyKeyMismatchError,
+                                InvalidCursorError)
+from app.infrastructure.broadcaster import CommentBroadcaster, get_comment_broadcaster
+from app.infrastructure.comment_cache import CachedCommentRepository, cache_enabled, get_comment_cache
 from app.infrastructure.comment_mongo_repository import CommentMongoRepository
-from app.infrastructure.publisher import RabbitMQPublisher
-from app.routes.auth import get_current_user
-from fastapi import APIRouter, Depends, HTTPException, status
-
-router = APIRouter()
+from app.infrastructure.timeline import get_public_timeline, timeline_enabled
+from app.infrastructure.traced_repository import TracedCommentRepository
+from app.infrastructure.tracing import tracing_enabled
+from app.routes.auth import get_current_user, get_optional_user
+from app.routes.bulk import BulkCreateResult, BulkRequest, build_bulk_result, read_bulk_request
+from app.routes.etag import etag_matches, make_etag, not_modified, set_etag
+from app.routes.fast_json import fast_json_enabled
+from app.routes.idempotency import IDEMPOTENT_REPLAYED_HEADER, MAX_IDEMPOTENCY_KEY_LENGTH
+from app.routes.msgpack_negotiation import msgpack_response, wants_msgpack
+from app.routes.pagination import paginated
+from app.routes.profiling import ProfiledRoute
+from app.routes.rate_limit import BulkItemsRateLimit, RateLimit
+from app.routes.sse import last_event_id, sse_response
+from app.routes.streaming import json_streaming_response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+
+# As rotas síncronas rodam no threadpool, fora do cProfile que o ProfilingMiddleware liga no event loop
+router = APIRouter(route_class=ProfiledRoute)
 
 
 def get_service():
-    publisher = RabbitMQPublisher()
     repository = CommentMongoRepository()
-    return CommentService(repository, publisher)
+    if tracing_enabled():
+        repository = TracedCommentRepository(repository)
+    if cache_enabled():
+        repository = CachedCommentRepository(repository, get_comment_cache())
+    timeline = get_public_timeline() if timeline_enabled() else None
+    return CommentService(repository, get_comment_broadcaster(), timeline)
+
+
+@router.get("/comments/cache/stats")
+def get_cache_stats():
+    return get_comment_cache().stats()
+
+
+@router.get("/comments/timeline/stats")
+def get_timeline_stats():
+    return get_public_timeline().stats()
+
+
+@router.get("/comments/stream")
+async def stream_public_comments(request: Request, broadcaster: CommentBroadcaster = Depends(get_comment_broadcaster)):
+    # async mesmo no modo síncrono: a assinatura pertence ao event loop que serve o stream
+    return sse_response(broadcaster.subscribe(last_event_id(request)))
+
+
+@router.get("/comments/stats", response_model=CommentStats)
+def get_comment_stats(
+    request: Request,
+    response: Response,
+    days: Annotated[int, Query(ge=1, le=MAX_STATS_DAYS)] = DEFAULT_STATS_DAYS,
+    user_id: Optional[str] = None,
+    viewer: Optional[dict] = Depends(get_optional_user),
+    service: CommentService = Depends(get_service)
+):
+    stats = service.get_comment_stats(days=days, user_id=user_id, viewer_id=viewer["id"] if viewer else None)
+    if wants_msgpack(request, response):
+        return msgpack_response(stats, response)
+    return stats
+
+
+@router.get("/comments/search", response_model=List[CommentSearchHit])
+def search_comments(
+    request: Request,
+    response: Response,
+    q: Annotated[str, Query(min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    user: Optional[dict] = Depends(get_optional_user),
+    service: CommentService = Depends(get_service)
+):
+    # Sem token a busca cobre só os públicos; com token inclui os privados do próprio usuário
+    as_msgpack = wants_msgpack(request, response)
+    try:
+        page = service.search_comments(q, user["id"] if user else None, limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return paginated(response, page, as_msgpack)
 
 
 @router.get("/comments/all_public", response_model=List[Comment])
-def get_all_public_comments(service: CommentService = Depends(get_service)):
-    return service.get_all_public_comments()
+def get_all_public_comments(
+    request: Request,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    service: CommentService = Depends(get_service)
+):
+    # A versão é lida antes da listagem: se mudar no meio, o próximo GET apenas baixa de novo
+    # O streaming sai sempre em JSON
+    as_msgpack = wants_msgpack(request, response) and not stream
+    etag = make_etag("comments:public", service.get_public_comments_version(), limit, cursor, stream, as_msgpack)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        if stream:
+            return json_streaming_response(service.stream_public_comments(cursor=cursor), etag)
+        if fast_json_enabled():
+            page = service.get_all_public_comments_raw(limit=limit, cursor=cursor)
+        else:
+            page = service.get_all_public_comments(limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    set_etag(response, etag)
+    return paginated(response, page, as_msgpack)
 
 
 @router.get("/comments/my", response_model=List[Comment])
-def get_my_comments(user: dict = Depends(get_current_user), service: CommentService = Depends(get_service)):
+def get_my_comments(
+    request: Request,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user: dict = Depends(get_current_user),
+    service: CommentService = Depends(get_service)
+):
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    # O streaming sai sempre em JSON
+    as_msgpack = wants_msgpack(request, response) and not stream
+    etag = make_etag("comments:user", user["id"], service.get_user_comments_version(user["id"]), limit, cursor, stream, as_msgpack)
+    if etag_matches(request, etag):
+        return not_modified(etag, private=True)
+    try:
+        if stream:
+            return json_streaming_response(service.stream_comments_by_user(user["id"], cursor=cursor), etag, private=True)
+        if fast_json_enabled():
+            page = service.get_comments_by_user_raw(user["id"], limit=limit, cursor=cursor)
+        else:
+            page = service.get_comments_by_user(user["id"], limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    set_etag(response, etag, private=True)
+    return paginated(response, page, as_msgpack)
+
+
+@router.post("/comments", response_model=Comment, status_code=status.HTTP_201_CREATED, dependencies=[Depends(RateLimit("comments:create"))])
+def post_comment(
+    comment: CommentCreate,
+    response: Response,
+    idempotency_key: Annotated[Optional[str], Header(max_length=MAX_IDEMPOTENCY_KEY_LENGTH)] = None,
+    user: dict = Depends(get_current_user),
+    service: CommentService = Depends(get_service)
+):
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return service.get_comments_by_user(user["id"])
 
+    if idempotency_key is None:
+        return service.create_comment(comment, user["id"], user["name"])
+    try:
+        created_comment, replayed = service.create_comment_idempotent(comment, user["id"], user["name"], idempotency_key)
+    except IdempotencyKeyMismatchError:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    except IdempotencyKeyInProgressError:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+    if replayed:
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
+    return created_comment
 
-@router.post("/comments", response_model=Comment, status_code=status.HTTP_201_CREATED)
-def post_comment(comment: CommentCreate, user: dict = Depends(get_current_user), service: CommentService = Depends(get_service)):
+
+@router.post("/comments/bulk", response_model=BulkCreateResult, dependencies=[Depends(RateLimit("comments:bulk")),
+                                                                          Depends(BulkItemsRateLimit("comments:create"))])
+def post_comments_bulk(
+    response: Response,
+    ordered: bool = False,
+    user: dict = Depends(get_current_user),
+    bulk: BulkRequest = Depends(read_bulk_request),
+    service: CommentService = Depends(get_service)
+):
+    """Cria vários comentários a partir de um array JSON ou de NDJSON (application/x-ndjson)."""
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    created_comment = service.create_comment(comment, user["id"], user["name"])
-    return created_comment
+    pending = bulk.insertable(ordered)
+    outcomes = service.create_comments([item for _, item in pending], user["id"], user["name"], ordered=ordered)
+    result = build_bulk_result(bulk, [(index, comment, error) for (index, _), (comment, error) in zip(pending, outcomes)])
+    response.status_code = status.HTTP_207_MULTI_STATUS if result.failed else status.HTTP_201_CREATED
+    return result
 
 
-@router.delete("/comments/{comment_id}")
-def delete_comment(comment_id: str, user: dict = Depends(get_current_user), service: CommentService = Depends(get_service)):
+@router.patch("/comments/{comment_id}", response_model=Comment, dependencies=[Depends(RateLimit("comments:update"))])
+def patch_comment(comment_id: str, changes: CommentUpdate, user: dict = Depends(get_current_user), service: CommentService = Depends(get_service)):
     if not user:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    # Verificar se o comentário existe e se o usuário é o autor
-    comment = service.get_comment_by_id(comment_id)
-    if not comment:
+    try:
+        return service.update_comment(comment_id, user["id"], changes)
+    except CommentNotFoundError:
         raise HTTPException(status_code=404, detail="Comment not found")
+    except CommentPermissionError:
+        raise HTTPException(status_code=403, detail="Not authorized to edit this comment")
+    except CommentVersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
-    if comment.user_id != user["id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
 
-    success = service.delete_comment(comment_id)
-    if not success:
+@router.delete("/comments/{comment_id}", dependencies=[Depends(RateLimit("comments:delete"))])
+def delete_comment(comment_id: str, user: dict = Depends(get_current_user), service: CommentService = Depends(get_service)):
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    # A remoção já filtra pelo autor; 404 e 403 saem do próprio repositório
+    try:
+        service.delete_user_comment(comment_id, user["id"])
+    except CommentNotFoundError:
         raise HTTPException(status_code=404, detail="Comment not found")
+    except CommentPermissionError:
+        raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
 
     return {"message": "Comment deleted successfully"}
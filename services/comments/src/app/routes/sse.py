@@ -0,0 +1,56 @@
+import asyncio
+import os
+from typing import AsyncIterator, Optional
+
+from app.infrastructure.broadcaster import RESET, CommentEvent, Subscription
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+# Intervalo sugerido ao EventSource para reconectar, em milissegundos
+RETRY_MILLISECONDS = 3000
+
+
+def heartbeat_seconds() -> float:
+    return float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+
+
+def last_event_id(request: Request) -> Optional[int]:
+    value = request.headers.get("Last-Event-ID")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def format_event(event: CommentEvent) -> bytes:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.data}\n\n".encode()
+
+
+async def sse_events(subscription: Subscription, heartbeat: float) -> AsyncIterator[bytes]:
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode()
+        if subscription.reset:
+            yield f"event: {RESET}\ndata: {{}}\n\n".encode()
+        for event in subscription.replay:
+            yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.next(), heartbeat)
+            except asyncio.TimeoutError:
+                # Comentário SSE: mantém a conexão viva em proxies com timeout de inatividade
+                yield b": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield format_event(event)
+    finally:
+        # Também roda quando o cliente desconecta e o Starlette cancela o stream
+        subscription.close()
+
+
+def sse_response(subscription: Subscription) -> StreamingResponse:
+    return StreamingResponse(
+        sse_events(subscription, heartbeat_seconds()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,54 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, Union
+
+from app.routes.etag import set_etag
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+# Quantos itens codificados são acumulados antes de cada escrita no socket
+STREAM_CHUNK_ITEMS = 100
+
+
+def _chunk(encoded: list[bytes], first: bool) -> bytes:
+    body = b",".join(encoded)
+    return body if first else b"," + body
+
+
+def stream_json_array(items: Iterable[BaseModel], chunk_items: int = STREAM_CHUNK_ITEMS) -> Iterator[bytes]:
+    """Codifica um array JSON à medida que o cursor entrega os itens.
+
+    A memória por requisição fica limitada a um lote e o primeiro byte sai
+    antes do último documento ser lido.
+    """
+    yield b"["
+    encoded, first = [], True
+    for item in items:
+        encoded.append(item.model_dump_json().encode())
+        if len(encoded) >= chunk_items:
+            yield _chunk(encoded, first)
+            encoded, first = [], False
+    if encoded:
+        yield _chunk(encoded, first)
+    yield b"]"
+
+
+async def astream_json_array(items: AsyncIterable[BaseModel], chunk_items: int = STREAM_CHUNK_ITEMS) -> AsyncIterator[bytes]:
+    yield b"["
+    encoded, first = [], True
+    async for item in items:
+        encoded.append(item.model_dump_json().encode())
+        if len(encoded) >= chunk_items:
+            yield _chunk(encoded, first)
+            encoded, first = [], False
+    if encoded:
+        yield _chunk(encoded, first)
+    yield b"]"
+
+
+def json_streaming_response(items: Union[Iterable[BaseModel], AsyncIterable[BaseModel]], etag: Optional[str] = None,
+                            private: bool = False) -> StreamingResponse:
+    # Iteradores síncronos (pymongo) são consumidos pelo Starlette no threadpool
+    body = astream_json_array(items) if hasattr(items, "__aiter__") else stream_json_array(items)
+    response = StreamingResponse(body, media_type="application/json")
+    if etag:
+        set_etag(response, etag, private)
+    return response
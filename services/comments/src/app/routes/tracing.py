@@ -0,0 +1,41 @@
+from app.infrastructure.tracing import tracer
+from app.routes.metrics import route_template
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind, StatusCode
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _headers(scope: Scope) -> dict:
+    return {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+
+
+class TracingMiddleware:
+    """Abre o span SERVER de cada requisição, continuando o trace do header traceparent se houver.
+
+    Como o MetricsMiddleware, é ASGI puro: o span fica aberto até o último
+    chunk dos streams, e os spans do auth e do repositório ficam dentro dele.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        attributes = {"http.request.method": method, "http.route": route, "url.path": scope["path"]}
+
+        with tracer.start_as_current_span(f"{method} {route}", context=propagate.extract(_headers(scope)),
+                                          kind=SpanKind.SERVER, attributes=attributes) as span:
+
+            async def send_with_status(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(StatusCode.ERROR)
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
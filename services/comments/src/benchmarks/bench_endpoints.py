@@ -0,0 +1,143 @@
+"""Benchmark dos endpoints do serviço de comentários pelo caminho completo da requisição.
+
+Usa a aplicação de app.main (rotas, autenticação JWT, limite de escrita,
+cache, serviço, paginação e serialização) com o repositório em memória de
+benchmarks.fakes no lugar do MongoDB:
+
+    cd services/comments/src && python -m benchmarks.bench_endpoints [--comments 10000] [--io-mode sync|async]
+
+As leituras rodam antes das escritas, que mudam as versões e invalidam o
+cache. Os resultados são gravados e comparados com a execução anterior da
+mesma configuração (ver benchmarks.runner).
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+from unittest.mock import patch
+
+from benchmarks.dataset import RARE_WORD, generate_comments, user_id
+from benchmarks.fakes import InMemoryAsyncCommentRepository, InMemoryCommentRepository
+from benchmarks.runner import DEFAULT_THRESHOLD, Endpoint, format_header, report, run
+
+JWT_SECRET = "benchmark-secret"
+
+# Limites altos o bastante para nunca responder 429 durante a medição, sem tirar o limitador do caminho
+RATE_LIMIT_ENV = {
+    "RATE_LIMIT_COMMENTS_CREATE": "1000000000/1",
+    "RATE_LIMIT_COMMENTS_BULK": "1000000000/1",
+    "RATE_LIMIT_COMMENTS_UPDATE": "1000000000/1",
+    "RATE_LIMIT_COMMENTS_DELETE": "1000000000/1",
+}
+
+
+def load_app(io_mode: str, fast_json: bool):
+    """Importa app.main com o modo de IO escolhido e sem buscar segredos no Vault."""
+    os.environ.update({
+        "COMMENTS_IO_MODE": io_mode,
+        "FAST_JSON_ENABLED": str(fast_json).lower(),
+        "JWT_SECRET": JWT_SECRET,
+        "RATE_LIMIT_BACKEND": "memory",
+        **RATE_LIMIT_ENV,
+    })
+    with patch("app.infrastructure.vault.load_secrets"):
+        from app import main
+    return main.app
+
+
+def override_service(app, io_mode: str, repository: InMemoryCommentRepository):
+    # Monta o serviço como get_service/get_async_service, trocando só o repositório do MongoDB
+    from app.application.comment_service import AsyncCommentService, CommentService
+    from app.infrastructure.broadcaster import get_comment_broadcaster
+    from app.infrastructure.comment_cache import (CachedAsyncCommentRepository, CachedCommentRepository, cache_enabled,
+                                                  get_comment_cache)
+    from app.infrastructure.timeline import get_public_timeline, timeline_enabled
+    from app.routes import async_routes, routes
+
+    timeline = get_public_timeline() if timeline_enabled() else None
+
+    if io_mode == "async":
+        def get_async_service():
+            async_repository = InMemoryAsyncCommentRepository(repository)
+            if cache_enabled():
+                async_repository = CachedAsyncCommentRepository(async_repository, get_comment_cache())
+            return AsyncCommentService(async_repository, get_comment_broadcaster(), timeline)
+        app.dependency_overrides[async_routes.get_async_service] = get_async_service
+    else:
+        def get_service():
+            sync_repository = repository
+            if cache_enabled():
+                sync_repository = CachedCommentRepository(sync_repository, get_comment_cache())
+            return CommentService(sync_repository, get_comment_broadcaster(), timeline)
+        app.dependency_overrides[routes.get_service] = get_service
+
+
+def bearer(author: int) -> dict:
+    from jose import jwt
+    token = jwt.encode({"id": user_id(author), "name": f"Usuário {author}"}, JWT_SECRET, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def endpoints(repository: InMemoryCommentRepository) -> list[Endpoint]:
+    from app.domain.comment import DEFAULT_PAGE_SIZE
+    from app.routes.etag import make_etag
+    from app.routes.msgpack_negotiation import MSGPACK_MEDIA_TYPE
+
+    deep_cursor = repository.public_cursor(0.5)
+    # O ETag que a primeira página pública teria agora, para medir o caminho do 304
+    public_etag = make_etag("comments:public", repository.get_public_version(), DEFAULT_PAGE_SIZE, None, False, False)
+    author = bearer(0)
+    authors = [bearer(index) for index in range(50)]
+
+    return [
+        Endpoint("all_public", "GET", "/comments/all_public"),
+        Endpoint("all_public_200", "GET", "/comments/all_public", lambda i: {"params": {"limit": 200}}),
+        Endpoint("all_public_deep", "GET", "/comments/all_public", lambda i: {"params": {"cursor": deep_cursor}}),
+        Endpoint("all_public_msgpack", "GET", "/comments/all_public", lambda i: {"headers": {"Accept": MSGPACK_MEDIA_TYPE}}),
+        Endpoint("all_public_304", "GET", "/comments/all_public", lambda i: {"headers": {"If-None-Match": public_etag}},
+                 expected_status=304),
+        Endpoint("my", "GET", "/comments/my", lambda i: {"headers": author}),
+        Endpoint("search", "GET", "/comments/search", lambda i: {"params": {"q": RARE_WORD}}),
+        Endpoint("stats", "GET", "/comments/stats", lambda i: {"params": {"days": 30}}),
+        Endpoint("post", "POST", "/comments",
+                 lambda i: {"headers": authors[i % len(authors)], "json": {"message": f"Comentário {i}", "is_public": True}},
+                 expected_status=201),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--comments", type=int, default=10_000, help="comentários no conjunto sintético (10^3 a 10^6)")
+    parser.add_argument("--users", type=int, default=1000, help="autores distintos no conjunto sintético")
+    parser.add_argument("--requests", type=int, default=500, help="requisições medidas por endpoint")
+    parser.add_argument("--concurrency", type=int, default=10, help="clientes simultâneos")
+    parser.add_argument("--io-mode", choices=("sync", "async"), default="sync", help="pilha testada (COMMENTS_IO_MODE)")
+    parser.add_argument("--fast-json", action="store_true", help="liga FAST_JSON_ENABLED")
+    parser.add_argument("--only", nargs="*", help="mede só os endpoints com estes nomes")
+    parser.add_argument("--no-save", action="store_true", help="não grava os resultados")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="variação considerada regressão")
+    parser.add_argument("--fail-on-regression", action="store_true", help="sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    app = load_app(args.io_mode, args.fast_json)
+    print(f"gerando {args.comments} comentários...", flush=True)
+    repository = InMemoryCommentRepository(generate_comments(args.comments, users=args.users))
+    override_service(app, args.io_mode, repository)
+    # Tira o conjunto sintético das coletas do gc: com 10^6 documentos na memória do processo, cada coleta
+    # completa percorreria todos eles, um custo que o serviço real, com os dados no MongoDB, não tem
+    gc.freeze()
+
+    selected = [endpoint for endpoint in endpoints(repository) if not args.only or endpoint.name in args.only]
+    print(format_header())
+    results = asyncio.run(run(app, selected, args.requests, args.concurrency))
+
+    config = {"comments": args.comments, "users": args.users, "requests": args.requests, "concurrency": args.concurrency,
+              "io_mode": args.io_mode, "fast_json": args.fast_json}
+    found = report("comments", config, results, save=not args.no_save, threshold=args.threshold)
+    if found and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Micro-benchmark da serialização das listagens de comentários.
+
+Compara, por documento, o caminho padrão (Comment(**doc), validação do
+response_model e json da stdlib) com o caminho rápido (FAST_JSON_ENABLED):
+
+    cd services/comments/src && python -m benchmarks.bench_serialization [--docs 200] [--rounds 200]
+"""
+import argparse
+import asyncio
+import json
+import timeit
+from datetime import datetime, timedelta
+
+from app.infrastructure.pagination import build_page, build_raw_page
+from app.routes.fast_json import fast_json_response
+from app.routes.routes import router
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+
+def make_documents(count: int) -> list[dict]:
+    created_at = datetime(2024, 1, 1, 12, 0, 0, 123000)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": "6650f1a2b3c4d5e6f7a8b9c0",
+            "user_name": "Usuário de Teste",
+            "message": "Comentário de exemplo com acentuação e um texto de tamanho médio. " * 2,
+            "is_public": True,
+            "created_at": created_at - timedelta(seconds=index),
+            "version": 1,
+        }
+        for index in range(count)
+    ]
+
+
+def _response_field():
+    route = next(route for route in router.routes if route.path == "/comments/all_public")
+    return route.secure_cloned_response_field
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200, help="documentos por página")
+    parser.add_argument("--rounds", type=int, default=200, help="páginas serializadas por medição")
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    field = _response_field()
+    loop = asyncio.new_event_loop()
+
+    # build_page recebe cópias porque from_document altera o documento
+    def current() -> bytes:
+        page = build_page([dict(doc) for doc in documents], args.docs)
+        content = loop.run_until_complete(serialize_response(field=field, response_content=page.items))
+        return JSONResponse(content).body
+
+    def fast() -> bytes:
+        page = build_raw_page(documents, args.docs)
+        return fast_json_response(page.items).body
+
+    # Os dois caminhos precisam produzir o mesmo JSON; só a formatação dos bytes muda
+    assert json.loads(current()) == json.loads(fast())
+    results = {}
+    for name, function in (("atual", current), ("rápido", fast)):
+        seconds = min(timeit.repeat(function, number=args.rounds, repeat=5))
+        results[name] = seconds / (args.rounds * args.docs) * 1e6
+        print(f"{name:>7}: {results[name]:6.2f} µs/documento")
+    print(f"ganho: {results['atual'] / results['rápido']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Gerador de comentários sintéticos no formato dos documentos do MongoDB.
+
+Determinístico pela seed, para que execuções em commits diferentes meçam o
+mesmo conjunto de dados.
+"""
+import random
+from calendar import timegm
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+WORDS = ("comentário", "projeto", "mongo", "fastapi", "python", "ótimo", "deploy", "índice", "cache", "latência",
+         "consulta", "teste", "código", "revisão", "produção", "página", "cursor", "servidor", "docker", "api")
+
+# Aparece em RARE_WORD_RATIO das mensagens: a busca por ele mede o caso seletivo
+RARE_WORD = "kubernetes"
+RARE_WORD_RATIO = 0.01
+
+# Intervalo coberto pelos created_at, do mais novo para o mais antigo
+DATASET_SPAN = timedelta(days=730)
+
+
+def user_id(index: int) -> str:
+    return f"{index:024x}"
+
+
+def generate_comments(count: int, users: int = 1000, public_ratio: float = 0.8, seed: int = 42,
+                      newest: datetime = datetime(2024, 6, 1)) -> list[dict]:
+    """`count` comentários de `users` autores, com created_at espalhados por DATASET_SPAN.
+
+    Os datetimes ficam sem fuso e em UTC, como o pymongo os devolve.
+    """
+    rng = random.Random(seed)
+    step = DATASET_SPAN / max(count, 1)
+    # Os comentários de um autor compartilham as strings, como os documentos decodificados não fariam,
+    # mas isso mantém 10^6 comentários em memória sem mudar o que é medido
+    authors = [(user_id(index), f"Usuário {index}") for index in range(users)]
+    docs = []
+    for index in range(count):
+        author_id, author_name = authors[rng.randrange(users)]
+        words = rng.choices(WORDS, k=rng.randint(5, 40))
+        if rng.random() < RARE_WORD_RATIO:
+            words.append(RARE_WORD)
+        created_at = (newest - step * index).replace(microsecond=0)
+        docs.append({
+            # Como um ObjectId gerado no insert: o timestamp é o do comentário
+            "_id": ObjectId(f"{timegm(created_at.timetuple()):08x}{index:016x}"),
+            "user_id": author_id,
+            "user_name": author_name,
+            "message": " ".join(words),
+            "is_public": rng.random() < public_ratio,
+            # Vários comentários no mesmo instante exercitam o desempate por _id do cursor
+            "created_at": created_at,
+            "version": rng.choice((0, 0, 0, 1, 2)),
+        })
+    return docs
@@ -0,0 +1,285 @@
+"""Repositórios em memória para medir o caminho da requisição sem o MongoDB.
+
+Guardam os comentários no formato dos documentos do banco e reutilizam as
+funções de paginação, documentos, versões e rollups dos repositórios reais,
+então o custo medido inclui a conversão documento → modelo e a codificação
+dos cursores. Cada leitura devolve cópias, como o pymongo devolve documentos
+novos a cada consulta.
+"""
+import re
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from datetime import timezone
+from typing import AsyncIterator, Iterator, List, Optional
+
+from app.domain.comment import (DEFAULT_PAGE_SIZE, DEFAULT_STATS_DAYS, AsyncCommentRepository, Comment, CommentNotFoundError,
+                                CommentPage, CommentPermissionError, CommentRepository, CommentSearchPage, CommentStats,
+                                DeletedComment, IdempotencyKey, RawCommentPage)
+from app.infrastructure.comment_documents import (apply_guarded_update, deleted_from_document, from_document, owned_object_id,
+                                                   to_document)
+from app.infrastructure.idempotency import replayed_comment
+from app.infrastructure.pagination import build_page, build_raw_page, decode_cursor, encode_cursor
+from app.infrastructure.rollups import build_stats, rollup_changes, stats_keys, today_utc, visibility_changes
+from app.infrastructure.search import build_search_page, decode_search_cursor, search_terms
+from app.infrastructure.versions import PUBLIC_SCOPE, comment_scopes, user_scope
+from bson import ObjectId
+
+
+def _key(doc: dict) -> tuple:
+    return doc["created_at"], doc["_id"]
+
+
+def _stored(document: dict) -> dict:
+    # O MongoDB grava em UTC e o pymongo devolve o datetime sem fuso
+    created_at = document["created_at"]
+    if created_at.tzinfo is not None:
+        document["created_at"] = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return document
+
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r"\w+", text.lower()))
+
+
+class InMemoryCommentRepository(CommentRepository):
+    """CommentRepository sobre dicts e listas ordenadas.
+
+    As listagens usam listas de chaves (created_at, _id) em ordem crescente,
+    percorridas de trás para frente como o índice de KEYSET_SORT, e a busca
+    usa um índice invertido por palavra.
+    """
+
+    def __init__(self, documents: List[dict] = ()):
+        self._docs: dict[ObjectId, dict] = {}
+        self._public: list[tuple] = []
+        self._by_user: dict[str, list[tuple]] = defaultdict(list)
+        # Listas em vez de sets: com 10^6 comentários o índice invertido ocupa bem menos memória
+        self._words: dict[str, list[ObjectId]] = defaultdict(list)
+        self._versions: Counter = Counter()
+        self._rollups: dict[str, Counter] = defaultdict(Counter)
+        self._idempotency: dict[str, dict] = {}
+        self.outbox: list[dict] = []
+        for doc in sorted(documents, key=_key):
+            self._index(dict(doc), sort=False)
+        self._apply_rollups(rollup_changes(created=self._docs.values()))
+
+    def _index(self, doc: dict, sort: bool = True):
+        self._docs[doc["_id"]] = doc
+        add = insort if sort else list.append
+        if doc["is_public"]:
+            add(self._public, _key(doc))
+        add(self._by_user[doc["user_id"]], _key(doc))
+        for word in _words(doc["message"]):
+            self._words[word].append(doc["_id"])
+
+    def _unindex(self, doc: dict):
+        del self._docs[doc["_id"]]
+        if doc["is_public"]:
+            self._public.pop(bisect_left(self._public, _key(doc)))
+        keys = self._by_user[doc["user_id"]]
+        keys.pop(bisect_left(keys, _key(doc)))
+        for word in _words(doc["message"]):
+            self._words[word].remove(doc["_id"])
+
+    def _apply_rollups(self, changes: dict[str, Counter]):
+        for key, fields in changes.items():
+            self._rollups[key].update(fields)
+
+    def _bump(self, scopes: list[str]):
+        self._versions.update(scopes)
+
+    def _newest(self, keys: list[tuple], cursor: Optional[str]) -> Iterator[dict]:
+        end = bisect_left(keys, decode_cursor(cursor)) if cursor else len(keys)
+        for index in range(end - 1, -1, -1):
+            yield dict(self._docs[keys[index][1]])
+
+    def _first(self, keys: list[tuple], cursor: Optional[str], count: int) -> list[dict]:
+        docs = []
+        for doc in self._newest(keys, cursor):
+            if len(docs) == count:
+                break
+            docs.append(doc)
+        return docs
+
+    def _find_owned(self, comment_id: str, user_id: str) -> dict:
+        doc = self._docs.get(owned_object_id(comment_id))
+        if doc is None:
+            raise CommentNotFoundError(comment_id)
+        if doc["user_id"] != user_id:
+            raise CommentPermissionError(comment_id)
+        return doc
+
+    def public_cursor(self, fraction: float) -> str:
+        """Cursor da listagem pública a `fraction` do caminho entre o mais novo e o mais antigo."""
+        index = len(self._public) - 1 - int((len(self._public) - 1) * fraction)
+        return encode_cursor(self._docs[self._public[index][1]])
+
+    def _store(self, comment: Comment, notification: Optional[dict]) -> dict:
+        document = _stored(to_document(comment))
+        document["_id"] = ObjectId()
+        self._index(document)
+        if notification is not None:
+            self.outbox.append(notification)
+        self._apply_rollups(rollup_changes(created=[document]))
+        return document
+
+    def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        document = self._store(comment, notification)
+        self._bump(comment_scopes(comment.user_id, comment.is_public))
+        return from_document(dict(document))
+
+    def insert_idempotent(self, comment: Comment, notification: Optional[dict], key: IdempotencyKey) -> tuple[Comment, bool]:
+        record = self._idempotency.get(key.id)
+        if record is not None:
+            return replayed_comment(record, key), True
+        created = self.insert(comment, notification)
+        self._idempotency[key.id] = {"request_hash": key.request_hash, "comment": created.model_dump()}
+        return created, False
+
+    def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                    ordered: bool = True) -> List[Optional[str]]:
+        # Como o repositório do MongoDB: preenche o id de cada comentário e incrementa as versões uma vez por lote
+        notifications = notifications or [None] * len(comments)
+        scopes = set()
+        for comment, notification in zip(comments, notifications):
+            comment.id = str(self._store(comment, notification)["_id"])
+            scopes.update(comment_scopes(comment.user_id, comment.is_public))
+        if scopes:
+            self._bump(sorted(scopes))
+        return [None] * len(comments)
+
+    def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return build_page(self._first(self._public, cursor, limit + 1), limit)
+
+    def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return build_page(self._first(self._by_user[user_id], cursor, limit + 1), limit)
+
+    def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return build_raw_page(self._first(self._public, cursor, limit + 1), limit)
+
+    def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return build_raw_page(self._first(self._by_user[user_id], cursor, limit + 1), limit)
+
+    def stream_public(self, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return (from_document(doc) for doc in self._newest(self._public, cursor))
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> Iterator[Comment]:
+        return (from_document(doc) for doc in self._newest(self._by_user[user_id], cursor))
+
+    def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+               cursor: Optional[str] = None) -> CommentSearchPage:
+        # Pontua pelo número de ocorrências dos termos, uma aproximação do textScore
+        terms = [term.lower() for term in search_terms(text)]
+        scores: Counter = Counter()
+        for term in terms:
+            for object_id in self._words.get(term, ()):
+                doc = self._docs[object_id]
+                if doc["is_public"] or doc["user_id"] == viewer_id:
+                    scores[object_id] += 1
+        ranked = sorted(((float(score), object_id) for object_id, score in scores.items()), reverse=True)
+        if cursor:
+            after = decode_search_cursor(cursor)
+            ranked = [entry for entry in ranked if entry < after]
+        docs = [{**self._docs[object_id], "score": score} for score, object_id in ranked[:limit + 1]]
+        return build_search_page(docs, text, limit)
+
+    def get_public_version(self) -> int:
+        return self._versions[PUBLIC_SCOPE]
+
+    def get_user_version(self, user_id: str) -> int:
+        return self._versions[user_scope(user_id)]
+
+    def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        keys, window = stats_keys(days, user_id, today_utc())
+        return build_stats([{"_id": key, **self._rollups[key]} for key in keys if key in self._rollups], window, user_id)
+
+    def get_by_id(self, comment_id: str) -> Comment:
+        doc = self._docs.get(ObjectId(comment_id))
+        return from_document(dict(doc)) if doc else None
+
+    def delete(self, comment_id: str) -> Optional[DeletedComment]:
+        doc = self._docs.get(ObjectId(comment_id))
+        if doc is None:
+            return None
+        self._unindex(doc)
+        self._apply_rollups(rollup_changes(removed=[doc]))
+        self._bump(comment_scopes(doc["user_id"], doc["is_public"]))
+        return deleted_from_document(comment_id, doc)
+
+    def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        doc = self._find_owned(comment_id, user_id)
+        self.delete(comment_id)
+        return from_document(dict(doc))
+
+    def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        before = self._find_owned(comment_id, user_id)
+        after = apply_guarded_update(dict(before), user_id, changes, expected_version)
+        self._unindex(before)
+        self._index(after)
+        self._apply_rollups(visibility_changes(before, after))
+        self._bump(sorted(set(comment_scopes(user_id, before["is_public"]) + comment_scopes(user_id, after["is_public"]))))
+        return from_document(dict(after))
+
+
+class InMemoryAsyncCommentRepository(AsyncCommentRepository):
+    """A mesma base em memória atrás da interface assíncrona, para COMMENTS_IO_MODE=async."""
+
+    def __init__(self, repository: InMemoryCommentRepository):
+        self.repository = repository
+
+    async def insert(self, comment: Comment, notification: Optional[dict] = None) -> Comment:
+        return self.repository.insert(comment, notification)
+
+    async def insert_idempotent(self, comment: Comment, notification: Optional[dict], key: IdempotencyKey) -> tuple[Comment, bool]:
+        return self.repository.insert_idempotent(comment, notification, key)
+
+    async def insert_many(self, comments: List[Comment], notifications: Optional[List[dict]] = None,
+                          ordered: bool = True) -> List[Optional[str]]:
+        return self.repository.insert_many(comments, notifications, ordered)
+
+    async def list_public(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return self.repository.list_public(limit, cursor)
+
+    async def list_by_user(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> CommentPage:
+        return self.repository.list_by_user(user_id, limit, cursor)
+
+    async def list_public_raw(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return self.repository.list_public_raw(limit, cursor)
+
+    async def list_by_user_raw(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> RawCommentPage:
+        return self.repository.list_by_user_raw(user_id, limit, cursor)
+
+    async def _aiter(self, comments: Iterator[Comment]) -> AsyncIterator[Comment]:
+        for comment in comments:
+            yield comment
+
+    def stream_public(self, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self._aiter(self.repository.stream_public(cursor))
+
+    def stream_by_user(self, user_id: str, cursor: Optional[str] = None) -> AsyncIterator[Comment]:
+        return self._aiter(self.repository.stream_by_user(user_id, cursor))
+
+    async def search(self, text: str, viewer_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                     cursor: Optional[str] = None) -> CommentSearchPage:
+        return self.repository.search(text, viewer_id, limit, cursor)
+
+    async def get_public_version(self) -> int:
+        return self.repository.get_public_version()
+
+    async def get_user_version(self, user_id: str) -> int:
+        return self.repository.get_user_version(user_id)
+
+    async def get_stats(self, days: int = DEFAULT_STATS_DAYS, user_id: Optional[str] = None) -> CommentStats:
+        return self.repository.get_stats(days, user_id)
+
+    async def get_by_id(self, comment_id: str) -> Comment:
+        return self.repository.get_by_id(comment_id)
+
+    async def delete(self, comment_id: str) -> Optional[DeletedComment]:
+        return self.repository.delete(comment_id)
+
+    async def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+        return self.repository.delete_owned(comment_id, user_id)
+
+    async def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+        return self.repository.update_owned(comment_id, user_id, changes, expected_version)
@@ -0,0 +1,186 @@
+"""Execução dos benchmarks de endpoints pelo ASGI, sem servidor nem rede.
+
+Cada endpoint recebe um número fixo de requisições, divididas entre
+`concurrency` clientes simultâneos, e uma segunda passada sequencial mede a
+memória alocada por requisição com tracemalloc (que deixa as requisições
+bem mais lentas, por isso fica fora das latências).
+
+Os resultados ficam em benchmarks/results/, um arquivo por execução com o
+commit e a configuração; cada execução é comparada com a anterior da mesma
+configuração para que uma regressão entre commits apareça no relatório.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Variação relativa a partir da qual uma métrica pior que a da execução anterior é uma regressão
+DEFAULT_THRESHOLD = 0.10
+
+# Métricas comparadas e se um valor maior é melhor
+METRICS = {"req_per_s": True, "p50_ms": False, "p99_ms": False, "alloc_kib": False}
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    # Argumentos do httpx para a i-ésima requisição (params, headers, json)
+    build: Callable[[int], dict] = field(default=lambda index: {})
+    expected_status: int = 200
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Percentil pelo método nearest-rank."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _send(client: httpx.AsyncClient, endpoint: Endpoint, index: int):
+    response = await client.request(endpoint.method, endpoint.path, **endpoint.build(index))
+    if response.status_code != endpoint.expected_status:
+        raise RuntimeError(f"{endpoint.name}: status {response.status_code}, esperado {endpoint.expected_status}: {response.text[:200]}")
+
+
+async def measure(client: httpx.AsyncClient, endpoint: Endpoint, requests: int, concurrency: int,
+                  warmup: int = 20, alloc_requests: int = 50) -> dict:
+    for index in range(warmup):
+        await _send(client, endpoint, index)
+
+    latencies = []
+    counter = itertools.count()
+
+    async def worker():
+        while (index := next(counter)) < requests:
+            started = time.perf_counter()
+            await _send(client, endpoint, warmup + index)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for index in range(alloc_requests):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await _send(client, endpoint, warmup + requests + index)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "req_per_s": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "alloc_kib": sum(peaks) / len(peaks) / 1024 if peaks else 0.0,
+    }
+
+
+async def run(app, endpoints: list[Endpoint], requests: int, concurrency: int) -> dict[str, dict]:
+    # O httpx registra cada requisição em INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for endpoint in endpoints:
+            results[endpoint.name] = await measure(client, endpoint, requests, concurrency)
+            print(format_row(endpoint.name, results[endpoint.name]), flush=True)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=Path(__file__).parent).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True,
+                               cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def save_results(service: str, config: dict, results: dict[str, dict], directory: Path = RESULTS_DIR) -> Path:
+    commit = git_commit()
+    created_at = datetime.now(timezone.utc)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{service}-{created_at:%Y%m%dT%H%M%S}-{commit}.json"
+    path.write_text(json.dumps({
+        "service": service,
+        "commit": commit,
+        "created_at": created_at.isoformat(),
+        "python": platform.python_version(),
+        "config": config,
+        "endpoints": results,
+    }, indent=2))
+    return path
+
+
+def previous_results(service: str, config: dict, exclude: Optional[Path] = None, directory: Path = RESULTS_DIR) -> Optional[dict]:
+    """Execução mais recente do mesmo serviço e configuração, excluindo `exclude`."""
+    candidates = []
+    for path in directory.glob(f"{service}-*.json"):
+        if exclude is not None and path.resolve() == exclude.resolve():
+            continue
+        data = json.loads(path.read_text())
+        if data.get("config") == config:
+            candidates.append(data)
+    return max(candidates, key=lambda data: data["created_at"], default=None)
+
+
+def regressions(results: dict[str, dict], baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    found = []
+    for name, metrics in results.items():
+        before = baseline["endpoints"].get(name)
+        if not before:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if not before.get(metric):
+                continue
+            change = (metrics[metric] - before[metric]) / before[metric]
+            if (-change if higher_is_better else change) > threshold:
+                found.append(f"{name} {metric}: {before[metric]:.2f} → {metrics[metric]:.2f} ({change:+.0%})")
+    return found
+
+
+def format_header() -> str:
+    return f"{'endpoint':<28} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'KiB/req':>8}"
+
+
+def format_row(name: str, metrics: dict) -> str:
+    return (f"{name:<28} {metrics['req_per_s']:>9.0f} {metrics['p50_ms']:>8.2f} {metrics['p99_ms']:>8.2f} "
+            f"{metrics['alloc_kib']:>8.1f}")
+
+
+def report(service: str, config: dict, results: dict[str, dict], save: bool = True,
+           threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Grava os resultados e devolve as regressões em relação à execução anterior."""
+    path = save_results(service, config, results) if save else None
+    baseline = previous_results(service, config, exclude=path)
+    if path:
+        print(f"\nresultados gravados em {path}")
+    if baseline is None:
+        print("nenhuma execução anterior com a mesma configuração para comparar")
+        return []
+    found = regressions(results, baseline, threshold)
+    print(f"comparado com {baseline['commit']} ({baseline['created_at']}):")
+    for line in found or [f"sem regressões acima de {threshold:.0%}"]:
+        print(f"  {line}")
+    return found
@@ -7,9 +7,8 @@ from datetime import datetime, timezone
 from app.main import app
 from app.routes import routes
 from app.application.comment_service import CommentService
-from app.domain.comment import Comment, CommentCreate
+from app.domain.comment import Comment, CommentCreate, CommentPage
 from app.infrastructure.comment_mongo_repository import CommentMongoRepository
-from app.infrastructure.publisher import RabbitMQPublisher
 from fastapi import HTTPException, status
 
 
@@ -23,17 +22,11 @@ def mock_comment_mongo_repository():
     return MagicMock(spec=CommentMongoRepository)
 
 
-@pytest.fixture
-def mock_rabbitmq_publisher():
-    return MagicMock(spec=RabbitMQPublisher)
-
-
 @pytest.fixture(autouse=True)
-def override_get_service(mock_comment_service, mock_comment_mongo_repository, mock_rabbitmq_publisher):
+def override_get_service(mock_comment_service, mock_comment_mongo_repository):
     def _override_get_service():
         # Ensure the mocked service uses mocked dependencies
         mock_comment_service.repository = mock_comment_mongo_repository
-        mock_comment_service.publisher = mock_rabbitmq_publisher
         return mock_comment_service
 
     app.dependency_overrides[routes.get_service] = _override_get_service
@@ -98,7 +91,7 @@ async def test_get_public_comments_success(async_client, mock_comment_service):
         Comment(id="id1", user_id="user1", user_name="User One", message="Comment 1", is_public=True, created_at=datetime.now(timezone.utc)),
         Comment(id="id2", user_id="user2", user_name="User Two", message="Comment 2", is_public=True, created_at=datetime.now(timezone.utc)),
     ]
-    mock_comment_service.get_all_public_comments.return_value = mock_comments
+    mock_comment_service.get_all_public_comments.return_value = CommentPage(items=mock_comments)
 
     response = await async_client.get("/comments/all_public") # Corrected endpoint
 
@@ -111,7 +104,8 @@ async def test_get_public_comments_success(async_client, mock_comment_service):
             "user_name": c.user_name,
             "message": c.message,
             "is_public": c.is_public,
-            "created_at": c.created_at.isoformat().replace("+00:00", "Z")
+            "created_at": c.created_at.isoformat().replace("+00:00", "Z"),
+            "version": c.version
         } for c in mock_comments
     ]
     assert response.json() == expected_json
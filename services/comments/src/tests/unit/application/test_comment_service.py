@@ -1,10 +1,12 @@
 from datetime import datetime, timezone
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
-from app.application.comment_service import CommentService
-from app.domain.comment import Comment, CommentCreate, CommentRepository
-from app.infrastructure.publisher import Publisher
+from app.application.comment_service import AsyncCommentService, CommentService
+from app.domain.comment import (DEFAULT_PAGE_SIZE, AsyncCommentRepository, Comment, CommentCreate, CommentPage, CommentRepository,
+                                CommentStats, CommentUpdate, DeletedComment, IdempotencyKey, UserCommentCount)
+from app.infrastructure.broadcaster import CommentBroadcaster
+from app.infrastructure.timeline import PublicTimeline
 
 
 class TestCommentService:
@@ -15,14 +17,9 @@ class TestCommentService:
         return MagicMock(spec=CommentRepository)
 
     @pytest.fixture
-    def mock_publisher(self):
-        """Mock publisher para os testes"""
-        return MagicMock(spec=Publisher)
-
-    @pytest.fixture
-    def comment_service(self, mock_repository, mock_publisher):
+    def comment_service(self, mock_repository):
         """Instância do serviço com dependências mock"""
-        return CommentService(mock_repository, mock_publisher)
+        return CommentService(mock_repository)
 
     @pytest.fixture
     def sample_comment_create(self):
@@ -44,7 +41,7 @@ class TestCommentService:
             created_at=datetime.now(timezone.utc)
         )
 
-    def test_create_comment_success(self, comment_service, mock_repository, mock_publisher, sample_comment_create):
+    def test_create_comment_success(self, comment_service, mock_repository, sample_comment_create):
         """Testa criação de comentário com sucesso"""
         # Arrange
         user_id = "user123"
@@ -65,11 +62,12 @@ class TestCommentService:
         # Assert
         assert result == created_comment
         mock_repository.insert.assert_called_once()
-        mock_publisher.publish_comment.assert_called_once_with({
+        # A notificação segue para o outbox na mesma gravação do comentário
+        assert mock_repository.insert.call_args.kwargs["notification"] == {
             "user_name": user_name,
             "message": sample_comment_create.message,
             "is_public": sample_comment_create.is_public
-        })
+        }
 
         # Verifica se o comentário foi criado com os dados corretos
         call_args = mock_repository.insert.call_args[0][0]
@@ -79,7 +77,7 @@ class TestCommentService:
         assert call_args.is_public == sample_comment_create.is_public
         assert isinstance(call_args.created_at, datetime)
 
-    def test_create_private_comment(self, comment_service, mock_repository, mock_publisher):
+    def test_create_private_comment(self, comment_service, mock_repository):
         """Testa criação de comentário privado"""
         # Arrange
         comment_create = CommentCreate(message="Private comment", is_public=False)
@@ -101,11 +99,27 @@ class TestCommentService:
         # Assert
         assert result == created_comment
         mock_repository.insert.assert_called_once()
-        mock_publisher.publish_comment.assert_called_once_with({
+        assert mock_repository.insert.call_args.kwargs["notification"] == {
             "user_name": user_name,
             "message": comment_create.message,
             "is_public": False
-        })
+        }
+
+    def test_create_comments_in_bulk(self, comment_service, mock_repository):
+        """Testa criação em lote com as notificações alinhadas aos comentários"""
+        # Arrange
+        items = [CommentCreate(message="a"), CommentCreate(message="b", is_public=False)]
+        mock_repository.insert_many.return_value = [None, "write error"]
+
+        # Act
+        results = comment_service.create_comments(items, "user123", "Test User", ordered=False)
+
+        # Assert
+        comments, notifications, ordered = mock_repository.insert_many.call_args[0]
+        assert [comment.message for comment in comments] == ["a", "b"]
+        assert notifications[1] == {"user_name": "Test User", "message": "b", "is_public": False}
+        assert ordered is False
+        assert [error for _, error in results] == [None, "write error"]
 
     def test_get_all_public_comments(self, comment_service, mock_repository, sample_comment):
         """Testa busca de todos os comentários públicos"""
@@ -132,6 +146,19 @@ class TestCommentService:
         assert result == []
         mock_repository.list_public.assert_called_once()
 
+    def test_get_all_public_comments_with_cursor(self, comment_service, mock_repository, sample_comment):
+        """Testa repasse do limite e do cursor para o repositório"""
+        # Arrange
+        expected_page = CommentPage(items=[sample_comment], next_cursor="next")
+        mock_repository.list_public.return_value = expected_page
+
+        # Act
+        result = comment_service.get_all_public_comments(limit=10, cursor="abc")
+
+        # Assert
+        assert result == expected_page
+        mock_repository.list_public.assert_called_once_with(limit=10, cursor="abc")
+
     def test_get_comments_by_user(self, comment_service, mock_repository, sample_comment):
         """Testa busca de comentários por usuário"""
         # Arrange
@@ -144,7 +171,7 @@ class TestCommentService:
 
         # Assert
         assert result == expected_comments
-        mock_repository.list_by_user.assert_called_once_with(user_id)
+        mock_repository.list_by_user.assert_called_once_with(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None)
 
     def test_get_comments_by_user_empty(self, comment_service, mock_repository):
         """Testa busca por usuário quando não há comentários"""
@@ -157,7 +184,7 @@ class TestCommentService:
 
         # Assert
         assert result == []
-        mock_repository.list_by_user.assert_called_once_with(user_id)
+        mock_repository.list_by_user.assert_called_once_with(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None)
 
     def test_get_comment_by_id_success(self, comment_service, mock_repository, sample_comment):
         """Testa busca de comentário por ID com sucesso"""
@@ -189,7 +216,9 @@ class TestCommentService:
         """Testa exclusão de comentário com sucesso"""
         # Arrange
         comment_id = "507f1f77bcf86cd799439011"
-        mock_repository.delete.return_value = True
+        mock_repository.delete.return_value = DeletedComment(
+            id=comment_id, user_id="user123", is_public=True, created_at=datetime.now(timezone.utc)
+        )
 
         # Act
         result = comment_service.delete_comment(comment_id)
@@ -202,7 +231,7 @@ class TestCommentService:
         """Testa exclusão de comentário que não existe"""
         # Arrange
         comment_id = "507f1f77bcf86cd799439011"
-        mock_repository.delete.return_value = False
+        mock_repository.delete.return_value = None
 
         # Act
         result = comment_service.delete_comment(comment_id)
@@ -210,3 +239,299 @@ class TestCommentService:
         # Assert
         assert result is False
         mock_repository.delete.assert_called_once_with(comment_id)
+
+    def test_broadcasts_public_create_and_delete(self, mock_repository, sample_comment):
+        """Testa que criação e exclusão alimentam o feed ao vivo"""
+        # Arrange
+        broadcaster = MagicMock(spec=CommentBroadcaster)
+        service = CommentService(mock_repository, broadcaster)
+        mock_repository.insert.return_value = sample_comment
+        mock_repository.delete_owned.return_value = sample_comment
+
+        # Act
+        service.create_comment(CommentCreate(message="m"), "user123", "Test User")
+        service.delete_user_comment(sample_comment.id, "user123")
+
+        # Assert
+        broadcaster.publish_created.assert_called_once_with(sample_comment)
+        broadcaster.publish_deleted.assert_called_once_with(sample_comment.id)
+
+    def test_private_delete_is_not_broadcast(self, mock_repository):
+        """Testa que a remoção de um comentário privado não chega ao feed público"""
+        # Arrange
+        broadcaster = MagicMock(spec=CommentBroadcaster)
+        service = CommentService(mock_repository, broadcaster)
+        mock_repository.delete.return_value = DeletedComment(
+            id="1", user_id="user123", is_public=False, created_at=datetime.now(timezone.utc)
+        )
+
+        # Act
+        result = service.delete_comment("1")
+
+        # Assert
+        assert result is True
+        broadcaster.publish_deleted.assert_not_called()
+
+    def test_create_comment_idempotent_replay_is_not_broadcast(self, mock_repository, sample_comment):
+        """Testa que o replay de uma Idempotency-Key não publica o comentário de novo"""
+        # Arrange
+        broadcaster = MagicMock(spec=CommentBroadcaster)
+        service = CommentService(mock_repository, broadcaster)
+        mock_repository.insert_idempotent.side_effect = [(sample_comment, False), (sample_comment, True)]
+        data = CommentCreate(message="m")
+
+        # Act
+        first = service.create_comment_idempotent(data, "user123", "Test User", "key-1")
+        second = service.create_comment_idempotent(data, "user123", "Test User", "key-1")
+
+        # Assert
+        assert first == (sample_comment, False)
+        assert second == (sample_comment, True)
+        broadcaster.publish_created.assert_called_once_with(sample_comment)
+        key = mock_repository.insert_idempotent.call_args.args[2]
+        assert key == IdempotencyKey.for_comment("key-1", "user123", data)
+
+    def test_update_broadcasts_changes(self, mock_repository, sample_comment):
+        """Testa que a edição publica o comentário e os campos alterados"""
+        # Arrange
+        broadcaster = MagicMock(spec=CommentBroadcaster)
+        service = CommentService(mock_repository, broadcaster)
+        mock_repository.update_owned.return_value = sample_comment
+
+        # Act
+        service.update_comment(sample_comment.id, "user123", CommentUpdate(is_public=False, version=0))
+
+        # Assert
+        broadcaster.publish_updated.assert_called_once_with(sample_comment, {"is_public": False})
+
+    def test_first_page_served_from_timeline(self, mock_repository, sample_comment):
+        """Testa que a primeira página vem da timeline, carregada uma vez pelo streaming"""
+        # Arrange
+        service = CommentService(mock_repository, timeline=PublicTimeline(capacity=10))
+        mock_repository.get_public_version.return_value = 7
+        mock_repository.stream_public.return_value = (comment for comment in [sample_comment])
+
+        # Act
+        version = service.get_public_comments_version()
+        first = service.get_all_public_comments(limit=10)
+        second = service.get_all_public_comments(limit=10)
+
+        # Assert
+        assert version == 7
+        assert [item.id for item in first.items] == [sample_comment.id]
+        assert second == first
+        mock_repository.stream_public.assert_called_once_with()
+        mock_repository.list_public.assert_not_called()
+
+    def test_older_page_falls_back_to_repository(self, mock_repository, sample_comment):
+        """Testa que a página que não cabe na timeline vem do repositório"""
+        # Arrange
+        service = CommentService(mock_repository, timeline=PublicTimeline(capacity=1))
+        mock_repository.get_public_version.return_value = 1
+        older = sample_comment.model_copy(update={"id": "507f1f77bcf86cd799439010"})
+        mock_repository.stream_public.return_value = (comment for comment in [sample_comment, older])
+        mock_repository.list_public.return_value = CommentPage(items=[sample_comment, older])
+
+        # Act
+        result = service.get_all_public_comments(limit=2)
+
+        # Assert
+        assert result == CommentPage(items=[sample_comment, older])
+        mock_repository.list_public.assert_called_once_with(limit=2, cursor=None)
+
+    def test_create_comment_updates_timeline(self, mock_repository, sample_comment):
+        """Testa que o comentário criado por este processo entra na timeline sem recarga"""
+        # Arrange
+        timeline = PublicTimeline(capacity=10)
+        timeline.load([], version=3)
+        service = CommentService(mock_repository, timeline=timeline)
+        mock_repository.insert.return_value = sample_comment
+        mock_repository.get_public_version.return_value = 4
+
+        # Act
+        service.create_comment(CommentCreate(message="m"), "user123", "Test User")
+        service.get_public_comments_version()
+        page = service.get_all_public_comments()
+
+        # Assert
+        assert [item.id for item in page.items] == [sample_comment.id]
+        mock_repository.stream_public.assert_not_called()
+        mock_repository.list_public.assert_not_called()
+
+    def test_private_delete_keeps_incomplete_timeline(self, mock_repository, sample_comment):
+        """Testa que remover um comentário privado não força a recarga da timeline"""
+        # Arrange
+        timeline = PublicTimeline(capacity=1)
+        timeline.load([sample_comment, sample_comment.model_copy(update={"id": "older"})], version=3)
+        service = CommentService(mock_repository, timeline=timeline)
+        mock_repository.delete.return_value = DeletedComment(
+            id="private", user_id="user123", is_public=False, created_at=datetime.now(timezone.utc)
+        )
+
+        # Act
+        service.delete_comment("private")
+
+        # Assert
+        assert timeline.stale is False
+        assert timeline.version == 3
+
+    def test_write_from_other_replica_reloads_timeline(self, mock_repository, sample_comment):
+        """Testa recarga da timeline quando a versão pública muda sem escrita deste processo"""
+        # Arrange
+        timeline = PublicTimeline(capacity=10)
+        timeline.load([], version=3)
+        service = CommentService(mock_repository, timeline=timeline)
+        mock_repository.get_public_version.return_value = 4
+        mock_repository.stream_public.return_value = (comment for comment in [sample_comment])
+
+        # Act
+        service.get_public_comments_version()
+        page = service.get_all_public_comments()
+
+        # Assert
+        assert [item.id for item in page.items] == [sample_comment.id]
+        assert timeline.version == 4
+
+
+    def test_get_comment_stats_hides_private_count_from_anonymous(self, comment_service, mock_repository):
+        """Testa que sem token a contagem do autor traz só os públicos"""
+        mock_repository.get_stats.return_value = CommentStats(
+            total=5, public=3, days=[], user=UserCommentCount(user_id="user123", count=4, public=1)
+        )
+
+        stats = comment_service.get_comment_stats(days=7, user_id="user123")
+
+        assert stats.user.count is None
+        assert stats.user.public == 1
+        assert mock_repository.get_stats.return_value.user.count == 4
+
+    def test_get_comment_stats_shows_own_count(self, comment_service, mock_repository):
+        """Testa que o próprio autor vê o total, privados incluídos"""
+        mock_repository.get_stats.return_value = CommentStats(
+            total=5, public=3, days=[], user=UserCommentCount(user_id="user123", count=4, public=1)
+        )
+
+        assert comment_service.get_comment_stats(days=7, user_id="user123", viewer_id="user123").user.count == 4
+        assert comment_service.get_comment_stats(days=7, user_id="user123", viewer_id="other").user.count is None
+
+
+class TestAsyncCommentService:
+
+    @pytest.fixture
+    def mock_repository(self):
+        """Mock assíncrono do repositório"""
+        return AsyncMock(spec=AsyncCommentRepository)
+
+    @pytest.fixture
+    def comment_service(self, mock_repository):
+        """Instância do serviço assíncrono com dependências mock"""
+        return AsyncCommentService(mock_repository)
+
+    @pytest.fixture
+    def sample_comment(self):
+        """Comment de exemplo para testes"""
+        return Comment(
+            id="507f1f77bcf86cd799439011",
+            user_id="user123",
+            user_name="Test User",
+            message="Test comment message",
+            is_public=True,
+            created_at=datetime.now(timezone.utc)
+        )
+
+    @pytest.mark.asyncio
+    async def test_create_comment_success(self, comment_service, mock_repository):
+        """Testa criação assíncrona de comentário"""
+        # Arrange
+        data = CommentCreate(message="Async comment", is_public=True)
+        mock_repository.insert.side_effect = lambda comment, notification: comment
+
+        # Act
+        result = await comment_service.create_comment(data, "user123", "Test User")
+
+        # Assert
+        assert result.message == "Async comment"
+        assert result.user_id == "user123"
+        mock_repository.insert.assert_awaited_once()
+        assert mock_repository.insert.call_args.kwargs["notification"] == {
+            "user_name": "Test User",
+            "message": "Async comment",
+            "is_public": True
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_all_public_comments(self, comment_service, mock_repository, sample_comment):
+        """Testa busca assíncrona de comentários públicos"""
+        # Arrange
+        mock_repository.list_public.return_value = [sample_comment]
+
+        # Act
+        result = await comment_service.get_all_public_comments()
+
+        # Assert
+        assert result == [sample_comment]
+        mock_repository.list_public.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_delete_comment(self, comment_service, mock_repository):
+        """Testa exclusão assíncrona de comentário"""
+        # Arrange
+        mock_repository.delete.return_value = DeletedComment(
+            id="507f1f77bcf86cd799439011", user_id="user123", is_public=True, created_at=datetime.now(timezone.utc)
+        )
+
+        # Act
+        result = await comment_service.delete_comment("507f1f77bcf86cd799439011")
+
+        # Assert
+        assert result is True
+        mock_repository.delete.assert_awaited_once_with("507f1f77bcf86cd799439011")
+
+    @pytest.mark.asyncio
+    async def test_bulk_broadcasts_only_inserted(self, mock_repository):
+        """Testa que apenas os comentários gravados no lote são publicados"""
+        # Arrange
+        broadcaster = MagicMock(spec=CommentBroadcaster)
+        service = AsyncCommentService(mock_repository, broadcaster)
+        mock_repository.insert_many.return_value = [None, "duplicate key"]
+
+        # Act
+        results = await service.create_comments([CommentCreate(message="a"), CommentCreate(message="b")], "user123", "Test User")
+
+        # Assert
+        broadcaster.publish_created.assert_called_once_with(results[0][0])
+
+    @pytest.mark.asyncio
+    async def test_first_page_served_from_timeline(self, mock_repository, sample_comment):
+        """Testa que a primeira página assíncrona vem da timeline"""
+        # Arrange
+        async def stream():
+            yield sample_comment
+
+        service = AsyncCommentService(mock_repository, timeline=PublicTimeline(capacity=10))
+        mock_repository.get_public_version.return_value = 2
+        mock_repository.stream_public = MagicMock(return_value=stream())
+
+        # Act
+        await service.get_public_comments_version()
+        page = await service.get_all_public_comments_raw(limit=5)
+
+        # Assert
+        assert [item["id"] for item in page.items] == [sample_comment.id]
+        mock_repository.list_public_raw.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_delete_owned_removes_from_timeline(self, mock_repository, sample_comment):
+        """Testa que o comentário removido sai da timeline"""
+        # Arrange
+        timeline = PublicTimeline(capacity=10)
+        timeline.load([sample_comment], version=1)
+        service = AsyncCommentService(mock_repository, timeline=timeline)
+        mock_repository.delete_owned.return_value = sample_comment
+
+        # Act
+        await service.delete_user_comment(sample_comment.id, "user123")
+
+        # Assert
+        assert timeline.page(limit=5).items == []
+        assert timeline.version == 2
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 
 import pytest
-from app.domain.comment import Comment, CommentCreate, CommentRepository
+from app.domain.comment import Comment, CommentCreate, CommentRepository, CommentUpdate, IdempotencyKey
 
 
 class TestCommentCreate:
@@ -185,6 +185,40 @@ def test_comment_model():
     assert comment_with_id.id == "abc123xyz"
 
 
+class TestCommentUpdate:
+
+    def test_changes_exclude_version_and_missing_fields(self):
+        """Testa que só os campos enviados entram na edição"""
+        # Arrange & Act
+        update = CommentUpdate(message="Edited", version=2)
+
+        # Assert
+        assert update.changes() == {"message": "Edited"}
+        assert update.version == 2
+
+    def test_requires_at_least_one_change(self):
+        """Testa que uma edição sem campos é rejeitada"""
+        # Arrange & Act & Assert
+        with pytest.raises(ValueError):
+            CommentUpdate(version=1)
+
+
+class TestIdempotencyKey:
+
+    def test_scoped_by_user_and_hashes_request(self):
+        """Testa que a chave é separada por autor e muda com o corpo da requisição"""
+        # Arrange
+        data = CommentCreate(message="Hello")
+
+        # Act
+        key = IdempotencyKey.for_comment("abc", "user123", data)
+
+        # Assert
+        assert key.id == "user123:abc"
+        assert key == IdempotencyKey.for_comment("abc", "user123", CommentCreate(message="Hello"))
+        assert key.request_hash != IdempotencyKey.for_comment("abc", "user123", CommentCreate(message="Hello", is_public=False)).request_hash
+
+
 def test_comment_repository_abstract_methods():
     # Ensure CommentRepository is an abstract base class
     # with pytest.raises(TypeError):
@@ -194,18 +228,54 @@ def test_comment_repository_abstract_methods():
         def insert(self, comment: Comment) -> Comment:
             return comment
 
+        def insert_idempotent(self, comment: Comment, notification, key) -> tuple:
+            return comment, False
+
+        def insert_many(self, comments: list[Comment], notifications=None, ordered: bool = True) -> list:
+            return [None] * len(comments)
+
         def list_public(self, limit: int = 100, offset: int = 0) -> list[Comment]:
             return []
 
         def list_by_user(self, user_id: str, limit: int = 100, offset: int = 0) -> list[Comment]:
             return []
 
+        def list_public_raw(self, limit: int = 100, cursor=None):
+            return None
+
+        def list_by_user_raw(self, user_id: str, limit: int = 100, cursor=None):
+            return None
+
+        def stream_public(self, cursor=None):
+            return iter([])
+
+        def stream_by_user(self, user_id: str, cursor=None):
+            return iter([])
+
+        def search(self, text: str, viewer_id=None, limit: int = 50, cursor=None):
+            return None
+
+        def get_public_version(self) -> int:
+            return 0
+
+        def get_user_version(self, user_id: str) -> int:
+            return 0
+
+        def get_stats(self, days: int = 30, user_id=None):
+            return None
+
         def get_by_id(self, comment_id: str) -> Comment:
             return None
 
         def delete(self, comment_id: str) -> bool:
             return True
 
+        def delete_owned(self, comment_id: str, user_id: str) -> Comment:
+            return None
+
+        def update_owned(self, comment_id: str, user_id: str, changes: dict, expected_version: int) -> Comment:
+            return None
+
     # Test that concrete implementation can be instantiated
     repo = ConcreteCommentRepository()
     assert isinstance(repo, CommentRepository)
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from app.infrastructure.archive import ARCHIVE_COLLECTION, ARCHIVE_SORT, archive_batch, archive_comments, archive_cutoff
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+
+CUTOFF = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_doc(object_id: str, version=None) -> dict:
+    doc = {"_id": ObjectId(object_id), "user_id": "user123", "is_public": True, "created_at": datetime(2023, 1, 1)}
+    if version is not None:
+        doc["version"] = version
+    return doc
+
+
+def test_archive_cutoff():
+    assert archive_cutoff(30, now=datetime(2024, 1, 31, tzinfo=timezone.utc)) == CUTOFF
+
+
+def test_archive_batch_copies_then_deletes_unchanged_comments():
+    comments, archive = MagicMock(), MagicMock()
+    docs = [make_doc("507f1f77bcf86cd799439011", version=2), make_doc("507f1f77bcf86cd799439012")]
+    comments.find.return_value.sort.return_value.limit.return_value = docs
+    comments.bulk_write.return_value.deleted_count = 2
+
+    moved = archive_batch(comments, archive, CUTOFF, batch_size=2)
+
+    assert moved == 2
+    comments.find.assert_called_once_with({"created_at": {"$lt": CUTOFF}}, session=None)
+    comments.find.return_value.sort.assert_called_once_with(ARCHIVE_SORT)
+    archive.bulk_write.assert_called_once_with([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs],
+                                               ordered=False, session=None)
+    # Um comentário editado depois da cópia fica na coleção quente e é copiado de novo no próximo lote
+    comments.bulk_write.assert_called_once_with([
+        DeleteOne({"_id": docs[0]["_id"], "version": 2}),
+        DeleteOne({"_id": docs[1]["_id"], "version": {"$exists": False}}),
+    ], ordered=False, session=None)
+
+
+def test_archive_batch_empty():
+    comments, archive = MagicMock(), MagicMock()
+    comments.find.return_value.sort.return_value.limit.return_value = []
+
+    assert archive_batch(comments, archive, CUTOFF) == 0
+    archive.bulk_write.assert_not_called()
+
+
+def test_archive_batch_uses_transaction_when_enabled():
+    comments, archive = MagicMock(), MagicMock()
+    comments.find.return_value.sort.return_value.limit.return_value = [make_doc("507f1f77bcf86cd799439011")]
+    session = comments.database.client.start_session.return_value.__enter__.return_value
+    session.with_transaction.side_effect = lambda callback: callback(session)
+
+    with patch.dict("os.environ", {"MONGO_TRANSACTIONS_ENABLED": "true"}):
+        archive_batch(comments, archive, CUTOFF)
+
+    assert archive.bulk_write.call_args.kwargs["session"] is session
+    assert comments.bulk_write.call_args.kwargs["session"] is session
+
+
+def test_archive_comments_runs_batches_until_done():
+    database = {"comments": MagicMock(), ARCHIVE_COLLECTION: MagicMock()}
+
+    with patch("app.infrastructure.archive.archive_batch", side_effect=[1000, 10, 0]) as mock_batch:
+        total = archive_comments(database, older_than_days=365, batch_size=1000)
+
+    assert total == 1010
+    assert mock_batch.call_count == 3
+
+
+def test_archive_comments_dry_run():
+    database = {"comments": MagicMock(), ARCHIVE_COLLECTION: MagicMock()}
+    database["comments"].count_documents.return_value = 42
+
+    assert archive_comments(database, dry_run=True) == 42
+    database[ARCHIVE_COLLECTION].bulk_write.assert_not_called()
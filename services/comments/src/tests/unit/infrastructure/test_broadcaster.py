@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from app.domain.comment import Comment
+from app.infrastructure.broadcaster import COMMENT_CREATED, COMMENT_DELETED, COMMENT_UPDATED, CommentBroadcaster
+
+
+def make_comment(is_public: bool = True) -> Comment:
+    return Comment(id="1", user_id="user123", user_name="Test User", message="m", is_public=is_public)
+
+
+async def next_event(subscription):
+    return await asyncio.wait_for(subscription.next(), 1)
+
+
+class TestCommentBroadcaster:
+
+    @pytest.mark.asyncio
+    async def test_subscribers_receive_events_in_order(self):
+        """Testa que todos os assinantes recebem os eventos na ordem de publicação"""
+        broadcaster = CommentBroadcaster()
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+
+        broadcaster.publish("a", "{}")
+        broadcaster.publish("b", "{}")
+
+        for subscription in (first, second):
+            assert [(await next_event(subscription)).type for _ in range(2)] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_publish_from_worker_thread(self):
+        """Testa a publicação vinda do threadpool das rotas síncronas"""
+        broadcaster = CommentBroadcaster()
+        subscription = broadcaster.subscribe()
+
+        thread = threading.Thread(target=broadcaster.publish, args=("a", "{}"))
+        thread.start()
+        thread.join()
+
+        assert (await next_event(subscription)).id == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_dropped(self):
+        """Testa que um assinante com a fila cheia é desligado sem afetar os demais"""
+        broadcaster = CommentBroadcaster(max_queue=2)
+        slow, healthy = broadcaster.subscribe(), broadcaster.subscribe()
+
+        for _ in range(2):
+            broadcaster.publish("a", "{}")
+            await next_event(healthy)
+        broadcaster.publish("a", "{}")
+        await next_event(healthy)
+
+        assert await next_event(slow) is None
+        assert slow.dropped is True
+        assert broadcaster.stats()["dropped"] == 1
+        assert broadcaster.stats()["subscribers"] == 1
+
+    @pytest.mark.asyncio
+    async def test_resume_from_last_event_id(self):
+        """Testa que a reconexão recebe os eventos posteriores ao Last-Event-ID"""
+        broadcaster = CommentBroadcaster()
+        for event_type in ("a", "b", "c"):
+            broadcaster.publish(event_type, "{}")
+
+        subscription = broadcaster.subscribe(last_event_id=1)
+
+        assert [event.id for event in subscription.replay] == [2, 3]
+        assert subscription.reset is False
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("last_event_id", [0, 99])
+    async def test_reset_when_history_cannot_resume(self, last_event_id):
+        """Testa o pedido de recarga quando o id saiu do histórico ou é de outro processo"""
+        broadcaster = CommentBroadcaster(history_size=2)
+        for event_type in ("a", "b", "c"):
+            broadcaster.publish(event_type, "{}")
+
+        subscription = broadcaster.subscribe(last_event_id=last_event_id)
+
+        assert subscription.reset is True
+        assert subscription.replay == []
+
+    @pytest.mark.asyncio
+    async def test_close_ends_open_subscriptions(self):
+        """Testa que o shutdown encerra os streams abertos"""
+        broadcaster = CommentBroadcaster()
+        subscription = broadcaster.subscribe()
+
+        broadcaster.close()
+
+        assert await next_event(subscription) is None
+        assert broadcaster.publish("a", "{}") is None
+
+    @pytest.mark.asyncio
+    async def test_comment_events(self):
+        """Testa quais mudanças de comentário chegam ao feed público"""
+        broadcaster = CommentBroadcaster()
+        subscription = broadcaster.subscribe()
+
+        broadcaster.publish_created(make_comment(is_public=False))
+        broadcaster.publish_updated(make_comment(is_public=False), {"message": "x"})
+        broadcaster.publish_created(make_comment())
+        broadcaster.publish_updated(make_comment(), {"message": "x"})
+        broadcaster.publish_updated(make_comment(is_public=False), {"is_public": False})
+
+        events = [await next_event(subscription) for _ in range(3)]
+        assert [event.type for event in events] == [COMMENT_CREATED, COMMENT_UPDATED, COMMENT_DELETED]
+        assert json.loads(events[0].data)["id"] == "1"
+        assert json.loads(events[2].data) == {"id": "1"}
@@ -0,0 +1,256 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.domain.comment import AsyncCommentRepository, Comment, CommentPage, CommentRepository, RawCommentPage
+from app.infrastructure.comment_cache import CachedAsyncCommentRepository, CachedCommentRepository, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_comment(comment_id: str, is_public: bool = True) -> Comment:
+    return Comment(id=comment_id, user_id="user123", user_name="Test User", message="m", is_public=is_public)
+
+
+class TestTTLCache:
+
+    def test_hit_and_miss_counters(self):
+        """Testa contadores de acerto e falha"""
+        cache = TTLCache()
+
+        assert cache.get("key") is None
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_ratio"] == 0.5
+
+    def test_entry_expires_after_ttl(self):
+        """Testa expiração por TTL"""
+        clock = FakeClock()
+        cache = TTLCache(ttl_seconds=10, clock=clock)
+        cache.set("key", "value")
+
+        clock.now = 10
+
+        assert cache.get("key") is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_lru_eviction_when_full(self):
+        """Testa remoção da entrada menos usada quando o cache enche"""
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_set_ignored_after_concurrent_invalidation(self):
+        """Testa que uma leitura iniciada antes da invalidação não repovoa o cache"""
+        cache = TTLCache()
+        generation = cache.generation
+
+        cache.evict_where(lambda key, value: True)
+        cache.set("key", "stale", generation)
+
+        assert cache.get("key") is None
+
+    def test_changed_version_clears_cache(self):
+        """Testa que uma versão diferente da última vista descarta as entradas"""
+        cache = TTLCache()
+        cache.observe_version(1)
+        cache.set("key", "value")
+
+        cache.observe_version(1)
+        assert cache.get("key") == "value"
+
+        cache.observe_version(2)
+        assert cache.get("key") is None
+
+
+class TestCachedCommentRepository:
+
+    @pytest.fixture
+    def mock_repository(self):
+        return MagicMock(spec=CommentRepository)
+
+    @pytest.fixture
+    def repository(self, mock_repository):
+        return CachedCommentRepository(mock_repository, TTLCache())
+
+    def test_list_public_served_from_cache(self, repository, mock_repository):
+        """Testa que a segunda leitura não consulta o banco"""
+        page = CommentPage(items=[make_comment("1")])
+        mock_repository.list_public.return_value = page
+
+        assert repository.list_public(limit=10) is page
+        assert repository.list_public(limit=10) is page
+
+        mock_repository.list_public.assert_called_once_with(limit=10, cursor=None)
+
+    def test_public_insert_invalidates_only_first_pages(self, repository, mock_repository):
+        """Testa que um comentário público novo invalida apenas as primeiras páginas"""
+        mock_repository.list_public.return_value = CommentPage(items=[make_comment("1")])
+        repository.list_public(limit=10)
+        repository.list_public(limit=10, cursor="next")
+        mock_repository.insert.return_value = make_comment("2")
+
+        repository.insert(make_comment(None))
+        repository.list_public(limit=10)
+        repository.list_public(limit=10, cursor="next")
+
+        assert mock_repository.list_public.call_count == 3
+
+    def test_private_insert_keeps_cache(self, repository, mock_repository):
+        """Testa que um comentário privado não invalida o feed público"""
+        mock_repository.list_public.return_value = CommentPage(items=[])
+        repository.list_public()
+        mock_repository.insert.return_value = make_comment("2", is_public=False)
+
+        repository.insert(make_comment(None, is_public=False))
+        repository.list_public()
+
+        mock_repository.list_public.assert_called_once()
+
+    def test_delete_invalidates_page_containing_comment(self, repository, mock_repository):
+        """Testa que a remoção invalida somente a página que contém o comentário"""
+        mock_repository.list_public.side_effect = [
+            CommentPage(items=[make_comment("1")], next_cursor="next"),
+            CommentPage(items=[make_comment("2")]),
+            CommentPage(items=[]),
+        ]
+        repository.list_public(limit=1)
+        repository.list_public(limit=1, cursor="next")
+        mock_repository.delete.return_value = True
+
+        repository.delete("2")
+        repository.list_public(limit=1)
+        repository.list_public(limit=1, cursor="next")
+
+        assert mock_repository.list_public.call_count == 3
+        assert repository.cache.stats()["evictions"] == 1
+
+    def test_raw_page_cached_and_evicted_by_id(self, repository, mock_repository):
+        """Testa que páginas do caminho rápido também são invalidadas pelo id do comentário"""
+        mock_repository.list_public_raw.return_value = RawCommentPage(items=[{"id": "1"}])
+        repository.list_public_raw(limit=10)
+        repository.list_public_raw(limit=10)
+        mock_repository.delete.return_value = True
+
+        repository.delete("1")
+        repository.list_public_raw(limit=10)
+
+        assert mock_repository.list_public_raw.call_count == 2
+
+    def test_update_of_cached_comment_evicts_its_page(self, repository, mock_repository):
+        """Testa que editar um comentário em cache invalida apenas a sua página"""
+        mock_repository.list_public.side_effect = [
+            CommentPage(items=[make_comment("1")], next_cursor="next"),
+            CommentPage(items=[make_comment("2")]),
+        ]
+        repository.list_public(limit=1)
+        repository.list_public(limit=1, cursor="next")
+        mock_repository.update_owned.return_value = make_comment("2")
+
+        repository.update_owned("2", "user123", {"message": "Edited"}, 0)
+
+        assert repository.cache.stats()["size"] == 1
+
+    def test_comment_made_public_clears_cache(self, repository, mock_repository):
+        """Testa que um comentário que passa a ser público limpa o cache"""
+        mock_repository.list_public.return_value = CommentPage(items=[make_comment("1")])
+        repository.list_public(limit=1)
+        mock_repository.update_owned.return_value = make_comment("9", is_public=True)
+
+        repository.update_owned("9", "user123", {"is_public": True}, 0)
+
+        assert repository.cache.stats()["size"] == 0
+
+    def test_write_through_other_instance_refreshes_page(self, mock_repository):
+        """Testa que a página servida acompanha a versão do ETag após uma escrita em outra réplica"""
+        mock_repository.get_public_version.return_value = 1
+        mock_repository.list_public.return_value = CommentPage(items=[make_comment("1")])
+        replica = CachedCommentRepository(mock_repository, TTLCache())
+        other_replica = CachedCommentRepository(mock_repository, TTLCache())
+        replica.get_public_version()
+        replica.list_public(limit=10)
+
+        mock_repository.delete.return_value = True
+        other_replica.delete("1")
+        mock_repository.get_public_version.return_value = 2
+        mock_repository.list_public.return_value = CommentPage(items=[])
+
+        assert replica.get_public_version() == 2
+        assert replica.list_public(limit=10).items == []
+
+    def test_version_bumped_before_local_eviction(self, mock_repository):
+        """Testa a leitura feita entre o incremento da versão e a invalidação do próprio processo"""
+        cache = TTLCache()
+        mock_repository.get_public_version.return_value = 1
+        mock_repository.list_public.return_value = CommentPage(items=[make_comment("1")])
+        reader = CachedCommentRepository(mock_repository, cache)
+        writer = CachedCommentRepository(mock_repository, cache)
+        reader.get_public_version()
+        reader.list_public(limit=10)
+        pages = []
+
+        def delete(comment_id):
+            # O repositório já incrementou a versão; o cache ainda não foi invalidado
+            mock_repository.get_public_version.return_value = 2
+            mock_repository.list_public.return_value = CommentPage(items=[])
+            pages.append((reader.get_public_version(), reader.list_public(limit=10)))
+            return True
+
+        mock_repository.delete.side_effect = delete
+        writer.delete("1")
+
+        [(version, page)] = pages
+        assert version == 2
+        assert page.items == []
+
+
+class TestCachedAsyncCommentRepository:
+
+    @pytest.mark.asyncio
+    async def test_list_public_served_from_cache(self):
+        """Testa o cache na pilha assíncrona"""
+        mock_repository = AsyncMock(spec=AsyncCommentRepository)
+        mock_repository.list_public.return_value = CommentPage(items=[make_comment("1")])
+        mock_repository.insert.return_value = make_comment("2")
+        repository = CachedAsyncCommentRepository(mock_repository, TTLCache())
+
+        await repository.list_public()
+        await repository.list_public()
+        await repository.insert(make_comment(None))
+        await repository.list_public()
+
+        assert mock_repository.list_public.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_write_through_other_instance_refreshes_page(self):
+        """Testa a invalidação pela versão na pilha assíncrona"""
+        mock_repository = AsyncMock(spec=AsyncCommentRepository)
+        mock_repository.get_public_version.return_value = 1
+        mock_repository.list_public.return_value = CommentPage(items=[make_comment("1")])
+        mock_repository.delete.return_value = True
+        replica = CachedAsyncCommentRepository(mock_repository, TTLCache())
+        other_replica = CachedAsyncCommentRepository(mock_repository, TTLCache())
+        await replica.get_public_version()
+        await replica.list_public()
+
+        await other_replica.delete("1")
+        mock_repository.get_public_version.return_value = 2
+        mock_repository.list_public.return_value = CommentPage(items=[])
+
+        assert await replica.get_public_version() == 2
+        assert (await replica.list_public()).items == []
@@ -2,9 +2,13 @@ from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
 import pytest
-from app.domain.comment import Comment
+from app.domain.comment import (Comment, CommentNotFoundError, CommentPermissionError, CommentVersionConflictError, DeletedComment,
+                                IdempotencyKey, IdempotencyKeyMismatchError, InvalidCursorError)
 from app.infrastructure.comment_mongo_repository import CommentMongoRepository
+from app.infrastructure.pagination import KEYSET_SORT, STREAM_BATCH_SIZE, decode_cursor, encode_cursor, keyset_after
+from app.infrastructure.rollups import rollup_changes
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 
 
 class TestCommentMongoRepository:
@@ -15,12 +19,40 @@ class TestCommentMongoRepository:
         return MagicMock()
 
     @pytest.fixture
-    def repository(self, mock_collection):
+    def mock_versions(self):
+        """Mock do contador de versões usado nos ETags"""
+        return MagicMock()
+
+    @pytest.fixture
+    def mock_outbox(self):
+        """Mock do outbox de notificações"""
+        return MagicMock()
+
+    @pytest.fixture
+    def mock_rollups(self):
+        """Mock dos contadores agregados de comentários"""
+        return MagicMock()
+
+    @pytest.fixture
+    def mock_idempotency(self):
+        """Mock das chaves Idempotency-Key"""
+        return MagicMock()
+
+    @pytest.fixture
+    def mock_archive(self):
+        """Mock da coleção de comentários arquivados, vazia"""
+        archive = MagicMock()
+        archive.find.return_value.sort.return_value.limit.return_value = []
+        archive.find_one.return_value = None
+        archive.find_one_and_delete.return_value = None
+        archive.find_one_and_update.return_value = None
+        return archive
+
+    @pytest.fixture
+    def repository(self, mock_collection, mock_versions, mock_outbox, mock_rollups, mock_idempotency, mock_archive):
         """Instância do repositório com collection mock"""
-        with patch('app.infrastructure.comment_mongo_repository.MongoClient'):
-            repo = CommentMongoRepository()
-            repo.collection = mock_collection
-            return repo
+        return CommentMongoRepository(collection=mock_collection, versions=mock_versions, outbox=mock_outbox, rollups=mock_rollups,
+                                      idempotency=mock_idempotency, archive=mock_archive)
 
     @pytest.fixture
     def sample_comment_data(self):
@@ -46,7 +78,22 @@ class TestCommentMongoRepository:
             created_at=datetime.now(timezone.utc)
         )
 
-    def test_insert_success(self, repository, mock_collection, sample_comment):
+    def test_default_collection_uses_shared_client(self):
+        """Testa que o repositório obtém a collection do cliente compartilhado"""
+        # Arrange
+        shared_collection = MagicMock()
+
+        # Act
+        with patch('app.infrastructure.comment_mongo_repository.get_mongo_collection',
+                   return_value=shared_collection) as mock_get_collection:
+            repo = CommentMongoRepository()
+
+        # Assert
+        assert repo.collection is shared_collection
+        mock_get_collection.assert_any_call("comments")
+        mock_get_collection.assert_any_call("collection_versions")
+
+    def test_insert_success(self, repository, mock_collection, mock_versions, mock_rollups, sample_comment):
         """Testa inserção de comentário com sucesso"""
         # Arrange
         comment_without_id = Comment(
@@ -69,35 +116,181 @@ class TestCommentMongoRepository:
         assert result.user_name == "Test User"
         assert result.message == "Test comment"
         mock_collection.insert_one.assert_called_once()
+        mock_versions.bump.assert_called_once_with(["comments:user:user123", "comments:public"], session=None)
+        mock_rollups.apply.assert_called_once_with(rollup_changes(created=[mock_collection.insert_one.call_args[0][0]]), session=None)
+
+    def test_insert_with_notification_writes_outbox(self, repository, mock_collection, mock_outbox, sample_comment):
+        """Testa que a notificação é gravada no outbox junto com o comentário"""
+        # Arrange
+        mock_collection.insert_one.return_value = MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011"))
+        notification = {"user_name": "Test User", "message": "Test comment", "is_public": True}
+
+        # Act
+        with patch.dict("os.environ", {"MONGO_TRANSACTIONS_ENABLED": "false"}):
+            repository.insert(sample_comment, notification=notification)
+
+        # Assert
+        mock_outbox.add.assert_called_once_with(notification, session=None)
+
+    def test_insert_uses_transaction_when_enabled(self, repository, mock_collection, mock_outbox, sample_comment):
+        """Testa que comentário e outbox compartilham a sessão da transação"""
+        # Arrange
+        mock_collection.insert_one.return_value = MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011"))
+        session = mock_collection.database.client.start_session.return_value.__enter__.return_value
+        session.with_transaction.side_effect = lambda callback: callback(session)
+
+        # Act
+        with patch.dict("os.environ", {"MONGO_TRANSACTIONS_ENABLED": "true"}):
+            repository.insert(sample_comment, notification={"message": "m"})
+
+        # Assert
+        session.with_transaction.assert_called_once()
+        assert mock_collection.insert_one.call_args.kwargs["session"] is session
+        mock_outbox.add.assert_called_once_with({"message": "m"}, session=session)
+
+    def test_insert_idempotent_new_key(self, repository, mock_collection, mock_idempotency, sample_comment):
+        """Testa que uma chave nova grava o comentário e guarda a resposta"""
+        # Arrange
+        key = IdempotencyKey(id="user123:abc", request_hash="h1")
+        mock_idempotency.claim.return_value = None
+        mock_collection.insert_one.return_value = MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011"))
+
+        # Act
+        result, replayed = repository.insert_idempotent(sample_comment, None, key)
+
+        # Assert
+        assert replayed is False
+        mock_collection.insert_one.assert_called_once()
+        mock_idempotency.complete.assert_called_once_with(key, result, session=None)
+
+    def test_insert_idempotent_replays_stored_comment(self, repository, mock_collection, mock_idempotency, sample_comment):
+        """Testa que uma chave já usada devolve o comentário original sem gravar"""
+        # Arrange
+        key = IdempotencyKey(id="user123:abc", request_hash="h1")
+        mock_idempotency.claim.return_value = {"request_hash": "h1", "comment": sample_comment.model_dump()}
+
+        # Act
+        result, replayed = repository.insert_idempotent(Comment(user_id="user123", user_name="Test User", message="x"), None, key)
+
+        # Assert
+        assert replayed is True
+        assert result == sample_comment
+        mock_collection.insert_one.assert_not_called()
+
+    def test_insert_idempotent_rejects_different_request(self, repository, mock_collection, mock_idempotency, sample_comment):
+        """Testa que reutilizar a chave com outro corpo é rejeitado"""
+        # Arrange
+        mock_idempotency.claim.return_value = {"request_hash": "other", "comment": sample_comment.model_dump()}
+
+        # Act & Assert
+        with pytest.raises(IdempotencyKeyMismatchError):
+            repository.insert_idempotent(sample_comment, None, IdempotencyKey(id="user123:abc", request_hash="h1"))
+        mock_collection.insert_one.assert_not_called()
+
+    def test_insert_idempotent_releases_key_on_failure(self, repository, mock_collection, mock_idempotency, sample_comment):
+        """Testa que, sem transação, a chave é liberada se o insert falhar"""
+        # Arrange
+        key = IdempotencyKey(id="user123:abc", request_hash="h1")
+        mock_idempotency.claim.return_value = None
+        mock_collection.insert_one.side_effect = RuntimeError("boom")
+
+        # Act & Assert
+        with pytest.raises(RuntimeError):
+            repository.insert_idempotent(sample_comment, None, key)
+        mock_idempotency.release.assert_called_once_with(key)
+        mock_idempotency.complete.assert_not_called()
+
+    def test_insert_idempotent_uses_transaction_when_enabled(self, repository, mock_collection, mock_idempotency, sample_comment):
+        """Testa que a chave é reservada na mesma transação do comentário"""
+        # Arrange
+        key = IdempotencyKey(id="user123:abc", request_hash="h1")
+        mock_idempotency.claim.return_value = None
+        mock_collection.insert_one.return_value = MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011"))
+        session = mock_collection.database.client.start_session.return_value.__enter__.return_value
+        session.with_transaction.side_effect = lambda callback: callback(session)
+
+        # Act
+        with patch.dict("os.environ", {"MONGO_TRANSACTIONS_ENABLED": "true"}):
+            result, replayed = repository.insert_idempotent(sample_comment, None, key)
+
+        # Assert
+        assert replayed is False
+        mock_idempotency.claim.assert_called_once_with(key, session=session)
+        mock_idempotency.complete.assert_called_once_with(key, result, session=session)
+
+    def test_insert_many_success(self, repository, mock_collection, mock_versions, mock_outbox):
+        """Testa gravação em lote com um único insert_many"""
+        # Arrange
+        comments = [Comment(user_id="user123", user_name="Test User", message=f"m{i}", is_public=i == 0) for i in range(2)]
+
+        def assign_ids(documents, ordered):
+            for document in documents:
+                document["_id"] = ObjectId()
+        mock_collection.insert_many.side_effect = assign_ids
+
+        # Act
+        errors = repository.insert_many(comments, [{"message": "m0"}, {"message": "m1"}], ordered=False)
+
+        # Assert
+        assert errors == [None, None]
+        assert all(comment.id for comment in comments)
+        assert mock_collection.insert_many.call_args.kwargs["ordered"] is False
+        mock_outbox.add_many.assert_called_once_with([{"message": "m0"}, {"message": "m1"}])
+        mock_versions.bump.assert_called_once_with(["comments:public", "comments:user:user123"])
+
+    def test_insert_many_partial_failure(self, repository, mock_collection, mock_outbox):
+        """Testa que só os documentos gravados recebem id e notificação"""
+        # Arrange
+        comments = [Comment(user_id="user123", user_name="Test User", message=f"m{i}") for i in range(3)]
+
+        def fail_second(documents, ordered):
+            for document in documents:
+                document["_id"] = ObjectId()
+            raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "E11000 duplicate key"}]})
+        mock_collection.insert_many.side_effect = fail_second
+
+        # Act
+        errors = repository.insert_many(comments, [{"i": 0}, {"i": 1}, {"i": 2}], ordered=True)
+
+        # Assert
+        assert errors[0] is None
+        assert errors[1] == "E11000 duplicate key"
+        assert errors[2].startswith("Not inserted")
+        assert comments[1].id is None
+        mock_outbox.add_many.assert_called_once_with([{"i": 0}])
 
     def test_list_public_success(self, repository, mock_collection, sample_comment_data):
         """Testa listagem de comentários públicos com sucesso"""
         # Arrange
         mock_cursor = MagicMock()
         mock_cursor.__iter__.return_value = iter([sample_comment_data])
-        mock_collection.find.return_value.sort.return_value.limit.return_value.skip.return_value = mock_cursor
+        mock_collection.find.return_value.sort.return_value.limit.return_value = mock_cursor
 
         # Act
-        result = repository.list_public(limit=100, offset=0)
+        result = repository.list_public(limit=100)
 
         # Assert
-        assert len(result) == 1
-        assert result[0].id == "507f1f77bcf86cd799439011"
-        assert result[0].user_name == "Test User"
+        assert len(result.items) == 1
+        assert result.items[0].id == "507f1f77bcf86cd799439011"
+        assert result.items[0].user_name == "Test User"
+        assert result.next_cursor is None
         mock_collection.find.assert_called_once_with({"is_public": True})
+        mock_collection.find.return_value.sort.assert_called_once_with(KEYSET_SORT)
+        mock_collection.find.return_value.sort.return_value.limit.assert_called_once_with(101)
 
     def test_list_public_empty(self, repository, mock_collection):
         """Testa listagem quando não há comentários públicos"""
         # Arrange
         mock_cursor = MagicMock()
         mock_cursor.__iter__.return_value = iter([])
-        mock_collection.find.return_value.sort.return_value.limit.return_value.skip.return_value = mock_cursor
+        mock_collection.find.return_value.sort.return_value.limit.return_value = mock_cursor
 
         # Act
         result = repository.list_public()
 
         # Assert
-        assert result == []
+        assert result.items == []
+        assert result.next_cursor is None
         mock_collection.find.assert_called_once_with({"is_public": True})
 
     def test_list_by_user_success(self, repository, mock_collection, sample_comment_data):
@@ -106,16 +299,158 @@ class TestCommentMongoRepository:
         user_id = "user123"
         mock_cursor = MagicMock()
         mock_cursor.__iter__.return_value = iter([sample_comment_data])
-        mock_collection.find.return_value.sort.return_value.limit.return_value.skip.return_value = mock_cursor
+        mock_collection.find.return_value.sort.return_value.limit.return_value = mock_cursor
 
         # Act
         result = repository.list_by_user(user_id)
 
         # Assert
-        assert len(result) == 1
-        assert result[0].user_id == user_id
+        assert len(result.items) == 1
+        assert result.items[0].user_id == user_id
         mock_collection.find.assert_called_once_with({"user_id": user_id})
 
+    def test_list_public_returns_next_cursor(self, repository, mock_collection, sample_comment_data):
+        """Testa que o documento excedente gera o cursor da próxima página"""
+        # Arrange
+        newer = {**sample_comment_data, "_id": ObjectId("507f1f77bcf86cd799439012")}
+        older = {**sample_comment_data, "_id": ObjectId("507f1f77bcf86cd799439011")}
+        mock_collection.find.return_value.sort.return_value.limit.return_value = [newer, older]
+
+        # Act
+        result = repository.list_public(limit=1)
+
+        # Assert
+        assert [comment.id for comment in result.items] == ["507f1f77bcf86cd799439012"]
+        created_at, object_id = decode_cursor(result.next_cursor)
+        assert created_at == sample_comment_data["created_at"]
+        assert object_id == ObjectId("507f1f77bcf86cd799439012")
+
+    def test_list_public_with_cursor_uses_range_query(self, repository, mock_collection, sample_comment_data):
+        """Testa que o cursor vira uma consulta por faixa, sem skip"""
+        # Arrange
+        cursor = encode_cursor(sample_comment_data)
+        mock_collection.find.return_value.sort.return_value.limit.return_value = []
+
+        # Act
+        repository.list_public(limit=10, cursor=cursor)
+
+        # Assert
+        created_at = sample_comment_data["created_at"]
+        mock_collection.find.assert_called_once_with({
+            "is_public": True,
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": sample_comment_data["_id"]}},
+            ],
+        })
+
+    def test_list_public_raw_skips_model(self, repository, mock_collection, sample_comment_data):
+        """Testa que o caminho rápido devolve dicts prontos para a resposta, na ordem de Comment"""
+        # Arrange
+        newer = {**sample_comment_data, "_id": ObjectId("507f1f77bcf86cd799439012")}
+        mock_collection.find.return_value.sort.return_value.limit.return_value = [newer, sample_comment_data]
+
+        # Act
+        result = repository.list_public_raw(limit=1)
+
+        # Assert
+        assert result.items == [{
+            "message": "Test comment",
+            "is_public": True,
+            "id": "507f1f77bcf86cd799439012",
+            "user_id": "user123",
+            "user_name": "Test User",
+            "created_at": sample_comment_data["created_at"],
+            "version": 0,
+        }]
+        assert list(result.items[0]) == list(Comment.model_fields)
+        assert decode_cursor(result.next_cursor)[1] == ObjectId("507f1f77bcf86cd799439012")
+
+    def test_search_runs_text_pipeline(self, repository, mock_collection, sample_comment_data):
+        """Testa que a busca usa o índice de texto e devolve os resultados com score e trecho"""
+        # Arrange
+        mock_collection.aggregate.return_value = iter([{**sample_comment_data, "score": 1.5}])
+
+        # Act
+        result = repository.search("comment", viewer_id="user123", limit=10)
+
+        # Assert
+        pipeline = mock_collection.aggregate.call_args[0][0]
+        assert pipeline[0]["$match"]["$text"] == {"$search": "comment"}
+        assert result.items[0].score == 1.5
+        assert result.items[0].snippet == "Test comment"
+        assert result.next_cursor is None
+
+    def test_list_public_continues_into_archive(self, repository, mock_collection, mock_archive, sample_comment_data):
+        """Testa que a página é completada pelo arquivo quando a coleção quente acaba"""
+        # Arrange
+        archived = {**sample_comment_data, "_id": ObjectId("507f1f77bcf86cd799439001"), "created_at": datetime(2020, 1, 1)}
+        mock_collection.find.return_value.sort.return_value.limit.return_value = [dict(sample_comment_data)]
+        mock_archive.find.return_value.sort.return_value.limit.return_value = [archived, dict(archived)]
+
+        # Act
+        result = repository.list_public(limit=2)
+
+        # Assert
+        assert [comment.id for comment in result.items] == ["507f1f77bcf86cd799439011", "507f1f77bcf86cd799439001"]
+        assert result.next_cursor is not None
+        mock_archive.find.assert_called_once_with(
+            keyset_after({"is_public": True}, sample_comment_data["created_at"], sample_comment_data["_id"])
+        )
+        mock_archive.find.return_value.sort.return_value.limit.assert_called_once_with(2)
+
+    def test_list_public_full_page_skips_archive(self, repository, mock_collection, mock_archive, sample_comment_data):
+        """Testa que o arquivo não é consultado enquanto a coleção quente tem mais resultados"""
+        # Arrange
+        mock_collection.find.return_value.sort.return_value.limit.return_value = [dict(sample_comment_data), dict(sample_comment_data)]
+
+        # Act
+        repository.list_public(limit=1)
+
+        # Assert
+        mock_archive.find.assert_not_called()
+
+    def test_stream_continues_into_archive(self, repository, mock_collection, mock_archive, sample_comment_data):
+        """Testa que o streaming segue para o arquivo depois do último comentário da coleção quente"""
+        # Arrange
+        documents = MagicMock()
+        documents.__iter__.return_value = iter([dict(sample_comment_data)])
+        mock_collection.find.return_value.sort.return_value.batch_size.return_value = documents
+        archived = MagicMock()
+        archived.__iter__.return_value = iter([{**sample_comment_data, "_id": ObjectId("507f1f77bcf86cd799439001")}])
+        mock_archive.find.return_value.sort.return_value.batch_size.return_value = archived
+
+        # Act
+        ids = [comment.id for comment in repository.stream_public()]
+
+        # Assert
+        assert ids == ["507f1f77bcf86cd799439011", "507f1f77bcf86cd799439001"]
+        mock_archive.find.assert_called_once_with(
+            keyset_after({"is_public": True}, sample_comment_data["created_at"], sample_comment_data["_id"])
+        )
+        documents.close.assert_called_once()
+        archived.close.assert_called_once()
+
+    def test_delete_owned_archived_comment(self, repository, mock_collection, mock_archive, sample_comment_data):
+        """Testa que o autor consegue remover um comentário já arquivado"""
+        # Arrange
+        mock_collection.find_one_and_delete.return_value = None
+        mock_archive.find_one_and_delete.return_value = dict(sample_comment_data)
+
+        # Act
+        result = repository.delete_owned("507f1f77bcf86cd799439011", "user123")
+
+        # Assert
+        assert result.id == "507f1f77bcf86cd799439011"
+        mock_archive.find_one_and_delete.assert_called_once_with({"_id": ObjectId("507f1f77bcf86cd799439011"), "user_id": "user123"})
+
+    def test_list_public_invalid_cursor(self, repository, mock_collection):
+        """Testa cursor inválido"""
+        # Act & Assert
+        with pytest.raises(InvalidCursorError):
+            repository.list_public(cursor="not-a-cursor")
+        mock_collection.find.assert_not_called()
+
     def test_get_by_id_success(self, repository, mock_collection, sample_comment_data):
         """Testa busca por ID com sucesso"""
         # Arrange
@@ -143,32 +478,127 @@ class TestCommentMongoRepository:
         assert result is None
         mock_collection.find_one.assert_called_once_with({"_id": ObjectId(comment_id)})
 
-    def test_delete_success(self, repository, mock_collection):
+    def test_delete_success(self, repository, mock_collection, mock_versions, mock_rollups):
         """Testa exclusão de comentário com sucesso"""
         # Arrange
         comment_id = "507f1f77bcf86cd799439011"
-        mock_result = MagicMock()
-        mock_result.deleted_count = 1
-        mock_collection.delete_one.return_value = mock_result
+        deleted = {"user_id": "user123", "is_public": False, "created_at": datetime(2024, 5, 1, 10, 0)}
+        mock_collection.find_one_and_delete.return_value = deleted
 
         # Act
         result = repository.delete(comment_id)
 
         # Assert
-        assert result is True
-        mock_collection.delete_one.assert_called_once_with({"_id": ObjectId(comment_id)})
+        assert result == DeletedComment(id=comment_id, user_id="user123", is_public=False, created_at=deleted["created_at"])
+        mock_collection.find_one_and_delete.assert_called_once_with(
+            {"_id": ObjectId(comment_id)}, projection={"user_id": True, "is_public": True, "created_at": True}
+        )
+        mock_versions.bump.assert_called_once_with(["comments:user:user123"])
+        mock_rollups.apply.assert_called_once_with(rollup_changes(removed=[deleted]))
 
-    def test_delete_not_found(self, repository, mock_collection):
+    def test_delete_not_found(self, repository, mock_collection, mock_versions):
         """Testa exclusão quando comentário não existe"""
         # Arrange
         comment_id = "507f1f77bcf86cd799439011"
-        mock_result = MagicMock()
-        mock_result.deleted_count = 0
-        mock_collection.delete_one.return_value = mock_result
+        mock_collection.find_one_and_delete.return_value = None
 
         # Act
         result = repository.delete(comment_id)
 
         # Assert
-        assert result is False
-        mock_collection.delete_one.assert_called_once_with({"_id": ObjectId(comment_id)})
+        assert result is None
+        mock_versions.bump.assert_not_called()
+
+    def test_versions_by_scope(self, repository, mock_versions):
+        """Testa que as versões do feed público e do usuário usam escopos distintos"""
+        # Arrange
+        mock_versions.get.side_effect = lambda scope: {"comments:public": 7, "comments:user:user123": 2}[scope]
+
+        # Act & Assert
+        assert repository.get_public_version() == 7
+        assert repository.get_user_version("user123") == 2
+
+    def test_delete_owned_single_operation(self, repository, mock_collection, sample_comment_data):
+        """Testa que a remoção do autor acontece em uma única operação"""
+        # Arrange
+        mock_collection.find_one_and_delete.return_value = dict(sample_comment_data)
+
+        # Act
+        deleted = repository.delete_owned("507f1f77bcf86cd799439011", "user123")
+
+        # Assert
+        assert deleted.id == "507f1f77bcf86cd799439011"
+        mock_collection.find_one_and_delete.assert_called_once_with(
+            {"_id": ObjectId("507f1f77bcf86cd799439011"), "user_id": "user123"}
+        )
+        mock_collection.find_one.assert_not_called()
+
+    def test_delete_owned_distinguishes_missing_and_forbidden(self, repository, mock_collection):
+        """Testa 404 e 403 quando nada foi removido"""
+        # Arrange
+        mock_collection.find_one_and_delete.return_value = None
+        mock_collection.find_one.side_effect = [None, {"_id": ObjectId("507f1f77bcf86cd799439011")}]
+
+        # Act & Assert
+        with pytest.raises(CommentNotFoundError):
+            repository.delete_owned("507f1f77bcf86cd799439011", "user123")
+        with pytest.raises(CommentPermissionError):
+            repository.delete_owned("507f1f77bcf86cd799439011", "user123")
+        with pytest.raises(CommentNotFoundError):
+            repository.delete_owned("not-an-object-id", "user123")
+
+    def test_update_owned_applies_changes(self, repository, mock_collection, mock_versions, mock_rollups, sample_comment_data):
+        """Testa edição com versionamento otimista em uma única operação"""
+        # Arrange
+        mock_collection.find_one_and_update.return_value = {**sample_comment_data, "version": 2}
+
+        # Act
+        updated = repository.update_owned("507f1f77bcf86cd799439011", "user123", {"message": "Edited", "is_public": False}, 2)
+
+        # Assert
+        assert updated.message == "Edited"
+        assert updated.is_public is False
+        assert updated.version == 3
+        mock_collection.find_one_and_update.assert_called_once()
+        pipeline = mock_collection.find_one_and_update.call_args[0][1]
+        assert pipeline[0]["$set"]["message"]["$cond"][1] == {"$literal": "Edited"}
+        mock_versions.bump.assert_called_once_with(["comments:public", "comments:user:user123"])
+        (changes,), _ = mock_rollups.apply.call_args
+        assert all(fields == {"public": -1} for fields in changes.values())
+
+    @pytest.mark.parametrize("before, error", [
+        (None, CommentNotFoundError),
+        ({"user_id": "other", "is_public": True, "version": 2}, CommentPermissionError),
+        ({"user_id": "user123", "is_public": True, "version": 4}, CommentVersionConflictError),
+        ({"user_id": "user123", "is_public": True}, CommentVersionConflictError),
+    ])
+    def test_update_owned_errors(self, repository, mock_collection, mock_versions, before, error):
+        """Testa que o documento anterior identifica o motivo da recusa"""
+        # Arrange
+        mock_collection.find_one_and_update.return_value = before
+
+        # Act & Assert
+        with pytest.raises(error):
+            repository.update_owned("507f1f77bcf86cd799439011", "user123", {"message": "Edited"}, 2)
+        mock_versions.bump.assert_not_called()
+
+    def test_stream_public_yields_in_batches(self, repository, mock_collection, sample_comment_data):
+        """Testa que o streaming lê o cursor em lotes, sem materializar a lista"""
+        # Arrange
+        documents = MagicMock()
+        documents.__iter__.return_value = iter([dict(sample_comment_data), dict(sample_comment_data)])
+        mock_collection.find.return_value.sort.return_value.batch_size.return_value = documents
+
+        # Act
+        comments = repository.stream_public()
+
+        # Assert
+        mock_collection.find.return_value.sort.return_value.batch_size.assert_called_once_with(STREAM_BATCH_SIZE)
+        documents.close.assert_not_called()
+        assert [comment.id for comment in comments] == ["507f1f77bcf86cd799439011"] * 2
+        documents.close.assert_called_once()
+
+    def test_stream_invalid_cursor_fails_before_iteration(self, repository):
+        """Testa que um cursor inválido é rejeitado antes de iniciar o streaming"""
+        with pytest.raises(InvalidCursorError):
+            repository.stream_by_user("user123", cursor="broken")
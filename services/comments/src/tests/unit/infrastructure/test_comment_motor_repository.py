@@ -0,0 +1,243 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.domain.comment import Comment, CommentPermissionError, IdempotencyKey
+from app.infrastructure.comment_motor_repository import CommentMotorRepository
+from bson import ObjectId
+
+
+class TestCommentMotorRepository:
+
+    @pytest.fixture
+    def mock_collection(self):
+        """Mock da collection assíncrona do MongoDB"""
+        return MagicMock()
+
+    @pytest.fixture
+    def mock_versions(self):
+        """Mock do contador de versões usado nos ETags"""
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_outbox(self):
+        """Mock assíncrono do outbox de notificações"""
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_rollups(self):
+        """Mock dos contadores agregados de comentários"""
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_idempotency(self):
+        """Mock das chaves Idempotency-Key"""
+        return AsyncMock()
+
+    @pytest.fixture
+    def mock_archive(self):
+        """Mock assíncrono da coleção de comentários arquivados, vazia"""
+        archive = MagicMock()
+        archive.find.return_value.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=[])
+        archive.find_one = AsyncMock(return_value=None)
+        archive.find_one_and_delete = AsyncMock(return_value=None)
+        archive.find_one_and_update = AsyncMock(return_value=None)
+        return archive
+
+    @pytest.fixture
+    def repository(self, mock_collection, mock_versions, mock_outbox, mock_rollups, mock_idempotency, mock_archive):
+        """Instância do repositório com collection mock"""
+        return CommentMotorRepository(collection=mock_collection, versions=mock_versions, outbox=mock_outbox, rollups=mock_rollups,
+                                      idempotency=mock_idempotency, archive=mock_archive)
+
+    @pytest.fixture
+    def sample_comment_data(self):
+        """Dados de comentário de exemplo"""
+        return {
+            "_id": ObjectId("507f1f77bcf86cd799439011"),
+            "user_id": "user123",
+            "user_name": "Test User",
+            "message": "Test comment",
+            "is_public": True,
+            "created_at": datetime.now(timezone.utc)
+        }
+
+    @pytest.mark.asyncio
+    async def test_insert_success(self, repository, mock_collection):
+        """Testa inserção assíncrona de comentário"""
+        # Arrange
+        comment = Comment(user_id="user123", user_name="Test User", message="Test comment")
+        mock_collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011")))
+
+        # Act
+        result = await repository.insert(comment)
+
+        # Assert
+        assert result.id == "507f1f77bcf86cd799439011"
+        inserted_document = mock_collection.insert_one.call_args[0][0]
+        assert "id" not in inserted_document
+        assert inserted_document["message"] == "Test comment"
+
+    @pytest.mark.asyncio
+    async def test_insert_with_notification_writes_outbox(self, repository, mock_collection, mock_outbox):
+        """Testa que a notificação assíncrona é gravada no outbox"""
+        # Arrange
+        comment = Comment(user_id="user123", user_name="Test User", message="Test comment")
+        mock_collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=ObjectId("507f1f77bcf86cd799439011")))
+
+        # Act
+        await repository.insert(comment, notification={"message": "Test comment"})
+
+        # Assert
+        mock_outbox.add.assert_awaited_once_with({"message": "Test comment"}, session=None)
+
+    @pytest.mark.asyncio
+    async def test_insert_idempotent_replay_skips_insert(self, repository, mock_collection, mock_idempotency):
+        """Testa o replay assíncrono de uma Idempotency-Key"""
+        # Arrange
+        original = Comment(id="507f1f77bcf86cd799439011", user_id="user123", user_name="Test User", message="Test comment")
+        mock_idempotency.claim.return_value = {"request_hash": "h1", "comment": original.model_dump()}
+        mock_collection.insert_one = AsyncMock()
+
+        # Act
+        result, replayed = await repository.insert_idempotent(
+            Comment(user_id="user123", user_name="Test User", message="Test comment"), None, IdempotencyKey("user123:abc", "h1")
+        )
+
+        # Assert
+        assert (result, replayed) == (original, True)
+        mock_collection.insert_one.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_list_public_success(self, repository, mock_collection, sample_comment_data):
+        """Testa listagem assíncrona de comentários públicos"""
+        # Arrange
+        mock_cursor = mock_collection.find.return_value.sort.return_value.limit.return_value
+        mock_cursor.to_list = AsyncMock(return_value=[sample_comment_data])
+
+        # Act
+        result = await repository.list_public(limit=10)
+
+        # Assert
+        assert len(result.items) == 1
+        assert result.items[0].id == "507f1f77bcf86cd799439011"
+        assert result.next_cursor is None
+        mock_collection.find.assert_called_once_with({"is_public": True})
+        mock_collection.find.return_value.sort.return_value.limit.assert_called_once_with(11)
+
+    @pytest.mark.asyncio
+    async def test_search_runs_text_pipeline(self, repository, mock_collection, sample_comment_data):
+        """Testa a busca textual assíncrona"""
+        # Arrange
+        mock_collection.aggregate.return_value.to_list = AsyncMock(return_value=[{**sample_comment_data, "score": 1.5}])
+
+        # Act
+        result = await repository.search("comment", limit=10)
+
+        # Assert
+        assert result.items[0].id == "507f1f77bcf86cd799439011"
+        assert mock_collection.aggregate.call_args[0][0][0]["$match"]["is_public"] is True
+        mock_collection.aggregate.return_value.to_list.assert_awaited_once_with(length=11)
+
+    @pytest.mark.asyncio
+    async def test_list_public_continues_into_archive(self, repository, mock_collection, mock_archive, sample_comment_data):
+        """Testa que a listagem assíncrona completa a página com o arquivo"""
+        # Arrange
+        mock_cursor = mock_collection.find.return_value.sort.return_value.limit.return_value
+        mock_cursor.to_list = AsyncMock(return_value=[])
+        archived = {**sample_comment_data, "_id": ObjectId("507f1f77bcf86cd799439001")}
+        mock_archive.find.return_value.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=[archived])
+
+        # Act
+        result = await repository.list_public(limit=10)
+
+        # Assert
+        assert [comment.id for comment in result.items] == ["507f1f77bcf86cd799439001"]
+        mock_archive.find.assert_called_once_with({"is_public": True})
+        mock_archive.find.return_value.sort.return_value.limit.return_value.to_list.assert_awaited_once_with(length=11)
+
+    @pytest.mark.asyncio
+    async def test_stream_public_closed_early_closes_cursor(self, repository, mock_collection, sample_comment_data):
+        """Testa que fechar o streaming antes do fim fecha o cursor do motor"""
+        # Arrange
+        class FakeCursor:
+            def __init__(self, docs):
+                self.docs = iter(docs)
+                self.close = AsyncMock()
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                try:
+                    return next(self.docs)
+                except StopIteration:
+                    raise StopAsyncIteration
+
+        cursor = FakeCursor([dict(sample_comment_data), {**sample_comment_data, "_id": ObjectId("507f1f77bcf86cd799439010")}])
+        mock_collection.find.return_value.sort.return_value.batch_size.return_value = cursor
+        stream = repository.stream_public()
+
+        # Act
+        first = await stream.__anext__()
+        await stream.aclose()
+
+        # Assert
+        assert first.id == "507f1f77bcf86cd799439011"
+        cursor.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_get_by_id_not_found(self, repository, mock_collection):
+        """Testa busca assíncrona por ID inexistente"""
+        # Arrange
+        mock_collection.find_one = AsyncMock(return_value=None)
+
+        # Act
+        result = await repository.get_by_id("507f1f77bcf86cd799439011")
+
+        # Assert
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_delete_success(self, repository, mock_collection, mock_versions):
+        """Testa exclusão assíncrona de comentário"""
+        # Arrange
+        comment_id = "507f1f77bcf86cd799439011"
+        mock_collection.find_one_and_delete = AsyncMock(
+            return_value={"user_id": "user123", "is_public": True, "created_at": datetime(2024, 5, 1, 10, 0)}
+        )
+
+        # Act
+        result = await repository.delete(comment_id)
+
+        # Assert
+        assert result.is_public is True
+        assert result.id == comment_id
+        mock_collection.find_one_and_delete.assert_awaited_once_with(
+            {"_id": ObjectId(comment_id)}, projection={"user_id": True, "is_public": True, "created_at": True}
+        )
+        mock_versions.bump.assert_awaited_once_with(["comments:user:user123", "comments:public"])
+
+    @pytest.mark.asyncio
+    async def test_update_owned(self, repository, mock_collection, sample_comment_data):
+        """Testa edição assíncrona com versionamento otimista"""
+        # Arrange
+        mock_collection.find_one_and_update = AsyncMock(return_value=dict(sample_comment_data))
+
+        # Act
+        updated = await repository.update_owned("507f1f77bcf86cd799439011", "user123", {"message": "Edited"}, 0)
+
+        # Assert
+        assert updated.message == "Edited"
+        assert updated.version == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_owned_forbidden(self, repository, mock_collection):
+        """Testa remoção assíncrona de comentário de outro autor"""
+        # Arrange
+        mock_collection.find_one_and_delete = AsyncMock(return_value=None)
+        mock_collection.find_one = AsyncMock(return_value={"_id": ObjectId("507f1f77bcf86cd799439011")})
+
+        # Act & Assert
+        with pytest.raises(CommentPermissionError):
+            await repository.delete_owned("507f1f77bcf86cd799439011", "user123")
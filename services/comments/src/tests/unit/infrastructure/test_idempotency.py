@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.domain.comment import Comment, IdempotencyKey, IdempotencyKeyInProgressError, IdempotencyKeyMismatchError
+from app.infrastructure.idempotency import MongoIdempotencyStore, MotorIdempotencyStore, replayed_comment
+from pymongo import ReturnDocument
+
+KEY = IdempotencyKey(id="user123:abc", request_hash="h1")
+
+
+def test_replayed_comment_returns_stored_response():
+    original = Comment(id="1", user_id="user123", user_name="Test User", message="m")
+
+    assert replayed_comment({"request_hash": "h1", "comment": original.model_dump()}, KEY) == original
+
+
+def test_replayed_comment_rejects_other_request():
+    with pytest.raises(IdempotencyKeyMismatchError):
+        replayed_comment({"request_hash": "h2", "comment": None}, KEY)
+
+
+def test_replayed_comment_in_progress():
+    with pytest.raises(IdempotencyKeyInProgressError):
+        replayed_comment({"request_hash": "h1", "comment": None}, KEY)
+
+
+def test_claim_upserts_without_overwriting():
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = None
+    store = MongoIdempotencyStore(collection, ttl_seconds=60)
+
+    assert store.claim(KEY) is None
+
+    query, update = collection.find_one_and_update.call_args.args
+    assert query == {"_id": "user123:abc"}
+    assert set(update) == {"$setOnInsert"}
+    assert update["$setOnInsert"]["request_hash"] == "h1"
+    assert (update["$setOnInsert"]["expires_at"] - update["$setOnInsert"]["created_at"]).total_seconds() == 60
+    assert collection.find_one_and_update.call_args.kwargs["return_document"] == ReturnDocument.BEFORE
+    assert collection.find_one_and_update.call_args.kwargs["upsert"] is True
+
+
+def test_release_only_removes_unfinished_key():
+    collection = MagicMock()
+
+    MongoIdempotencyStore(collection, ttl_seconds=60).release(KEY)
+
+    collection.delete_one.assert_called_once_with({"_id": "user123:abc", "comment": None})
+
+
+def test_claim_takes_over_abandoned_claim():
+    collection = MagicMock()
+    collection.find_one_and_update.side_effect = [
+        {"_id": "user123:abc", "request_hash": "h1", "comment": None, "claimed_at": datetime.now(timezone.utc) - timedelta(minutes=5)},
+        {"_id": "user123:abc"},
+    ]
+    store = MongoIdempotencyStore(collection, ttl_seconds=60, lease_seconds=30)
+
+    assert store.claim(KEY) is None
+
+    query, update = collection.find_one_and_update.call_args.args
+    assert query["comment"] is None
+    assert "$not" in query["claimed_at"]
+    assert update["$set"]["request_hash"] == "h1"
+
+
+def test_claim_within_lease_is_in_progress():
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = {"request_hash": "h1", "comment": None, "claimed_at": datetime.now(timezone.utc)}
+    store = MongoIdempotencyStore(collection, ttl_seconds=60, lease_seconds=30)
+
+    record = store.claim(KEY)
+
+    assert collection.find_one_and_update.call_count == 1
+    with pytest.raises(IdempotencyKeyInProgressError):
+        replayed_comment(record, KEY)
+
+
+def test_claim_lost_takeover_returns_current_record():
+    completed = {"request_hash": "h1", "comment": Comment(id="1", user_id="user123", user_name="u", message="m").model_dump()}
+    collection = MagicMock()
+    collection.find_one_and_update.side_effect = [{"request_hash": "h1", "comment": None}, None]
+    collection.find_one.return_value = completed
+
+    assert MongoIdempotencyStore(collection, ttl_seconds=60, lease_seconds=30).claim(KEY) == completed
+
+
+@pytest.mark.asyncio
+async def test_motor_claim_takes_over_abandoned_claim():
+    collection = MagicMock()
+    collection.find_one_and_update = AsyncMock(side_effect=[
+        {"request_hash": "h1", "comment": None, "claimed_at": datetime.now(timezone.utc) - timedelta(minutes=5)},
+        {"_id": "user123:abc"},
+    ])
+
+    assert await MotorIdempotencyStore(collection, ttl_seconds=60, lease_seconds=30).claim(KEY) is None
+    assert collection.find_one_and_update.await_count == 2
@@ -0,0 +1,146 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.infrastructure.indexes import INDEXES, IndexSpec, plan_indexes, reconcile_indexes, reconcile_indexes_async
+
+
+@pytest.fixture
+def specs():
+    return [
+        IndexSpec(name="user_id_created_at", keys=[("user_id", 1), ("created_at", -1)], serves=["list_by_user"]),
+    ]
+
+
+def test_plan_creates_missing_index(specs):
+    plan = plan_indexes("comments", {"_id_": {"key": [("_id", 1)]}}, specs)
+
+    assert plan.to_create == specs
+    assert plan.to_drop == []
+
+
+def test_plan_keeps_matching_index(specs):
+    existing = {
+        "_id_": {"key": [("_id", 1)]},
+        "user_id_created_at": {"key": [("user_id", 1.0), ("created_at", -1.0)]},
+    }
+
+    plan = plan_indexes("comments", existing, specs)
+
+    assert plan.unchanged == specs
+    assert plan.to_create == []
+    assert plan.to_drop == []
+
+
+def test_plan_drops_obsolete_and_changed_indexes(specs):
+    existing = {
+        "_id_": {"key": [("_id", 1)]},
+        "is_public_1": {"key": [("is_public", 1)]},
+        "user_id_created_at": {"key": [("user_id", 1)]},
+    }
+
+    plan = plan_indexes("comments", existing, specs)
+
+    assert plan.to_drop == ["is_public_1", "user_id_created_at"]
+    assert plan.to_create == specs
+
+
+def test_plan_keep_obsolete(specs):
+    existing = {"is_public_1": {"key": [("is_public", 1)]}}
+
+    plan = plan_indexes("comments", existing, specs, drop_obsolete=False)
+
+    assert plan.to_drop == []
+
+
+def test_plan_keeps_matching_text_index():
+    spec = IndexSpec(name="message_text", keys=[("message", "text")], serves=["search"], options={"weights": {"message": 10}})
+    existing = {"message_text": {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"message": 10}}}
+
+    plan = plan_indexes("comments", existing, [spec])
+
+    assert plan.unchanged == [spec]
+
+
+def test_plan_replaces_text_index_with_other_fields():
+    spec = IndexSpec(name="message_text", keys=[("message", "text"), ("user_name", "text")], serves=["search"])
+    existing = {"message_text": {"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"message": 1}}}
+
+    plan = plan_indexes("comments", existing, [spec])
+
+    assert plan.to_drop == ["message_text"]
+    assert plan.to_create == [spec]
+
+
+def test_registry_covers_repository_queries():
+    served = {query for spec in INDEXES["comments"] for query in spec.serves}
+
+    assert {"CommentRepository.list_public", "CommentRepository.list_by_user", "CommentRepository.search"} <= served
+
+
+def test_reconcile_indexes_applies_plan():
+    collections = {name: MagicMock() for name in INDEXES}
+    collections["comments"].index_information.return_value = {"_id_": {"key": [("_id", 1)]}, "created_at_1": {"key": [("created_at", 1)]}}
+    collections["comment_outbox"].index_information.return_value = {"_id_": {"key": [("_id", 1)]}}
+    database = MagicMock()
+    database.__getitem__.side_effect = collections.__getitem__
+
+    plans = reconcile_indexes(database)
+
+    collections["comments"].drop_index.assert_called_once_with("created_at_1")
+    collections["comment_outbox"].drop_index.assert_not_called()
+    for name, collection in collections.items():
+        assert collection.create_index.call_count == len(INDEXES[name])
+    assert [plan.collection for plan in plans] == list(INDEXES)
+
+
+def test_reconcile_indexes_dry_run():
+    collection = MagicMock()
+    collection.index_information.return_value = {"created_at_1": {"key": [("created_at", 1)]}}
+    database = MagicMock()
+    database.__getitem__.return_value = collection
+
+    reconcile_indexes(database, dry_run=True)
+
+    collection.drop_index.assert_not_called()
+    collection.create_index.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_indexes_async():
+    collection = MagicMock()
+    collection.index_information = AsyncMock(return_value={"_id_": {"key": [("_id", 1)]}})
+    collection.create_index = AsyncMock()
+    collection.drop_index = AsyncMock()
+    database = MagicMock()
+    database.__getitem__.return_value = collection
+
+    await reconcile_indexes_async(database)
+
+    assert collection.create_index.await_count == sum(len(specs) for specs in INDEXES.values())
+    collection.drop_index.assert_not_awaited()
+
+
+def test_plan_create_only_keeps_obsolete_and_changed_indexes(specs):
+    existing = {
+        "_id_": {"key": [("_id", 1)]},
+        "is_public_1": {"key": [("is_public", 1)]},
+        "user_id_created_at": {"key": [("user_id", 1)]},
+    }
+
+    plan = plan_indexes("comments", existing, specs, create_only=True)
+
+    assert plan.to_drop == []
+    assert plan.to_create == []
+    assert plan.outdated == ["user_id_created_at"]
+
+
+def test_reconcile_indexes_create_only_never_drops():
+    collection = MagicMock()
+    collection.index_information.return_value = {"created_at_1": {"key": [("created_at", 1)]}}
+    database = MagicMock()
+    database.__getitem__.return_value = collection
+
+    reconcile_indexes(database, create_only=True)
+
+    collection.drop_index.assert_not_called()
+    assert collection.create_index.call_count == sum(len(specs) for specs in INDEXES.values())
@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+import pytest
+from app.infrastructure.metrics import MongoCommandMetrics, mongo_event_listeners, observe_publish
+from prometheus_client import REGISTRY
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def command_event(command_name: str, command: dict, request_id: int = 1, duration_micros: int = 2500):
+    return MagicMock(command_name=command_name, command=command, request_id=request_id, connection_id=("localhost", 27017),
+                     duration_micros=duration_micros)
+
+
+def test_mongo_command_recorded_with_collection():
+    listener = MongoCommandMetrics()
+    labels = {"command": "find", "collection": "comments", "outcome": "succeeded"}
+    before_count = sample("mongodb_command_duration_seconds_count", **labels)
+    before_sum = sample("mongodb_command_duration_seconds_sum", **labels)
+
+    listener.started(command_event("find", {"find": "comments", "filter": {}}))
+    listener.succeeded(command_event("find", {}))
+
+    assert sample("mongodb_command_duration_seconds_count", **labels) == before_count + 1
+    assert sample("mongodb_command_duration_seconds_sum", **labels) == pytest.approx(before_sum + 0.0025)
+
+
+def test_mongo_get_more_uses_collection_field():
+    listener = MongoCommandMetrics()
+    labels = {"command": "getMore", "collection": "comments_archive", "outcome": "failed"}
+    before = sample("mongodb_command_duration_seconds_count", **labels)
+
+    listener.started(command_event("getMore", {"getMore": 123456789, "collection": "comments_archive"}, request_id=2))
+    listener.failed(command_event("getMore", {}, request_id=2))
+
+    assert sample("mongodb_command_duration_seconds_count", **labels) == before + 1
+
+
+def test_mongo_listeners_disabled(monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "false")
+
+    assert mongo_event_listeners() == []
+
+
+def test_observe_publish_counts_failures():
+    before_failures = sample("rabbitmq_publish_failures_total", error="TimeoutError")
+    before_failed = sample("rabbitmq_publish_duration_seconds_count", outcome="failed")
+    before_published = sample("rabbitmq_publish_duration_seconds_count", outcome="published")
+
+    with observe_publish():
+        pass
+    with pytest.raises(TimeoutError):
+        with observe_publish():
+            raise TimeoutError("No RabbitMQ channel available in the pool")
+
+    assert sample("rabbitmq_publish_duration_seconds_count", outcome="published") == before_published + 1
+    assert sample("rabbitmq_publish_duration_seconds_count", outcome="failed") == before_failed + 1
+    assert sample("rabbitmq_publish_failures_total", error="TimeoutError") == before_failures + 1
@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+
+import pytest
+from app.infrastructure.mongo import close_client, get_mongo_client, get_mongo_collection
+from pymongo import MongoClient
+
+
+@pytest.fixture(autouse=True)
+def reset_mongo_client(mocker):
+    mocker.patch('app.infrastructure.mongo._mongo_client', None)
+    yield
+
+
+def test_get_mongo_client_singleton(mocker, monkeypatch):
+    monkeypatch.setenv("MONGO_URI", "mongodb://test:27017")
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    mock_client_instance = MagicMock(spec=MongoClient)
+    mock_client_init = mocker.patch('app.infrastructure.mongo.MongoClient', return_value=mock_client_instance)
+
+    client1 = get_mongo_client()
+    client2 = get_mongo_client()
+
+    mock_client_init.assert_called_once()
+    assert mock_client_init.call_args.args == ("mongodb://test:27017",)
+    assert mock_client_init.call_args.kwargs["maxPoolSize"] == 20
+    assert mock_client_init.call_args.kwargs["serverSelectionTimeoutMS"] == 5000
+    assert client1 is client2
+    assert client1 is mock_client_instance
+
+
+def test_close_client(mocker):
+    mock_client_instance = MagicMock(spec=MongoClient)
+    mock_client_init = mocker.patch('app.infrastructure.mongo.MongoClient', return_value=mock_client_instance)
+
+    get_mongo_client()
+    close_client()
+    get_mongo_client()
+
+    mock_client_instance.close.assert_called_once()
+    assert mock_client_init.call_count == 2
+
+
+def test_get_mongo_collection_default_db_name(mocker, monkeypatch):
+    monkeypatch.delenv("MONGO_DB_NAME", raising=False)
+    mock_client = MagicMock(spec=MongoClient)
+    mock_db = MagicMock()
+    mock_client.__getitem__.return_value = mock_db
+    mocker.patch('app.infrastructure.mongo.get_mongo_client', return_value=mock_client)
+
+    collection = get_mongo_collection("comments")
+
+    assert collection is mock_db.__getitem__.return_value
+    mock_client.__getitem__.assert_called_once_with("comments")
+    mock_db.__getitem__.assert_called_once_with("comments")
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.infrastructure.outbox import DEAD, PENDING, MongoOutbox, MotorOutbox, new_outbox_record
+from bson import ObjectId
+
+
+def test_new_outbox_record_is_due_immediately():
+    now = datetime.now(timezone.utc)
+
+    record = new_outbox_record({"message": "m"}, now)
+
+    assert record["status"] == PENDING
+    assert record["attempts"] == 0
+    assert record["next_attempt_at"] == now
+    assert record["payload"] == {"message": "m"}
+
+
+def test_claim_marks_batch_with_token():
+    collection = MagicMock()
+    ids = [ObjectId(), ObjectId()]
+    claimed = [{"_id": ids[0], "payload": {}}]
+    # A mesma cadeia find().sort() atende a busca dos ids (com limit) e a leitura dos registros reivindicados
+    cursor = collection.find.return_value.sort.return_value
+    cursor.limit.return_value = [{"_id": record_id} for record_id in ids]
+    cursor.__iter__.return_value = iter(claimed)
+    outbox = MongoOutbox(collection)
+
+    result = outbox.claim(limit=2, lease_seconds=30)
+
+    assert result == claimed
+    claim_filter, claim_update = collection.update_many.call_args[0]
+    assert claim_filter["status"] == PENDING
+    assert claim_filter["_id"] == {"$in": ids}
+    token = claim_update["$set"]["claim"]
+    assert collection.find.call_args[0][0] == {"_id": {"$in": ids}, "claim": token}
+
+
+def test_claim_without_due_records_does_not_update():
+    collection = MagicMock()
+    collection.find.return_value.sort.return_value.limit.return_value = []
+
+    assert MongoOutbox(collection).claim(limit=10, lease_seconds=30) == []
+    collection.update_many.assert_not_called()
+
+
+def test_complete_and_dead_letter():
+    collection = MagicMock()
+    outbox = MongoOutbox(collection)
+    record_id = ObjectId()
+
+    outbox.complete([])
+    outbox.complete([record_id])
+    outbox.dead_letter(record_id, 10, "AMQPConnectionError: down")
+
+    collection.delete_many.assert_called_once_with({"_id": {"$in": [record_id]}})
+    update = collection.update_one.call_args[0][1]
+    assert update["$set"]["status"] == DEAD
+    assert update["$set"]["attempts"] == 10
+
+
+@pytest.mark.asyncio
+async def test_motor_outbox_add_and_claim():
+    collection = MagicMock()
+    collection.insert_one = AsyncMock()
+    collection.update_many = AsyncMock()
+    record_id = ObjectId()
+    cursor = collection.find.return_value.sort.return_value
+    cursor.limit.return_value.to_list = AsyncMock(return_value=[{"_id": record_id}])
+    cursor.to_list = AsyncMock(return_value=[{"_id": record_id, "payload": {"message": "m"}}])
+    outbox = MotorOutbox(collection)
+
+    await outbox.add({"message": "m"}, session="session")
+    claimed = await outbox.claim(limit=5, lease_seconds=30)
+
+    assert collection.insert_one.call_args.kwargs["session"] == "session"
+    assert claimed[0]["payload"] == {"message": "m"}
+    collection.update_many.assert_awaited_once()
@@ -0,0 +1,122 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.infrastructure.outbox_dispatcher import AsyncOutboxDispatcher, OutboxDispatcher, retry_delay
+from bson import ObjectId
+
+
+def make_records(count: int, attempts: int = 0) -> list[dict]:
+    return [{"_id": ObjectId(), "payload": {"message": f"m{i}"}, "attempts": attempts} for i in range(count)]
+
+
+@pytest.fixture
+def outbox():
+    return MagicMock()
+
+
+@pytest.fixture
+def publisher():
+    return MagicMock()
+
+
+@pytest.fixture
+def dispatcher(outbox, publisher, monkeypatch):
+    monkeypatch.setenv("OUTBOX_MAX_ATTEMPTS", "3")
+    return OutboxDispatcher(outbox, lambda: publisher)
+
+
+def test_retry_delay_grows_and_is_capped():
+    assert 0.5 <= retry_delay(1, base_seconds=1, max_seconds=60) <= 1
+    assert 4 <= retry_delay(4, base_seconds=1, max_seconds=60) <= 8
+    assert retry_delay(20, base_seconds=1, max_seconds=60) <= 60
+
+
+def test_dispatch_once_publishes_batch_and_completes(dispatcher, outbox, publisher):
+    records = make_records(3)
+    outbox.claim.return_value = records
+
+    dispatched = dispatcher.dispatch_once()
+
+    assert dispatched == 3
+    assert publisher.publish_comment.call_count == 3
+    outbox.complete.assert_called_once_with([record["_id"] for record in records])
+
+
+def test_dispatch_once_reschedules_failure_and_releases_rest(dispatcher, outbox, publisher):
+    records = make_records(3)
+    outbox.claim.return_value = records
+    publisher.publish_comment.side_effect = [None, ConnectionError("down"), None]
+
+    dispatched = dispatcher.dispatch_once()
+
+    assert dispatched == 1
+    outbox.complete.assert_called_once_with([records[0]["_id"]])
+    record_id, attempts, error, _ = outbox.reschedule.call_args[0]
+    assert (record_id, attempts) == (records[1]["_id"], 1)
+    assert "ConnectionError" in error
+    outbox.release.assert_called_once_with([records[2]["_id"]])
+
+
+def test_dispatch_once_dead_letters_after_max_attempts(dispatcher, outbox, publisher):
+    records = make_records(1, attempts=2)
+    outbox.claim.return_value = records
+    publisher.publish_comment.side_effect = ConnectionError("down")
+
+    dispatcher.dispatch_once()
+
+    outbox.dead_letter.assert_called_once()
+    assert outbox.dead_letter.call_args[0][:2] == (records[0]["_id"], 3)
+    outbox.reschedule.assert_not_called()
+
+
+def test_dispatch_once_without_publisher(outbox):
+    records = make_records(2)
+    outbox.claim.return_value = records
+
+    def unavailable():
+        raise ConnectionError("rabbitmq down")
+
+    dispatched = OutboxDispatcher(outbox, unavailable).dispatch_once()
+
+    assert dispatched == 0
+    outbox.reschedule.assert_called_once()
+    outbox.release.assert_called_once_with([records[1]["_id"]])
+
+
+def test_start_and_stop(outbox, monkeypatch):
+    monkeypatch.setenv("OUTBOX_POLL_INTERVAL_SECONDS", "0.01")
+    outbox.claim.return_value = []
+    dispatcher = OutboxDispatcher(outbox, MagicMock())
+
+    dispatcher.start()
+    dispatcher.stop()
+
+    assert dispatcher._thread is None
+
+
+@pytest.mark.asyncio
+async def test_async_dispatch_once(monkeypatch):
+    outbox = AsyncMock()
+    records = make_records(2)
+    outbox.claim.return_value = records
+    publisher = AsyncMock()
+    dispatcher = AsyncOutboxDispatcher(outbox, AsyncMock(return_value=publisher))
+
+    dispatched = await dispatcher.dispatch_once()
+
+    assert dispatched == 2
+    publisher.publish_comment.assert_awaited_with(records[1]["payload"])
+    outbox.complete.assert_awaited_once_with([record["_id"] for record in records])
+
+
+@pytest.mark.asyncio
+async def test_async_start_and_stop(monkeypatch):
+    monkeypatch.setenv("OUTBOX_POLL_INTERVAL_SECONDS", "0.01")
+    outbox = AsyncMock()
+    outbox.claim.return_value = []
+    dispatcher = AsyncOutboxDispatcher(outbox, AsyncMock())
+
+    dispatcher.start()
+    await dispatcher.stop()
+
+    assert dispatcher._task is None
@@ -0,0 +1,124 @@
+import contextvars
+import os
+import pstats
+import threading
+
+import pytest
+from app.infrastructure.profiling import (MemoryProfiler, RequestProfile, SamplingProfiler, current_request_profile,
+                                          profile_in_thread, profile_path, prune_profiles)
+
+
+@pytest.fixture(autouse=True)
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILING_DIR", str(tmp_path))
+    return tmp_path
+
+
+def busy_work():
+    return sum(i * i for i in range(1000))
+
+
+def test_profile_path_names_kind_and_label(profiles):
+    path = profile_path("request", "GET /comments/{comment_id}", ".prof")
+
+    assert path.parent == profiles
+    assert path.name.startswith("request-")
+    assert path.name.endswith("-GET_comments_comment_id.prof")
+
+
+def test_request_profile_merges_thread_profiles(profiles):
+    profile = RequestProfile(profiles / "request.prof")
+    token = current_request_profile.set(profile)
+    try:
+        # A thread recebe uma cópia do contexto, como no threadpool das rotas síncronas
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(profile_in_thread(busy_work),))
+        thread.start()
+        thread.join()
+    finally:
+        current_request_profile.reset(token)
+
+    functions = {name for _, _, name in pstats.Stats(str(profile.dump())).stats}
+    assert "busy_work" in functions
+
+
+def test_profile_in_thread_without_request_profile():
+    assert profile_in_thread(busy_work)() == busy_work()
+
+
+def test_sampling_profiler_writes_collapsed_stacks(profiles):
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait, name="waiting-worker")
+    worker.start()
+    try:
+        path, samples = SamplingProfiler().run(seconds=0.05, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert samples > 0
+    lines = path.read_text().splitlines()
+    stacks = [line.rsplit(" ", 1) for line in lines]
+    assert all(count.isdigit() for _, count in stacks)
+    assert any(stack.startswith("waiting-worker;") and "wait (" in stack for stack, _ in stacks)
+
+
+def test_sampling_profiler_runs_one_at_a_time():
+    profiler = SamplingProfiler()
+    started = threading.Event()
+    original = profiler._sample
+
+    def slow_sample(seconds, interval):
+        started.set()
+        return original(seconds, interval)
+
+    profiler._sample = slow_sample
+    thread = threading.Thread(target=profiler.run, args=(0.2, 0.01))
+    thread.start()
+    started.wait()
+
+    with pytest.raises(RuntimeError):
+        profiler.run(0.01, 0.01)
+    thread.join()
+
+
+def test_memory_snapshots_and_diff(profiles):
+    profiler = MemoryProfiler()
+    profiler.start(frames=5)
+    try:
+        first = profiler.snapshot()
+        retained = [bytearray(1024) for _ in range(100)]
+        second = profiler.snapshot()
+    finally:
+        profiler.stop()
+
+    assert "diff" not in first
+    assert (profiles / first["snapshot"]).exists()
+    assert (profiles / second["diff"]).read_text().strip()
+    assert any(entry["size_diff"] >= 100 * 1024 for entry in second["top_growth"])
+    assert len(retained) == 100
+
+
+def test_memory_snapshot_requires_tracing():
+    with pytest.raises(RuntimeError):
+        MemoryProfiler().snapshot()
+
+
+def test_prune_profiles_keeps_newest(profiles):
+    for index in range(5):
+        path = profiles / f"sample-{index}.collapsed"
+        path.write_text("a 1\n")
+        os.utime(path, ns=(index * 10**9, index * 10**9))
+
+    assert prune_profiles(keep=2) == 3
+    assert sorted(path.name for path in profiles.iterdir()) == ["sample-3.collapsed", "sample-4.collapsed"]
+
+
+def test_sampling_profiler_respects_file_limit(profiles, monkeypatch):
+    monkeypatch.setenv("PROFILING_MAX_FILES", "2")
+    profiler = SamplingProfiler()
+
+    for _ in range(3):
+        profiler.run(seconds=0.01, interval=0.005)
+
+    assert len(list(profiles.iterdir())) == 2
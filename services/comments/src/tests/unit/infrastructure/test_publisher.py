@@ -1,10 +1,11 @@
 import json
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.infrastructure.publisher import RabbitMQPublisher
+import pika
+from app.infrastructure.publisher import AioPikaPublisher, RabbitMQPublisher, close_publisher, get_publisher
 
 
 @pytest.fixture
@@ -54,7 +55,11 @@ def test_rabbitmq_publisher_init(mock_pika_connection, mock_pika_plain_credentia
 
     mock_pika_plain_credentials.assert_called_once_with("guest", "guest")
     mock_pika_connection_parameters.assert_called_once_with(
-        host="localhost", port=5672, credentials=mock_pika_plain_credentials.return_value
+        host="localhost",
+        port=5672,
+        credentials=mock_pika_plain_credentials.return_value,
+        heartbeat=60,
+        blocked_connection_timeout=30.0
     )
     mock_pika_connection.assert_called_once_with(mock_pika_connection_parameters.return_value)
 
@@ -65,8 +70,8 @@ def test_rabbitmq_publisher_init(mock_pika_connection, mock_pika_plain_credentia
     publisher.close()
 
 
-def test_publish_comment(rabbitmq_publisher):
-    mock_channel = rabbitmq_publisher.connection.channel.return_value
+def test_publish_comment(rabbitmq_publisher, mock_pika_connection):
+    mock_channel = mock_pika_connection.return_value.channel.return_value
     mock_basic_properties = MagicMock()
     with patch('pika.BasicProperties', return_value=mock_basic_properties) as mock_props_class:
         comment_data = {"author_name": "Test User", "message": "Test message", "is_public": True}
@@ -79,9 +84,95 @@ def test_publish_comment(rabbitmq_publisher):
             body=expected_body,
             properties=mock_basic_properties
         )
-        mock_props_class.assert_called_once_with(content_type="application/json")
+        mock_props_class.assert_called_once_with(content_type="application/json", headers=None)
+
+
+def test_publish_reuses_pooled_connection(rabbitmq_publisher, mock_pika_connection):
+    mock_channel = mock_pika_connection.return_value.channel.return_value
+
+    rabbitmq_publisher.publish_comment({"message": "first"})
+    rabbitmq_publisher.publish_comment({"message": "second"})
+
+    mock_pika_connection.assert_called_once()
+    mock_channel.exchange_declare.assert_called_once()
+    assert mock_channel.basic_publish.call_count == 2
+
+
+def test_publish_reconnects_after_connection_loss(rabbitmq_publisher, mock_pika_connection):
+    mock_channel = mock_pika_connection.return_value.channel.return_value
+    mock_channel.basic_publish.side_effect = [pika.exceptions.StreamLostError("lost"), None]
+
+    rabbitmq_publisher.publish_comment({"message": "retry"})
+
+    assert mock_pika_connection.call_count == 2
+    assert mock_channel.basic_publish.call_count == 2
+
+
+def test_publish_raises_after_second_failure(rabbitmq_publisher, mock_pika_connection):
+    mock_channel = mock_pika_connection.return_value.channel.return_value
+    mock_channel.basic_publish.side_effect = pika.exceptions.StreamLostError("lost")
+
+    with pytest.raises(pika.exceptions.StreamLostError):
+        rabbitmq_publisher.publish_comment({"message": "fail"})
+
+
+def test_publisher_confirms_enabled(mock_pika_connection, mock_pika_plain_credentials, mock_pika_connection_parameters, mock_os_getenv):
+    mock_os_getenv.side_effect = {
+        "RABBITMQ_HOST": "localhost",
+        "RABBITMQ_CONFIRM_DELIVERY": "true",
+    }.get
+
+    publisher = RabbitMQPublisher()
+
+    mock_pika_connection.return_value.channel.return_value.confirm_delivery.assert_called_once()
+    publisher.close()
 
 
-def test_close(rabbitmq_publisher):
+def test_close(rabbitmq_publisher, mock_pika_connection):
     rabbitmq_publisher.close()
-    rabbitmq_publisher.connection.close.assert_called_once()
+    mock_pika_connection.return_value.close.assert_called_once()
+
+
+def test_get_publisher_singleton(mock_pika_connection, mock_pika_plain_credentials, mock_pika_connection_parameters, mock_os_getenv):
+    publisher1 = get_publisher()
+    publisher2 = get_publisher()
+
+    assert publisher1 is publisher2
+    mock_pika_connection.assert_called_once()
+    close_publisher()
+
+
+@pytest.mark.asyncio
+async def test_aio_pika_publisher_connect_and_publish(mock_os_getenv):
+    mock_connection = MagicMock()
+    mock_channel = MagicMock(spec=["declare_exchange", "get_exchange", "close", "is_closed"])
+    mock_exchange = MagicMock()
+    mock_connection.channel = AsyncMock(return_value=mock_channel)
+    mock_connection.close = AsyncMock()
+    mock_channel.declare_exchange = AsyncMock()
+    mock_channel.get_exchange = AsyncMock(return_value=mock_exchange)
+    mock_channel.is_closed = False
+    closed_channels = []
+
+    async def close_channel():
+        closed_channels.append(mock_channel)
+
+    mock_channel.close = close_channel
+    mock_exchange.publish = AsyncMock()
+
+    with patch('aio_pika.connect_robust', new=AsyncMock(return_value=mock_connection)) as mock_connect:
+        publisher = AioPikaPublisher()
+        await publisher.connect()
+        await publisher.publish_comment({"message": "first"})
+        await publisher.publish_comment({"message": "second"})
+        await publisher.close()
+
+    mock_connect.assert_awaited_once_with(host="localhost", port=5672, login="guest", password="guest", heartbeat=60)
+    mock_channel.declare_exchange.assert_awaited_once()
+    mock_connection.channel.assert_awaited_once_with(publisher_confirms=False)
+    assert mock_exchange.publish.await_count == 2
+    message = mock_exchange.publish.await_args_list[0].args[0]
+    assert message.body == json.dumps({"message": "first"}).encode()
+    assert message.content_type == "application/json"
+    assert closed_channels == [mock_channel]
+    mock_connection.close.assert_awaited_once()
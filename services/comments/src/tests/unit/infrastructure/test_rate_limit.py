@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+
+import pytest
+from app.infrastructure import rate_limit
+from app.infrastructure.rate_limit import (InMemoryRateLimitBackend, MongoRateLimitBackend, RateLimitRule, consume_pipeline,
+                                           get_rate_limit_backend, rate_limit_rule)
+from pymongo import ReturnDocument
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rule_parse_and_refill_rate():
+    rule = RateLimitRule.parse("10/60")
+
+    assert rule == RateLimitRule(capacity=10, per_seconds=60.0)
+    assert rule.refill_rate == pytest.approx(1 / 6)
+
+
+@pytest.mark.parametrize("value", ["10", "a/60", "0/60", "10/0"])
+def test_rule_parse_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        RateLimitRule.parse(value)
+
+
+def test_rule_env_override(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_COMMENTS_CREATE", "3/1")
+
+    assert rate_limit_rule("comments:create") == RateLimitRule(3, 1.0)
+    assert rate_limit_rule("comments:delete") == RateLimitRule.parse(rate_limit.DEFAULT_RULES["comments:delete"])
+
+
+def test_memory_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+    rule = RateLimitRule(capacity=2, per_seconds=10)
+
+    assert backend.consume("u1", rule) == 0
+    assert backend.consume("u1", rule) == 0
+    assert backend.consume("u1", rule) == pytest.approx(5)
+    # Outro usuário tem o próprio balde
+    assert backend.consume("u2", rule) == 0
+
+    clock.now += 5
+    assert backend.consume("u1", rule) == 0
+    assert backend.consume("u1", rule) == pytest.approx(5)
+
+
+def test_memory_bucket_never_exceeds_capacity():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+    rule = RateLimitRule(capacity=1, per_seconds=10)
+    backend.consume("u1", rule)
+
+    clock.now += 1000
+
+    assert backend.consume("u1", rule) == 0
+    assert backend.consume("u1", rule) > 0
+
+
+def test_memory_backend_bounds_keys():
+    backend = InMemoryRateLimitBackend(max_keys=2, clock=FakeClock())
+    rule = RateLimitRule(capacity=1, per_seconds=10)
+
+    for key in ("u1", "u2", "u3"):
+        backend.consume(key, rule)
+
+    assert list(backend._buckets) == ["u2", "u3"]
+
+
+def test_consume_pipeline_uses_server_clock():
+    pipeline = consume_pipeline(RateLimitRule(capacity=5, per_seconds=60))
+
+    assert pipeline[0]["$set"]["updated_at"] == "$$NOW"
+    assert pipeline[0]["$set"]["tokens"]["$min"][0] == 5
+    assert pipeline[1] == {"$set": {"allowed": {"$gte": ["$tokens", 1]}}}
+
+
+@pytest.mark.parametrize("doc, expected", [
+    ({"allowed": True, "tokens": 4.0}, 0.0),
+    ({"allowed": False, "tokens": 0.5}, 6.0),
+])
+def test_mongo_backend_consume(doc, expected):
+    collection = MagicMock()
+    collection.find_one_and_update.return_value = doc
+    rule = RateLimitRule(capacity=5, per_seconds=60)
+
+    assert MongoRateLimitBackend(collection).consume("comments:create:u1", rule) == pytest.approx(expected)
+    collection.find_one_and_update.assert_called_once_with(
+        {"_id": "comments:create:u1"}, consume_pipeline(rule), upsert=True, return_document=ReturnDocument.AFTER
+    )
+
+
+def test_backend_disabled(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "false")
+
+    assert get_rate_limit_backend() is None
@@ -0,0 +1,103 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from app.infrastructure.rollups import (ROLLUPS_COLLECTION, MongoRollupStore, rebuild_pipeline, rebuild_rollups, rollup_changes,
+                                        visibility_changes)
+from pymongo import UpdateOne
+
+
+def make_doc(user_id: str = "user123", is_public: bool = True, created_at: datetime = datetime(2024, 5, 1, 23, 30)) -> dict:
+    return {"user_id": user_id, "is_public": is_public, "created_at": created_at}
+
+
+class TestRollupChanges:
+
+    def test_created_and_removed_are_combined_per_key(self):
+        """Testa que criações e remoções no mesmo lote se somam por contador"""
+        changes = rollup_changes(created=[make_doc(), make_doc(is_public=False)], removed=[make_doc(user_id="other")])
+
+        assert changes["all"] == {"count": 1, "public": 0}
+        assert changes["user:user123"] == {"count": 2, "public": 1}
+        assert changes["user:other"] == {"count": -1, "public": -1}
+        assert changes["day:2024-05-01"] == {"count": 1, "public": 0}
+
+    def test_day_uses_utc(self):
+        """Testa que o dia do contador é o dia em UTC"""
+        created_at = datetime(2024, 5, 1, 22, 0, tzinfo=timezone(timedelta(hours=-3)))
+
+        assert "day:2024-05-02" in rollup_changes(created=[make_doc(created_at=created_at)])
+
+    def test_visibility_changes(self):
+        """Testa que uma edição só mexe na contagem de públicos quando a visibilidade muda"""
+        assert visibility_changes(make_doc(), make_doc()) == {}
+        changes = visibility_changes(make_doc(is_public=False), make_doc(is_public=True))
+        assert set(changes) == {"all", "user:user123", "day:2024-05-01"}
+        assert all(fields == {"public": 1} for fields in changes.values())
+
+
+class TestMongoRollupStore:
+
+    def test_apply_skips_zero_increments(self):
+        """Testa que contadores que se anulam não geram escrita"""
+        collection = MagicMock()
+        store = MongoRollupStore(collection)
+
+        store.apply(rollup_changes(created=[make_doc(is_public=False)]))
+        store.apply(rollup_changes(created=[make_doc()], removed=[make_doc()]))
+
+        operations = collection.bulk_write.call_args_list[0][0][0]
+        assert UpdateOne({"_id": "all"}, {"$inc": {"count": 1}}, upsert=True) in operations
+        collection.bulk_write.assert_called_once()
+
+    def test_get_stats_reads_window_by_id(self, monkeypatch):
+        """Testa que as estatísticas vêm de um find por _id, com zero nos dias sem contador"""
+        monkeypatch.setattr("app.infrastructure.rollups.today_utc", lambda: date(2024, 5, 2))
+        collection = MagicMock()
+        collection.find.return_value = [
+            {"_id": "all", "count": 10, "public": 7},
+            {"_id": "day:2024-05-01", "count": 2, "public": 1},
+            {"_id": "user:user123", "count": 3, "public": 3},
+        ]
+
+        stats = MongoRollupStore(collection).get_stats(days=2, user_id="user123")
+
+        collection.find.assert_called_once_with({"_id": {"$in": ["all", "day:2024-05-02", "day:2024-05-01", "user:user123"]}})
+        assert (stats.total, stats.public) == (10, 7)
+        assert [(day.date, day.count) for day in stats.days] == [(date(2024, 5, 2), 0), (date(2024, 5, 1), 2)]
+        assert stats.user.count == 3
+
+
+class TestRebuildRollups:
+
+    def test_pipeline_merges_into_rollups(self):
+        """Testa que a reconstrução grava no servidor, sem trazer os comentários para o processo"""
+        rebuilt_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+        pipeline = rebuild_pipeline({"$literal": "all"}, rebuilt_at)
+
+        assert pipeline[0] == {"$unionWith": {"coll": "comments_archive"}}
+        assert pipeline[1]["$group"]["public"] == {"$sum": {"$cond": ["$is_public", 1, 0]}}
+        assert pipeline[-1]["$merge"]["into"] == ROLLUPS_COLLECTION
+        assert pipeline[-2] == {"$set": {"rebuilt_at": rebuilt_at}}
+
+    def test_rebuild_removes_stale_counters(self):
+        """Testa que contadores não regravados são removidos ao final"""
+        database = {"comments": MagicMock(), ROLLUPS_COLLECTION: MagicMock()}
+        database[ROLLUPS_COLLECTION].count_documents.return_value = 5
+
+        assert rebuild_rollups(database) == 5
+
+        assert database["comments"].aggregate.call_count == 3
+        stale_filter = database[ROLLUPS_COLLECTION].delete_many.call_args[0][0]
+        assert "$ne" in stale_filter["rebuilt_at"]
+
+    @pytest.mark.parametrize("groups", [[], [{"_id": "all"}]])
+    def test_dry_run_does_not_write(self, groups):
+        """Testa que o dry-run só calcula os grupos"""
+        database = {"comments": MagicMock(), ROLLUPS_COLLECTION: MagicMock()}
+        database["comments"].aggregate.return_value = groups
+
+        assert rebuild_rollups(database, dry_run=True) == 3 * len(groups)
+        database[ROLLUPS_COLLECTION].delete_many.assert_not_called()
+        assert all("$merge" not in str(call) for call in database["comments"].aggregate.call_args_list)
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+
+import pytest
+from app.domain.comment import InvalidCursorError
+from app.infrastructure.search import (build_search_page, decode_search_cursor, encode_search_cursor, make_snippet, search_pipeline,
+                                       search_terms)
+from bson import ObjectId
+
+
+def make_doc(object_id: str, score: float, message: str = "Test comment") -> dict:
+    return {
+        "_id": ObjectId(object_id),
+        "user_id": "user123",
+        "user_name": "Test User",
+        "message": message,
+        "is_public": True,
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "score": score,
+    }
+
+
+def test_pipeline_anonymous_searches_public_only():
+    pipeline = search_pipeline("mongo", None, limit=10)
+
+    assert pipeline[0] == {"$match": {"$text": {"$search": "mongo"}, "is_public": True}}
+    assert pipeline[-1] == {"$limit": 11}
+
+
+def test_pipeline_includes_viewer_private_comments():
+    pipeline = search_pipeline("mongo", "user123", limit=10)
+
+    assert pipeline[0]["$match"]["$or"] == [{"is_public": True}, {"user_id": "user123"}]
+
+
+def test_pipeline_cursor_continues_after_last_hit():
+    cursor = encode_search_cursor(make_doc("507f1f77bcf86cd799439011", 1.25))
+
+    pipeline = search_pipeline("mongo", None, limit=10, cursor=cursor)
+
+    assert pipeline[2] == {"$match": {"$or": [
+        {"score": {"$lt": 1.25}},
+        {"score": 1.25, "_id": {"$lt": ObjectId("507f1f77bcf86cd799439011")}},
+    ]}}
+
+
+def test_invalid_search_cursor():
+    with pytest.raises(InvalidCursorError):
+        decode_search_cursor("not-a-cursor")
+
+
+def test_search_terms_skip_negated_words():
+    assert search_terms('mongo "text index" -sql -"full scan"') == ["mongo", "text", "index"]
+
+
+def test_snippet_keeps_short_messages():
+    assert make_snippet("Curto", ["curto"]) == "Curto"
+
+
+def test_snippet_centers_on_first_term():
+    message = " ".join(["palavra"] * 40) + " MongoDB " + " ".join(["fim"] * 40)
+
+    snippet = make_snippet(message, ["mongodb"], length=60)
+
+    assert snippet.startswith("…palavra")
+    assert "MongoDB" in snippet
+    assert snippet.endswith("…")
+    assert len(snippet) <= 62
+
+
+def test_snippet_falls_back_to_start_when_term_is_stemmed():
+    message = "comentário " * 30
+
+    snippet = make_snippet(message, ["comentários"], length=40)
+
+    assert snippet.startswith("comentário")
+    assert snippet.endswith("…")
+
+
+def test_build_search_page_returns_ranked_hits_and_cursor():
+    docs = [make_doc("507f1f77bcf86cd799439012", 2.0), make_doc("507f1f77bcf86cd799439011", 1.0)]
+
+    page = build_search_page(docs, "comment", limit=1)
+
+    assert [hit.id for hit in page.items] == ["507f1f77bcf86cd799439012"]
+    assert page.items[0].score == 2.0
+    assert page.items[0].snippet == "Test comment"
+    assert decode_search_cursor(page.next_cursor) == (2.0, ObjectId("507f1f77bcf86cd799439012"))
@@ -0,0 +1,131 @@
+from unittest.mock import MagicMock
+
+import pytest
+from app.infrastructure.slow_queries import (SlowQueryListener, SlowQueryLog, command_shape, explain_command, plan_summary,
+                                             shape_of, slow_query_listeners)
+
+LIST_BY_USER = {"find": "comments", "filter": {"user_id": "user123", "created_at": {"$lt": "2024-01-01"}},
+                "sort": {"created_at": -1, "_id": -1}, "limit": 21, "lsid": {"id": "session"}, "$db": "comments"}
+
+COLLSCAN_EXPLAIN = {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}
+
+
+def command_event(command_name: str, command: dict, request_id: int = 1, duration_micros: int = 2500):
+    return MagicMock(command_name=command_name, command=command, request_id=request_id, connection_id=("localhost", 27017),
+                     database_name="comments", duration_micros=duration_micros)
+
+
+def run_command(listener: SlowQueryListener, command_name: str, command: dict, duration_ms: float, request_id: int = 1):
+    listener.started(command_event(command_name, command, request_id))
+    listener.succeeded(command_event(command_name, {}, request_id, duration_micros=int(duration_ms * 1000)))
+
+
+def test_shape_replaces_values_and_keeps_operators():
+    shape = shape_of({"$or": [{"is_public": True}, {"user_id": "u1"}], "_id": {"$in": ["a", "b", "c"]}})
+
+    assert shape == {"$or": [{"is_public": "?"}, {"user_id": "?"}], "_id": {"$in": "?"}}
+
+
+def test_command_shape_of_find_keeps_sort():
+    assert command_shape("find", LIST_BY_USER) == {
+        "command": "find", "collection": "comments", "filter": {"user_id": "?", "created_at": {"$lt": "?"}},
+        "sort": {"created_at": -1, "_id": -1},
+    }
+
+
+def test_command_shape_of_aggregate_and_update():
+    aggregate = {"aggregate": "comments", "pipeline": [{"$match": {"user_id": "u1"}}, {"$sort": {"created_at": -1}},
+                                                      {"$limit": 5}]}
+    update = {"update": "comments", "updates": [{"q": {"_id": "c1", "user_id": "u1"}, "u": {"$set": {"message": "m"}}}]}
+
+    assert command_shape("aggregate", aggregate)["pipeline"] == [{"$match": {"user_id": "?"}}, {"$sort": {"created_at": -1}},
+                                                                 {"$limit": "?"}]
+    assert command_shape("update", update)["filter"] == {"_id": "?", "user_id": "?"}
+
+
+def test_explain_command_drops_session_fields():
+    assert "lsid" not in explain_command("find", LIST_BY_USER)
+    assert "$db" not in explain_command("find", LIST_BY_USER)
+    assert explain_command("find", LIST_BY_USER)["sort"] == {"created_at": -1, "_id": -1}
+
+
+def test_explain_command_keeps_first_statement_of_bulk_write():
+    update = {"update": "comments", "ordered": True, "lsid": {"id": "session"},
+              "updates": [{"q": {"_id": "c1"}, "u": {"$set": {"message": "a"}}}, {"q": {"_id": "c2"}, "u": {"$set": {"message": "b"}}}]}
+    delete = {"delete": "comments", "deletes": [{"q": {"_id": "c1"}, "limit": 1}, {"q": {"_id": "c2"}, "limit": 1}]}
+
+    assert explain_command("update", update) == {"update": "comments", "ordered": True,
+                                                 "updates": [{"q": {"_id": "c1"}, "u": {"$set": {"message": "a"}}}]}
+    assert explain_command("delete", delete)["deletes"] == [{"q": {"_id": "c1"}, "limit": 1}]
+    assert len(update["updates"]) == 2
+
+
+def test_plan_summary():
+    ixscan = {"queryPlanner": {"winningPlan": {"queryPlan": {
+        "stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "user_id_1_created_at_-1"}}}}}
+    aggregate = {"stages": [{"$cursor": COLLSCAN_EXPLAIN}, {"$group": {}}]}
+
+    assert plan_summary(COLLSCAN_EXPLAIN) == "SORT > COLLSCAN"
+    assert plan_summary(ixscan) == "FETCH > IXSCAN(user_id_1_created_at_-1)"
+    assert plan_summary(aggregate) == "SORT > COLLSCAN"
+    assert plan_summary({"error": "boom"}) is None
+
+
+def test_commands_below_threshold_are_ignored():
+    log = SlowQueryLog(threshold_ms=100, max_shapes=10, explainer=None)
+    listener = SlowQueryListener(log)
+
+    run_command(listener, "find", LIST_BY_USER, duration_ms=20)
+
+    assert log.summary()["shapes"] == []
+
+
+def test_same_shape_grouped_and_explained_once():
+    explainer = MagicMock(return_value=COLLSCAN_EXPLAIN)
+    log = SlowQueryLog(threshold_ms=100, max_shapes=10, explainer=explainer)
+    listener = SlowQueryListener(log)
+    other_user = {**LIST_BY_USER, "filter": {"user_id": "user456", "created_at": {"$lt": "2024-02-01"}}}
+
+    run_command(listener, "find", LIST_BY_USER, duration_ms=150, request_id=1)
+    run_command(listener, "find", other_user, duration_ms=250, request_id=2)
+    log.wait_for_explains()
+
+    [shape] = log.summary()["shapes"]
+    assert shape["count"] == 2
+    assert shape["total_ms"] == pytest.approx(400)
+    assert shape["max_ms"] == pytest.approx(250)
+    assert shape["plan"] == "SORT > COLLSCAN"
+    # O explain usa o comando da primeira ocorrência, sem os campos de sessão
+    explainer.assert_called_once_with("comments", explain_command("find", LIST_BY_USER))
+    log.close()
+
+
+def test_summary_ranks_by_total_time():
+    log = SlowQueryLog(threshold_ms=100, max_shapes=10, explainer=None)
+    listener = SlowQueryListener(log)
+
+    run_command(listener, "find", LIST_BY_USER, duration_ms=300, request_id=1)
+    for request_id in range(2, 6):
+        run_command(listener, "count", {"count": "comments", "query": {"is_public": True}}, duration_ms=120,
+                    request_id=request_id)
+
+    summary = log.summary(with_explain=True)
+    assert [shape["shape"]["command"] for shape in summary["shapes"]] == ["count", "find"]
+    assert summary["shapes"][0]["total_ms"] == pytest.approx(480)
+    assert summary["shapes"][0]["explain"] is None
+
+
+def test_new_shapes_dropped_past_limit():
+    log = SlowQueryLog(threshold_ms=0, max_shapes=1, explainer=None)
+
+    log.record("comments", "find", {"find": "comments", "filter": {"a": 1}}, 10)
+    log.record("comments", "find", {"find": "comments", "filter": {"b": 1}}, 10)
+
+    assert log.summary()["tracked"] == 1
+    assert log.summary()["dropped"] == 1
+
+
+def test_listeners_disabled(monkeypatch):
+    monkeypatch.setenv("SLOW_QUERY_LOG_ENABLED", "false")
+
+    assert slow_query_listeners() == []
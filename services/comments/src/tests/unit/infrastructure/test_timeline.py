@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.domain.comment import Comment, InvalidCursorError
+from app.infrastructure.timeline import PublicTimeline
+
+BASE = datetime(2024, 1, 1)
+
+
+def make_comment(index: int, is_public: bool = True, message: str = "m") -> Comment:
+    # ids crescem com o índice, como ObjectIds gerados em sequência
+    return Comment(id=f"{index:024x}", user_id="user123", user_name="Test User", message=message, is_public=is_public,
+                   created_at=BASE + timedelta(minutes=index))
+
+
+def newest_first(*indexes: int) -> list[Comment]:
+    return [make_comment(index) for index in sorted(indexes, reverse=True)]
+
+
+def ids(page) -> list[str]:
+    return [item.id if isinstance(item, Comment) else item["id"] for item in page.items]
+
+
+class TestPublicTimeline:
+
+    def test_page_none_until_loaded(self):
+        """Testa que a timeline não responde antes da carga"""
+        timeline = PublicTimeline(capacity=10)
+
+        assert timeline.page(5) is None
+        assert timeline.claim_reload() is True
+
+    def test_first_page_with_next_cursor(self):
+        """Testa primeira página servida da memória com cursor para a seguinte"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load(newest_first(*range(10)) + [make_comment(-1)], version=3)
+
+        page = timeline.page(limit=4)
+
+        assert ids(page) == [make_comment(index).id for index in (9, 8, 7, 6)]
+        next_page = timeline.page(limit=4, cursor=page.next_cursor)
+        assert ids(next_page) == [make_comment(index).id for index in (5, 4, 3, 2)]
+        assert timeline.stats()["hits"] == 2
+
+    def test_page_past_the_end_falls_back(self):
+        """Testa que a página que passa do fim de uma timeline incompleta vai para o repositório"""
+        timeline = PublicTimeline(capacity=5)
+        timeline.load(newest_first(*range(6)), version=1)
+
+        first = timeline.page(limit=4)
+
+        # Só resta um comentário na timeline, e ela não sabe o que vem depois dele
+        assert timeline.page(limit=4, cursor=first.next_cursor) is None
+        assert timeline.stats()["misses"] == 1
+
+    def test_complete_timeline_serves_last_page(self):
+        """Testa última página sem próximo cursor quando a timeline tem todos os comentários públicos"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load(newest_first(0, 1, 2), version=1)
+
+        page = timeline.page(limit=5)
+
+        assert ids(page) == [make_comment(index).id for index in (2, 1, 0)]
+        assert page.next_cursor is None
+        assert timeline.complete is True
+
+    def test_raw_page_matches_page(self):
+        """Testa página no formato do caminho rápido"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load(newest_first(0, 1, 2), version=1)
+
+        raw = timeline.raw_page(limit=2)
+
+        assert raw.items == [item.model_dump() for item in timeline.page(limit=2).items]
+        assert raw.next_cursor == timeline.page(limit=2).next_cursor
+
+    def test_invalid_cursor(self):
+        """Testa cursor inválido"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load([], version=0)
+
+        with pytest.raises(InvalidCursorError):
+            timeline.page(limit=5, cursor="not-a-cursor")
+
+    def test_add_keeps_newest_within_capacity(self):
+        """Testa que um comentário novo entra no topo e o mais antigo sai"""
+        timeline = PublicTimeline(capacity=3)
+        timeline.load(newest_first(0, 1, 2), version=1)
+
+        timeline.add([make_comment(3)])
+
+        assert ids(timeline.page(limit=2)) == [make_comment(3).id, make_comment(2).id]
+        assert timeline.stats()["size"] == 3
+        assert timeline.complete is False
+        assert timeline.version == 2
+
+    def test_add_normalizes_created_at_like_mongo(self):
+        """Testa que o comentário recém-criado fica como o banco o devolveria"""
+        timeline = PublicTimeline(capacity=3)
+        timeline.load([], version=0)
+        comment = make_comment(1).model_copy(update={"created_at": datetime(2024, 1, 2, 12, 0, 0, 123456, tzinfo=timezone.utc)})
+
+        timeline.add([comment])
+
+        assert timeline.page(limit=1).items[0].created_at == datetime(2024, 1, 2, 12, 0, 0, 123000)
+
+    def test_add_older_than_incomplete_timeline_is_skipped(self):
+        """Testa que um comentário mais antigo que a timeline incompleta não entra nela"""
+        timeline = PublicTimeline(capacity=2)
+        timeline.load(newest_first(5, 6, 7), version=1)
+
+        timeline.add([make_comment(1)])
+
+        assert ids(timeline.page(limit=1)) == [make_comment(7).id]
+        assert timeline.stats()["size"] == 2
+        assert timeline.version == 2
+
+    def test_observe_other_version_marks_stale(self):
+        """Testa que uma escrita de outra réplica invalida a timeline até a recarga"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load(newest_first(0, 1), version=4)
+
+        timeline.observe(4)
+        assert timeline.page(limit=1) is not None
+
+        timeline.observe(5)
+        assert timeline.page(limit=1) is None
+        assert timeline.claim_reload() is True
+        assert timeline.claim_reload() is False
+
+    def test_local_write_keeps_expected_version(self):
+        """Testa que uma escrita deste processo não força recarga"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load(newest_first(0, 1), version=4)
+
+        timeline.add([make_comment(2)])
+        timeline.observe(5)
+
+        assert ids(timeline.page(limit=1)) == [make_comment(2).id]
+
+    def test_update_replaces_in_place(self):
+        """Testa edição de comentário da timeline"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load(newest_first(0, 1), version=1)
+
+        timeline.update(make_comment(0, message="editado"))
+
+        assert timeline.page(limit=2).items[1].message == "editado"
+        assert timeline.version == 2
+
+    def test_update_to_private_removes(self):
+        """Testa que um comentário que deixou de ser público sai da timeline"""
+        timeline = PublicTimeline(capacity=10)
+        timeline.load(newest_first(0, 1), version=1)
+
+        timeline.update(make_comment(1, is_public=False))
+
+        assert ids(timeline.page(limit=5)) == [make_comment(0).id]
+        assert timeline.version == 2
+
+    def test_remove_unknown_comment_from_incomplete_timeline_marks_stale(self):
+        """Testa remoção de comentário público mais antigo que a timeline"""
+        timeline = PublicTimeline(capacity=2)
+        timeline.load(newest_first(5, 6, 7), version=1)
+
+        timeline.remove(make_comment(5).id, is_public=True)
+
+        assert timeline.stale is True
+
+    def test_remove_private_comment_changes_nothing(self):
+        """Testa remoção de comentário privado"""
+        timeline = PublicTimeline(capacity=2)
+        timeline.load(newest_first(5, 6, 7), version=1)
+
+        timeline.remove(make_comment(1).id, is_public=False)
+
+        assert timeline.stale is False
+        assert timeline.version == 1
@@ -0,0 +1,150 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.domain.comment import AsyncCommentRepository, Comment, CommentRepository
+from app.infrastructure import tracing
+from app.infrastructure.outbox import new_outbox_record
+from app.infrastructure.outbox_dispatcher import OutboxDispatcher
+from app.infrastructure.traced_repository import TracedAsyncCommentRepository, TracedCommentRepository
+from app.infrastructure.tracing import JsonLinesSpanExporter, create_exporter, inject_context, publish_span, use_context
+from bson import ObjectId
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+
+@pytest.fixture
+def spans():
+    # Liga o tracer do app a um provider só deste teste, sem mexer no provider global do processo
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    with patch.object(tracing.tracer, "_real_tracer", provider.get_tracer("app")):
+        yield exporter
+
+
+def make_comment(comment_id: str = "c1") -> Comment:
+    return Comment(id=comment_id, user_id="user123", user_name="Test User", message="m", is_public=True)
+
+
+def test_json_lines_exporter_writes_one_span_per_line(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(JsonLinesSpanExporter(str(path))))
+
+    with provider.get_tracer("test").start_as_current_span("parent"):
+        with provider.get_tracer("test").start_as_current_span("child"):
+            pass
+    provider.shutdown()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["child", "parent"]
+    assert lines[0]["parent_id"] == lines[1]["context"]["span_id"]
+
+
+def test_create_exporter_by_name(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRACING_FILE", str(tmp_path / "spans.jsonl"))
+
+    assert isinstance(create_exporter("file"), JsonLinesSpanExporter)
+    assert isinstance(create_exporter("opentelemetry.sdk.trace.export.in_memory_span_exporter:InMemorySpanExporter"),
+                      InMemorySpanExporter)
+    with pytest.raises(ValueError):
+        create_exporter("zipkin")
+
+
+def test_inject_context_empty_without_span():
+    assert inject_context() == {}
+
+
+def test_use_context_continues_stored_trace(spans):
+    with tracing.tracer.start_as_current_span("request") as request_span:
+        carrier = inject_context()
+
+    with use_context(carrier), tracing.tracer.start_as_current_span("publish"):
+        pass
+
+    publish = spans.get_finished_spans()[-1]
+    assert publish.parent.span_id == request_span.get_span_context().span_id
+    assert publish.context.trace_id == request_span.get_span_context().trace_id
+
+
+def test_publish_span_returns_headers_of_producer_span(spans):
+    with publish_span("comment_notifications") as headers:
+        pass
+
+    span = spans.get_finished_spans()[0]
+    assert span.kind == SpanKind.PRODUCER
+    assert span.attributes["messaging.destination.name"] == "comment_notifications"
+    assert headers["traceparent"].split("-")[2] == format(span.context.span_id, "016x")
+
+
+def test_outbox_record_keeps_request_trace_context(spans):
+    with tracing.tracer.start_as_current_span("request"):
+        record = new_outbox_record({"message": "m"})
+
+    assert "traceparent" in record["trace_context"]
+
+
+def test_dispatcher_publishes_inside_stored_trace(spans, monkeypatch):
+    monkeypatch.setenv("OUTBOX_MAX_ATTEMPTS", "3")
+    with tracing.tracer.start_as_current_span("request") as request_span:
+        record = {"_id": ObjectId(), "attempts": 0, **new_outbox_record({"message": "m"})}
+    outbox = MagicMock()
+    outbox.claim.return_value = [record]
+    publisher = MagicMock()
+    publisher.publish_comment.side_effect = lambda payload: tracing.tracer.start_span("publish").end()
+
+    OutboxDispatcher(outbox, lambda: publisher).dispatch_once()
+
+    publish = spans.get_finished_spans()[-1]
+    assert publish.context.trace_id == request_span.get_span_context().trace_id
+
+
+def test_traced_repository_span_per_call(spans):
+    comment = make_comment()
+    inner = MagicMock(spec=CommentRepository)
+    inner.get_by_id.return_value = comment
+    repository = TracedCommentRepository(inner)
+
+    with tracing.tracer.start_as_current_span("request"):
+        assert repository.get_by_id("c1") is comment
+
+    repository_span, request_span = spans.get_finished_spans()
+    assert repository_span.name == "CommentRepository.get_by_id"
+    assert repository_span.attributes["db.system"] == "mongodb"
+    assert repository_span.parent.span_id == request_span.context.span_id
+
+
+def test_traced_stream_span_covers_iteration(spans):
+    inner = MagicMock(spec=CommentRepository)
+    stream = MagicMock()
+    stream.__iter__.return_value = iter([make_comment("c1"), make_comment("c2")])
+    inner.stream_public.return_value = stream
+
+    comments = TracedCommentRepository(inner).stream_public()
+    assert spans.get_finished_spans() == ()
+    assert [comment.id for comment in comments] == ["c1", "c2"]
+
+    span = spans.get_finished_spans()[0]
+    assert span.name == "CommentRepository.stream_public"
+    assert span.attributes["comments.count"] == 2
+    stream.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_traced_async_repository(spans):
+    inner = MagicMock(spec=AsyncCommentRepository)
+    inner.delete = AsyncMock(return_value=True)
+
+    async def stream():
+        yield make_comment("c1")
+
+    inner.stream_by_user.return_value = stream()
+    repository = TracedAsyncCommentRepository(inner)
+
+    assert await repository.delete("c1") is True
+    assert [comment.id async for comment in repository.stream_by_user("user123")] == ["c1"]
+
+    assert [span.name for span in spans.get_finished_spans()] == ["CommentRepository.delete", "CommentRepository.stream_by_user"]
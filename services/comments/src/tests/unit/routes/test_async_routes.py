@@ -0,0 +1,320 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import msgpack
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.application.comment_service import AsyncCommentService
+from app.domain.comment import (Comment, CommentNotFoundError, CommentPage, CommentPermissionError, CommentVersionConflictError,
+                                CommentSearchHit, CommentSearchPage, CommentStats, IdempotencyKeyInProgressError,
+                                IdempotencyKeyMismatchError, InvalidCursorError, RawCommentPage, UserCommentCount)
+from app.infrastructure.rate_limit import InMemoryRateLimitBackend, get_rate_limit_backend
+from app.routes import async_routes
+
+
+@pytest.fixture
+def mock_comment_service():
+    return AsyncMock(spec=AsyncCommentService)
+
+
+@pytest.fixture
+def client(mock_comment_service):
+    app = FastAPI()
+    app.include_router(async_routes.router)
+    app.dependency_overrides[async_routes.get_async_service] = lambda: mock_comment_service
+    app.dependency_overrides[async_routes.get_current_user] = lambda: {"id": "test_user_id", "name": "Test User"}
+    backend = InMemoryRateLimitBackend()
+    app.dependency_overrides[get_rate_limit_backend] = lambda: backend
+    return TestClient(app)
+
+
+def test_get_all_public_comments(client, mock_comment_service):
+    mock_comment_service.get_all_public_comments.return_value = CommentPage(
+        items=[Comment(id="1", user_id="u1", user_name="n1", message="m1", created_at=datetime.now(timezone.utc))],
+        next_cursor="next"
+    )
+
+    response = client.get("/comments/all_public", params={"limit": 1, "cursor": "abc"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["id"] == "1"
+    assert response.headers["X-Next-Cursor"] == "next"
+    mock_comment_service.get_all_public_comments.assert_awaited_once_with(limit=1, cursor="abc")
+
+
+def test_get_comment_stats(client, mock_comment_service):
+    mock_comment_service.get_comment_stats.return_value = CommentStats(total=3, public=2, days=[])
+
+    response = client.get("/comments/stats", params={"days": 7, "user_id": "u1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["public"] == 2
+    mock_comment_service.get_comment_stats.assert_awaited_once_with(days=7, user_id="u1", viewer_id=None)
+
+
+def test_get_comment_stats_unauthenticated_hides_private_count(mock_comment_service):
+    repository = AsyncMock()
+    repository.get_stats.return_value = CommentStats(
+        total=3, public=2, days=[], user=UserCommentCount(user_id="u1", count=3, public=1)
+    )
+    app = FastAPI()
+    app.include_router(async_routes.router)
+    app.dependency_overrides[async_routes.get_async_service] = lambda: AsyncCommentService(repository)
+
+    response = TestClient(app).get("/comments/stats", params={"user_id": "u1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["user"] == {"user_id": "u1", "count": None, "public": 1}
+
+
+def test_get_comment_stats_limits_window(client, mock_comment_service):
+    response = client.get("/comments/stats", params={"days": 1000})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_search_comments_anonymous(client, mock_comment_service):
+    mock_comment_service.search_comments.return_value = CommentSearchPage(
+        items=[CommentSearchHit(id="1", user_id="u1", user_name="n1", message="mongo text", score=1.5, snippet="mongo text")],
+        next_cursor="next"
+    )
+
+    response = client.get("/comments/search", params={"q": "mongo", "limit": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["snippet"] == "mongo text"
+    assert response.json()[0]["score"] == 1.5
+    assert response.headers["X-Next-Cursor"] == "next"
+    mock_comment_service.search_comments.assert_awaited_once_with("mongo", None, limit=1, cursor=None)
+
+
+def test_search_comments_includes_own_private_comments(client, mock_comment_service):
+    mock_comment_service.search_comments.return_value = CommentSearchPage(items=[])
+    client.app.dependency_overrides[async_routes.get_optional_user] = lambda: {"id": "test_user_id", "name": "Test User"}
+
+    response = client.get("/comments/search", params={"q": "mongo"})
+
+    assert response.status_code == status.HTTP_200_OK
+    mock_comment_service.search_comments.assert_awaited_once_with("mongo", "test_user_id", limit=50, cursor=None)
+
+
+def test_search_comments_rejects_empty_query_and_bad_cursor(client, mock_comment_service):
+    mock_comment_service.search_comments.side_effect = InvalidCursorError()
+
+    assert client.get("/comments/search", params={"q": ""}).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert client.get("/comments/search", params={"q": "mongo", "cursor": "x"}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_all_public_comments_fast_json(client, mock_comment_service, monkeypatch):
+    monkeypatch.setenv("FAST_JSON_ENABLED", "true")
+    mock_comment_service.get_all_public_comments_raw.return_value = RawCommentPage(
+        items=[{"message": "m1", "is_public": True, "id": "1", "user_id": "u1", "user_name": "n1",
+                "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc), "version": 0}],
+        next_cursor="next"
+    )
+
+    response = client.get("/comments/all_public", params={"limit": 1})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["created_at"] == "2024-01-01T00:00:00Z"
+    assert response.headers["X-Next-Cursor"] == "next"
+    assert "ETag" in response.headers
+    mock_comment_service.get_all_public_comments.assert_not_awaited()
+
+
+def test_get_all_public_comments_msgpack(client, mock_comment_service):
+    mock_comment_service.get_public_comments_version.return_value = 1
+    mock_comment_service.get_all_public_comments.return_value = CommentPage(
+        items=[Comment(id="1", user_id="u1", user_name="n1", message="m1", created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))],
+        next_cursor="next"
+    )
+
+    json_response = client.get("/comments/all_public")
+    response = client.get("/comments/all_public", headers={"Accept": "application/msgpack"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == json_response.json()
+    assert response.headers["X-Next-Cursor"] == "next"
+    assert response.headers["Vary"] == "Accept"
+    # Cada representação tem o seu ETag: um 304 nunca devolve JSON para quem guardou MessagePack
+    assert response.headers["ETag"] != json_response.headers["ETag"]
+    not_modified = client.get("/comments/all_public", headers={"Accept": "application/msgpack",
+                                                               "If-None-Match": json_response.headers["ETag"]})
+    assert not_modified.status_code == status.HTTP_200_OK
+
+
+def test_get_comment_stats_msgpack(client, mock_comment_service):
+    mock_comment_service.get_comment_stats.return_value = CommentStats(total=3, public=2, days=[])
+
+    response = client.get("/comments/stats", headers={"Accept": "application/msgpack"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert msgpack.unpackb(response.content)["public"] == 2
+
+
+def test_get_all_public_comments_streaming(client, mock_comment_service):
+    async def comments():
+        for index in range(3):
+            yield Comment(id=str(index), user_id="u1", user_name="n1", message=f"m{index}")
+    mock_comment_service.stream_public_comments = lambda cursor=None: comments()
+
+    response = client.get("/comments/all_public", params={"stream": True})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.json()] == ["0", "1", "2"]
+    assert "ETag" in response.headers
+    mock_comment_service.get_all_public_comments.assert_not_awaited()
+
+
+def test_get_all_public_comments_streaming_invalid_cursor(client, mock_comment_service):
+    def invalid(cursor=None):
+        raise InvalidCursorError("Invalid cursor")
+    mock_comment_service.stream_public_comments = invalid
+
+    response = client.get("/comments/all_public", params={"stream": True, "cursor": "broken"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_all_public_comments_invalid_cursor(client, mock_comment_service):
+    mock_comment_service.get_all_public_comments.side_effect = InvalidCursorError("Invalid cursor")
+
+    response = client.get("/comments/all_public", params={"cursor": "broken"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_my_comments_etag_round_trip(client, mock_comment_service):
+    mock_comment_service.get_user_comments_version.return_value = 4
+    mock_comment_service.get_comments_by_user.return_value = CommentPage(items=[])
+
+    first = client.get("/comments/my")
+    etag = first.headers["ETag"]
+    second = client.get("/comments/my", headers={"If-None-Match": etag})
+
+    assert first.status_code == status.HTTP_200_OK
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert second.status_code == status.HTTP_304_NOT_MODIFIED
+    assert second.content == b""
+    mock_comment_service.get_comments_by_user.assert_awaited_once()
+    mock_comment_service.get_user_comments_version.assert_awaited_with("test_user_id")
+
+
+def test_get_my_comments_etag_changes_with_version(client, mock_comment_service):
+    mock_comment_service.get_comments_by_user.return_value = CommentPage(items=[])
+    mock_comment_service.get_user_comments_version.return_value = 4
+    etag = client.get("/comments/my").headers["ETag"]
+    mock_comment_service.get_user_comments_version.return_value = 5
+
+    response = client.get("/comments/my", headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+def test_post_comment(client, mock_comment_service):
+    mock_comment_service.create_comment.return_value = Comment(
+        id="new_comment_id", user_id="test_user_id", user_name="Test User", message="New comment"
+    )
+
+    response = client.post("/comments", json={"message": "New comment", "is_public": True})
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["id"] == "new_comment_id"
+    mock_comment_service.create_comment.assert_awaited_once()
+
+
+def test_post_comment_idempotency_key_replay(client, mock_comment_service):
+    original = Comment(id="new_comment_id", user_id="test_user_id", user_name="Test User", message="New comment")
+    mock_comment_service.create_comment_idempotent.side_effect = [(original, False), (original, True)]
+
+    first = client.post("/comments", json={"message": "New comment"}, headers={"Idempotency-Key": "abc"})
+    second = client.post("/comments", json={"message": "New comment"}, headers={"Idempotency-Key": "abc"})
+
+    assert first.status_code == second.status_code == status.HTTP_201_CREATED
+    assert first.json() == second.json()
+    assert "Idempotent-Replayed" not in first.headers
+    assert second.headers["Idempotent-Replayed"] == "true"
+    mock_comment_service.create_comment.assert_not_awaited()
+    mock_comment_service.create_comment_idempotent.assert_awaited_with(
+        async_routes.CommentCreate(message="New comment"), "test_user_id", "Test User", "abc"
+    )
+
+
+@pytest.mark.parametrize("error, expected_status", [
+    (IdempotencyKeyMismatchError(), status.HTTP_422_UNPROCESSABLE_ENTITY),
+    (IdempotencyKeyInProgressError(), status.HTTP_409_CONFLICT),
+])
+def test_post_comment_idempotency_key_errors(client, mock_comment_service, error, expected_status):
+    mock_comment_service.create_comment_idempotent.side_effect = error
+
+    response = client.post("/comments", json={"message": "New comment"}, headers={"Idempotency-Key": "abc"})
+
+    assert response.status_code == expected_status
+
+
+def test_post_comment_rate_limited(client, mock_comment_service, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_COMMENTS_CREATE", "2/60")
+    mock_comment_service.create_comment.return_value = Comment(
+        id="new_comment_id", user_id="test_user_id", user_name="Test User", message="New comment"
+    )
+
+    responses = [client.post("/comments", json={"message": "New comment"}) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [201, 201, 429]
+    assert responses[2].headers["Retry-After"] == "30"
+    assert mock_comment_service.create_comment.await_count == 2
+
+
+def test_delete_comment_forbidden(client, mock_comment_service):
+    mock_comment_service.delete_user_comment.side_effect = CommentPermissionError("1")
+
+    response = client.delete("/comments/1")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    mock_comment_service.delete_user_comment.assert_awaited_once_with("1", "test_user_id")
+    mock_comment_service.get_comment_by_id.assert_not_awaited()
+
+
+def test_delete_comment_not_found(client, mock_comment_service):
+    mock_comment_service.delete_user_comment.side_effect = CommentNotFoundError("1")
+
+    response = client.delete("/comments/1")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_patch_comment(client, mock_comment_service):
+    mock_comment_service.update_comment.return_value = Comment(
+        id="1", user_id="test_user_id", user_name="Test User", message="Edited", version=3
+    )
+
+    response = client.patch("/comments/1", json={"message": "Edited", "version": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["version"] == 3
+    comment_id, user_id, changes = mock_comment_service.update_comment.call_args[0]
+    assert (comment_id, user_id, changes.changes(), changes.version) == ("1", "test_user_id", {"message": "Edited"}, 2)
+
+
+@pytest.mark.parametrize("error, expected_status", [
+    (CommentNotFoundError("1"), status.HTTP_404_NOT_FOUND),
+    (CommentPermissionError("1"), status.HTTP_403_FORBIDDEN),
+    (CommentVersionConflictError(5), status.HTTP_409_CONFLICT),
+])
+def test_patch_comment_errors(client, mock_comment_service, error, expected_status):
+    mock_comment_service.update_comment.side_effect = error
+
+    response = client.patch("/comments/1", json={"is_public": False, "version": 2})
+
+    assert response.status_code == expected_status
+
+
+def test_patch_comment_without_changes(client, mock_comment_service):
+    response = client.patch("/comments/1", json={"version": 2})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_comment_service.update_comment.assert_not_awaited()
@@ -6,7 +6,7 @@ from fastapi import HTTPException, status
 from jose import jwt
 from jose.exceptions import ExpiredSignatureError, JWTError
 
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_user, get_optional_user
 
 
 @pytest.fixture
@@ -58,3 +58,11 @@ def test_get_current_user_invalid_token(mock_http_authorization_credentials):
             get_current_user(mock_http_authorization_credentials)
         assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
         assert exc_info.value.detail == "Invalid token"
+
+
+def test_get_optional_user_without_credentials():
+    assert get_optional_user(None) is None
+
+
+def test_get_optional_user_with_credentials(mock_http_authorization_credentials):
+    assert get_optional_user(mock_http_authorization_credentials) == {"id": "test_user_id", "name": "Test User"}
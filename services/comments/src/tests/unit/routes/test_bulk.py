@@ -0,0 +1,123 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.application.comment_service import AsyncCommentService, CommentService
+from app.domain.comment import Comment
+from app.infrastructure.rate_limit import InMemoryRateLimitBackend, get_rate_limit_backend
+from app.routes import async_routes, routes
+from app.routes.bulk import MAX_BULK_ITEMS
+
+
+def created(items, user_id, user_name, ordered):
+    return [
+        (Comment(id=str(index), user_id=user_id, user_name=user_name, message=item.message, is_public=item.is_public), None)
+        for index, item in enumerate(items)
+    ]
+
+
+@pytest.fixture
+def mock_comment_service():
+    service = AsyncMock(spec=AsyncCommentService)
+    service.create_comments.side_effect = created
+    return service
+
+
+@pytest.fixture
+def client(mock_comment_service):
+    app = FastAPI()
+    app.include_router(async_routes.router)
+    app.dependency_overrides[async_routes.get_async_service] = lambda: mock_comment_service
+    app.dependency_overrides[async_routes.get_current_user] = lambda: {"id": "test_user_id", "name": "Test User"}
+    app.dependency_overrides[get_rate_limit_backend] = lambda: None
+    return TestClient(app)
+
+
+def test_bulk_json_array(client, mock_comment_service):
+    response = client.post("/comments/bulk", json=[{"message": "a"}, {"message": "b", "is_public": False}])
+
+    assert response.status_code == status.HTTP_201_CREATED
+    body = response.json()
+    assert body["created"] == 2 and body["failed"] == 0
+    assert [item["id"] for item in body["results"]] == ["0", "1"]
+    items = mock_comment_service.create_comments.call_args[0][0]
+    assert [item.message for item in items] == ["a", "b"]
+
+
+def test_bulk_ndjson_with_invalid_items(client, mock_comment_service):
+    body = b'{"message": "a"}\n{"is_public": true}\nnot json\n\n{"message": "d"}\n'
+
+    response = client.post("/comments/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == status.HTTP_207_MULTI_STATUS
+    results = response.json()["results"]
+    assert results[0]["id"] == "0"
+    assert "message" in results[1]["error"]
+    assert results[2]["error"].startswith("Invalid JSON")
+    assert results[3]["id"] == "1"
+    assert len(mock_comment_service.create_comments.call_args[0][0]) == 2
+
+
+def test_bulk_ordered_stops_at_first_invalid_item(client, mock_comment_service):
+    response = client.post("/comments/bulk", params={"ordered": True}, json=[{"message": "a"}, {}, {"message": "c"}])
+
+    results = response.json()["results"]
+    assert results[0]["id"] == "0"
+    assert results[1]["error"]
+    assert results[2]["error"].startswith("Not inserted")
+    assert len(mock_comment_service.create_comments.call_args[0][0]) == 1
+
+
+def test_bulk_reports_write_errors(client, mock_comment_service):
+    mock_comment_service.create_comments.side_effect = lambda items, *args, **kwargs: [
+        (Comment(user_id="u", user_name="n", message=item.message), "E11000 duplicate key") for item in items
+    ]
+
+    response = client.post("/comments/bulk", json=[{"message": "a"}])
+
+    assert response.json()["results"][0]["error"] == "E11000 duplicate key"
+
+
+def test_bulk_rejects_non_array(client):
+    response = client.post("/comments/bulk", json={"message": "a"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_bulk_rejects_too_many_items(client, mock_comment_service):
+    response = client.post("/comments/bulk", json=[{"message": "m"}] * (MAX_BULK_ITEMS + 1))
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    mock_comment_service.create_comments.assert_not_awaited()
+
+
+def test_bulk_sync_router():
+    service = MagicMock(spec=CommentService)
+    service.create_comments.side_effect = created
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[routes.get_service] = lambda: service
+    app.dependency_overrides[routes.get_current_user] = lambda: {"id": "test_user_id", "name": "Test User"}
+    app.dependency_overrides[get_rate_limit_backend] = lambda: None
+
+    response = TestClient(app).post("/comments/bulk", json=[{"message": "a"}])
+
+    assert response.status_code == status.HTTP_201_CREATED
+    service.create_comments.assert_called_once()
+
+
+def test_bulk_items_charged_to_create_limit(client, mock_comment_service, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_COMMENTS_CREATE", "10/60")
+    backend = InMemoryRateLimitBackend()
+    client.app.dependency_overrides[get_rate_limit_backend] = lambda: backend
+
+    too_many = client.post("/comments/bulk", json=[{"message": str(index)} for index in range(11)])
+    within = client.post("/comments/bulk", json=[{"message": str(index)} for index in range(8)])
+    over_remaining = client.post("/comments/bulk", json=[{"message": "a"}, {"message": "b"}, {"message": "c"}])
+
+    assert too_many.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert within.status_code == status.HTTP_201_CREATED
+    assert over_remaining.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert mock_comment_service.create_comments.await_count == 1
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime, timezone
+from typing import List
+
+import pytest
+from app.domain.comment import Comment
+from app.infrastructure.comment_documents import to_raw
+from app.routes.fast_json import dumps, fast_json_response
+from bson import ObjectId
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 5, 1, 12, 30, 15, 123000),
+    datetime(2024, 5, 1, 12, 30, 15, tzinfo=timezone.utc),
+])
+def test_fast_path_matches_response_model_bytes(created_at):
+    doc = {"_id": ObjectId(), "user_id": "u1", "user_name": "Ana", "message": "olá \"mundo\"", "is_public": False,
+           "created_at": created_at, "version": 3}
+
+    expected = TypeAdapter(List[Comment]).dump_json([Comment(**{**doc, "id": str(doc["_id"])})])
+
+    assert dumps([to_raw(doc)]) == expected
+
+
+def test_fast_json_response_copies_route_headers():
+    sub_response = Response()
+    sub_response.headers["ETag"] = '"abc"'
+    sub_response.headers["X-Next-Cursor"] = "next"
+
+    response = fast_json_response([{"id": "1"}], sub_response)
+
+    assert json.loads(response.body) == [{"id": "1"}]
+    assert response.headers["ETag"] == '"abc"'
+    assert response.headers["X-Next-Cursor"] == "next"
+    assert response.headers["content-length"] == str(len(response.body))
@@ -0,0 +1,58 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.routes.metrics import UNMATCHED_ROUTE, MetricsMiddleware, router
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+
+    @app.get("/comments/{comment_id}")
+    def get_comment(comment_id: str):
+        return {"id": comment_id}
+
+    return TestClient(app)
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_request_recorded_by_route_template():
+    client = make_client()
+    labels = {"method": "GET", "route": "/comments/{comment_id}", "status": "200"}
+    before = sample("http_request_duration_seconds_count", **labels)
+
+    client.get("/comments/abc")
+    client.get("/comments/def")
+
+    assert sample("http_request_duration_seconds_count", **labels) == before + 2
+    assert sample("http_requests_in_flight", method="GET", route="/comments/{comment_id}") == 0
+
+
+def test_unknown_path_and_wrong_method():
+    client = make_client()
+    before_unmatched = sample("http_request_duration_seconds_count", method="GET", route=UNMATCHED_ROUTE, status="404")
+    before_not_allowed = sample("http_request_duration_seconds_count", method="POST", route="/comments/{comment_id}",
+                                status="405")
+
+    client.get("/nothing/here")
+    client.post("/comments/abc")
+
+    assert sample("http_request_duration_seconds_count", method="GET", route=UNMATCHED_ROUTE, status="404") == before_unmatched + 1
+    assert sample("http_request_duration_seconds_count", method="POST", route="/comments/{comment_id}",
+                  status="405") == before_not_allowed + 1
+
+
+def test_metrics_endpoint_exposes_text_format():
+    client = make_client()
+    client.get("/comments/abc")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/comments/{comment_id}",status="200"}' in response.text
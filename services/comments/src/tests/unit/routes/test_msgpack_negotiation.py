@@ -0,0 +1,68 @@
+import json
+from datetime import datetime, timezone
+
+import msgpack
+import pytest
+from app.domain.comment import Comment
+from app.infrastructure.comment_documents import to_raw
+from app.routes.msgpack_negotiation import MSGPACK_MEDIA_TYPE, accepts_msgpack, msgpack_response, packb, wants_msgpack
+from bson import ObjectId
+from fastapi import Response
+from starlette.requests import Request
+
+
+def make_request(accept=None) -> Request:
+    headers = [(b"accept", accept.encode())] if accept else []
+    return Request({"type": "http", "method": "GET", "path": "/comments/all_public", "headers": headers})
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("*/*", False),
+    ("application/json", False),
+    ("application/msgpack", True),
+    ("application/x-msgpack", True),
+    ("application/msgpack, application/json", True),
+    ("application/msgpack;q=0.5, application/json", False),
+    ("application/json;q=0.5, application/msgpack", True),
+    ("application/msgpack;q=0", False),
+    ("application/msgpack;q=0.8, */*;q=0.1", True),
+])
+def test_accepts_msgpack(accept, expected):
+    assert accepts_msgpack(make_request(accept)) is expected
+
+
+def test_wants_msgpack_marks_response_as_varying_by_accept():
+    response = Response()
+
+    assert wants_msgpack(make_request("application/msgpack"), response)
+    assert response.headers["Vary"] == "Accept"
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2024, 5, 1, 12, 30, 15, 123000),
+    datetime(2024, 5, 1, 12, 30, 15, tzinfo=timezone.utc),
+])
+def test_raw_and_model_paths_match_json_response(created_at):
+    doc = {"_id": ObjectId(), "user_id": "u1", "user_name": "Ana", "message": "olá", "is_public": False,
+           "created_at": created_at, "version": 3}
+    comment = Comment(**{**doc, "id": str(doc["_id"])})
+
+    expected = json.loads(comment.model_dump_json())
+
+    assert msgpack.unpackb(packb([comment])) == [expected]
+    assert msgpack.unpackb(packb([to_raw(doc)])) == [expected]
+
+
+def test_msgpack_response_copies_route_headers():
+    sub_response = Response()
+    sub_response.headers["ETag"] = '"abc"'
+    sub_response.headers["X-Next-Cursor"] = "next"
+
+    response = msgpack_response([{"id": "1"}], sub_response)
+
+    assert msgpack.unpackb(response.body) == [{"id": "1"}]
+    assert response.media_type == MSGPACK_MEDIA_TYPE
+    assert response.headers["ETag"] == '"abc"'
+    assert response.headers["X-Next-Cursor"] == "next"
+    assert response.headers["content-length"] == str(len(response.body))
@@ -0,0 +1,105 @@
+import pstats
+from unittest.mock import patch
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.profiling import PROFILE_FILE_HEADER, ProfiledRoute, ProfilingMiddleware, router
+
+ADMIN = {"id": "admin123", "name": "Admin"}
+USER = {"id": "user123", "name": "Test User"}
+
+
+def slow_listing():
+    return sum(i * i for i in range(1000))
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILING_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET", "test_secret")
+    monkeypatch.setenv("AUTHORIZED_USER_ID", ADMIN["id"])
+    return tmp_path
+
+
+@pytest.fixture
+def client(profiles):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(router)
+    comments = APIRouter(route_class=ProfiledRoute)
+
+    @comments.get("/comments/all_public")
+    def list_public():
+        return {"total": slow_listing()}
+
+    app.include_router(comments)
+    return TestClient(app)
+
+
+def as_user(user: dict):
+    return patch("jose.jwt.decode", return_value=user)
+
+
+def test_admin_header_profiles_sync_route(client, profiles):
+    with as_user(ADMIN):
+        response = client.get("/comments/all_public", headers={"Authorization": "Bearer token", "X-Profile": "1"})
+
+    assert response.status_code == 200
+    name = response.headers[PROFILE_FILE_HEADER]
+    assert name.startswith("request-") and name.endswith("-GET_comments_all_public.prof")
+    # O endpoint roda no threadpool e ainda assim aparece no perfil
+    functions = {function for _, _, function in pstats.Stats(str(profiles / name)).stats}
+    assert "slow_listing" in functions
+
+
+def test_profile_header_ignored_for_other_users(client, profiles):
+    with as_user(USER):
+        response = client.get("/comments/all_public", headers={"Authorization": "Bearer token", "X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert PROFILE_FILE_HEADER not in response.headers
+    assert list(profiles.iterdir()) == []
+
+
+def test_sample_rate_profiles_without_header(client, profiles, monkeypatch):
+    monkeypatch.setenv("PROFILING_REQUEST_SAMPLE_RATE", "1")
+
+    response = client.get("/comments/all_public")
+
+    assert PROFILE_FILE_HEADER not in response.headers
+    assert [path.suffix for path in profiles.iterdir()] == [".prof"]
+
+
+def test_admin_routes_require_admin(client):
+    with as_user(USER):
+        assert client.get("/admin/profiling/files", headers={"Authorization": "Bearer token"}).status_code == 403
+    assert client.get("/admin/profiling/files").status_code == 403
+
+
+def test_sample_and_download(client):
+    with as_user(ADMIN):
+        sampled = client.post("/admin/profiling/sample?seconds=0.05&interval_ms=5", headers={"Authorization": "Bearer token"})
+        files = client.get("/admin/profiling/files", headers={"Authorization": "Bearer token"}).json()
+        download = client.get(f"/admin/profiling/files/{sampled.json()['file']}", headers={"Authorization": "Bearer token"})
+        missing = client.get("/admin/profiling/files/..", headers={"Authorization": "Bearer token"})
+
+    assert sampled.status_code == 200
+    assert sampled.json()["samples"] > 0
+    assert [entry["name"] for entry in files] == [sampled.json()["file"]]
+    assert download.status_code == 200
+    assert missing.status_code == 404
+
+
+def test_tracemalloc_routes(client):
+    headers = {"Authorization": "Bearer token"}
+    with as_user(ADMIN):
+        assert client.post("/admin/profiling/tracemalloc/snapshot", headers=headers).status_code == 409
+        assert client.post("/admin/profiling/tracemalloc/start?frames=5", headers=headers).status_code == 200
+        first = client.post("/admin/profiling/tracemalloc/snapshot", headers=headers).json()
+        second = client.post("/admin/profiling/tracemalloc/snapshot", headers=headers).json()
+        assert client.post("/admin/profiling/tracemalloc/stop", headers=headers).json() == {"tracing": False}
+
+    assert first["collapsed"].endswith(".collapsed")
+    assert second["diff"].startswith("memory-diff-")
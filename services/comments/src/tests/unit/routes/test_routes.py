@@ -4,9 +4,17 @@ import pytest
 from fastapi import HTTPException, status
 
 from app.application.comment_service import CommentService
-from app.domain.comment import Comment, CommentCreate
+from fastapi import Response
+
+from app.domain.comment import Comment, CommentCreate, CommentPage
 from app.routes.auth import get_current_user
 from app.routes.routes import get_all_public_comments, post_comment, get_service
+from starlette.requests import Request
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/comments/all_public", "headers": headers})
 
 
 @pytest.fixture
@@ -29,16 +37,34 @@ def test_get_comments_success(mock_comment_service, mock_get_current_user, mock_
         Comment(id="1", user_id="u1", user_name="n1", message="m1", is_public=True),
         Comment(id="2", user_id="u2", user_name="n2", message="m2", is_public=True),
     ]
-    mock_comment_service.get_all_public_comments.return_value = mock_comments
+    mock_comment_service.get_all_public_comments.return_value = CommentPage(items=mock_comments, next_cursor="next")
+    http_response = Response()
 
     with patch('app.routes.routes.get_current_user', new=mock_get_current_user):
         with patch('app.routes.routes.get_service', new=mock_get_service):
-            response = get_all_public_comments(service=mock_comment_service)
+            response = get_all_public_comments(make_request(), http_response, service=mock_comment_service)
 
     assert response == mock_comments
+    assert http_response.headers["X-Next-Cursor"] == "next"
+    assert http_response.headers["ETag"].startswith('"')
     mock_comment_service.get_all_public_comments.assert_called_once()
 
 
+def test_get_comments_not_modified(mock_comment_service):
+    mock_comment_service.get_public_comments_version.return_value = 3
+    mock_comment_service.get_all_public_comments.return_value = CommentPage(items=[])
+    http_response = Response()
+    get_all_public_comments(make_request(), http_response, limit=50, cursor=None, service=mock_comment_service)
+    etag = http_response.headers["ETag"]
+    mock_comment_service.get_all_public_comments.reset_mock()
+
+    response = get_all_public_comments(make_request(etag), Response(), limit=50, cursor=None, service=mock_comment_service)
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    mock_comment_service.get_all_public_comments.assert_not_called()
+
+
 def test_post_comment_success(mock_comment_service, mock_get_current_user, mock_get_service):
     comment_data = CommentCreate(message="New comment", is_public=True)
     # The service returns a Comment object, not just the ID
@@ -52,7 +78,7 @@ def test_post_comment_success(mock_comment_service, mock_get_current_user, mock_
 
     with patch('app.routes.routes.get_current_user', new=mock_get_current_user):
         with patch('app.routes.routes.get_service', new=mock_get_service):
-            response = post_comment(comment=comment_data, user=mock_get_current_user(), service=mock_comment_service)
+            response = post_comment(comment=comment_data, response=Response(), user=mock_get_current_user(), service=mock_comment_service)
 
     assert response.id == "new_comment_id"
     assert response.message == "New comment"
@@ -67,7 +93,7 @@ def test_post_comment_unauthorized(mock_comment_service, mock_get_service):
     with patch('app.routes.routes.get_current_user', return_value=None):
         with patch('app.routes.routes.get_service', new=mock_get_service):
             with pytest.raises(HTTPException) as exc_info:
-                post_comment(comment=MagicMock(), user=None, service=mock_comment_service)
+                post_comment(comment=MagicMock(), response=Response(), user=None, service=mock_comment_service)
 
     assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert exc_info.value.detail == "Unauthorized"
@@ -0,0 +1,43 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.infrastructure.slow_queries import get_slow_query_log
+from app.routes.slow_queries import router
+
+HEADERS = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test_secret")
+    monkeypatch.setenv("AUTHORIZED_USER_ID", "admin123")
+    app = FastAPI()
+    app.include_router(router)
+    get_slow_query_log().reset()
+    yield TestClient(app)
+    get_slow_query_log().reset()
+
+
+def test_summary_requires_admin(client):
+    with patch("jose.jwt.decode", return_value={"id": "user123", "name": "Test User"}):
+        assert client.get("/admin/slow-queries", headers=HEADERS).status_code == 403
+
+
+def test_summary_and_reset(client):
+    log = get_slow_query_log()
+    # Sem o explain: o teste não tem MongoDB
+    with patch.object(log, "explainer", None):
+        log.record("comments", "find", {"find": "comments", "filter": {"user_id": "u1"}}, 500)
+
+    with patch("jose.jwt.decode", return_value={"id": "admin123", "name": "Admin"}):
+        summary = client.get("/admin/slow-queries?limit=5", headers=HEADERS).json()
+        reset = client.delete("/admin/slow-queries", headers=HEADERS)
+        after = client.get("/admin/slow-queries", headers=HEADERS).json()
+
+    assert summary["shapes"][0]["shape"] == {"command": "find", "collection": "comments", "filter": {"user_id": "?"}}
+    assert summary["shapes"][0]["total_ms"] == 500
+    assert reset.status_code == 204
+    assert after["shapes"] == []
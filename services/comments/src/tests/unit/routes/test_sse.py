@@ -0,0 +1,51 @@
+import pytest
+from app.infrastructure.broadcaster import CommentBroadcaster, get_comment_broadcaster
+from app.routes import async_routes, routes
+from app.routes.sse import sse_events
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+@pytest.mark.asyncio
+async def test_sse_events_sends_heartbeat_while_idle():
+    broadcaster = CommentBroadcaster()
+    stream = sse_events(broadcaster.subscribe(), heartbeat=0.01)
+
+    assert await stream.__anext__() == b"retry: 3000\n\n"
+    assert await stream.__anext__() == b": keep-alive\n\n"
+
+    broadcaster.publish("comment_created", '{"id": "1"}')
+    assert await stream.__anext__() == b'id: 1\nevent: comment_created\ndata: {"id": "1"}\n\n'
+
+    await stream.aclose()
+    assert broadcaster.stats()["subscribers"] == 0
+
+
+@pytest.mark.parametrize("router", [routes.router, async_routes.router])
+def test_stream_replays_after_last_event_id(router):
+    broadcaster = CommentBroadcaster()
+    for event_type in ("comment_created", "comment_deleted"):
+        broadcaster.publish(event_type, "{}")
+    # Com o broadcaster encerrado o stream termina logo após o replay
+    broadcaster.close()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_comment_broadcaster] = lambda: broadcaster
+
+    response = TestClient(app).get("/comments/stream", headers={"Last-Event-ID": "1"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == "retry: 3000\n\nid: 2\nevent: comment_deleted\ndata: {}\n\n"
+
+
+def test_stream_asks_for_reload_when_history_is_gone():
+    broadcaster = CommentBroadcaster()
+    broadcaster.close()
+    app = FastAPI()
+    app.include_router(async_routes.router)
+    app.dependency_overrides[get_comment_broadcaster] = lambda: broadcaster
+
+    response = TestClient(app).get("/comments/stream", headers={"Last-Event-ID": "42"})
+
+    assert "event: reset" in response.text
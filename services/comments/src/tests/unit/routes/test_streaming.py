@@ -0,0 +1,38 @@
+import json
+
+import pytest
+from app.domain.comment import Comment
+from app.routes.streaming import astream_json_array, json_streaming_response, stream_json_array
+
+
+def make_comments(count: int) -> list[Comment]:
+    return [Comment(id=str(i), user_id="u", user_name="n", message=f"m{i}") for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3, 7])
+def test_stream_json_array_is_valid_json(count):
+    chunks = list(stream_json_array(iter(make_comments(count)), chunk_items=3))
+
+    decoded = json.loads(b"".join(chunks))
+    assert [item["id"] for item in decoded] == [str(i) for i in range(count)]
+    # Abre, fecha e um pedaço por lote de 3 itens
+    assert len(chunks) == 2 + -(-count // 3)
+
+
+@pytest.mark.asyncio
+async def test_astream_json_array():
+    async def comments():
+        for comment in make_comments(4):
+            yield comment
+
+    chunks = [chunk async for chunk in astream_json_array(comments(), chunk_items=2)]
+
+    assert [item["message"] for item in json.loads(b"".join(chunks))] == ["m0", "m1", "m2", "m3"]
+
+
+def test_json_streaming_response_sets_etag():
+    response = json_streaming_response(iter([]), etag='"abc"', private=True)
+
+    assert response.media_type == "application/json"
+    assert response.headers["ETag"] == '"abc"'
+    assert response.headers["Cache-Control"] == "private, no-cache"
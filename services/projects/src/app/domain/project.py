@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from pydantic import BaseModel
 
@@ -17,7 +17,16 @@ class Project(BaseModel):
 class ProjectRepository(ABC):
 
     @abstractmethod
-    def list_all(self) -> List[Project]: pass
+    def list_all(self, tag: Optional[str] = None, stack: Optional[str] = None) -> List[Project]: pass
+
+    @abstractmethod
+    def list_all_raw(self, tag: Optional[str] = None, stack: Optional[str] = None) -> List[dict]: pass
+
+    @abstractmethod
+    def stream_all(self, tag: Optional[str] = None, stack: Optional[str] = None) -> AsyncIterator[Project]: pass
+
+    @abstractmethod
+    def get_version(self) -> int: pass
 
     @abstractmethod
     def get_by_id(self, project_id: int) -> Optional[Project]: pass
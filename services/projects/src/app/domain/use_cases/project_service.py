@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from app.domain.project import Project, ProjectRepository
 
@@ -7,8 +7,17 @@ class ProjectService:
     def __init__(self, repository: ProjectRepository):
         self.repository = repository
 
-    async def list_projects(self) -> List[Project]:
-        return await self.repository.list_all()
+    async def list_projects(self, tag: Optional[str] = None, stack: Optional[str] = None) -> List[Project]:
+        return await self.repository.list_all(tag=tag, stack=stack)
+
+    async def list_projects_raw(self, tag: Optional[str] = None, stack: Optional[str] = None) -> List[dict]:
+        return await self.repository.list_all_raw(tag=tag, stack=stack)
+
+    def stream_projects(self, tag: Optional[str] = None, stack: Optional[str] = None) -> AsyncIterator[Project]:
+        return self.repository.stream_all(tag=tag, stack=stack)
+
+    async def get_projects_version(self) -> int:
+        return await self.repository.get_version()
 
     async def get_project(self, project_id: str) -> Optional[Project]:
         return await self.repository.get_by_id(project_id)
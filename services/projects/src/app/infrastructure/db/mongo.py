@@ -1,6 +1,8 @@
 import os
 
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from app.infrastructure.metrics import mongo_event_listeners
+from app.infrastructure.slow_queries import slow_query_listeners
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
 
 # Inicializa o cliente do Mongo uma única vez
 _mongo_client: AsyncIOMotorClient | None = None
@@ -10,7 +12,8 @@ def get_mongo_client() -> AsyncIOMotorClient:
     global _mongo_client
     if _mongo_client is None:
         mongo_uri = os.getenv("MONGO_URI", "mongodb://mongo:27017")
-        _mongo_client = AsyncIOMotorClient(mongo_uri)
+        # Duração de cada comando em mongodb_command_duration_seconds e registro dos comandos lentos
+        _mongo_client = AsyncIOMotorClient(mongo_uri, event_listeners=mongo_event_listeners() + slow_query_listeners())
     return _mongo_client
 
 def reset_client():
@@ -18,7 +21,17 @@ def reset_client():
     _mongo_client = None
 
 
-def get_mongo_collection(collection_name: str) -> AsyncIOMotorCollection:
+def close_client():
+    if _mongo_client is not None:
+        _mongo_client.close()
+    reset_client()
+
+
+def get_mongo_database() -> AsyncIOMotorDatabase:
     db_name = os.getenv("MONGO_DB_NAME", "projects")
     client = get_mongo_client()
-    return client[db_name][collection_name]
+    return client[db_name]
+
+
+def get_mongo_collection(collection_name: str) -> AsyncIOMotorCollection:
+    return get_mongo_database()[collection_name]
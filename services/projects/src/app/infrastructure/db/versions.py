@@ -0,0 +1,22 @@
+VERSIONS_COLLECTION = "collection_versions"
+
+PROJECTS_SCOPE = "projects"
+
+
+class MongoVersionStore:
+    """Contador de versão por escopo, incrementado a cada escrita.
+
+    Ler a versão é um find_one por _id, bem mais barato que a listagem;
+    os ETags são derivados dela. Fica no Mongo para que todas as réplicas
+    do serviço enxerguem a mesma versão.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, scope: str) -> int:
+        doc = await self.collection.find_one({"_id": scope}, {"version": True})
+        return doc["version"] if doc else 0
+
+    async def bump(self, scope: str):
+        await self.collection.update_one({"_id": scope}, {"$inc": {"version": 1}}, upsert=True)
@@ -0,0 +1,73 @@
+"""Métricas do serviço no formato do Prometheus, expostas em GET /metrics.
+
+- http_request_duration_seconds e http_requests_in_flight, por rota (o
+  template, como /projects/{project_id}), preenchidas por
+  app.routes.metrics.MetricsMiddleware;
+- mongodb_command_duration_seconds, por comando e coleção, coletada pelo
+  command monitoring do motor (MongoCommandMetrics).
+
+Os valores são por processo: com vários workers, cada um expõe os seus.
+"""
+import os
+import threading
+
+from prometheus_client import Gauge, Histogram
+from pymongo import monitoring
+
+# Comandos do MongoDB costumam levar de décimos de milissegundo a poucos milissegundos
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Duração das requisições HTTP, até o fim do corpo da resposta",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento", ["method", "route"],
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "Duração dos comandos enviados ao MongoDB",
+    ["command", "collection", "outcome"], buckets=MONGO_BUCKETS,
+)
+
+
+def metrics_enabled() -> bool:
+    return os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Registra a duração de cada comando do MongoDB medida pelo próprio driver.
+
+    Os eventos de término não trazem o comando, então a coleção é guardada
+    no início, pela chave (request_id, connection_id) que os dois eventos têm.
+    """
+
+    def __init__(self):
+        self._collections: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        target = event.command.get(event.command_name)
+        # getMore e killCursors trazem o id do cursor no lugar da coleção
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        with self._lock:
+            self._collections[(event.request_id, event.connection_id)] = collection
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._observe(event, "succeeded")
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._observe(event, "failed")
+
+    def _observe(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop((event.request_id, event.connection_id), "")
+        MONGO_COMMAND_DURATION.labels(event.command_name, collection, outcome).observe(event.duration_micros / 1e6)
+
+
+# Um único listener para todos os clientes do processo
+_mongo_command_metrics = MongoCommandMetrics()
+
+
+def mongo_event_listeners() -> list:
+    return [_mongo_command_metrics] if metrics_enabled() else []
+
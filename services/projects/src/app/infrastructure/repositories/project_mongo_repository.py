@@ -1,17 +1,65 @@
+from typing import AsyncIterator
+
 from app.domain.project import Project, ProjectRepository
 from app.infrastructure.db.mongo import get_mongo_collection
+from app.infrastructure.db.versions import PROJECTS_SCOPE, VERSIONS_COLLECTION, MongoVersionStore
 from bson import ObjectId
 
+# Documentos trazidos do servidor por ida e volta durante o streaming
+STREAM_BATCH_SIZE = 100
+
+
+def _filter(tag: str | None, stack: str | None) -> dict:
+    query = {}
+    if tag:
+        query["tags"] = tag
+    if stack:
+        query["stack"] = stack
+    return query
+
+
+def _raw_project(doc: dict) -> dict:
+    """Documento do banco direto para o dict da resposta, na ordem dos campos de Project, sem validação."""
+    return {
+        "id": str(doc["_id"]),
+        "name": doc["name"],
+        "description": doc["description"],
+        "stack": doc["stack"],
+        "repo_url": doc["repo_url"],
+        "tags": doc["tags"],
+        "visible": doc["visible"],
+    }
+
+
+async def _projects(cursor) -> AsyncIterator[Project]:
+    try:
+        async for doc in cursor:
+            yield Project(**{**doc, "id": str(doc["_id"])})
+    finally:
+        # O cliente pode desconectar no meio da resposta; o cursor no servidor não deve ficar aberto
+        await cursor.close()
+
 
 class ProjectMongoRepository(ProjectRepository):
     def __init__(self):
         self.collection = get_mongo_collection("projects")
+        self.versions = MongoVersionStore(get_mongo_collection(VERSIONS_COLLECTION))
+
+    async def get_version(self) -> int:
+        return await self.versions.get(PROJECTS_SCOPE)
 
-    async def list_all(self) -> list[Project]:
-        cursor = self.collection.find({})
+    async def list_all(self, tag: str | None = None, stack: str | None = None) -> list[Project]:
+        cursor = self.collection.find(_filter(tag, stack))
         docs = await cursor.to_list(length=None)
         return [Project(**{**doc, "id": str(doc["_id"])}) for doc in docs]
 
+    async def list_all_raw(self, tag: str | None = None, stack: str | None = None) -> list[dict]:
+        docs = await self.collection.find(_filter(tag, stack)).to_list(length=None)
+        return [_raw_project(doc) for doc in docs]
+
+    def stream_all(self, tag: str | None = None, stack: str | None = None) -> AsyncIterator[Project]:
+        return _projects(self.collection.find(_filter(tag, stack)).batch_size(STREAM_BATCH_SIZE))
+
     async def get_by_id(self, project_id: str) -> Project | None:
         doc = await self.collection.find_one({"_id": ObjectId(project_id)})
         if doc:
@@ -26,6 +74,7 @@ class ProjectMongoRepository(ProjectRepository):
         del data["id"]
 
         await self.collection.insert_one(data)
+        await self.versions.bump(PROJECTS_SCOPE)
         project.id = str(data["_id"])
         return project
 
@@ -40,6 +89,7 @@ class ProjectMongoRepository(ProjectRepository):
             )
 
             if result.modified_count > 0:
+                await self.versions.bump(PROJECTS_SCOPE)
                 # Return the updated project
                 return await self.get_by_id(project_id)
             return None
@@ -50,7 +100,10 @@ class ProjectMongoRepository(ProjectRepository):
     async def delete(self, project_id: str) -> bool:
         try:
             result = await self.collection.delete_one({"_id": ObjectId(project_id)})
-            return result.deleted_count > 0
+            if result.deleted_count > 0:
+                await self.versions.bump(PROJECTS_SCOPE)
+                return True
+            return False
         except Exception as e:
             print(f"Error deleting project {project_id}: {e}")
             return False
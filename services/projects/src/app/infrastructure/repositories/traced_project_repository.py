@@ -0,0 +1,62 @@
+from typing import AsyncIterator
+
+from app.domain.project import Project, ProjectRepository
+from app.infrastructure.tracing import tracer
+
+DB_ATTRIBUTES = {"db.system": "mongodb"}
+
+
+def _span(method: str):
+    return tracer.start_as_current_span(f"ProjectRepository.{method}", attributes=DB_ATTRIBUTES)
+
+
+async def _traced_stream(stream: AsyncIterator[Project]) -> AsyncIterator[Project]:
+    # O span cobre a iteração inteira, até o último documento enviado na resposta
+    span = tracer.start_span("ProjectRepository.stream_all", attributes=DB_ATTRIBUTES)
+    count = 0
+    try:
+        async for project in stream:
+            count += 1
+            yield project
+    finally:
+        await stream.aclose()
+        span.set_attribute("projects.count", count)
+        span.end()
+
+
+class TracedProjectRepository(ProjectRepository):
+    """Abre um span por chamada ao repositório, dentro do span da requisição."""
+
+    def __init__(self, repository: ProjectRepository):
+        self.repository = repository
+
+    async def get_version(self) -> int:
+        with _span("get_version"):
+            return await self.repository.get_version()
+
+    async def list_all(self, tag: str | None = None, stack: str | None = None) -> list[Project]:
+        with _span("list_all"):
+            return await self.repository.list_all(tag, stack)
+
+    async def list_all_raw(self, tag: str | None = None, stack: str | None = None) -> list[dict]:
+        with _span("list_all_raw"):
+            return await self.repository.list_all_raw(tag, stack)
+
+    def stream_all(self, tag: str | None = None, stack: str | None = None) -> AsyncIterator[Project]:
+        return _traced_stream(self.repository.stream_all(tag, stack))
+
+    async def get_by_id(self, project_id: str) -> Project | None:
+        with _span("get_by_id"):
+            return await self.repository.get_by_id(project_id)
+
+    async def create(self, project: Project) -> Project:
+        with _span("create"):
+            return await self.repository.create(project)
+
+    async def update(self, project_id: str, project: Project) -> Project | None:
+        with _span("update"):
+            return await self.repository.update(project_id, project)
+
+    async def delete(self, project_id: str) -> bool:
+        with _span("delete"):
+            return await self.repository.delete(project_id)
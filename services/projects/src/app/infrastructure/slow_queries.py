@@ -0,0 +1,307 @@
+"""Registro dos comandos lentos do MongoDB, pelo command monitoring do driver.
+
+Todo comando acima de SLOW_QUERY_THRESHOLD_MS (padrão 100) é logado com o
+formato da consulta: filtro, ordenação e pipeline com os valores trocados
+por "?", de modo que `{"tags": "web"}` e `{"tags": "api"}` contam como
+a mesma consulta. Na primeira ocorrência de cada formato, o comando original
+é passado ao explain (verbosidade SLOW_QUERY_EXPLAIN_VERBOSITY, padrão
+queryPlanner, que não executa a consulta) numa thread à parte, com um
+cliente próprio; o plano fica junto do resumo em GET /admin/slow-queries.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from pymongo import MongoClient, monitoring
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = "?"
+
+# Comandos com filtro que o explain aceita; os demais (insert, getMore...) só entram no ranking
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Comandos do próprio driver e do explain, que não dizem nada sobre as consultas da aplicação
+IGNORED_COMMANDS = {"explain", "hello", "isMaster", "ismaster", "ping", "buildInfo", "endSessions", "saslStart",
+                    "saslContinue", "killCursors"}
+
+# Campos de sessão e transporte que o driver acrescenta ao comando e o explain recusa
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "autocommit", "startTransaction", "$readPreference",
+                 "writeConcern"}
+
+# Chaves cujo valor descreve a forma da consulta e não dados: a ordenação decide o índice usado
+VERBATIM_KEYS = {"sort", "$sort"}
+
+
+def slow_query_log_enabled() -> bool:
+    return os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+
+
+def shape_of(value: Any) -> Any:
+    """Troca os valores por "?" mantendo campos, operadores e a estrutura de $and/$or."""
+    if isinstance(value, dict):
+        return {key: item if key in VERBATIM_KEYS else shape_of(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(item, dict) for item in value):
+            return [shape_of(item) for item in value]
+        # Listas de valores ($in, $nin) têm o mesmo formato qualquer que seja o tamanho
+        return PLACEHOLDER
+    return PLACEHOLDER
+
+
+def command_shape(command_name: str, command: dict) -> dict:
+    target = command.get(command_name)
+    collection = target if isinstance(target, str) else command.get("collection", "")
+    shape = {"command": command_name, "collection": collection}
+    if command_name == "find":
+        shape["filter"] = shape_of(command.get("filter", {}))
+        if "sort" in command:
+            shape["sort"] = command["sort"]
+    elif command_name == "aggregate":
+        shape["pipeline"] = shape_of(command.get("pipeline", []))
+    elif command_name in ("count", "distinct"):
+        shape["filter"] = shape_of(command.get("query", {}))
+    elif command_name == "findAndModify":
+        shape["filter"] = shape_of(command.get("query", {}))
+        if "sort" in command:
+            shape["sort"] = command["sort"]
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes", [])
+        if statements:
+            shape["filter"] = shape_of(statements[0].get("q", {}))
+    return shape
+
+
+# Escritas em lote levam vários statements; o explain só aceita um
+STATEMENT_FIELDS = {"update": "updates", "delete": "deletes"}
+
+
+def explain_command(command_name: str, command: dict) -> dict:
+    explained = {key: value for key, value in command.items() if key not in DRIVER_FIELDS}
+    field = STATEMENT_FIELDS.get(command_name)
+    if field and explained.get(field):
+        # O primeiro statement, o mesmo que command_shape usa para agrupar
+        explained[field] = [explained[field][0]]
+    return explained
+
+
+def _winning_plan(explain: dict) -> Optional[dict]:
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # Agregação cujo primeiro estágio virou um cursor: o plano fica dentro dele
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                planner = stage["$cursor"].get("queryPlanner")
+                break
+    if planner is None:
+        return None
+    plan = planner.get("winningPlan", {})
+    # Com o motor de execução SBE (MongoDB 7+) o plano clássico vem em queryPlan
+    return plan.get("queryPlan", plan)
+
+
+def plan_summary(explain: Optional[dict]) -> Optional[str]:
+    """Estágios do plano vencedor, do topo à leitura: "SORT > COLLSCAN" ou "FETCH > IXSCAN(tags_1)"."""
+    if not explain or "error" in explain:
+        return None
+    stage = _winning_plan(explain)
+    stages = []
+    while stage:
+        name = stage.get("stage", "?")
+        stages.append(f"{name}({stage['indexName']})" if "indexName" in stage else name)
+        stage = stage.get("inputStage") or next(iter(stage.get("inputStages", [])), None)
+    return " > ".join(stages) or None
+
+
+class SlowQueryShape:
+
+    def __init__(self, shape: dict, now: datetime):
+        self.shape = shape
+        self.count = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.first_seen = now
+        self.last_seen = now
+        self.explain: Optional[dict] = None
+
+    def as_dict(self, with_explain: bool) -> dict:
+        result = {
+            "shape": self.shape,
+            "count": self.count,
+            "failures": self.failures,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3),
+            "max_ms": round(self.max_ms, 3),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "plan": plan_summary(self.explain),
+        }
+        if with_explain:
+            result["explain"] = self.explain
+        return result
+
+
+class SlowQueryLog:
+    """Comandos lentos agrupados por formato, com o explain da primeira ocorrência de cada um."""
+
+    def __init__(self, threshold_ms: float, max_shapes: int, explainer: Optional[Callable[[str, dict], dict]]):
+        self.threshold_ms = threshold_ms
+        self.max_shapes = max_shapes
+        self.explainer = explainer
+        self.dropped = 0
+        self._shapes: dict[str, SlowQueryShape] = {}
+        self._lock = threading.Lock()
+        self._explains: queue.Queue = queue.Queue()
+        self._worker: threading.Thread | None = None
+
+    def record(self, database: str, command_name: str, command: dict, duration_ms: float, failed: bool = False):
+        shape = command_shape(command_name, command)
+        key = json.dumps(shape, default=str)
+        logger.warning(f"[MONGO] Comando lento ({duration_ms:.1f} ms{', falhou' if failed else ''}) em {database}: {key}")
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self.dropped += 1
+                    return
+                entry = self._shapes[key] = SlowQueryShape(shape, now)
+                if self.explainer is not None and command_name in EXPLAINABLE_COMMANDS:
+                    self._explain_later(entry, database, explain_command(command_name, command))
+            entry.count += 1
+            entry.failures += int(failed)
+            entry.total_ms += duration_ms
+            entry.max_ms = max(entry.max_ms, duration_ms)
+            entry.last_seen = now
+
+    def _explain_later(self, entry: SlowQueryShape, database: str, command: dict):
+        # O listener roda no meio do comando, no event loop: o explain não pode esperar por ele
+        self._explains.put((entry, database, command))
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run_explains, name="slow-query-explain", daemon=True)
+            self._worker.start()
+
+    def _run_explains(self):
+        while True:
+            item = self._explains.get()
+            if item is None:
+                return
+            entry, database, command = item
+            try:
+                explain = self.explainer(database, command)
+            except Exception as e:
+                logger.warning(f"[MONGO] Falha no explain de um comando lento: {e}")
+                explain = {"error": str(e)}
+            with self._lock:
+                entry.explain = explain
+            self._explains.task_done()
+
+    def wait_for_explains(self):
+        """Espera os explains pendentes; usado nos testes e no encerramento."""
+        if self._worker is not None:
+            self._explains.join()
+
+    def summary(self, limit: int = 20, with_explain: bool = False) -> dict:
+        with self._lock:
+            ranked = sorted(self._shapes.values(), key=lambda entry: entry.total_ms, reverse=True)[:limit]
+            shapes = [entry.as_dict(with_explain) for entry in ranked]
+            return {"threshold_ms": self.threshold_ms, "shapes": shapes, "tracked": len(self._shapes),
+                    "dropped": self.dropped}
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+            self.dropped = 0
+
+    def close(self):
+        if self._worker is not None:
+            self._explains.put(None)
+            self._worker.join(timeout=5)
+            self._worker = None
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Guarda o comando no início e, se o término passar do limite, o entrega ao SlowQueryLog."""
+
+    def __init__(self, log: SlowQueryLog):
+        self.log = log
+        self._commands: dict[tuple, tuple[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        with self._lock:
+            self._commands[(event.request_id, event.connection_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            started = self._commands.pop((event.request_id, event.connection_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is not None and duration_ms >= self.log.threshold_ms:
+            database, command = started
+            self.log.record(database, event.command_name, command, duration_ms, failed)
+
+
+class MongoExplainer:
+    """Roda o explain com um cliente só seu, sem listeners: o explain não entra no próprio registro nem nas métricas."""
+
+    def __init__(self):
+        self.verbosity = os.getenv("SLOW_QUERY_EXPLAIN_VERBOSITY", "queryPlanner")
+        self._client: MongoClient | None = None
+
+    def __call__(self, database: str, command: dict) -> dict:
+        if self._client is None:
+            self._client = MongoClient(os.getenv("MONGO_URI", "mongodb://mongo:27017"), maxPoolSize=1, serverSelectionTimeoutMS=5000)
+        return self._client[database].command({"explain": command, "verbosity": self.verbosity})
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+# Um único registro para o processo
+_slow_query_log: SlowQueryLog | None = None
+_slow_query_listener: SlowQueryListener | None = None
+_slow_query_lock = threading.Lock()
+
+
+def get_slow_query_log() -> SlowQueryLog:
+    global _slow_query_log, _slow_query_listener
+    if _slow_query_log is None:
+        with _slow_query_lock:
+            if _slow_query_log is None:
+                explainer = MongoExplainer() if os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true" else None
+                _slow_query_log = SlowQueryLog(
+                    threshold_ms=float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100)),
+                    max_shapes=int(os.getenv("SLOW_QUERY_MAX_SHAPES", 200)),
+                    explainer=explainer,
+                )
+                _slow_query_listener = SlowQueryListener(_slow_query_log)
+    return _slow_query_log
+
+
+def slow_query_listeners() -> list:
+    if not slow_query_log_enabled():
+        return []
+    get_slow_query_log()
+    return [_slow_query_listener]
+
+
+def close_slow_query_log():
+    if _slow_query_log is not None:
+        _slow_query_log.close()
+        if isinstance(_slow_query_log.explainer, MongoExplainer):
+            _slow_query_log.explainer.close()
@@ -1,20 +1,65 @@
+import logging
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
+from app.infrastructure.db.indexes import reconcile_indexes
+from app.infrastructure.db.mongo import close_client, get_mongo_database
+from app.infrastructure.metrics import metrics_enabled
+from app.infrastructure.profiling import profiling_enabled
+from app.infrastructure.slow_queries import close_slow_query_log, slow_query_log_enabled
+from app.infrastructure.tracing import configure_tracing, flush_tracing, tracing_enabled
 from app.infrastructure.vault import load_secrets
-from app.routes import routes
+from app.routes import metrics, profiling, routes, slow_queries, tracing
 from fastapi import FastAPI
 
+logger = logging.getLogger(__name__)
+
 load_secrets()
+configure_tracing()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv("MONGO_RECONCILE_INDEXES", "true").lower() == "true":
+        # Por padrão só cria: réplicas da versão anterior ainda podem usar os índices que sairiam
+        drop_obsolete = os.getenv("MONGO_DROP_OBSOLETE_INDEXES", "false").lower() == "true"
+        try:
+            await reconcile_indexes(get_mongo_database(), drop_obsolete=drop_obsolete, create_only=not drop_obsolete)
+            logger.info("[MONGO] Índices verificados com sucesso.")
+        except Exception as e:
+            logger.error(f"[MONGO] Erro ao reconciliar índices: {e}")
+    yield
+    close_client()
+    close_slow_query_log()
+    flush_tracing()
 
 
 app = FastAPI(
     title="Project Service",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url=None
+    redoc_url=None,
+    lifespan=lifespan
 )
 
 app.include_router(routes.router)
 
+if metrics_enabled():
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(metrics.router)
+
+if profiling_enabled():
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiling.router)
+
+if slow_query_log_enabled():
+    app.include_router(slow_queries.router)
+
+if tracing_enabled():
+    # Adicionado por último, fica por fora: o span da requisição cobre também a medição das métricas
+    app.add_middleware(tracing.TracingMiddleware)
+
 
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8001, reload=True)
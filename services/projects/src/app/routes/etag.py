@@ -0,0 +1,39 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# Incrementar quando a representação das respostas mudar, invalidando os ETags antigos
+REPRESENTATION_VERSION = 1
+
+
+def make_etag(*parts) -> str:
+    """ETag forte derivado da versão da coleção e dos parâmetros da consulta.
+
+    Não depende do corpo renderizado, então pode ser calculado antes de
+    buscar os documentos.
+    """
+    raw = "|".join(str(part) for part in (REPRESENTATION_VERSION, *parts))
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparação fraca: W/"x" equivale a "x"
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def set_etag(response: Response, etag: str, private: bool = False):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache" if private else "no-cache"
+    # O ETag muda com o formato negociado (JSON ou MessagePack), então os caches precisam separar pelo Accept
+    response.headers["Vary"] = "Accept"
+
+
+def not_modified(etag: str, private: bool = False) -> Response:
+    response = Response(status_code=304)
+    set_etag(response, etag, private)
+    return response
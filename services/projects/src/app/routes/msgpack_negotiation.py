@@ -0,0 +1,91 @@
+"""Negociação de conteúdo entre JSON e MessagePack.
+
+Com `Accept: application/msgpack` as rotas de leitura devolvem o mesmo
+conteúdo da resposta JSON codificado em MessagePack: os mesmos campos e as
+datas como strings ISO 8601, então o consumidor troca só o decodificador.
+Sem o header, ou preferindo JSON, a resposta continua em JSON.
+"""
+from datetime import datetime
+from typing import Any, Optional
+
+import msgpack
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# application/x-msgpack ainda é o nome enviado por vários clientes
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+# Do mais específico para o menos específico
+JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+
+def _accept_qualities(header: str) -> dict[str, float]:
+    qualities = {}
+    for entry in header.split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.lower()] = quality
+    return qualities
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """Se o cliente pediu MessagePack explicitamente com qualidade maior ou igual à do JSON."""
+    header = request.headers.get("accept")
+    if not header:
+        return False
+    qualities = _accept_qualities(header)
+    msgpack_quality = max(qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = next((qualities[media_type] for media_type in JSON_MEDIA_TYPES if media_type in qualities), 0.0)
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def wants_msgpack(request: Request, response: Response) -> bool:
+    """accepts_msgpack, marcando a resposta com Vary: Accept, já que o corpo passa a depender do header."""
+    response.headers["Vary"] = "Accept"
+    return accepts_msgpack(request)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Mesmo texto do serializador do pydantic, que escreve UTC com "Z"
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def _primitive(content: Any) -> Any:
+    if isinstance(content, BaseModel):
+        return content.model_dump(mode="json")
+    # Listas de dicts (caminho rápido) seguem sem cópia; só listas de modelos são convertidas
+    if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        return [item.model_dump(mode="json") for item in content]
+    return content
+
+
+def packb(content: Any) -> bytes:
+    """Codifica modelos ou dicts já no formato da resposta (os do caminho rápido) em MessagePack."""
+    return msgpack.packb(_primitive(content), default=_default, use_bin_type=True)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def msgpack_response(content: Any, sub_response: Optional[Response] = None, status_code: int = 200) -> MsgPackResponse:
+    # Como em fast_json_response, os headers do Response injetado na rota (ETag, cursor, Vary) são copiados
+    headers = None
+    if sub_response is not None:
+        headers = {name: value for name, value in sub_response.headers.items() if name != "content-length"}
+    return MsgPackResponse(content, status_code=status_code, headers=headers)
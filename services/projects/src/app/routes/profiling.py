@@ -0,0 +1,117 @@
+import asyncio
+from typing import Annotated
+
+from app.infrastructure.profiling import (MAX_SAMPLE_SECONDS, RequestProfile, get_memory_profiler, get_sampling_profiler,
+                                          profile_dir, profile_path, request_profile_lock, should_sample_request)
+from app.routes.auth import get_admin_user, get_current_user, is_admin
+from app.routes.metrics import route_template
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Header que pede o cProfile da requisição (só atendido para o AUTHORIZED_USER_ID) e o que devolve o arquivo gerado
+PROFILE_HEADER = "x-profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+
+router = APIRouter(prefix="/admin/profiling", dependencies=[Depends(get_admin_user)])
+
+
+@router.get("/files")
+async def list_profiles():
+    files = sorted(profile_dir().iterdir(), key=lambda path: path.stat().st_mtime, reverse=True)
+    return [{"name": path.name, "size": path.stat().st_size} for path in files if path.is_file()]
+
+
+@router.get("/files/{name}")
+async def download_profile(name: str):
+    path = profile_dir() / name
+    # O nome vem da listagem: nada de subdiretórios ou caminhos para fora de PROFILING_DIR
+    if "/" in name or "\\" in name or name.startswith(".") or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name)
+
+
+@router.post("/sample")
+async def sample_stacks(
+    seconds: Annotated[float, Query(gt=0, le=MAX_SAMPLE_SECONDS)] = 10,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 10,
+):
+    # Thread própria em vez do threadpool das rotas: a amostragem não ocupa um worker pelo intervalo inteiro
+    try:
+        path, samples = await asyncio.to_thread(get_sampling_profiler().run, seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+    return {"file": path.name, "samples": samples}
+
+
+@router.post("/tracemalloc/start")
+async def start_tracemalloc(frames: Annotated[int, Query(ge=1, le=100)] = 25):
+    get_memory_profiler().start(frames)
+    return {"tracing": True, "frames": frames}
+
+
+@router.post("/tracemalloc/snapshot")
+async def take_tracemalloc_snapshot(top: Annotated[int, Query(ge=1, le=100)] = 10):
+    try:
+        return await asyncio.to_thread(get_memory_profiler().snapshot, top)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+
+
+@router.post("/tracemalloc/stop")
+async def stop_tracemalloc():
+    get_memory_profiler().stop()
+    return {"tracing": False}
+
+
+def _admin_request(scope: Scope) -> bool:
+    headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+    if headers.get(PROFILE_HEADER, "").lower() not in ("1", "true"):
+        return False
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        return is_admin(get_current_user(HTTPAuthorizationCredentials(scheme=scheme, credentials=token)))
+    except HTTPException:
+        return False
+
+
+class ProfilingMiddleware:
+    """Grava o cProfile das requisições com X-Profile: 1 (do administrador) ou sorteadas por PROFILING_REQUEST_SAMPLE_RATE.
+
+    Uma requisição é perfilada por vez; as que chegam enquanto isso seguem
+    sem perfil.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = _admin_request(scope)
+        if not (requested or should_sample_request()) or not request_profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            profile = RequestProfile(profile_path("request", f"{scope['method']} {route_template(scope)}", ".prof"))
+
+            async def send_with_file(message: Message):
+                if requested and message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", []), (PROFILE_FILE_HEADER.encode(), profile.path.name.encode())]
+                await send(message)
+
+            profile.loop.enable()
+            try:
+                await self.app(scope, receive, send_with_file)
+            finally:
+                profile.loop.disable()
+            profile.dump()
+        finally:
+            request_profile_lock.release()
+
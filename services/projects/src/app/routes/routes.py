@@ -1,17 +1,25 @@
 import os
-from typing import List
+from typing import List, Optional
 
 from app.domain.project import Project
 from app.domain.use_cases.project_service import ProjectService
 from app.infrastructure.repositories.project_mongo_repository import ProjectMongoRepository
+from app.infrastructure.repositories.traced_project_repository import TracedProjectRepository
+from app.infrastructure.tracing import tracing_enabled
 from app.routes.auth import get_current_user
-from fastapi import APIRouter, Depends, HTTPException
+from app.routes.etag import etag_matches, make_etag, not_modified, set_etag
+from app.routes.fast_json import fast_json_enabled, fast_json_response
+from app.routes.msgpack_negotiation import msgpack_response, wants_msgpack
+from app.routes.streaming import json_streaming_response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 router = APIRouter()
 
 
 def get_service():
     repository = ProjectMongoRepository()
+    if tracing_enabled():
+        repository = TracedProjectRepository(repository)
     return ProjectService(repository)
 
 
@@ -45,21 +53,48 @@ async def create_project(
 
 @router.get("/projects", response_model=List[Project])
 async def list_projects(
+    request: Request,
+    response: Response,
+    tag: Optional[str] = None,
+    stack: Optional[str] = None,
+    stream: bool = False,
     user: dict = Depends(get_current_user),
     service: ProjectService = Depends(get_service)
 ):
-    return await service.list_projects()
+    # O streaming sai sempre em JSON
+    as_msgpack = wants_msgpack(request, response) and not stream
+    etag = make_etag("projects", await service.get_projects_version(), tag, stack, stream, as_msgpack)
+    if etag_matches(request, etag):
+        return not_modified(etag, private=True)
+    if stream:
+        return json_streaming_response(service.stream_projects(tag=tag, stack=stack), etag, private=True)
+    set_etag(response, etag, private=True)
+    if fast_json_enabled():
+        projects = await service.list_projects_raw(tag=tag, stack=stack)
+        return msgpack_response(projects, response) if as_msgpack else fast_json_response(projects, response)
+    projects = await service.list_projects(tag=tag, stack=stack)
+    return msgpack_response(projects, response) if as_msgpack else projects
 
 
 @router.get("/projects/{project_id}", response_model=Project)
 async def get_project(
     project_id: str,
+    request: Request,
+    response: Response,
     user: dict = Depends(get_current_user),
     service: ProjectService = Depends(get_service)
 ):
+    # A versão da coleção também muda quando o projeto é removido, então um 404 nunca fica oculto por um 304
+    as_msgpack = wants_msgpack(request, response)
+    etag = make_etag("projects", await service.get_projects_version(), project_id, as_msgpack)
+    if etag_matches(request, etag):
+        return not_modified(etag, private=True)
     project = await service.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    set_etag(response, etag, private=True)
+    if as_msgpack:
+        return msgpack_response(project, response)
     return project
 
 
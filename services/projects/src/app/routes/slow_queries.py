@@ -0,0 +1,18 @@
+from typing import Annotated
+
+from app.infrastructure.slow_queries import get_slow_query_log
+from app.routes.auth import get_admin_user
+from fastapi import APIRouter, Depends, Query, status
+
+router = APIRouter(prefix="/admin/slow-queries", dependencies=[Depends(get_admin_user)])
+
+
+@router.get("")
+async def get_slow_queries(limit: Annotated[int, Query(ge=1, le=200)] = 20, explain: bool = False):
+    """Formatos de consulta acima do limite, do maior tempo total para o menor, com o plano de cada um."""
+    return get_slow_query_log().summary(limit=limit, with_explain=explain)
+
+
+@router.delete("", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries():
+    get_slow_query_log().reset()
@@ -0,0 +1,92 @@
+"""Benchmark dos endpoints do serviço de projetos pelo caminho completo da requisição.
+
+Usa a aplicação de app.main (rotas, autenticação JWT, serviço e
+serialização) com o repositório em memória de benchmarks.fakes no lugar do
+MongoDB:
+
+    cd services/projects/src && python -m benchmarks.bench_endpoints [--projects 1000]
+
+Só as leituras são medidas: as escritas são restritas a um único usuário
+autorizado. Os resultados são gravados e comparados com a execução anterior
+da mesma configuração (ver benchmarks.runner).
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+from unittest.mock import patch
+
+from benchmarks.dataset import generate_projects
+from benchmarks.fakes import InMemoryProjectRepository
+from benchmarks.runner import DEFAULT_THRESHOLD, Endpoint, format_header, report, run
+
+JWT_SECRET = "benchmark-secret"
+
+
+def load_app(fast_json: bool):
+    """Importa app.main sem buscar segredos no Vault."""
+    os.environ.update({"FAST_JSON_ENABLED": str(fast_json).lower(), "JWT_SECRET": JWT_SECRET})
+    with patch("app.infrastructure.vault.load_secrets"):
+        from app import main
+    return main.app
+
+
+def bearer() -> dict:
+    from jose import jwt
+    token = jwt.encode({"id": "benchmark-user", "name": "Benchmark"}, JWT_SECRET, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def endpoints(documents: list[dict]) -> list[Endpoint]:
+    from app.routes.etag import make_etag
+    from app.routes.msgpack_negotiation import MSGPACK_MEDIA_TYPE
+
+    auth = bearer()
+    project_id = str(documents[len(documents) // 2]["_id"])
+    # O ETag que a listagem completa teria agora, para medir o caminho do 304
+    list_etag = make_etag("projects", 0, None, None, False, False)
+
+    return [
+        Endpoint("list", "GET", "/projects", lambda i: {"headers": auth}),
+        Endpoint("list_tag", "GET", "/projects", lambda i: {"headers": auth, "params": {"tag": "api"}}),
+        Endpoint("list_msgpack", "GET", "/projects", lambda i: {"headers": {**auth, "Accept": MSGPACK_MEDIA_TYPE}}),
+        Endpoint("list_304", "GET", "/projects", lambda i: {"headers": {**auth, "If-None-Match": list_etag}}, expected_status=304),
+        Endpoint("get", "GET", f"/projects/{project_id}", lambda i: {"headers": auth}),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=1000, help="projetos no conjunto sintético")
+    parser.add_argument("--requests", type=int, default=500, help="requisições medidas por endpoint")
+    parser.add_argument("--concurrency", type=int, default=10, help="clientes simultâneos")
+    parser.add_argument("--fast-json", action="store_true", help="liga FAST_JSON_ENABLED")
+    parser.add_argument("--only", nargs="*", help="mede só os endpoints com estes nomes")
+    parser.add_argument("--no-save", action="store_true", help="não grava os resultados")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="variação considerada regressão")
+    parser.add_argument("--fail-on-regression", action="store_true", help="sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    app = load_app(args.fast_json)
+    from app.domain.use_cases.project_service import ProjectService
+    from app.routes import routes
+
+    documents = generate_projects(args.projects)
+    repository = InMemoryProjectRepository(documents)
+    app.dependency_overrides[routes.get_service] = lambda: ProjectService(repository)
+    # Tira o conjunto sintético das coletas do gc, como ficaria com os dados no MongoDB
+    gc.freeze()
+
+    selected = [endpoint for endpoint in endpoints(documents) if not args.only or endpoint.name in args.only]
+    print(format_header())
+    results = asyncio.run(run(app, selected, args.requests, args.concurrency))
+
+    config = {"projects": args.projects, "requests": args.requests, "concurrency": args.concurrency, "fast_json": args.fast_json}
+    found = report("projects", config, results, save=not args.no_save, threshold=args.threshold)
+    if found and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
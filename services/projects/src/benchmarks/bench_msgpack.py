@@ -0,0 +1,76 @@
+"""Benchmark de JSON contra MessagePack na listagem de projetos.
+
+Mede o tamanho do corpo, o tempo de codificação no serviço e o de
+decodificação no consumidor de uma listagem, com os modelos e com o caminho
+rápido (FAST_JSON_ENABLED):
+
+    cd services/projects/src && python -m benchmarks.bench_msgpack [--docs 1000] [--rounds 20]
+"""
+import argparse
+import asyncio
+import json
+import timeit
+
+import msgpack
+from app.domain.project import Project
+from app.infrastructure.repositories.project_mongo_repository import _raw_project
+from app.routes.fast_json import fast_json_response
+from app.routes.msgpack_negotiation import msgpack_response
+from benchmarks.bench_serialization import _response_field, make_documents
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+
+def _timed(function, rounds: int) -> float:
+    """Milissegundos por chamada, no melhor de cinco medições."""
+    return min(timeit.repeat(function, number=rounds, repeat=5)) / rounds * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1000, help="documentos por listagem")
+    parser.add_argument("--rounds", type=int, default=20, help="listagens codificadas por medição")
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    field = _response_field()
+    loop = asyncio.new_event_loop()
+
+    def models() -> list[Project]:
+        return [Project(**{**doc, "id": str(doc["_id"])}) for doc in documents]
+
+    def json_models() -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=models()))
+        return JSONResponse(content).body
+
+    def json_raw() -> bytes:
+        return fast_json_response([_raw_project(doc) for doc in documents]).body
+
+    def msgpack_models() -> bytes:
+        return msgpack_response(models()).body
+
+    def msgpack_raw() -> bytes:
+        return msgpack_response([_raw_project(doc) for doc in documents]).body
+
+    encoders = (
+        ("json", json_models, json.loads),
+        ("json (FAST_JSON)", json_raw, json.loads),
+        ("msgpack", msgpack_models, msgpack.unpackb),
+        ("msgpack (FAST_JSON)", msgpack_raw, msgpack.unpackb),
+    )
+    # Todos os formatos precisam decodificar para o mesmo conteúdo
+    expected = json.loads(json_models())
+    assert all(decode(encode()) == expected for _, encode, decode in encoders)
+
+    json_size = len(json_models())
+    print(f"{args.docs} documentos por listagem")
+    print(f"{'formato':>20} {'bytes':>9} {'tamanho':>8} {'codificar':>11} {'decodificar':>12}")
+    for name, encode, decode in encoders:
+        body = encode()
+        encode_ms = _timed(encode, args.rounds)
+        decode_ms = _timed(lambda: decode(body), args.rounds)
+        print(f"{name:>20} {len(body):>9} {len(body) / json_size:>7.0%} {encode_ms:>8.2f} ms {decode_ms:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Micro-benchmark da serialização da listagem de projetos.
+
+Compara, por documento, o caminho padrão (Project(**doc), validação do
+response_model e json da stdlib) com o caminho rápido (FAST_JSON_ENABLED):
+
+    cd services/projects/src && python -m benchmarks.bench_serialization [--docs 200] [--rounds 200]
+"""
+import argparse
+import asyncio
+import json
+import timeit
+
+from app.domain.project import Project
+from app.infrastructure.repositories.project_mongo_repository import _raw_project
+from app.routes.fast_json import fast_json_response
+from app.routes.routes import router
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+
+def make_documents(count: int) -> list[dict]:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Projeto {index}",
+            "description": "Descrição de exemplo com acentuação e um texto de tamanho médio. " * 2,
+            "stack": ["Python", "FastAPI", "MongoDB"],
+            "repo_url": f"https://github.com/exemplo/projeto-{index}",
+            "tags": ["api", "backend"],
+            "visible": True,
+        }
+        for index in range(count)
+    ]
+
+
+def _response_field():
+    route = next(route for route in router.routes if route.path == "/projects" and "GET" in route.methods)
+    return route.secure_cloned_response_field
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200, help="documentos por listagem")
+    parser.add_argument("--rounds", type=int, default=200, help="listagens serializadas por medição")
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    field = _response_field()
+    loop = asyncio.new_event_loop()
+
+    def current() -> bytes:
+        projects = [Project(**{**doc, "id": str(doc["_id"])}) for doc in documents]
+        content = loop.run_until_complete(serialize_response(field=field, response_content=projects))
+        return JSONResponse(content).body
+
+    def fast() -> bytes:
+        return fast_json_response([_raw_project(doc) for doc in documents]).body
+
+    # Os dois caminhos precisam produzir o mesmo JSON; só a formatação dos bytes muda
+    assert json.loads(current()) == json.loads(fast())
+    results = {}
+    for name, function in (("atual", current), ("rápido", fast)):
+        seconds = min(timeit.repeat(function, number=args.rounds, repeat=5))
+        results[name] = seconds / (args.rounds * args.docs) * 1e6
+        print(f"{name:>7}: {results[name]:6.2f} µs/documento")
+    print(f"ganho: {results['atual'] / results['rápido']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
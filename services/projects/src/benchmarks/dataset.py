@@ -0,0 +1,27 @@
+"""Gerador de projetos sintéticos no formato dos documentos do MongoDB.
+
+Determinístico pela seed, para que execuções em commits diferentes meçam o
+mesmo conjunto de dados.
+"""
+import random
+
+from bson import ObjectId
+
+STACKS = ("Python", "FastAPI", "MongoDB", "Go", "Node.js", "React", "Docker", "RabbitMQ", "Redis", "PostgreSQL")
+TAGS = ("api", "backend", "frontend", "cli", "infra", "dados", "estudo", "jogo", "mobile", "web")
+
+
+def generate_projects(count: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "_id": ObjectId(f"{index:024x}"),
+            "name": f"Projeto {index}",
+            "description": "Descrição de exemplo com acentuação e um texto de tamanho médio. " * rng.randint(1, 4),
+            "stack": rng.sample(STACKS, k=rng.randint(1, 4)),
+            "repo_url": f"https://github.com/exemplo/projeto-{index}",
+            "tags": rng.sample(TAGS, k=rng.randint(1, 3)),
+            "visible": rng.random() < 0.9,
+        }
+        for index in range(count)
+    ]
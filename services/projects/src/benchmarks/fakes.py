@@ -0,0 +1,72 @@
+"""Repositório em memória para medir o caminho da requisição sem o MongoDB.
+
+Guarda os projetos no formato dos documentos do banco e faz as mesmas
+conversões do ProjectMongoRepository, devolvendo cópias a cada leitura como
+o motor devolve documentos novos a cada consulta.
+"""
+from typing import AsyncIterator, Optional
+
+from app.domain.project import Project, ProjectRepository
+from app.infrastructure.repositories.project_mongo_repository import _raw_project
+from bson import ObjectId
+
+
+def _matches(doc: dict, tag: Optional[str], stack: Optional[str]) -> bool:
+    return (not tag or tag in doc["tags"]) and (not stack or stack in doc["stack"])
+
+
+def _project(doc: dict) -> Project:
+    return Project(**{**doc, "id": str(doc["_id"])})
+
+
+class InMemoryProjectRepository(ProjectRepository):
+    """ProjectRepository sobre um dict na ordem de inserção, a ordem natural de uma coleção sem índice de ordenação."""
+
+    def __init__(self, documents: list[dict] = ()):
+        self._docs: dict[ObjectId, dict] = {doc["_id"]: dict(doc) for doc in documents}
+        self._version = 0
+
+    def _find(self, tag: Optional[str], stack: Optional[str]) -> list[dict]:
+        return [dict(doc) for doc in self._docs.values() if _matches(doc, tag, stack)]
+
+    async def get_version(self) -> int:
+        return self._version
+
+    async def list_all(self, tag: Optional[str] = None, stack: Optional[str] = None) -> list[Project]:
+        return [_project(doc) for doc in self._find(tag, stack)]
+
+    async def list_all_raw(self, tag: Optional[str] = None, stack: Optional[str] = None) -> list[dict]:
+        return [_raw_project(doc) for doc in self._find(tag, stack)]
+
+    async def stream_all(self, tag: Optional[str] = None, stack: Optional[str] = None) -> AsyncIterator[Project]:
+        for doc in self._find(tag, stack):
+            yield _project(doc)
+
+    async def get_by_id(self, project_id: str) -> Optional[Project]:
+        doc = self._docs.get(ObjectId(project_id))
+        return _project(dict(doc)) if doc else None
+
+    async def create(self, project: Project) -> Project:
+        data = project.model_dump()
+        del data["id"]
+        data["_id"] = ObjectId()
+        self._docs[data["_id"]] = data
+        self._version += 1
+        project.id = str(data["_id"])
+        return project
+
+    async def update(self, project_id: str, project: Project) -> Optional[Project]:
+        object_id = ObjectId(project_id)
+        if object_id not in self._docs:
+            return None
+        data = project.model_dump()
+        del data["id"]
+        self._docs[object_id].update(data)
+        self._version += 1
+        return await self.get_by_id(project_id)
+
+    async def delete(self, project_id: str) -> bool:
+        if self._docs.pop(ObjectId(project_id), None) is None:
+            return False
+        self._version += 1
+        return True
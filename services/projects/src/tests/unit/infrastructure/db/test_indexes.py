@@ -0,0 +1,74 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from app.infrastructure.db.indexes import INDEXES, plan_indexes, reconcile_indexes
+
+
+def test_plan_creates_multikey_indexes():
+    plan = plan_indexes("projects", {"_id_": {"key": [("_id", 1)]}}, INDEXES["projects"])
+
+    assert [spec.name for spec in plan.to_create] == ["tags", "stack"]
+    assert plan.to_drop == []
+
+
+def test_plan_drops_obsolete_index():
+    existing = {
+        "_id_": {"key": [("_id", 1)]},
+        "tags": {"key": [("tags", 1)]},
+        "stack": {"key": [("stack", 1.0)]},
+        "name_1": {"key": [("name", 1)]},
+    }
+
+    plan = plan_indexes("projects", existing, INDEXES["projects"])
+
+    assert plan.to_drop == ["name_1"]
+    assert plan.to_create == []
+    assert [spec.name for spec in plan.unchanged] == ["tags", "stack"]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_indexes():
+    collection = MagicMock()
+    collection.index_information = AsyncMock(return_value={"_id_": {"key": [("_id", 1)]}, "name_1": {"key": [("name", 1)]}})
+    collection.create_index = AsyncMock()
+    collection.drop_index = AsyncMock()
+    database = MagicMock()
+    database.__getitem__.return_value = collection
+
+    await reconcile_indexes(database)
+
+    collection.drop_index.assert_awaited_once_with("name_1")
+    collection.create_index.assert_any_await([("tags", 1)], name="tags")
+    collection.create_index.assert_any_await([("stack", 1)], name="stack")
+
+
+@pytest.mark.asyncio
+async def test_reconcile_indexes_dry_run():
+    collection = MagicMock()
+    collection.index_information = AsyncMock(return_value={"name_1": {"key": [("name", 1)]}})
+    collection.create_index = AsyncMock()
+    collection.drop_index = AsyncMock()
+    database = MagicMock()
+    database.__getitem__.return_value = collection
+
+    plans = await reconcile_indexes(database, dry_run=True)
+
+    assert plans[0].to_drop == ["name_1"]
+    collection.drop_index.assert_not_awaited()
+    collection.create_index.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_indexes_create_only():
+    collection = MagicMock()
+    collection.index_information = AsyncMock(return_value={"name_1": {"key": [("name", 1)]}, "tags": {"key": [("tags", -1)]}})
+    collection.create_index = AsyncMock()
+    collection.drop_index = AsyncMock()
+    database = MagicMock()
+    database.__getitem__.return_value = collection
+
+    plans = await reconcile_indexes(database, create_only=True)
+
+    assert plans[0].outdated == ["tags"]
+    collection.drop_index.assert_not_awaited()
+    collection.create_index.assert_awaited_once_with([("stack", 1)], name="stack")
@@ -2,6 +2,8 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from app.infrastructure.db.mongo import get_mongo_client, get_mongo_collection, reset_client
+from app.infrastructure.metrics import mongo_event_listeners
+from app.infrastructure.slow_queries import slow_query_listeners
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 
 
@@ -19,7 +21,7 @@ async def test_get_mongo_client_singleton(mocker):
     client1 = get_mongo_client()
     client2 = get_mongo_client()
 
-    mock_client_init.assert_called_once_with("mongodb://test:27017")
+    mock_client_init.assert_called_once_with("mongodb://test:27017", event_listeners=mongo_event_listeners() + slow_query_listeners())
     assert client1 is client2
     assert client1 is mock_client_instance
 
@@ -2,7 +2,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from app.domain.project import Project
-from app.infrastructure.repositories.project_mongo_repository import ProjectMongoRepository
+from app.infrastructure.repositories.project_mongo_repository import STREAM_BATCH_SIZE, ProjectMongoRepository
+from app.routes.fast_json import dumps
 from bson import ObjectId
 
 
@@ -14,10 +15,16 @@ class TestProjectMongoRepository:
         return AsyncMock()
 
     @pytest.fixture
-    def repository(self, mock_collection):
+    def mock_versions(self):
+        """Mock do contador de versões usado nos ETags"""
+        return AsyncMock()
+
+    @pytest.fixture
+    def repository(self, mock_collection, mock_versions):
         """Instância do repositório com collection mock"""
         repo = ProjectMongoRepository()
         repo.collection = mock_collection
+        repo.versions = mock_versions
         return repo
 
     @pytest.fixture
@@ -64,6 +71,21 @@ class TestProjectMongoRepository:
         mock_collection.find.assert_called_once_with({})
         mock_cursor.to_list.assert_called_once_with(length=None)
 
+    @pytest.mark.asyncio
+    async def test_list_all_filtered_by_tag_and_stack(self, repository, mock_collection, sample_project_data):
+        """Testa listagem filtrada pelos campos multikey"""
+        # Arrange
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=[sample_project_data])
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+
+        # Act
+        result = await repository.list_all(tag="api", stack="Python")
+
+        # Assert
+        assert len(result) == 1
+        mock_collection.find.assert_called_once_with({"tags": "api", "stack": "Python"})
+
     @pytest.mark.asyncio
     async def test_list_all_empty(self, repository, mock_collection):
         """Testa listagem quando não há projetos"""
@@ -79,6 +101,41 @@ class TestProjectMongoRepository:
         assert result == []
         mock_collection.find.assert_called_once_with({})
 
+    @pytest.mark.asyncio
+    async def test_list_all_raw_matches_model_json(self, repository, mock_collection, sample_project_data):
+        """Testa que o caminho rápido gera o mesmo JSON que o modelo Project"""
+        # Arrange
+        mock_cursor = AsyncMock()
+        mock_cursor.to_list = AsyncMock(return_value=[{**sample_project_data, "legacy_field": 1}])
+        mock_collection.find = MagicMock(return_value=mock_cursor)
+
+        # Act
+        result = await repository.list_all_raw(stack="Python")
+
+        # Assert
+        expected = Project(**{**sample_project_data, "id": str(sample_project_data["_id"])})
+        assert dumps(result[0]) == expected.model_dump_json().encode()
+        mock_collection.find.assert_called_once_with({"stack": "Python"})
+
+    @pytest.mark.asyncio
+    async def test_stream_all_reads_in_batches_and_closes_cursor(self, repository, mock_collection, sample_project_data):
+        """Testa que o streaming percorre o cursor em lotes e o fecha ao final"""
+        # Arrange
+        mock_cursor = MagicMock()
+        mock_cursor.__aiter__.return_value = [sample_project_data, sample_project_data]
+        mock_cursor.close = AsyncMock()
+        mock_collection.find = MagicMock()
+        mock_collection.find.return_value.batch_size.return_value = mock_cursor
+
+        # Act
+        result = [project async for project in repository.stream_all(tag="api")]
+
+        # Assert
+        assert [project.id for project in result] == ["507f1f77bcf86cd799439011"] * 2
+        mock_collection.find.assert_called_once_with({"tags": "api"})
+        mock_collection.find.return_value.batch_size.assert_called_once_with(STREAM_BATCH_SIZE)
+        mock_cursor.close.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_get_by_id_success(self, repository, mock_collection, sample_project_data):
         """Testa busca por ID com sucesso"""
@@ -183,7 +240,7 @@ class TestProjectMongoRepository:
         mock_collection.update_one.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_delete_success(self, repository, mock_collection):
+    async def test_delete_success(self, repository, mock_collection, mock_versions):
         """Testa exclusão de projeto com sucesso"""
         # Arrange
         project_id = "507f1f77bcf86cd799439011"
@@ -197,9 +254,10 @@ class TestProjectMongoRepository:
         # Assert
         assert result is True
         mock_collection.delete_one.assert_called_once_with({"_id": ObjectId(project_id)})
+        mock_versions.bump.assert_awaited_once_with("projects")
 
     @pytest.mark.asyncio
-    async def test_delete_not_found(self, repository, mock_collection):
+    async def test_delete_not_found(self, repository, mock_collection, mock_versions):
         """Testa exclusão quando projeto não existe"""
         # Arrange
         project_id = "507f1f77bcf86cd799439011"
@@ -213,9 +271,10 @@ class TestProjectMongoRepository:
         # Assert
         assert result is False
         mock_collection.delete_one.assert_called_once_with({"_id": ObjectId(project_id)})
+        mock_versions.bump.assert_not_awaited()
 
     @pytest.mark.asyncio
-    async def test_delete_exception(self, repository, mock_collection):
+    async def test_delete_exception(self, repository, mock_collection, mock_versions):
         """Testa exclusão com exceção"""
         # Arrange
         project_id = "507f1f77bcf86cd799439011"
@@ -227,3 +286,4 @@ class TestProjectMongoRepository:
         # Assert
         assert result is False
         mock_collection.delete_one.assert_called_once_with({"_id": ObjectId(project_id)})
+        mock_versions.bump.assert_not_awaited()
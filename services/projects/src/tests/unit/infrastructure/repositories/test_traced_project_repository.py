@@ -0,0 +1,71 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from app.domain.project import Project, ProjectRepository
+from app.infrastructure import tracing
+from app.infrastructure.repositories.traced_project_repository import TracedProjectRepository
+from app.infrastructure.tracing import JsonLinesSpanExporter
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+
+@pytest.fixture
+def spans():
+    # Liga o tracer do app a um provider só deste teste, sem mexer no provider global do processo
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    with patch.object(tracing.tracer, "_real_tracer", provider.get_tracer("app")):
+        yield exporter
+
+
+def make_project(project_id: str = "p1") -> Project:
+    return Project(id=project_id, name="Projeto", description="d", stack=["python"], repo_url="https://example.com",
+                   tags=["web"], visible=True)
+
+
+@pytest.mark.asyncio
+async def test_span_per_repository_call(spans):
+    project = make_project()
+    inner = MagicMock(spec=ProjectRepository)
+    inner.get_by_id = AsyncMock(return_value=project)
+
+    with tracing.tracer.start_as_current_span("request"):
+        assert await TracedProjectRepository(inner).get_by_id("p1") is project
+
+    repository_span, request_span = spans.get_finished_spans()
+    assert repository_span.name == "ProjectRepository.get_by_id"
+    assert repository_span.attributes["db.system"] == "mongodb"
+    assert repository_span.parent.span_id == request_span.context.span_id
+
+
+@pytest.mark.asyncio
+async def test_stream_span_covers_iteration(spans):
+    async def stream():
+        yield make_project("p1")
+        yield make_project("p2")
+
+    inner = MagicMock(spec=ProjectRepository)
+    inner.stream_all.return_value = stream()
+
+    projects = [project.id async for project in TracedProjectRepository(inner).stream_all(tag="web")]
+
+    assert projects == ["p1", "p2"]
+    inner.stream_all.assert_called_once_with("web", None)
+    span = spans.get_finished_spans()[0]
+    assert span.name == "ProjectRepository.stream_all"
+    assert span.attributes["projects.count"] == 2
+
+
+def test_json_lines_exporter(tmp_path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(JsonLinesSpanExporter(str(path))))
+
+    with provider.get_tracer("test").start_as_current_span("GET /projects"):
+        pass
+    provider.shutdown()
+
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["GET /projects"]
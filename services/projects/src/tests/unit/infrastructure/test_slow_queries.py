@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+import pytest
+from app.infrastructure.slow_queries import SlowQueryListener, SlowQueryLog, command_shape, explain_command, plan_summary
+
+LIST_BY_TAG = {"find": "projects", "filter": {"tags": "web", "stack": "python"}, "lsid": {"id": "session"}, "$db": "projects"}
+
+COLLSCAN_EXPLAIN = {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+
+def command_event(command_name: str, command: dict, request_id: int = 1, duration_micros: int = 2500):
+    return MagicMock(command_name=command_name, command=command, request_id=request_id, connection_id=("localhost", 27017),
+                     database_name="projects", duration_micros=duration_micros)
+
+
+def run_command(listener: SlowQueryListener, command: dict, duration_ms: float, request_id: int):
+    listener.started(command_event("find", command, request_id))
+    listener.succeeded(command_event("find", {}, request_id, duration_micros=int(duration_ms * 1000)))
+
+
+def test_command_shape_replaces_values():
+    assert command_shape("find", LIST_BY_TAG) == {"command": "find", "collection": "projects",
+                                                  "filter": {"tags": "?", "stack": "?"}}
+
+
+def test_slow_find_grouped_by_shape_and_explained_once():
+    explainer = MagicMock(return_value=COLLSCAN_EXPLAIN)
+    log = SlowQueryLog(threshold_ms=100, max_shapes=10, explainer=explainer)
+    listener = SlowQueryListener(log)
+
+    run_command(listener, LIST_BY_TAG, duration_ms=150, request_id=1)
+    run_command(listener, {**LIST_BY_TAG, "filter": {"tags": "api", "stack": "go"}}, duration_ms=50, request_id=2)
+    run_command(listener, {**LIST_BY_TAG, "filter": {"tags": "cli", "stack": "rust"}}, duration_ms=200, request_id=3)
+    log.wait_for_explains()
+
+    [shape] = log.summary()["shapes"]
+    assert shape["count"] == 2
+    assert shape["total_ms"] == pytest.approx(350)
+    assert shape["plan"] == "COLLSCAN"
+    explainer.assert_called_once_with("projects", explain_command("find", LIST_BY_TAG))
+    log.close()
+
+
+def test_failed_explain_is_kept_as_error():
+    log = SlowQueryLog(threshold_ms=0, max_shapes=10, explainer=MagicMock(side_effect=RuntimeError("not authorized")))
+
+    log.record("projects", "find", LIST_BY_TAG, 10)
+    log.wait_for_explains()
+
+    [shape] = log.summary(with_explain=True)["shapes"]
+    assert shape["explain"] == {"error": "not authorized"}
+    assert plan_summary(shape["explain"]) is None
+    log.close()
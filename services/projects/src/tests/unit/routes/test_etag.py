@@ -0,0 +1,27 @@
+from starlette.requests import Request
+
+from app.routes.etag import etag_matches, make_etag
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_make_etag_is_strong_and_stable():
+    etag = make_etag("comments:public", 3, 50, None)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("comments:public", 3, 50, None)
+    assert etag != make_etag("comments:public", 4, 50, None)
+    assert etag != make_etag("comments:public", 3, 20, None)
+
+
+def test_etag_matches():
+    etag = make_etag("scope", 1)
+
+    assert etag_matches(make_request(etag), etag)
+    assert etag_matches(make_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(make_request("*"), etag)
+    assert not etag_matches(make_request('"other"'), etag)
+    assert not etag_matches(make_request(), etag)
@@ -0,0 +1,31 @@
+import msgpack
+import pytest
+from app.domain.project import Project
+from app.infrastructure.repositories.project_mongo_repository import _raw_project
+from app.routes.msgpack_negotiation import accepts_msgpack, packb
+from bson import ObjectId
+from starlette.requests import Request
+
+
+def make_request(accept=None) -> Request:
+    headers = [(b"accept", accept.encode())] if accept else []
+    return Request({"type": "http", "method": "GET", "path": "/projects", "headers": headers})
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, False),
+    ("*/*", False),
+    ("application/msgpack", True),
+    ("application/msgpack;q=0.5, application/json", False),
+    ("application/json;q=0.5, application/x-msgpack", True),
+])
+def test_accepts_msgpack(accept, expected):
+    assert accepts_msgpack(make_request(accept)) is expected
+
+
+def test_raw_and_model_paths_encode_the_same_content():
+    doc = {"_id": ObjectId(), "name": "Projeto", "description": "Descrição", "stack": ["Python"],
+           "repo_url": "https://example.com", "tags": ["api"], "visible": True}
+    project = Project(**{**doc, "id": str(doc["_id"])})
+
+    assert msgpack.unpackb(packb([_raw_project(doc)])) == msgpack.unpackb(packb([project])) == [project.model_dump()]
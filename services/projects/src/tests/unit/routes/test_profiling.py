@@ -0,0 +1,80 @@
+import pstats
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes.profiling import PROFILE_FILE_HEADER, ProfilingMiddleware, router
+
+ADMIN = {"id": "admin123", "name": "Admin"}
+USER = {"id": "user123", "name": "Test User"}
+HEADERS = {"Authorization": "Bearer token"}
+
+
+def render_projects():
+    return sum(i * i for i in range(1000))
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILING_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET", "test_secret")
+    monkeypatch.setenv("AUTHORIZED_USER_ID", ADMIN["id"])
+    return tmp_path
+
+
+@pytest.fixture
+def client(profiles):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(router)
+
+    @app.get("/projects")
+    async def list_projects():
+        return {"total": render_projects()}
+
+    return TestClient(app)
+
+
+def test_admin_header_profiles_request(client, profiles):
+    with patch("jose.jwt.decode", return_value=ADMIN):
+        response = client.get("/projects", headers={**HEADERS, "X-Profile": "1"})
+
+    name = response.headers[PROFILE_FILE_HEADER]
+    assert name.endswith("-GET_projects.prof")
+    functions = {function for _, _, function in pstats.Stats(str(profiles / name)).stats}
+    assert "render_projects" in functions
+
+
+def test_profile_header_ignored_for_other_users(client, profiles):
+    with patch("jose.jwt.decode", return_value=USER):
+        response = client.get("/projects", headers={**HEADERS, "X-Profile": "1"})
+        forbidden = client.get("/admin/profiling/files", headers=HEADERS)
+
+    assert PROFILE_FILE_HEADER not in response.headers
+    assert list(profiles.iterdir()) == []
+    assert forbidden.status_code == 403
+
+
+def test_sample_and_tracemalloc(client):
+    with patch("jose.jwt.decode", return_value=ADMIN):
+        sampled = client.post("/admin/profiling/sample?seconds=0.05&interval_ms=5", headers=HEADERS).json()
+        client.post("/admin/profiling/tracemalloc/start?frames=5", headers=HEADERS)
+        client.post("/admin/profiling/tracemalloc/snapshot", headers=HEADERS)
+        snapshot = client.post("/admin/profiling/tracemalloc/snapshot", headers=HEADERS).json()
+        client.post("/admin/profiling/tracemalloc/stop", headers=HEADERS)
+        files = {entry["name"] for entry in client.get("/admin/profiling/files", headers=HEADERS).json()}
+
+    assert sampled["file"].endswith(".collapsed")
+    assert {sampled["file"], snapshot["snapshot"], snapshot["collapsed"], snapshot["diff"]} <= files
+
+
+def test_request_profiles_capped(client, profiles, monkeypatch):
+    monkeypatch.setenv("PROFILING_REQUEST_SAMPLE_RATE", "1")
+    monkeypatch.setenv("PROFILING_MAX_FILES", "2")
+
+    for _ in range(4):
+        client.get("/projects")
+
+    assert len(list(profiles.iterdir())) == 2
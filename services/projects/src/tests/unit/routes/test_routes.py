@@ -1,4 +1,5 @@
 import os
+import msgpack
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
@@ -45,6 +46,13 @@ def test_list_projects(mock_project_service):
     assert len(response.json()) == 1
     assert response.json()[0]["name"] == "Test Project"
 
+def test_list_projects_filtered(mock_project_service):
+    client = TestClient(app)
+    mock_project_service.list_projects.return_value = []
+    response = client.get("/projects", params={"tag": "api", "stack": "Python"})
+    assert response.status_code == 200
+    mock_project_service.list_projects.assert_called_once_with(tag="api", stack="Python")
+
 def test_get_project(mock_project_service):
     client = TestClient(app)
     project_data = {"name": "Test Project", "description": "A test project", "stack": ["Python"], "repo_url": "http://test.com", "tags": ["test"], "visible": True, "id": "1"}
@@ -53,8 +61,78 @@ def test_get_project(mock_project_service):
     assert response.status_code == 200
     assert response.json()["name"] == "Test Project"
 
+def test_list_projects_not_modified(mock_project_service):
+    client = TestClient(app)
+    mock_project_service.get_projects_version.return_value = 2
+    mock_project_service.list_projects.return_value = []
+    etag = client.get("/projects").headers["ETag"]
+    response = client.get("/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    mock_project_service.list_projects.assert_called_once()
+
+def test_list_projects_fast_json(mock_project_service, monkeypatch):
+    monkeypatch.setenv("FAST_JSON_ENABLED", "true")
+    client = TestClient(app)
+    mock_project_service.get_projects_version.return_value = 1
+    mock_project_service.list_projects_raw.return_value = [{"id": "1", "name": "Test Project"}]
+    response = client.get("/projects", params={"tag": "api"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": "1", "name": "Test Project"}]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert "ETag" in response.headers
+    mock_project_service.list_projects_raw.assert_called_once_with(tag="api", stack=None)
+    mock_project_service.list_projects.assert_not_called()
+
+def test_list_projects_streaming(mock_project_service):
+    client = TestClient(app)
+    project_data = {"name": "Test Project", "description": "A test project", "stack": ["Python"], "repo_url": "http://test.com", "tags": ["test"], "visible": True}
+    async def projects(tag=None, stack=None):
+        for index in range(3):
+            yield Project(**project_data, id=str(index))
+    mock_project_service.stream_projects = projects
+    mock_project_service.get_projects_version.return_value = 1
+    response = client.get("/projects", params={"stream": True})
+    assert response.status_code == 200
+    assert [project["id"] for project in response.json()] == ["0", "1", "2"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert response.headers["ETag"] != client.get("/projects").headers["ETag"]
+    mock_project_service.list_projects.assert_called_once()
+
+def test_get_project_etag_varies_by_id(mock_project_service):
+    client = TestClient(app)
+    project_data = {"name": "Test Project", "description": "A test project", "stack": ["Python"], "repo_url": "http://test.com", "tags": ["test"], "visible": True, "id": "1"}
+    mock_project_service.get_projects_version.return_value = 2
+    mock_project_service.get_project.return_value = Project(**project_data)
+    etag = client.get("/projects/1").headers["ETag"]
+    response = client.get("/projects/2", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
 def test_get_project_not_found(mock_project_service):
     client = TestClient(app)
     mock_project_service.get_project.return_value = None
     response = client.get("/projects/1")
     assert response.status_code == 404
+
+def test_list_projects_msgpack(mock_project_service):
+    client = TestClient(app)
+    project_data = {"name": "Test Project", "description": "A test project", "stack": ["Python"], "repo_url": "http://test.com", "tags": ["test"], "visible": True, "id": "1"}
+    mock_project_service.get_projects_version.return_value = 1
+    mock_project_service.list_projects.return_value = [Project(**project_data)]
+    json_response = client.get("/projects")
+    response = client.get("/projects", headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["Vary"] == "Accept"
+    assert msgpack.unpackb(response.content) == json_response.json()
+    assert response.headers["ETag"] != json_response.headers["ETag"]
+
+def test_get_project_msgpack(mock_project_service):
+    client = TestClient(app)
+    project_data = {"name": "Test Project", "description": "A test project", "stack": ["Python"], "repo_url": "http://test.com", "tags": ["test"], "visible": True, "id": "1"}
+    mock_project_service.get_projects_version.return_value = 1
+    mock_project_service.get_project.return_value = Project(**project_data)
+    response = client.get("/projects/1", headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content) == project_data
@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.infrastructure.slow_queries import get_slow_query_log
+from app.routes.slow_queries import router
+
+HEADERS = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test_secret")
+    monkeypatch.setenv("AUTHORIZED_USER_ID", "admin123")
+    app = FastAPI()
+    app.include_router(router)
+    get_slow_query_log().reset()
+    yield TestClient(app)
+    get_slow_query_log().reset()
+
+
+def test_slow_query_summary(client):
+    log = get_slow_query_log()
+    with patch.object(log, "explainer", None):
+        log.record("projects", "find", {"find": "projects", "filter": {"tags": "web"}}, 300)
+        log.record("projects", "find", {"find": "projects", "filter": {"stack": "go"}}, 400)
+        log.record("projects", "find", {"find": "projects", "filter": {"tags": "api"}}, 200)
+
+    with patch("jose.jwt.decode", return_value={"id": "admin123", "name": "Admin"}):
+        summary = client.get("/admin/slow-queries", headers=HEADERS).json()
+    with patch("jose.jwt.decode", return_value={"id": "user123", "name": "Test User"}):
+        forbidden = client.get("/admin/slow-queries", headers=HEADERS)
+
+    assert [(shape["shape"]["filter"], shape["total_ms"]) for shape in summary["shapes"]] == [
+        ({"tags": "?"}, 500), ({"stack": "?"}, 400),
+    ]
+    assert forbidden.status_code == 403
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+from app.domain.project import Project
+from app.routes.streaming import astream_json_array, json_streaming_response, stream_json_array
+
+
+def make_projects(count: int) -> list[Project]:
+    return [Project(id=str(i), name=f"p{i}", description="d", stack=[], repo_url="r", tags=[], visible=True)
+            for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3, 7])
+def test_stream_json_array_is_valid_json(count):
+    chunks = list(stream_json_array(iter(make_projects(count)), chunk_items=3))
+
+    decoded = json.loads(b"".join(chunks))
+    assert [item["id"] for item in decoded] == [str(i) for i in range(count)]
+    # Abre, fecha e um pedaço por lote de 3 itens
+    assert len(chunks) == 2 + -(-count // 3)
+
+
+@pytest.mark.asyncio
+async def test_astream_json_array():
+    async def projects():
+        for project in make_projects(4):
+            yield project
+
+    chunks = [chunk async for chunk in astream_json_array(projects(), chunk_items=2)]
+
+    assert [item["name"] for item in json.loads(b"".join(chunks))] == ["p0", "p1", "p2", "p3"]
+
+
+def test_json_streaming_response_sets_etag():
+    response = json_streaming_response(iter([]), etag='"abc"', private=True)
+
+    assert response.media_type == "application/json"
+    assert response.headers["ETag"] == '"abc"'
+    assert response.headers["Cache-Control"] == "private, no-cache"
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+from app.infrastructure import tracing
+from app.routes.auth import get_current_user
+from app.routes.tracing import TracingMiddleware
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def spans():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    with patch.object(tracing.tracer, "_real_tracer", provider.get_tracer("app")):
+        yield exporter
+
+
+def test_request_span_continues_incoming_trace(spans, monkeypatch):
+    monkeypatch.setenv("JWT_SECRET", "test_secret")
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/projects/{project_id}")
+    def get_project(project_id: str, user: dict = Depends(get_current_user)):
+        return {"id": project_id}
+
+    with patch("jose.jwt.decode", return_value={"id": "123", "name": "test_user"}):
+        response = TestClient(app).get("/projects/abc", headers={"Authorization": "Bearer token",
+                                                                  "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    assert response.status_code == 200
+    auth_span, request_span = spans.get_finished_spans()
+    assert request_span.name == "GET /projects/{project_id}"
+    assert request_span.kind == SpanKind.SERVER
+    assert format(request_span.context.trace_id, "032x") == TRACE_ID
+    assert format(request_span.parent.span_id, "016x") == PARENT_ID
+    assert auth_span.name == "get_current_user"
+    assert auth_span.parent.span_id == request_span.context.span_id